@@ -1,5 +1,5 @@
 from copy import deepcopy
-from typing import List
+from typing import List, Tuple
 
 from common.entities.base_entities.base_entity import JsonableBaseEntity
 from common.entities.base_entities.entity_id import EntityID
@@ -7,7 +7,7 @@ from common.entities.base_entities.package import PackageType
 from common.entities.base_entities.package_delivery_plan import PackageDeliveryPlan
 from common.entities.base_entities.package_holder import PackageHolder
 from geometry.geo2d import Point2D, Polygon2D
-from geometry.geo_factory import calc_centroid, calc_convex_hull_polygon
+from geometry.geo_factory import calc_centroid_xy, calc_convex_hull_polygon, create_point_2d
 from geometry.utils import Localizable
 
 
@@ -16,6 +16,9 @@ class CustomerDelivery(JsonableBaseEntity, Localizable, PackageHolder):
     def __init__(self, package_delivery_plans: List[PackageDeliveryPlan], customer_delivery_id: EntityID):
         self._id = customer_delivery_id
         self._package_delivery_plans = package_delivery_plans
+        self._hash = None
+        self._location_xy = None
+        self._location = None
 
     @property
     def id(self) -> EntityID:
@@ -26,7 +29,14 @@ class CustomerDelivery(JsonableBaseEntity, Localizable, PackageHolder):
         return self._package_delivery_plans
 
     def calc_location(self) -> Point2D:
-        return calc_centroid(tuple(pdp.drop_point for pdp in self._package_delivery_plans))
+        if self._location is None:
+            self._location = create_point_2d(*self.calc_location_xy())
+        return self._location
+
+    def calc_location_xy(self) -> Tuple[float, float]:
+        if self._location_xy is None:
+            self._location_xy = calc_centroid_xy(tuple(pdp.drop_point.xy() for pdp in self._package_delivery_plans))
+        return self._location_xy
 
     def calc_bounds(self) -> Polygon2D:
         return calc_convex_hull_polygon([pdp.drop_point for pdp in self._package_delivery_plans])
@@ -36,10 +46,14 @@ class CustomerDelivery(JsonableBaseEntity, Localizable, PackageHolder):
         return len(list(filter(lambda x: x.package_type == package_type, package_delivery_plans)))
 
     def __eq__(self, other):
-        return self.package_delivery_plans == other.package_delivery_plans
+        if self is other:
+            return True
+        return hash(self) == hash(other) and self.package_delivery_plans == other.package_delivery_plans
 
     def __hash__(self):
-        return hash(tuple(self.package_delivery_plans))
+        if self._hash is None:
+            self._hash = hash(tuple(self.package_delivery_plans))
+        return self._hash
 
     def __deepcopy__(self, memo=None):
         if memo is None:
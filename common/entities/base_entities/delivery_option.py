@@ -1,6 +1,6 @@
 import itertools
 from copy import deepcopy
-from typing import List
+from typing import List, Tuple
 
 from common.entities.base_entities.base_entity import JsonableBaseEntity
 from common.entities.base_entities.customer_delivery import CustomerDelivery
@@ -10,7 +10,7 @@ from common.entities.base_entities.package_delivery_plan import PackageDeliveryP
 from common.entities.base_entities.entity_id import EntityID
 from common.entities.base_entities.package_holder import PackageHolder
 from geometry.geo2d import Point2D
-from geometry.geo_factory import calc_centroid
+from geometry.geo_factory import calc_centroid_xy, create_point_2d
 from geometry.utils import Localizable
 
 
@@ -19,6 +19,9 @@ class DeliveryOption(JsonableBaseEntity, Localizable, PackageHolder):
     def __init__(self, customer_deliveries: [CustomerDelivery], delivery_options_id: EntityID):
         self._id = delivery_options_id
         self._customer_deliveries = customer_deliveries if customer_deliveries is not None else []
+        self._hash = None
+        self._location_xy = None
+        self._location = None
 
     @property
     def id(self) -> EntityID:
@@ -34,7 +37,14 @@ class DeliveryOption(JsonableBaseEntity, Localizable, PackageHolder):
             customer_delivery.package_delivery_plans for customer_delivery in self.customer_deliveries))
 
     def calc_location(self) -> Point2D:
-        return calc_centroid(tuple(cd.calc_location() for cd in self.customer_deliveries))
+        if self._location is None:
+            self._location = create_point_2d(*self.calc_location_xy())
+        return self._location
+
+    def calc_location_xy(self) -> Tuple[float, float]:
+        if self._location_xy is None:
+            self._location_xy = calc_centroid_xy(tuple(cd.calc_location_xy() for cd in self.customer_deliveries))
+        return self._location_xy
 
     def get_package_type_amount(self, package_type: PackageType) -> int:
         customer_deliveries = self.customer_deliveries
@@ -55,15 +65,21 @@ class DeliveryOption(JsonableBaseEntity, Localizable, PackageHolder):
                                  dict_input['customer_deliveries']])
 
     def __eq__(self, other):
-        return self.customer_deliveries == other.customer_deliveries
+        if self is other:
+            return True
+        return hash(self) == hash(other) and self.customer_deliveries == other.customer_deliveries
 
     def __hash__(self):
-        return hash(tuple(self.customer_deliveries))
+        if self._hash is None:
+            self._hash = hash(tuple(self.customer_deliveries))
+        return self._hash
 
     def __deepcopy__(self, memodict=None):
         if memodict is None:
             memodict = {}
         # noinspection PyArgumentList
         new_copy = DeliveryOption(deepcopy(self._customer_deliveries, memodict), self._id)
+        new_copy._location_xy = self._location_xy
+        new_copy._location = self._location
         memodict[id(self)] = new_copy
         return new_copy
@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from copy import deepcopy
 from datetime import date, time, timedelta
+from pathlib import Path
+from typing import Iterator, List, Union, Tuple
 
 from common.entities.base_entities.base_entity import JsonableBaseEntity
 from common.entities.base_entities.delivery_option import DeliveryOption
@@ -9,8 +11,9 @@ from common.entities.base_entities.entity_distribution.temporal_distribution imp
     DateTimeDistribution, TimeWindowDistribution
 from common.entities.base_entities.entity_id import EntityID
 from common.entities.base_entities.temporal import TimeWindowExtension, Temporal, DateTimeExtension, TimeDeltaExtension
+from common.utils.json_stream_utils import iter_json_records, iter_chunks
 from geometry.geo2d import Point2D
-from geometry.geo_factory import calc_centroid
+from geometry.geo_factory import calc_centroid_xy, create_point_2d
 from geometry.utils import Localizable
 
 
@@ -22,6 +25,9 @@ class DeliveryRequest(JsonableBaseEntity, Localizable, Temporal):
         self._delivery_options = delivery_options if delivery_options is not None else []
         self._time_window = time_window
         self._priority = priority
+        self._hash = None
+        self._location_xy = None
+        self._location = None
 
     @property
     def id(self) -> EntityID:
@@ -40,7 +46,17 @@ class DeliveryRequest(JsonableBaseEntity, Localizable, Temporal):
         return self._priority
 
     def calc_location(self) -> Point2D:
-        return calc_centroid(tuple(do.calc_location() for do in self.delivery_options))
+        if self._location is None:
+            self._location = create_point_2d(*self.calc_location_xy())
+        return self._location
+
+    def calc_location_xy(self) -> Tuple[float, float]:
+        """
+        Computed once, on first use, so importers trimming the delivery options in place should do so beforehand.
+        """
+        if self._location_xy is None:
+            self._location_xy = calc_centroid_xy(tuple(do.calc_location_xy() for do in self.delivery_options))
+        return self._location_xy
 
     @classmethod
     def dict_to_obj(cls, dict_input):
@@ -53,14 +69,22 @@ class DeliveryRequest(JsonableBaseEntity, Localizable, Temporal):
             priority=int(dict_input['priority']))
 
     def __eq__(self, other: DeliveryRequest):
-        return all([self.__class__ == other.__class__,
-                    self.id == other.id,
-                    self.time_window == other.time_window,
-                    self.priority == other.priority]) \
-               and (self.delivery_options == other.delivery_options)
+        if self is other:
+            return True
+        return self.__class__ == other.__class__ \
+               and self.id == other.id \
+               and self.time_window == other.time_window \
+               and self.priority == other.priority \
+               and self.delivery_options == other.delivery_options
 
     def __hash__(self):
-        return hash((self.id, tuple(self.delivery_options), self.time_window, self.priority))
+        """
+        Delivery options are left out, as they are compared only for requests of the same id, and are trimmed in place
+        by some importers.
+        """
+        if self._hash is None:
+            self._hash = hash((self.id, self.time_window, self.priority))
+        return self._hash
 
     def __deepcopy__(self, memodict=None):
         if memodict is None:
@@ -68,10 +92,15 @@ class DeliveryRequest(JsonableBaseEntity, Localizable, Temporal):
         # noinspection PyArgumentList
         new_copy = DeliveryRequest(self.id, deepcopy(self.delivery_options, memodict),
                                    deepcopy(self.time_window, memodict), self.priority)
+        new_copy._location_xy = self._location_xy
+        new_copy._location = self._location
         memodict[id(self)] = new_copy
         return new_copy
 
 
+DEFAULT_DELIVERY_REQUESTS_CHUNK_SIZE = 1000
+
+
 def create_default_time_window_for_delivery_request():
     default_date_time_morning = DateTimeExtension(dt_date=date(2021, 1, 1), dt_time=time(6, 0, 0))
     default_date_time_night = DateTimeExtension(dt_date=date(2021, 1, 1), dt_time=time(23, 59, 0))
@@ -79,3 +108,22 @@ def create_default_time_window_for_delivery_request():
                                                         TimeDeltaExtension(timedelta(minutes=30))])
     default_dt_options = [default_date_time_morning, default_date_time_night]
     return TimeWindowDistribution(DateTimeDistribution(default_dt_options), default_time_delta_distrib)
+
+
+def iter_unique_delivery_requests(file_path: Union[Path, str]) -> Iterator[DeliveryRequest]:
+    """
+    Lazily parses the delivery requests of a JSON array or JSONL file, skipping requests whose id was already read.
+    """
+    read_ids = set()
+    for dr_dict in iter_json_records(file_path):
+        dr_id = EntityID.dict_to_obj(dr_dict['id'])
+        if dr_id in read_ids:
+            continue
+        read_ids.add(dr_id)
+        yield DeliveryRequest.dict_to_obj(dr_dict)
+
+
+def iter_delivery_requests_chunks(file_path: Union[Path, str],
+                                  chunk_size: int = DEFAULT_DELIVERY_REQUESTS_CHUNK_SIZE) \
+        -> Iterator[List[DeliveryRequest]]:
+    return iter_chunks(iter_unique_delivery_requests(file_path), chunk_size)
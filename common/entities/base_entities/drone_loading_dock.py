@@ -22,6 +22,7 @@ class DroneLoadingDock(JsonableBaseEntity, Localizable, Temporal, ShapeableColle
         self._drone_loading_station = drone_loading_station
         self._drone_type = drone_type
         self._time_window = time_window
+        self._hash = None
 
     @property
     def id(self) -> EntityID:
@@ -57,6 +58,8 @@ class DroneLoadingDock(JsonableBaseEntity, Localizable, Temporal, ShapeableColle
         )
 
     def __eq__(self, other):
+        if self is other:
+            return True
         return self.__class__ == other.__class__ and \
                self.id == other.id and \
                self.drone_type == other.drone_type and \
@@ -64,7 +67,12 @@ class DroneLoadingDock(JsonableBaseEntity, Localizable, Temporal, ShapeableColle
                self.time_window == other.time_window
 
     def __hash__(self):
-        return hash((self.id, self._drone_loading_station, self._drone_type, self._time_window))
+        """
+        The time window is left out, since matching sessions narrow the time windows of their copied docks.
+        """
+        if self._hash is None:
+            self._hash = hash((self.id, self._drone_loading_station, self._drone_type))
+        return self._hash
 
     def __deepcopy__(self, memodict=None):
         if memodict is None:
@@ -105,3 +105,7 @@ class PackageType(Enum):
 
     def __lt__(self, other: PackageType):
         return self.name < other.name
+
+    def __reduce_ex__(self, protocol):
+        # Pickled by name, as the Package values do not pickle
+        return getattr, (PackageType, self.name)
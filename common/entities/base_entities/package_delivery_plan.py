@@ -17,6 +17,7 @@ class PackageDeliveryPlan(JsonableBaseEntity, Localizable):
         self._azimuth = azimuth
         self._pitch = pitch
         self._package_type = package_type
+        self._hash = None
 
     @property
     def id(self) -> EntityID:
@@ -51,12 +52,16 @@ class PackageDeliveryPlan(JsonableBaseEntity, Localizable):
                                    package_type=PackageType.dict_to_obj(dict_input['package_type']))
 
     def __hash__(self):
-        return hash((self.id, self.drop_point, self.azimuth, self.pitch, self.package_type))
+        if self._hash is None:
+            self._hash = hash((self.id, self.drop_point, self.azimuth, self.pitch, self.package_type))
+        return self._hash
 
     def __str__(self):
         return 'Package Delivery Plan: ' + str((self.id, self.drop_point, self.azimuth, self.pitch, self.package_type))
 
     def __eq__(self, other):
+        if self is other:
+            return True
         return (self.id == other.id) and \
                (self.drop_point == other.drop_point) and \
                (self.azimuth == other.azimuth) and \
@@ -25,6 +25,9 @@ MIN_IN_HOUR = 60
 
 DATETIME_DEFAULT_FORMAT = "%d/%m/%Y %H:%M:%S"
 
+EPOCH = datetime(1970, 1, 1)
+ONE_SECOND = timedelta(seconds=1)
+
 
 class Temporal(ABC):
 
@@ -38,17 +41,27 @@ class TimeWindowExtension(JsonableBaseEntity):
 
     def __init__(self, since: DateTimeExtension, until: DateTimeExtension):
         self._time_window = TimeWindow(tm_since=since.get_internal(), tm_until=until.get_internal())
+        self._since = since
+        self._until = until
+        self._epoch_seconds = (since.get_epoch_seconds(), until.get_epoch_seconds())
 
     def get_internal(self) -> TimeWindow:
         return self._time_window
 
     @property
     def since(self) -> DateTimeExtension:
-        return DateTimeExtension.from_dt(self.get_internal().since)
+        return self._since
 
     @property
     def until(self) -> DateTimeExtension:
-        return DateTimeExtension.from_dt(self.get_internal().until)
+        return self._until
+
+    def get_epoch_seconds(self) -> Tuple[int, int]:
+        """
+        Whole seconds since the (naive) epoch of since and until, precomputed for cheap overlap and relative time
+        calculations.
+        """
+        return self._epoch_seconds
 
     @classmethod
     def dict_to_obj(cls, dict_input):
@@ -61,18 +74,19 @@ class TimeWindowExtension(JsonableBaseEntity):
         return self.get_internal().since.timestamp(), self.get_internal().until.timestamp()
 
     def overlaps(self, other: TimeWindowExtension) -> bool:
-        return self.get_internal().overlaps(other.get_internal())
-        # return int(self._internal.since.timestamp()), int(self._internal.until.timestamp())
+        return max(self._epoch_seconds[0], other._epoch_seconds[0]) < min(self._epoch_seconds[1],
+                                                                           other._epoch_seconds[1])
 
     def get_relative_time_in_min(self, zero_time: DateTimeExtension) -> (float, float):
-        return self.since.get_time_delta(zero_time).in_minutes(), self.until.get_time_delta(zero_time).in_minutes()
+        zero_epoch_seconds = zero_time.get_epoch_seconds()
+        return (self._epoch_seconds[0] - zero_epoch_seconds) / SEC_IN_MIN, \
+               (self._epoch_seconds[1] - zero_epoch_seconds) / SEC_IN_MIN
 
     def __eq__(self, other: TimeWindowExtension):
-        return self.get_internal().since == other.get_internal().since and \
-               self.get_internal().until == other.get_internal().until
+        return self._epoch_seconds == other._epoch_seconds
 
     def __hash__(self):
-        return hash(self.get_internal())
+        return hash(self._epoch_seconds)
 
     def __contains__(self, temporal: Union[DateTimeExtension, TimeWindowExtension]):
         return temporal.get_internal() in self.get_internal()
@@ -116,6 +130,9 @@ class DateTimeExtension(BaseEntity):
     def time_stamp(self) -> float:
         return self._date_time.timestamp()
 
+    def get_epoch_seconds(self) -> int:
+        return (self._date_time - EPOCH) // ONE_SECOND
+
     def __dict__(self):
         val = self.to_dict()
         val.update({'__class__': self.__class__.__name__})
@@ -1,11 +1,21 @@
+import json
 import unittest
+from copy import deepcopy
+from pathlib import Path
+from random import Random
+from uuid import uuid4
 
-from common.entities.base_entities.entity_distribution.delivery_request_distribution import PriorityDistribution
+from common.entities.base_entities.delivery_request import DeliveryRequest, iter_delivery_requests_chunks
+from common.entities.base_entities.entity_distribution.delivery_request_distribution import PriorityDistribution, \
+    DeliveryRequestDistribution
 from common.entities.base_entities.entity_distribution.delivery_requestion_dataset_builder import \
     build_delivery_request_distribution
 from common.entities.base_entities.entity_distribution.priority_distribution import ExactPriorityDistribution
+from common.entities.base_entities.entity_id import EntityID
 from common.entities.generator.delivery_request_generator import DeliveryRequestDatasetGenerator, \
     DeliveryRequestDatasetStructure
+from common.utils.json_stream_utils import iter_json_records
+from geometry.geo_factory import calc_centroid
 
 
 class BasicDeliveryRequestGenerationTests(unittest.TestCase):
@@ -54,3 +64,63 @@ class BasicDeliveryRequestGenerationTests(unittest.TestCase):
         self.assertEqual(priority_1, dr_dataset[0].priority)
         self.assertEqual(priority_2, dr_dataset[1].priority)
         self.assertEqual(priority_3, dr_dataset[2].priority)
+
+
+class DeliveryRequestsStreamTests(unittest.TestCase):
+    drs_json_path = Path('common/entities/base_entities/tests/drs_stream_test_file.json')
+    drs_jsonl_path = Path('common/entities/base_entities/tests/drs_stream_test_file.jsonl')
+
+    @classmethod
+    def setUpClass(cls):
+        cls.drs = DeliveryRequestDistribution().choose_rand(random=Random(42), amount={DeliveryRequest: 25})
+        drs_with_duplicates = cls.drs + cls.drs[3:7] + cls.drs[:2]
+        with open(cls.drs_json_path, 'w') as f:
+            json.dump([dr.__dict__() for dr in drs_with_duplicates], f, indent=2)
+        with open(cls.drs_jsonl_path, 'w') as f:
+            f.writelines(dr.to_json() + '\n\n' for dr in drs_with_duplicates)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.drs_json_path.unlink()
+        cls.drs_jsonl_path.unlink()
+
+    def test_iter_json_records(self):
+        expected_records = DeliveryRequest.json_to_dict(self.drs_json_path)
+        self.assertEqual(expected_records, list(iter_json_records(self.drs_json_path, read_size=7)))
+        self.assertEqual(expected_records, list(iter_json_records(self.drs_jsonl_path, read_size=7)))
+
+    def test_iter_delivery_requests_chunks(self):
+        for file_path in [self.drs_json_path, self.drs_jsonl_path]:
+            chunks = list(iter_delivery_requests_chunks(file_path, chunk_size=10))
+            self.assertEqual([10, 10, 5], [len(chunk) for chunk in chunks])
+            self.assertEqual(self.drs, [dr for chunk in chunks for dr in chunk])
+
+
+class DeliveryRequestHashTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.drs = DeliveryRequestDistribution().choose_rand(random=Random(42), amount={DeliveryRequest: 10})
+
+    def test_copies_are_equal_keys(self):
+        drs_map = {dr: i for i, dr in enumerate(self.drs)}
+        drs_copies = [deepcopy(dr) for dr in self.drs]
+        self.assertEqual(list(range(len(self.drs))), [drs_map[dr] for dr in drs_copies])
+        self.assertEqual([hash(dr) for dr in self.drs], [hash(dr) for dr in drs_copies])
+        self.assertEqual([hash(dr.delivery_options[0]) for dr in self.drs],
+                         [hash(dr.delivery_options[0]) for dr in drs_copies])
+
+    def test_not_equal_to_request_of_other_id(self):
+        dr = self.drs[0]
+        other_dr = DeliveryRequest(EntityID(uuid4()), dr.delivery_options, dr.time_window, dr.priority)
+        self.assertNotEqual(dr, other_dr)
+        self.assertEqual(dr.delivery_options, other_dr.delivery_options)
+
+    def test_location_is_computed_once(self):
+        dr = self.drs[0]
+        expected_location = calc_centroid(tuple(calc_centroid(tuple(cd.calc_location() for cd in do.customer_deliveries))
+                                                for do in dr.delivery_options))
+        self.assertEqual(expected_location.xy(), dr.calc_location_xy())
+        self.assertIs(dr.calc_location(), dr.calc_location())
+        self.assertEqual(expected_location, dr.calc_location())
+        self.assertEqual(dr.calc_location_xy(), deepcopy(dr).calc_location_xy())
@@ -0,0 +1,45 @@
+import os
+import timeit
+import unittest
+from copy import deepcopy
+from random import Random
+
+from common.entities.base_entities.delivery_request import DeliveryRequest
+from common.entities.base_entities.entity_distribution.delivery_request_distribution import DeliveryRequestDistribution
+from common.entities.base_entities.entity_distribution.drone_loading_dock_distribution import \
+    DroneLoadingDockDistribution
+from common.graph.operational.operational_graph import OperationalNode
+
+
+@unittest.skipUnless(os.environ.get('RUN_BENCHMARKS', False), 'benchmark')
+class EntitiesDictLookupBenchmark(unittest.TestCase):
+
+    def test_dict_lookups_2k_delivery_requests(self):
+        self._benchmark_dict_lookups(2000)
+
+    def test_dict_lookups_10k_delivery_requests(self):
+        self._benchmark_dict_lookups(10000)
+
+    def _benchmark_dict_lookups(self, num_delivery_requests: int, repeats: int = 10):
+        drs = DeliveryRequestDistribution().choose_rand(random=Random(42),
+                                                        amount={DeliveryRequest: num_delivery_requests})
+        docks = DroneLoadingDockDistribution().choose_rand(random=Random(42), amount=10)
+        drs_copies = [deepcopy(dr) for dr in drs]
+        nodes = [OperationalNode(internal_node) for internal_node in docks + drs]
+
+        build_sec = timeit.timeit(lambda: {dr: i for i, dr in enumerate(drs_copies)}, number=1)
+        drs_map = {dr: i for i, dr in enumerate(drs)}
+        same_keys_sec = timeit.timeit(lambda: [drs_map[dr] for dr in drs], number=repeats)
+        equal_keys_sec = timeit.timeit(lambda: [drs_map[dr] for dr in drs_copies], number=repeats)
+        nodes_map = {node: i for i, node in enumerate(nodes)}
+        nodes_sec = timeit.timeit(lambda: [nodes_map[OperationalNode(node.internal_node)] for node in nodes],
+                                  number=repeats)
+        dedup_sec = timeit.timeit(lambda: set(drs + drs_copies), number=repeats)
+
+        print(f"\n{num_delivery_requests} delivery requests, {repeats} repeats:"
+              f"\n  build dict (first hash): {build_sec:.6f} sec"
+              f"\n  lookup by same requests: {same_keys_sec:.6f} sec"
+              f"\n  lookup by equal copies: {equal_keys_sec:.6f} sec"
+              f"\n  lookup by operational nodes: {nodes_sec:.6f} sec"
+              f"\n  set dedup of requests and copies: {dedup_sec:.6f} sec")
+        self.assertEqual(list(range(num_delivery_requests)), [drs_map[dr] for dr in drs_copies])
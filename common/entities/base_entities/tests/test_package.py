@@ -1,3 +1,4 @@
+import pickle
 import unittest
 from collections import Counter
 from pprint import pprint
@@ -61,6 +62,9 @@ class BasicPackageTestCase(unittest.TestCase):
     def test_2_package_not_equal(self):
         self.assertNotEqual(self.p1.value, self.p2.value)
 
+    def test_package_type_pickles_by_name(self):
+        self.assertIs(pickle.loads(pickle.dumps(self.p4)), PackageType.LARGE)
+
     def test_package_delivery_plan(self):
         self.assertEqual(self.pdp_1.package_type.value.weight, 1)
 
@@ -26,6 +26,20 @@ class BasicTemporalTests(unittest.TestCase):
         self.assertFalse(self.tw4 in self.tw2)
         self.assertTrue(self.tw1 in self.tw1)
 
+    def test_overlaps(self):
+        self.assertFalse(self.tw1.overlaps(self.tw3))
+        self.assertFalse(self.tw1.overlaps(self.tw2))
+        self.assertTrue(self.tw4.overlaps(self.tw3))
+        self.assertTrue(self.tw1.overlaps(self.tw4))
+        self.assertEqual(self.tw1.get_internal().overlaps(self.tw4.get_internal()), self.tw1.overlaps(self.tw4))
+
+    def test_relative_time_in_min(self):
+        zero_time = DateTimeExtension(dt_date=date(2021, 9, 30), dt_time=time(23, 0, 0))
+        self.assertEqual((self.dt1.get_time_delta(zero_time).in_minutes(),
+                          self.dt2.get_time_delta(zero_time).in_minutes()),
+                         self.tw1.get_relative_time_in_min(zero_time))
+        self.assertEqual((430 + 5 / 60, 492 + 5 / 60), self.tw1.get_relative_time_in_min(zero_time))
+
     def test_to_dict(self):
         dt1_dict = self.dt1.__dict__()
         expected_dict = {'__class__': 'DateTimeExtension',
@@ -1,16 +1,16 @@
 import itertools
 import math
 from itertools import repeat
-from typing import List
+from typing import Union
+
+import numpy as np
 
 from common.entities.base_entities.delivery_request import DeliveryRequest
 from common.entities.base_entities.drone_loading_dock import DroneLoadingDock
 from common.entities.base_entities.zone import Zone
 from common.graph.operational.graph_utils import sort_delivery_requests_by_zone, split_delivery_requests_into_clusters, \
-    get_delivery_requests_from_graph, has_overlapping_time_window, calc_arrival_envelope_travel_time, \
-    calc_arrival_envelope_cost, \
-    calc_under_distance, filter_nodes_with_at_least_one_identical_package_type, \
-    filter_nodes_with_time_overlapping
+    get_delivery_requests_from_graph, calc_arrival_envelope_travel_time, calc_arrival_envelope_cost, \
+    calc_arrival_envelope_costs, calc_locally_connected_pairs, calc_two_way_connected_pairs, calc_time_overlapping_pairs
 from common.graph.operational.operational_graph import OperationalGraph, OperationalEdge, OperationalEdgeAttribs, \
     OperationalNode
 from drop_envelope.envelopes_service import EnvelopesService
@@ -47,127 +47,85 @@ def add_locally_connected_dr_graph(graph, arrival_envelope_service: EnvelopesSer
                                    edge_travel_time_factor: float = 1.0,
                                    max_distance_to_connect_km=math.inf
                                    ):
-    edges = []
     graph.add_delivery_requests(dr_connection_options)
-    for start_dr in dr_connection_options:
-        end_dr_options = calc_under_distance(dr_connection_options, start_dr, max_distance_to_connect_km)
-        for end_dr in end_dr_options:
-            if has_overlapping_time_window(start_dr, end_dr):
-                cost = calc_arrival_envelope_cost(arrival_envelope_service, start_dr, end_dr, edge_cost_factor)
-                travel_time = calc_arrival_envelope_travel_time(arrival_envelope_service, start_dr, end_dr,
-                                                                edge_travel_time_factor)
-                edges.append(OperationalEdge(OperationalNode(start_dr),
-                                             OperationalNode(end_dr),
-                                             OperationalEdgeAttribs(cost, travel_time)))
-    graph.add_operational_edges(edges)
-
-
-def _create_directed_from_edges(origin_node: OperationalNode, destinations: List[OperationalNode],
-                                arrival_envelope_service: EnvelopesService,
-                                edge_cost_factor: float = 1.0, edge_travel_time_factor: float = 1.0) -> \
-        List[OperationalEdge]:
-    edges = list(map(lambda y:
-                     OperationalEdge(origin_node, y,
-                                     OperationalEdgeAttribs(
-                                         calc_arrival_envelope_cost(arrival_envelope_service,
-                                                                    origin_node.internal_node, y.internal_node,
-                                                                    edge_cost_factor),
-                                         calc_arrival_envelope_travel_time(arrival_envelope_service,
-                                                                           origin_node.internal_node, y.internal_node,
-                                                                           edge_travel_time_factor)
-                                     )),
-                     destinations)) + \
-            list(map(lambda y: OperationalEdge(y, origin_node,
-                                               OperationalEdgeAttribs(
-                                                   calc_arrival_envelope_cost(arrival_envelope_service,
-                                                                              origin_node.internal_node,
-                                                                              y.internal_node,
-                                                                              edge_cost_factor),
-                                                   calc_arrival_envelope_travel_time(arrival_envelope_service,
-                                                                                     origin_node.internal_node,
-                                                                                     y.internal_node,
-                                                                                     edge_travel_time_factor)
-                                               )),
-                     destinations))
-    return edges
+    start_indices, end_indices, _ = calc_locally_connected_pairs(dr_connection_options, max_distance_to_connect_km)
+    _add_edges_by_arrival_envelope_costs(graph, dr_connection_options, start_indices, end_indices,
+                                         calc_arrival_envelope_costs(arrival_envelope_service, dr_connection_options,
+                                                                     start_indices, end_indices),
+                                         edge_cost_factor, edge_travel_time_factor)
 
 
 def build_time_overlapping_dependent_connected_graph(graph: OperationalGraph,
                                                      edge_cost_factor: float = 1.0,
                                                      edge_travel_time_factor: float = 1.0):
-    nodes = list(graph.nodes)
-    arrival_envelope_service = EnvelopesService.from_nodes(nodes)
-    for selected_node_index, origin_node in enumerate(nodes):
-        destinations = filter_nodes_with_time_overlapping(selected_node=origin_node,
-                                                          optional_nodes=graph.nodes[selected_node_index:])
-        edges = _create_directed_from_edges(origin_node, destinations, arrival_envelope_service,
-                                            edge_cost_factor, edge_travel_time_factor)
-        graph.add_operational_edges(edges)
+    _add_two_way_edges_between_graph_nodes(graph, edge_cost_factor, edge_travel_time_factor,
+                                           filter_time_overlapping=True)
 
 
 def build_package_dependent_connected_graph(graph: OperationalGraph,
                                             edge_cost_factor: float = 1.0,
                                             edge_travel_time_factor: float = 1.0,
                                             delivery_option_index: int = 0):
-    arrival_envelope_service = EnvelopesService.from_nodes(list(graph.nodes))
-    for selected_node_index, selected_node in enumerate(graph.nodes):
-        destinations = filter_nodes_with_at_least_one_identical_package_type(selected_node=selected_node,
-                                                                             optional_nodes=graph.nodes[
-                                                                                            selected_node_index:],
-                                                                             delivery_option_index=delivery_option_index)
-        edges = _create_directed_from_edges(selected_node, destinations, arrival_envelope_service,
-                                            edge_cost_factor, edge_travel_time_factor)
-        graph.add_operational_edges(edges)
+    _add_two_way_edges_between_graph_nodes(graph, edge_cost_factor, edge_travel_time_factor,
+                                           filter_package_types=True, delivery_option_index=delivery_option_index)
 
 
 def build_package_and_time_dependent_connected_graph(graph: OperationalGraph,
                                                      edge_cost_factor: float = 1.0,
                                                      edge_travel_time_factor: float = 1.0,
                                                      delivery_option_index: int = 0):
-    arrival_envelope_service = EnvelopesService.from_nodes(list(graph.nodes))
-    for selected_node_index, selected_node in enumerate(graph.nodes):
-        destinations_by_packages = filter_nodes_with_at_least_one_identical_package_type(selected_node=selected_node,
-                                                                                         optional_nodes=graph.nodes[
-                                                                                                        selected_node_index:],
-                                                                                         delivery_option_index=
-                                                                                         delivery_option_index)
-        destinations_by_times = filter_nodes_with_time_overlapping(selected_node=selected_node,
-                                                                   optional_nodes=graph.nodes[
-                                                                                  selected_node_index:])
-
-        destinations = list(set(destinations_by_packages).intersection(set(destinations_by_times)))
-
-        edges = _create_directed_from_edges(selected_node, destinations, arrival_envelope_service,
-                                            edge_cost_factor, edge_travel_time_factor)
-        graph.add_operational_edges(edges)
+    _add_two_way_edges_between_graph_nodes(graph, edge_cost_factor, edge_travel_time_factor,
+                                           filter_time_overlapping=True, filter_package_types=True,
+                                           delivery_option_index=delivery_option_index)
 
 
 def build_fully_connected_graph(graph: OperationalGraph,
                                 edge_cost_factor: float = 1.0,
                                 edge_travel_time_factor: float = 1.0):
-    nodes = list(graph.nodes)
-    arrival_envelope_service = EnvelopesService.from_nodes(nodes)
-    for i, origin_node in enumerate(nodes):
-        destinations = list(filter(lambda x: x != origin_node,
-                                   nodes[i:]))
-        edges = _create_directed_from_edges(origin_node, destinations, arrival_envelope_service,
-                                            edge_cost_factor, edge_travel_time_factor)
-        graph.add_operational_edges(edges)
+    _add_two_way_edges_between_graph_nodes(graph, edge_cost_factor, edge_travel_time_factor)
 
 
 def add_fully_connected_loading_docks(graph: OperationalGraph, drone_loading_docks: [DroneLoadingDock],
                                       edge_cost_factor: float = 1.0,
                                       edge_travel_time_factor: float = 1.0):
     graph.add_drone_loading_docks(drone_loading_docks)
-    arrival_envelope_service = EnvelopesService.from_nodes(graph.nodes)
     dr_in_graph = get_delivery_requests_from_graph(graph)
-    edges = []
-    for dld in drone_loading_docks:
-        for dr in dr_in_graph:
-            if has_overlapping_time_window(dld, dr):
-                edges += create_two_way_directed_edges(dld, dr,arrival_envelope_service,
-                                                       edge_cost_factor, edge_travel_time_factor)
-    graph.add_operational_edges(edges)
+    internal_nodes = list(drone_loading_docks) + dr_in_graph
+    docks_indices, drs_indices = calc_time_overlapping_pairs(drone_loading_docks, dr_in_graph)
+    drs_indices = drs_indices + len(drone_loading_docks)
+    costs = calc_arrival_envelope_costs(EnvelopesService.from_nodes(internal_nodes), internal_nodes,
+                                        docks_indices, drs_indices)
+    _add_edges_by_arrival_envelope_costs(graph, internal_nodes,
+                                         np.stack([docks_indices, drs_indices], axis=1).ravel(),
+                                         np.stack([drs_indices, docks_indices], axis=1).ravel(),
+                                         np.repeat(costs, 2), edge_cost_factor, edge_travel_time_factor)
+
+
+def _add_two_way_edges_between_graph_nodes(graph: OperationalGraph,
+                                           edge_cost_factor: float, edge_travel_time_factor: float,
+                                           filter_time_overlapping: bool = False,
+                                           filter_package_types: bool = False,
+                                           delivery_option_index: int = 0) -> None:
+    internal_nodes = [node.internal_node for node in graph.nodes]
+    arrival_envelopes_arrays = EnvelopesService.from_nodes(internal_nodes).calc_arrival_envelopes_arrays(
+        internal_nodes)
+    start_indices, end_indices = calc_two_way_connected_pairs(
+        internal_nodes, filter_time_overlapping=filter_time_overlapping, filter_package_types=filter_package_types,
+        delivery_option_index=delivery_option_index)
+    if filter_time_overlapping or filter_package_types:
+        costs = arrival_envelopes_arrays.calc_costs(start_indices, end_indices)
+    else:
+        costs = arrival_envelopes_arrays.calc_costs_matrix()[start_indices, end_indices]
+    _add_edges_by_arrival_envelope_costs(graph, internal_nodes, start_indices, end_indices, costs,
+                                         edge_cost_factor, edge_travel_time_factor)
+
+
+def _add_edges_by_arrival_envelope_costs(graph: OperationalGraph,
+                                         internal_nodes: [Union[DeliveryRequest, DroneLoadingDock]],
+                                         start_indices: np.ndarray, end_indices: np.ndarray, costs: np.ndarray,
+                                         edge_cost_factor: float, edge_travel_time_factor: float) -> None:
+    graph.add_operational_edges_from_arrays(internal_nodes, start_indices, end_indices,
+                                            costs * edge_cost_factor, costs * edge_travel_time_factor)
 
 
 def create_two_way_directed_edges(node_content_1, node_content_2,
@@ -0,0 +1,368 @@
+from __future__ import annotations
+
+from copy import deepcopy
+from typing import List, Tuple, Union
+
+import numpy as np
+from networkx import DiGraph
+
+from common.entities.base_entities.delivery_request import DeliveryRequest
+from common.entities.base_entities.drone_loading_dock import DroneLoadingDock
+from common.entities.base_entities.entity_id import EntityID
+from common.entities.base_entities.package import PackageType
+from common.entities.base_entities.temporal import DateTimeExtension, SEC_IN_MIN
+from common.graph.operational.operational_graph import OperationalGraph, OperationalNode, OperationalEdge, \
+    OperationalEdgeAttribs, calc_package_demands
+
+EDGE_INDEX_DTYPE = np.int32
+EDGE_ATTRIBS_DTYPE = np.float32
+INITIAL_EDGES_CAPACITY = 1024
+
+
+class ColumnarOperationalGraph(OperationalGraph):
+
+    def __init__(self, edge_attribs_dtype=EDGE_ATTRIBS_DTYPE):
+        super().__init__()
+        self._internal_graph = None
+        self._edge_attribs_dtype = np.dtype(edge_attribs_dtype)
+        self._priorities = np.empty(0, dtype=np.int64)
+        self._time_windows_sec = np.empty((0, 2), dtype=np.int64)
+        self._locations = np.empty((0, 2), dtype=np.float64)
+        self._package_demands = np.empty((0, len(PackageType)), dtype=np.int64)
+        self._edge_sources = np.empty(INITIAL_EDGES_CAPACITY, dtype=EDGE_INDEX_DTYPE)
+        self._edge_targets = np.empty(INITIAL_EDGES_CAPACITY, dtype=EDGE_INDEX_DTYPE)
+        self._edge_costs = np.empty(INITIAL_EDGES_CAPACITY, dtype=self._edge_attribs_dtype)
+        self._edge_travel_times = np.empty(INITIAL_EDGES_CAPACITY, dtype=self._edge_attribs_dtype)
+        self._num_edges = 0
+        self._edges_indptr = np.zeros(1, dtype=EDGE_INDEX_DTYPE)
+        self._is_compact = True
+
+    @classmethod
+    def from_operational_graph(cls, graph: OperationalGraph,
+                               edge_attribs_dtype=EDGE_ATTRIBS_DTYPE) -> ColumnarOperationalGraph:
+        columnar_graph = ColumnarOperationalGraph(edge_attribs_dtype)
+        columnar_graph.add_operational_nodes(graph.nodes)
+        columnar_graph.add_operational_edges(graph.edges)
+        return columnar_graph
+
+    def to_operational_graph(self) -> OperationalGraph:
+        graph = OperationalGraph()
+        graph.add_operational_nodes(self.nodes)
+        graph.add_operational_edges(self.edges)
+        return graph
+
+    @property
+    def num_edges(self) -> int:
+        self._compact_edges()
+        return self._num_edges
+
+    @property
+    def priorities(self) -> np.ndarray:
+        return _read_only_view(self._priorities)
+
+    @property
+    def time_windows_sec(self) -> np.ndarray:
+        return _read_only_view(self._time_windows_sec)
+
+    @property
+    def time_windows_min(self) -> np.ndarray:
+        return self._time_windows_sec / SEC_IN_MIN
+
+    @property
+    def locations(self) -> np.ndarray:
+        return _read_only_view(self._locations)
+
+    @property
+    def package_demands(self) -> np.ndarray:
+        return _read_only_view(self._package_demands)
+
+    def get_relative_time_windows_in_min(self, zero_time: DateTimeExtension) -> np.ndarray:
+        return (self._time_windows_sec - zero_time.get_epoch_seconds()) / SEC_IN_MIN
+
+    def get_package_type_demands(self, package_type: PackageType) -> np.ndarray:
+        return _read_only_view(self._package_demands[:, list(PackageType).index(package_type)])
+
+    def to_csr_arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        self._compact_edges()
+        return (_read_only_view(self._edges_indptr),
+                _read_only_view(self._edge_targets),
+                _read_only_view(self._edge_costs),
+                _read_only_view(self._edge_travel_times))
+
+    def get_internal_graph(self) -> DiGraph:
+        self._compact_edges()
+        internal_graph = DiGraph()
+        internal_graph.add_nodes_from(self._nodes_ids)
+        internal_graph.add_edges_from(
+            (self._nodes_ids[source], self._nodes_ids[target],
+             OperationalEdgeAttribs(cost, travel_time).__dict__())
+            for source, target, cost, travel_time in self._iter_edges())
+        return internal_graph
+
+    def add_drone_loading_docks(self, drone_loading_docks: [DroneLoadingDock]):
+        self._add_internal_nodes(drone_loading_docks, self._loading_docks_map)
+
+    def add_delivery_requests(self, delivery_requests: [DeliveryRequest]):
+        self._add_internal_nodes(delivery_requests, self._delivery_requests_map)
+
+    def add_operational_edges(self, operational_edges: [OperationalEdge]):
+        operational_edges = list(operational_edges)
+        self.add_operational_nodes([node for edge in operational_edges for node in (edge.start_node, edge.end_node)
+                                    if node.internal_node.id not in self._nodes_indices])
+        num_new_edges = len(operational_edges)
+        self._append_edges(
+            np.fromiter((self._nodes_indices[edge.start_node.internal_node.id] for edge in operational_edges),
+                        dtype=EDGE_INDEX_DTYPE, count=num_new_edges),
+            np.fromiter((self._nodes_indices[edge.end_node.internal_node.id] for edge in operational_edges),
+                        dtype=EDGE_INDEX_DTYPE, count=num_new_edges),
+            np.fromiter((edge.attributes.cost for edge in operational_edges),
+                        dtype=self._edge_attribs_dtype, count=num_new_edges),
+            np.fromiter((edge.attributes.travel_time_min for edge in operational_edges),
+                        dtype=self._edge_attribs_dtype, count=num_new_edges))
+
+    def add_operational_edges_from_arrays(self, internal_nodes: [Union[DeliveryRequest, DroneLoadingDock]],
+                                          start_indices: np.ndarray, end_indices: np.ndarray,
+                                          costs: np.ndarray, travel_times: np.ndarray):
+        self._add_missing_internal_nodes(internal_nodes)
+        graph_indices = np.array([self._nodes_indices[internal_node.id] for internal_node in internal_nodes],
+                                 dtype=EDGE_INDEX_DTYPE)
+        self._append_edges(graph_indices[start_indices], graph_indices[end_indices],
+                           np.asarray(costs, dtype=self._edge_attribs_dtype),
+                           np.asarray(travel_times, dtype=self._edge_attribs_dtype))
+
+    @classmethod
+    def _create_empty_for_edges_arrays(cls, edge_costs: np.ndarray) -> ColumnarOperationalGraph:
+        return ColumnarOperationalGraph(edge_costs.dtype)
+
+    def _get_edges_arrays(self):
+        self._compact_edges()
+        return (self._edge_sources[:self._num_edges], self._edge_targets[:self._num_edges],
+                self._edge_costs[:self._num_edges], self._edge_travel_times[:self._num_edges])
+
+    def _add_edges_from_arrays(self, internal_nodes: [Union[DeliveryRequest, DroneLoadingDock]],
+                               edge_sources: np.ndarray, edge_targets: np.ndarray,
+                               edge_costs: np.ndarray, edge_travel_times: np.ndarray) -> None:
+        graph_indices = np.array([self._nodes_indices[internal_node.id] for internal_node in internal_nodes],
+                                 dtype=EDGE_INDEX_DTYPE)
+        if self._num_edges == 0 and np.array_equal(graph_indices, np.arange(len(self._nodes_ids))) \
+                and _are_compact_edges(edge_sources, edge_targets, len(self._nodes_ids)):
+            self._set_compact_edges(edge_sources, edge_targets, edge_costs, edge_travel_times)
+            return
+        self.add_operational_edges_from_arrays(internal_nodes, edge_sources, edge_targets, edge_costs,
+                                               edge_travel_times)
+
+    @property
+    def edges(self) -> List[OperationalEdge]:
+        self._compact_edges()
+        nodes = self.nodes
+        return [OperationalEdge(nodes[source], nodes[target], OperationalEdgeAttribs(cost, travel_time))
+                for source, target, cost, travel_time in self._iter_edges()]
+
+    def to_cost_numpy_array(self, nonedge: float, dtype) -> np.ndarray:
+        self._compact_edges()
+        return self._to_dense_numpy_array(self._edge_costs[:self._num_edges], nonedge, dtype)
+
+    def to_travel_time_numpy_array(self, nonedge: float, dtype) -> np.ndarray:
+        self._compact_edges()
+        return self._to_dense_numpy_array(self._edge_travel_times[:self._num_edges], nonedge, dtype)
+
+    def calc_max_cost(self) -> float:
+        self._compact_edges()
+        return float(self._edge_costs[:self._num_edges].max())
+
+    def calc_min_cost(self) -> float:
+        self._compact_edges()
+        return float(self._edge_costs[:self._num_edges].min())
+
+    def remove_delivery_requests(self, delivery_requests: [DeliveryRequest]):
+        for dr in delivery_requests:
+            self._delivery_requests_map.pop(dr.id)
+        self._remove_nodes_ids([dr.id for dr in delivery_requests])
+
+    def remove_operational_nodes(self, operational_nodes: [OperationalNode]):
+        ids = [operational_node.internal_node.id for operational_node in operational_nodes]
+        for id_ in ids:
+            self._delivery_requests_map.pop(id_, None)
+            self._loading_docks_map.pop(id_, None)
+        self._remove_nodes_ids(ids)
+
+    def _remove_nodes_ids(self, ids: [EntityID]) -> None:
+        ids_to_remove = set(ids)
+        self._select_nodes_into(self, np.array([index for index, id_ in enumerate(self._nodes_ids)
+                                                if id_ not in ids_to_remove], dtype=np.int64))
+
+    def _create_subgraph_of_nodes(self, ids: [EntityID]) -> ColumnarOperationalGraph:
+        subgraph = ColumnarOperationalGraph(self._edge_attribs_dtype)
+        self._copy_nodes_maps_to(subgraph, ids)
+        self._select_nodes_into(subgraph, np.sort(np.array([self._nodes_indices[id_] for id_ in ids],
+                                                           dtype=np.int64)))
+        return subgraph
+
+    def _select_nodes_into(self, graph: ColumnarOperationalGraph, kept_indices: np.ndarray) -> None:
+        self._compact_edges()
+        new_indices = np.full(len(self._nodes_ids), -1, dtype=np.int64)
+        new_indices[kept_indices] = np.arange(len(kept_indices))
+        sources = new_indices[self._edge_sources[:self._num_edges]]
+        targets = new_indices[self._edge_targets[:self._num_edges]]
+        kept_edges = (sources >= 0) & (targets >= 0)
+        graph._nodes_ids = [self._nodes_ids[index] for index in kept_indices]
+        graph._nodes_indices = {id_: index for index, id_ in enumerate(graph._nodes_ids)}
+        graph._original_nodes_indices = [self._original_nodes_indices[index] for index in kept_indices]
+        graph._num_of_original_nodes = self._num_of_original_nodes
+        graph._priorities = self._priorities[kept_indices]
+        graph._time_windows_sec = self._time_windows_sec[kept_indices]
+        graph._locations = self._locations[kept_indices]
+        graph._package_demands = self._package_demands[kept_indices]
+        graph._set_compact_edges(sources[kept_edges].astype(EDGE_INDEX_DTYPE),
+                                 targets[kept_edges].astype(EDGE_INDEX_DTYPE),
+                                 self._edge_costs[:self._num_edges][kept_edges],
+                                 self._edge_travel_times[:self._num_edges][kept_edges])
+
+    def _add_internal_nodes(self, internal_nodes: [Union[DeliveryRequest, DroneLoadingDock]], nodes_map) -> None:
+        new_internal_nodes = []
+        for internal_node in internal_nodes:
+            nodes_map[internal_node.id] = internal_node
+            if internal_node.id not in self._nodes_indices:
+                self._register_node_id(internal_node.id)
+                new_internal_nodes.append(internal_node)
+        if len(new_internal_nodes) == 0:
+            return
+        self._priorities = np.concatenate(
+            [self._priorities, np.array([node.priority for node in new_internal_nodes], dtype=np.int64)])
+        self._time_windows_sec = np.concatenate(
+            [self._time_windows_sec,
+             np.array([node.time_window.get_epoch_seconds() for node in new_internal_nodes], dtype=np.int64)])
+        self._locations = np.concatenate(
+            [self._locations,
+             np.array([node.calc_location_xy() for node in new_internal_nodes], dtype=np.float64)])
+        self._package_demands = np.concatenate(
+            [self._package_demands,
+             np.array([calc_package_demands(node) for node in new_internal_nodes], dtype=np.int64)])
+        if self._is_compact:
+            self._edges_indptr = np.concatenate(
+                [self._edges_indptr, np.full(len(new_internal_nodes), self._edges_indptr[-1], dtype=EDGE_INDEX_DTYPE)])
+
+    def _append_edges(self, sources: np.ndarray, targets: np.ndarray,
+                      costs: np.ndarray, travel_times: np.ndarray) -> None:
+        num_edges = self._num_edges + len(sources)
+        if num_edges > len(self._edge_sources):
+            capacity = max(num_edges, 2 * len(self._edge_sources), INITIAL_EDGES_CAPACITY)
+            self._edge_sources = _resize(self._edge_sources, capacity, self._num_edges)
+            self._edge_targets = _resize(self._edge_targets, capacity, self._num_edges)
+            self._edge_costs = _resize(self._edge_costs, capacity, self._num_edges)
+            self._edge_travel_times = _resize(self._edge_travel_times, capacity, self._num_edges)
+        self._edge_sources[self._num_edges:num_edges] = sources
+        self._edge_targets[self._num_edges:num_edges] = targets
+        self._edge_costs[self._num_edges:num_edges] = costs
+        self._edge_travel_times[self._num_edges:num_edges] = travel_times
+        self._num_edges = num_edges
+        self._is_compact = False
+
+    def _compact_edges(self) -> None:
+        if self._is_compact:
+            return
+        sources = self._edge_sources[:self._num_edges]
+        targets = self._edge_targets[:self._num_edges]
+        keys = sources.astype(np.int64) * len(self._nodes_ids) + targets
+        _, first_occurrences = np.unique(keys, return_index=True)
+        _, last_occurrences_reversed = np.unique(keys[::-1], return_index=True)
+        last_occurrences = self._num_edges - 1 - last_occurrences_reversed
+        order = np.lexsort((first_occurrences, sources[first_occurrences]))
+        first_occurrences = first_occurrences[order]
+        last_occurrences = last_occurrences[order]
+        self._set_compact_edges(sources[first_occurrences], targets[first_occurrences],
+                                self._edge_costs[last_occurrences], self._edge_travel_times[last_occurrences])
+
+    def _set_compact_edges(self, sources: np.ndarray, targets: np.ndarray,
+                           costs: np.ndarray, travel_times: np.ndarray) -> None:
+        self._edge_sources = np.ascontiguousarray(sources, dtype=EDGE_INDEX_DTYPE)
+        self._edge_targets = np.ascontiguousarray(targets, dtype=EDGE_INDEX_DTYPE)
+        self._edge_costs = np.ascontiguousarray(costs, dtype=self._edge_attribs_dtype)
+        self._edge_travel_times = np.ascontiguousarray(travel_times, dtype=self._edge_attribs_dtype)
+        self._num_edges = len(sources)
+        self._edges_indptr = np.zeros(len(self._nodes_ids) + 1, dtype=EDGE_INDEX_DTYPE)
+        np.cumsum(np.bincount(self._edge_sources, minlength=len(self._nodes_ids)), out=self._edges_indptr[1:])
+        self._is_compact = True
+
+    def _iter_edges(self):
+        return zip(self._edge_sources[:self._num_edges].tolist(), self._edge_targets[:self._num_edges].tolist(),
+                   self._edge_costs[:self._num_edges].tolist(), self._edge_travel_times[:self._num_edges].tolist())
+
+    def _to_dense_numpy_array(self, edge_values: np.ndarray, nonedge: float, dtype) -> np.ndarray:
+        num_nodes = len(self._nodes_ids)
+        arr = np.full((num_nodes, num_nodes), nonedge, dtype=dtype)
+        arr[self._edge_sources[:self._num_edges], self._edge_targets[:self._num_edges]] = edge_values
+        if nonedge != 0:
+            self._zero_nodes_travel_time_to_themselves(arr)
+        return arr
+
+    def copy_sharing_internal_nodes(self) -> ColumnarOperationalGraph:
+        """
+        Nodes and edges arrays are shared as well, since changing the graph replaces them rather than writing to them.
+        The edges arrays are trimmed so that appending edges to either graph reallocates them.
+        """
+        self._compact_edges()
+        new_copy = ColumnarOperationalGraph(self._edge_attribs_dtype)
+        self._copy_structure_to(new_copy)
+        new_copy._priorities = self._priorities
+        new_copy._time_windows_sec = self._time_windows_sec
+        new_copy._locations = self._locations
+        new_copy._package_demands = self._package_demands
+        new_copy._edge_sources = self._edge_sources[:self._num_edges]
+        new_copy._edge_targets = self._edge_targets[:self._num_edges]
+        new_copy._edge_costs = self._edge_costs[:self._num_edges]
+        new_copy._edge_travel_times = self._edge_travel_times[:self._num_edges]
+        new_copy._num_edges = self._num_edges
+        new_copy._edges_indptr = self._edges_indptr
+        new_copy._is_compact = True
+        return new_copy
+
+    def __hash__(self):
+        return object.__hash__(self)
+
+    def __deepcopy__(self, memodict=None):
+        if memodict is None:
+            memodict = {}
+        self._compact_edges()
+        new_copy = ColumnarOperationalGraph(self._edge_attribs_dtype)
+        new_copy._loading_docks_map = deepcopy(self._loading_docks_map, memodict)
+        new_copy._delivery_requests_map = deepcopy(self._delivery_requests_map, memodict)
+        new_copy._nodes_ids = deepcopy(self._nodes_ids, memodict)
+        new_copy._nodes_indices = {id_: index for index, id_ in enumerate(new_copy._nodes_ids)}
+        new_copy._original_nodes_indices = list(self._original_nodes_indices)
+        new_copy._num_of_original_nodes = self._num_of_original_nodes
+        new_copy._priorities = self._priorities.copy()
+        new_copy._time_windows_sec = self._time_windows_sec.copy()
+        new_copy._locations = self._locations.copy()
+        new_copy._package_demands = self._package_demands.copy()
+        new_copy._set_compact_edges(self._edge_sources.copy(), self._edge_targets.copy(),
+                                    self._edge_costs.copy(), self._edge_travel_times.copy())
+        memodict[id(self)] = new_copy
+        return new_copy
+
+    def __repr__(self):
+        return f"ColumnarOperationalGraph: {self.__dict__()}"
+
+    @classmethod
+    def dict_to_obj(cls, dict_input):
+        assert (dict_input['__class__'] == cls.__name__)
+        graph_dict = dict(dict_input)
+        graph_dict['__class__'] = OperationalGraph.__name__
+        return ColumnarOperationalGraph.from_operational_graph(OperationalGraph.dict_to_obj(graph_dict))
+
+
+def _are_compact_edges(sources: np.ndarray, targets: np.ndarray, num_nodes: int) -> bool:
+    keys = sources.astype(np.int64) * num_nodes + targets
+    return bool(np.all(sources[1:] >= sources[:-1])) and len(np.unique(keys)) == len(keys)
+
+
+def _resize(arr: np.ndarray, capacity: int, size: int) -> np.ndarray:
+    resized = np.empty(capacity, dtype=arr.dtype)
+    resized[:size] = arr[:size]
+    return resized
+
+
+def _read_only_view(arr: np.ndarray) -> np.ndarray:
+    view = arr.view()
+    view.flags.writeable = False
+    return view
@@ -14,10 +14,8 @@ from common.graph.operational.export_graph import GraphExporter, OperationalGrap
 class OrtoolsGraphExporter(GraphExporter):
 
     def export_time_windows(self, graph: OperationalGraph, zero_time: DateTimeExtension) -> List[Tuple[int, int]]:
-        nodes = graph.nodes
-        time_windows = [tuple(map(int, node.get_time_window().get_relative_time_in_min(zero_time)))
-                        for node in nodes]
-        return time_windows
+        return [tuple(time_window)
+                for time_window in graph.get_relative_time_windows_in_min(zero_time).astype(np.int64).tolist()]
 
     @lru_cache()
     def export_priorities(self, graph: OperationalGraph) -> List[int]:
@@ -1,19 +1,43 @@
 import itertools
 import math
+from functools import wraps
 from itertools import repeat
-from typing import List
+from typing import Union
+
+import numpy as np
 
 from common.entities.base_entities.delivery_request import DeliveryRequest
 from common.entities.base_entities.drone_loading_dock import DroneLoadingDock
 from common.entities.base_entities.zone import Zone
 from common.graph.operational.graph_utils import sort_delivery_requests_by_zone, split_delivery_requests_into_clusters, \
-    get_delivery_requests_from_graph, has_overlapping_time_window, calc_travel_time_in_min, calc_cost, \
-    calc_under_distance, filter_nodes_with_at_least_one_identical_package_type, \
-    filter_nodes_with_time_overlapping, has_at_least_one_identical_package_type
+    get_delivery_requests_from_graph, calc_travel_time_in_min, calc_cost, calc_locations_array, \
+    calc_distances_array, calc_locally_connected_pairs, calc_two_way_connected_pairs, calc_time_overlapping_pairs
 from common.graph.operational.operational_graph import OperationalGraph, OperationalEdge, OperationalEdgeAttribs, \
     OperationalNode
-
-
+from common.utils import instrumentation
+
+
+def _instrument_graph_creation(function):
+    """
+    Spans the graph creation function, with the numbers of nodes and edges it added to its graph or created.
+    """
+    @wraps(function)
+    def instrumented_function(*args, **kwargs):
+        if not instrumentation.is_enabled():
+            return function(*args, **kwargs)
+        graph = kwargs.get('graph', args[0] if len(args) > 0 else None)
+        graph = graph if isinstance(graph, OperationalGraph) else None
+        num_nodes, num_edges = (graph.num_nodes, graph.num_edges) if graph is not None else (0, 0)
+        with instrumentation.span(f'graph_creator.{function.__name__}') as span:
+            result = function(*args, **kwargs)
+            created_graph = graph if graph is not None else result
+            span.add(nodes=created_graph.num_nodes - num_nodes, edges=created_graph.num_edges - num_edges)
+        return result
+
+    return instrumented_function
+
+
+@_instrument_graph_creation
 def create_clustered_delivery_requests_graph(delivery_requests: [DeliveryRequest],
                                              drone_loading_docks: [DroneLoadingDock],
                                              zones: [Zone],
@@ -37,6 +61,7 @@ def create_clustered_delivery_requests_graph(delivery_requests: [DeliveryRequest
 
     return graph
 
+@_instrument_graph_creation
 def create_package_time_zones_dependent_graph_model(delivery_requests: [DeliveryRequest],
                                                     drone_loading_docks: [DroneLoadingDock],
                                                     zones: [Zone],
@@ -55,133 +80,139 @@ def create_package_time_zones_dependent_graph_model(delivery_requests: [Delivery
     return graph
 
 
+@_instrument_graph_creation
 def add_locally_connected_dr_graph_packages_time_dependent(graph, dr_connection_options: [DeliveryRequest],
                                                            edge_cost_factor: float = 1.0,
                                                            edge_travel_time_factor: float = 1.0,
                                                            max_distance_to_connect_km=math.inf,
                                                            delivery_option_index: int = 0
                                                            ):
-    edges = []
     graph.add_delivery_requests(dr_connection_options)
-    for start_dr in dr_connection_options:
-        end_dr_options = calc_under_distance(dr_connection_options, start_dr, max_distance_to_connect_km)
-        for end_dr in end_dr_options:
-            if has_overlapping_time_window(start_dr, end_dr) and has_at_least_one_identical_package_type(
-                    start_dr.delivery_options[delivery_option_index], end_dr.delivery_options[delivery_option_index]):
-                cost = calc_cost(start_dr, end_dr, edge_cost_factor)
-                travel_time = calc_travel_time_in_min(start_dr, end_dr, edge_travel_time_factor)
-                edges.append(OperationalEdge(OperationalNode(start_dr),
-                                             OperationalNode(end_dr),
-                                             OperationalEdgeAttribs(cost, travel_time)))
-    graph.add_operational_edges(edges)
+    _add_locally_connected_edges(graph, dr_connection_options, edge_cost_factor, edge_travel_time_factor,
+                                 max_distance_to_connect_km, filter_package_types=True,
+                                 delivery_option_index=delivery_option_index)
 
+
+@_instrument_graph_creation
 def add_locally_connected_dr_graph(graph, dr_connection_options: [DeliveryRequest],
                                    edge_cost_factor: float = 1.0,
                                    edge_travel_time_factor: float = 1.0,
                                    max_distance_to_connect_km=math.inf
                                    ):
-    edges = []
     graph.add_delivery_requests(dr_connection_options)
-    for start_dr in dr_connection_options:
-        end_dr_options = calc_under_distance(dr_connection_options, start_dr, max_distance_to_connect_km)
-        for end_dr in end_dr_options:
-            if has_overlapping_time_window(start_dr, end_dr):
-                cost = calc_cost(start_dr, end_dr, edge_cost_factor)
-                travel_time = calc_travel_time_in_min(start_dr, end_dr, edge_travel_time_factor)
-                edges.append(OperationalEdge(OperationalNode(start_dr),
-                                             OperationalNode(end_dr),
-                                             OperationalEdgeAttribs(cost, travel_time)))
-    graph.add_operational_edges(edges)
-
-
-def _create_directed_from_edges(origin_node: OperationalNode, destinations: List[OperationalNode],
-                                edge_cost_factor: float = 1.0, edge_travel_time_factor: float = 1.0) -> \
-        List[OperationalEdge]:
-    edges = list(map(lambda y:
-                     OperationalEdge(origin_node, y,
-                                     OperationalEdgeAttribs(
-                                         calc_cost(origin_node.internal_node, y.internal_node,
-                                                   edge_cost_factor),
-                                         calc_travel_time_in_min(origin_node.internal_node, y.internal_node,
-                                                                 edge_travel_time_factor)
-                                     )),
-                     destinations)) + \
-            list(map(lambda y: OperationalEdge(y, origin_node,
-                                               OperationalEdgeAttribs(
-                                                   calc_cost(origin_node.internal_node, y.internal_node,
-                                                             edge_cost_factor),
-                                                   calc_travel_time_in_min(origin_node.internal_node,
-                                                                           y.internal_node, edge_travel_time_factor)
-                                               )),
-                     destinations))
-    return edges
+    _add_locally_connected_edges(graph, dr_connection_options, edge_cost_factor, edge_travel_time_factor,
+                                 max_distance_to_connect_km)
 
 
+@_instrument_graph_creation
 def build_time_overlapping_dependent_connected_graph(graph: OperationalGraph,
                                                      edge_cost_factor: float = 1.0,
                                                      edge_travel_time_factor: float = 1.0):
-    nodes = list(graph.nodes)
-    for selected_node_index, origin_node in enumerate(nodes):
-        destinations = filter_nodes_with_time_overlapping(selected_node=origin_node,
-                                                          optional_nodes=graph.nodes[selected_node_index:])
-        edges = _create_directed_from_edges(origin_node, destinations, edge_cost_factor, edge_travel_time_factor)
-        graph.add_operational_edges(edges)
+    _add_two_way_edges_between_graph_nodes(graph, edge_cost_factor, edge_travel_time_factor,
+                                           filter_time_overlapping=True)
 
 
+@_instrument_graph_creation
 def build_package_dependent_connected_graph(graph: OperationalGraph,
                                             edge_cost_factor: float = 1.0,
                                             edge_travel_time_factor: float = 1.0,
                                             delivery_option_index: int = 0):
-    for selected_node_index, selected_node in enumerate(graph.nodes):
-        destinations = filter_nodes_with_at_least_one_identical_package_type(selected_node=selected_node,
-                                                                             optional_nodes=graph.nodes[
-                                                                                            selected_node_index:],
-                                                                             delivery_option_index=delivery_option_index)
-        edges = _create_directed_from_edges(selected_node, destinations, edge_cost_factor, edge_travel_time_factor)
-        graph.add_operational_edges(edges)
+    _add_two_way_edges_between_graph_nodes(graph, edge_cost_factor, edge_travel_time_factor,
+                                           filter_package_types=True, delivery_option_index=delivery_option_index)
 
 
+@_instrument_graph_creation
 def build_package_time_dependent_connected_graph(graph: OperationalGraph,
-                                                     edge_cost_factor: float = 1.0,
-                                                     edge_travel_time_factor: float = 1.0,
-                                                     delivery_option_index: int = 0):
-    for selected_node_index, selected_node in enumerate(graph.nodes):
-        destinations_by_packages = filter_nodes_with_at_least_one_identical_package_type(selected_node=selected_node,
-                                                                                         optional_nodes=graph.nodes[
-                                                                                                        selected_node_index:],
-                                                                                         delivery_option_index=delivery_option_index)
-        destinations_by_times = filter_nodes_with_time_overlapping(selected_node=selected_node,
-                                                                   optional_nodes=graph.nodes[
-                                                                                  selected_node_index:])
-
-        destinations = list(set(destinations_by_packages).intersection(set(destinations_by_times)))
-
-        edges = _create_directed_from_edges(selected_node, destinations, edge_cost_factor, edge_travel_time_factor)
-        graph.add_operational_edges(edges)
+                                                 edge_cost_factor: float = 1.0,
+                                                 edge_travel_time_factor: float = 1.0,
+                                                 delivery_option_index: int = 0):
+    _add_two_way_edges_between_graph_nodes(graph, edge_cost_factor, edge_travel_time_factor,
+                                           filter_time_overlapping=True, filter_package_types=True,
+                                           delivery_option_index=delivery_option_index)
 
 
+@_instrument_graph_creation
 def build_fully_connected_graph(graph: OperationalGraph,
                                 edge_cost_factor: float = 1.0,
                                 edge_travel_time_factor: float = 1.0):
-    nodes = list(graph.nodes)
-    for i, origin_node in enumerate(nodes):
-        destinations = list(filter(lambda x: x != origin_node,
-                                   nodes[i:]))
-        edges = _create_directed_from_edges(origin_node, destinations, edge_cost_factor, edge_travel_time_factor)
-        graph.add_operational_edges(edges)
+    _add_two_way_edges_between_graph_nodes(graph, edge_cost_factor, edge_travel_time_factor)
 
 
+@_instrument_graph_creation
 def add_fully_connected_loading_docks(graph: OperationalGraph, drone_loading_docks: [DroneLoadingDock],
                                       edge_cost_factor: float = 1.0,
                                       edge_travel_time_factor: float = 1.0):
     graph.add_drone_loading_docks(drone_loading_docks)
     dr_in_graph = get_delivery_requests_from_graph(graph)
-    edges = []
-    for dld in drone_loading_docks:
-        for dr in dr_in_graph:
-            if has_overlapping_time_window(dld, dr):
-                edges += create_two_way_directed_edges(dld, dr, edge_cost_factor, edge_travel_time_factor)
-    graph.add_operational_edges(edges)
+    docks_indices, drs_indices = calc_time_overlapping_pairs(drone_loading_docks, dr_in_graph)
+    distances = np.repeat(calc_distances_array(calc_locations_array(drone_loading_docks)[docks_indices],
+                                               calc_locations_array(dr_in_graph)[drs_indices]), 2)
+    drs_indices = drs_indices + len(drone_loading_docks)
+    graph.add_operational_edges_from_arrays(list(drone_loading_docks) + dr_in_graph,
+                                            np.stack([docks_indices, drs_indices], axis=1).ravel(),
+                                            np.stack([drs_indices, docks_indices], axis=1).ravel(),
+                                            distances * edge_cost_factor,
+                                            distances * edge_travel_time_factor)
+
+
+@_instrument_graph_creation
+def add_time_overlapping_connected_delivery_requests(graph: OperationalGraph, delivery_requests: [DeliveryRequest],
+                                                     edge_cost_factor: float = 1.0,
+                                                     edge_travel_time_factor: float = 1.0):
+    """
+    Adds delivery requests to a built graph, connected in both directions to all the time overlapping graph nodes and
+    to each other.
+    """
+    graph_internal_nodes = [node.internal_node for node in graph.nodes]
+    graph.add_delivery_requests(delivery_requests)
+    internal_nodes = list(delivery_requests) + graph_internal_nodes
+    new_indices, other_indices = calc_time_overlapping_pairs(delivery_requests, internal_nodes)
+    is_new_pair = (other_indices >= len(delivery_requests)) | (other_indices > new_indices)
+    new_indices, other_indices = new_indices[is_new_pair], other_indices[is_new_pair]
+    locations = calc_locations_array(internal_nodes)
+    distances = np.repeat(calc_distances_array(locations[new_indices], locations[other_indices]), 2)
+    graph.add_operational_edges_from_arrays(internal_nodes,
+                                            np.stack([new_indices, other_indices], axis=1).ravel(),
+                                            np.stack([other_indices, new_indices], axis=1).ravel(),
+                                            distances * edge_cost_factor,
+                                            distances * edge_travel_time_factor)
+
+
+def _add_locally_connected_edges(graph: OperationalGraph, delivery_requests: [DeliveryRequest],
+                                 edge_cost_factor: float, edge_travel_time_factor: float,
+                                 max_distance_to_connect_km: float,
+                                 filter_package_types: bool = False, delivery_option_index: int = 0) -> None:
+    start_indices, end_indices, distances = calc_locally_connected_pairs(
+        delivery_requests, max_distance_to_connect_km, filter_package_types=filter_package_types,
+        delivery_option_index=delivery_option_index)
+    _add_edges_by_distances(graph, delivery_requests, [start_indices], [end_indices], [distances],
+                            edge_cost_factor, edge_travel_time_factor)
+
+
+def _add_two_way_edges_between_graph_nodes(graph: OperationalGraph,
+                                           edge_cost_factor: float, edge_travel_time_factor: float,
+                                           filter_time_overlapping: bool = False,
+                                           filter_package_types: bool = False,
+                                           delivery_option_index: int = 0) -> None:
+    internal_nodes = [node.internal_node for node in graph.nodes]
+    locations = calc_locations_array(internal_nodes)
+    two_way_start_indices, two_way_end_indices = calc_two_way_connected_pairs(
+        internal_nodes, filter_time_overlapping=filter_time_overlapping, filter_package_types=filter_package_types,
+        delivery_option_index=delivery_option_index)
+    distances = calc_distances_array(locations[two_way_start_indices], locations[two_way_end_indices])
+    _add_edges_by_distances(graph, internal_nodes, [two_way_start_indices], [two_way_end_indices], [distances],
+                            edge_cost_factor, edge_travel_time_factor)
+
+
+def _add_edges_by_distances(graph: OperationalGraph, internal_nodes: [Union[DeliveryRequest, DroneLoadingDock]],
+                            start_indices: [np.ndarray], end_indices: [np.ndarray], distances: [np.ndarray],
+                            edge_cost_factor: float, edge_travel_time_factor: float) -> None:
+    distances = np.concatenate(distances or [np.empty(0)])
+    graph.add_operational_edges_from_arrays(internal_nodes,
+                                            np.concatenate(start_indices or [np.empty(0, dtype=np.int64)]),
+                                            np.concatenate(end_indices or [np.empty(0, dtype=np.int64)]),
+                                            distances * edge_cost_factor,
+                                            distances * edge_travel_time_factor)
 
 
 def create_two_way_directed_edges(node_content_1, node_content_2,
@@ -1,20 +1,26 @@
-from typing import List, Dict, Union
+import math
+from typing import List, Dict, Union, Iterator, Tuple
 
 import numpy as np
 
 from common.entities.base_entities.delivery_request import DeliveryRequest
 from common.entities.base_entities.drone_loading_dock import DroneLoadingDock
+from common.entities.base_entities.package import PackageType
 from common.entities.base_entities.package_holder import PackageHolder
 from common.entities.base_entities.temporal import Temporal
 from common.entities.base_entities.zone import Zone
 from common.graph.operational.operational_graph import OperationalNode
 from common.tools.clustering_alg import fit_k_means
 from drop_envelope.envelopes_service import EnvelopesService
+from geometry.spatial_index import SpatialIndex
+from geometry.geo_factory import create_point_2d
 from geometry.utils import Localizable
 from visualization.basic.pltdrawer2d import create_drawer_2d
 from visualization.operational.operational_drawer2d import add_operational_graph
 from drop_envelope.arrival_envelope import calc_cost as arrival_envelope_cost
 
+MAX_PAIRS_CHUNK_SIZE = 2 ** 20
+
 
 def has_at_least_one_identical_package_type(ph_1: PackageHolder, ph_2: PackageHolder):
     return ph_1.has_at_least_one_identical(ph_2)
@@ -39,10 +45,9 @@ def filter_nodes_with_at_least_one_identical_package_type(selected_node, optiona
 
 
 def filter_nodes_with_time_overlapping(selected_node, optional_nodes) -> List[OperationalNode]:
-    return list(filter(lambda x: x != selected_node
-                                 and has_overlapping_time_window(selected_node.internal_node,
-                                                                 x.internal_node),
-                       optional_nodes))
+    selected_time_window = selected_node.internal_node.time_window
+    return [x for x in optional_nodes
+            if selected_time_window.overlaps(x.internal_node.time_window) and x != selected_node]
 
 
 def get_delivery_requests_from_graph(graph) -> [DeliveryRequest]:
@@ -60,7 +65,10 @@ def is_within_distance_range(start: Localizable, target: Localizable,
 
 
 def calc_distance(start: Localizable, end: Localizable) -> float:
-    return start.calc_location().calc_distance_to_point(end.calc_location())
+    start_x, start_y = start.calc_location_xy()
+    end_x, end_y = end.calc_location_xy()
+    delta_x, delta_y = end_x - start_x, end_y - start_y
+    return math.sqrt(delta_x * delta_x + delta_y * delta_y)
 
 
 def calc_cost(start: Localizable, end: Localizable, edge_cost_factor: float = 1.0) -> float:
@@ -71,6 +79,208 @@ def calc_travel_time_in_min(start: Localizable, end: Localizable, edge_travel_ti
     return calc_distance(end, start) * edge_travel_time_factor
 
 
+def calc_locations_array(localizables: [Localizable]) -> np.ndarray:
+    return np.array([localizable.calc_location_xy() for localizable in localizables],
+                    dtype=np.float64).reshape(-1, 2)
+
+
+def calc_time_windows_array(temporals: [Temporal]) -> np.ndarray:
+    return np.array([temporal.time_window.get_epoch_seconds() for temporal in temporals],
+                    dtype=np.int64).reshape(-1, 2)
+
+
+def calc_active_package_types_array(package_holders: [PackageHolder]) -> np.ndarray:
+    return np.array([[package_holder.get_package_type_amount(package_type) != 0 for package_type in PackageType]
+                     for package_holder in package_holders], dtype=bool).reshape(-1, len(PackageType))
+
+
+def calc_distances_array(start_locations: np.ndarray, end_locations: np.ndarray) -> np.ndarray:
+    deltas = end_locations - start_locations
+    return np.sqrt(deltas[..., 0] * deltas[..., 0] + deltas[..., 1] * deltas[..., 1])
+
+
+def calc_overlapping_time_windows_mask(start_time_windows: np.ndarray, end_time_windows: np.ndarray) -> np.ndarray:
+    return np.maximum(start_time_windows[..., 0], end_time_windows[..., 0]) < \
+           np.minimum(start_time_windows[..., 1], end_time_windows[..., 1])
+
+
+def calc_overlapping_time_windows_pairs(start_time_windows: np.ndarray, end_time_windows: np.ndarray,
+                                        max_chunk_size: int = MAX_PAIRS_CHUNK_SIZE) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sorted sweep over the end time windows by their start: a start window can only overlap the end windows which start
+    before it ends, and after it starts minus the longest end window duration. Only these candidates are compared, so
+    the work is near O(N log N) rather than O(N * M) when the durations are similar. Returns the start and end indices
+    of the overlapping pairs, grouped by start but in no particular order within a group.
+    """
+    if len(start_time_windows) == 0 or len(end_time_windows) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    end_order = np.argsort(end_time_windows[:, 0], kind='stable')
+    sorted_end_since = end_time_windows[end_order, 0]
+    max_end_duration = int((end_time_windows[:, 1] - end_time_windows[:, 0]).max())
+    first_candidates = np.searchsorted(sorted_end_since, start_time_windows[:, 0] - max_end_duration, side='right')
+    last_candidates = np.searchsorted(sorted_end_since, start_time_windows[:, 1], side='left')
+    num_candidates = np.maximum(last_candidates - first_candidates, 0)
+    start_indices, end_indices = [], []
+    for chunk_start_indices, candidates in _iter_candidates(first_candidates, num_candidates, max_chunk_size):
+        chunk_end_indices = end_order[candidates]
+        mask = calc_overlapping_time_windows_mask(start_time_windows[chunk_start_indices],
+                                                  end_time_windows[chunk_end_indices])
+        start_indices.append(chunk_start_indices[mask])
+        end_indices.append(chunk_end_indices[mask])
+    return np.concatenate(start_indices or [np.empty(0, dtype=np.int64)]), \
+           np.concatenate(end_indices or [np.empty(0, dtype=np.int64)])
+
+
+def calc_one_way_overlapping_time_windows_pairs(time_windows: np.ndarray,
+                                                max_chunk_size: int = MAX_PAIRS_CHUNK_SIZE) -> \
+        Tuple[np.ndarray, np.ndarray]:
+    """
+    Sorted sweep of the time windows against themselves: in the order of their start, a window overlaps exactly the
+    later (non empty) windows which start before it ends, so the candidates are the overlapping pairs themselves.
+    Returns the smaller and larger indices of each overlapping pair of different windows, in no particular order.
+    """
+    order = np.argsort(time_windows[:, 0], kind='stable')
+    sorted_time_windows = time_windows[order]
+    last_candidates = np.searchsorted(sorted_time_windows[:, 0], sorted_time_windows[:, 1], side='left')
+    first_candidates = np.arange(1, len(time_windows) + 1)
+    num_candidates = np.maximum(last_candidates - first_candidates, 0)
+    start_indices, end_indices = [], []
+    for sorted_start_indices, candidates in _iter_candidates(first_candidates, num_candidates, max_chunk_size):
+        mask = sorted_time_windows[candidates, 0] < sorted_time_windows[candidates, 1]
+        chunk_start_indices, chunk_end_indices = order[sorted_start_indices[mask]], order[candidates[mask]]
+        start_indices.append(np.minimum(chunk_start_indices, chunk_end_indices))
+        end_indices.append(np.maximum(chunk_start_indices, chunk_end_indices))
+    return np.concatenate(start_indices or [np.empty(0, dtype=np.int64)]), \
+           np.concatenate(end_indices or [np.empty(0, dtype=np.int64)])
+
+
+def _iter_candidates(first_candidates: np.ndarray, num_candidates: np.ndarray, max_chunk_size: int) -> \
+        Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Expands, chunk by chunk, each row's consecutive range of candidates into (row, candidate) pairs.
+    """
+    for rows in _iter_rows_chunks_by_size(num_candidates, max_chunk_size):
+        chunk_num_candidates = num_candidates[rows]
+        row_indices = np.repeat(np.arange(rows.start, rows.stop), chunk_num_candidates)
+        offsets = np.arange(len(row_indices)) - np.repeat(
+            np.cumsum(chunk_num_candidates) - chunk_num_candidates, chunk_num_candidates)
+        yield row_indices, np.repeat(first_candidates[rows], chunk_num_candidates) + offsets
+
+
+def _iter_rows_chunks_by_size(rows_sizes: np.ndarray, max_chunk_size: int) -> Iterator[slice]:
+    start = 0
+    cumulative_sizes = np.cumsum(rows_sizes)
+    while start < len(rows_sizes):
+        done_size = cumulative_sizes[start - 1] if start > 0 else 0
+        stop = max(start + 1, int(np.searchsorted(cumulative_sizes, done_size + max_chunk_size, side='right')))
+        yield slice(start, stop)
+        start = stop
+
+
+def calc_identical_package_type_mask(start_active_package_types: np.ndarray,
+                                     end_active_package_types: np.ndarray) -> np.ndarray:
+    return np.any(start_active_package_types & end_active_package_types, axis=-1)
+
+
+def iter_rows_chunks(num_rows: int, num_columns: int, max_chunk_size: int = MAX_PAIRS_CHUNK_SIZE) -> Iterator[slice]:
+    rows_per_chunk = max(1, max_chunk_size // max(1, num_columns))
+    for start in range(0, num_rows, rows_per_chunk):
+        yield slice(start, min(start + rows_per_chunk, num_rows))
+
+
+def iter_pairs_under_distance(locations: np.ndarray, max_distance_km: float) -> \
+        Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    if math.isinf(max_distance_km):
+        for rows in iter_rows_chunks(len(locations), len(locations)):
+            distances = calc_distances_array(locations[rows, np.newaxis], locations)
+            start_indices, end_indices = np.nonzero(0 < distances)
+            yield start_indices + rows.start, end_indices, distances[start_indices, end_indices]
+    else:
+        start_indices, end_indices = SpatialIndex(locations).query_pairs_within_distance(max_distance_km)
+        distances = calc_distances_array(locations[start_indices], locations[end_indices])
+        under_distance = (0 < distances) & (distances <= max_distance_km)
+        yield start_indices[under_distance], end_indices[under_distance], distances[under_distance]
+
+
+def calc_locally_connected_pairs(delivery_requests: [DeliveryRequest], max_distance_to_connect_km: float,
+                                 filter_package_types: bool = False, delivery_option_index: int = 0) -> \
+        Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Returns the start indices, end indices and distances of the delivery requests directed pairs which are under the
+    distance and overlap in time (and share a package type, if filtered by package types).
+    """
+    locations = calc_locations_array(delivery_requests)
+    time_windows = calc_time_windows_array(delivery_requests)
+    active_package_types = calc_active_package_types_array(
+        [dr.delivery_options[delivery_option_index] for dr in delivery_requests]) if filter_package_types else None
+    start_indices, end_indices, distances = [], [], []
+    for chunk_start_indices, chunk_end_indices, chunk_distances in \
+            iter_pairs_under_distance(locations, max_distance_to_connect_km):
+        mask = calc_overlapping_time_windows_mask(time_windows[chunk_start_indices], time_windows[chunk_end_indices])
+        if filter_package_types:
+            mask &= calc_identical_package_type_mask(active_package_types[chunk_start_indices],
+                                                     active_package_types[chunk_end_indices])
+        start_indices.append(chunk_start_indices[mask])
+        end_indices.append(chunk_end_indices[mask])
+        distances.append(chunk_distances[mask])
+    return np.concatenate(start_indices or [np.empty(0, dtype=np.int64)]), \
+           np.concatenate(end_indices or [np.empty(0, dtype=np.int64)]), \
+           np.concatenate(distances or [np.empty(0)])
+
+
+def calc_two_way_connected_pairs(internal_nodes: [Union[DeliveryRequest, DroneLoadingDock]],
+                                 filter_time_overlapping: bool = False, filter_package_types: bool = False,
+                                 delivery_option_index: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the start and end indices, sorted by start and then end, of the directed pairs of different nodes which
+    overlap in time and share a package type (if filtered by them). Loading docks share any package type.
+    """
+    num_nodes = len(internal_nodes)
+    is_dock = np.array([isinstance(internal_node, DroneLoadingDock) for internal_node in internal_nodes], dtype=bool)
+    active_package_types = np.zeros((num_nodes, len(PackageType)), dtype=bool)
+    if filter_package_types:
+        active_package_types[~is_dock] = calc_active_package_types_array(
+            [internal_node.delivery_options[delivery_option_index] for internal_node in internal_nodes
+             if not isinstance(internal_node, DroneLoadingDock)])
+    if filter_time_overlapping:
+        start_indices, end_indices = calc_one_way_overlapping_time_windows_pairs(
+            calc_time_windows_array(internal_nodes))
+        if filter_package_types:
+            mask = is_dock[start_indices] | is_dock[end_indices] | calc_identical_package_type_mask(
+                active_package_types[start_indices], active_package_types[end_indices])
+            start_indices, end_indices = start_indices[mask], end_indices[mask]
+    else:
+        start_indices, end_indices = _calc_one_way_pairs(is_dock, active_package_types, filter_package_types)
+    two_way_start_indices = np.concatenate([start_indices, end_indices])
+    two_way_end_indices = np.concatenate([end_indices, start_indices])
+    order = np.lexsort((two_way_end_indices, two_way_start_indices))
+    return two_way_start_indices[order], two_way_end_indices[order]
+
+
+def _calc_one_way_pairs(is_dock: np.ndarray, active_package_types: np.ndarray, filter_package_types: bool) -> \
+        Tuple[np.ndarray, np.ndarray]:
+    num_nodes = len(is_dock)
+    start_indices, end_indices = [], []
+    for rows in iter_rows_chunks(num_nodes, num_nodes):
+        mask = np.arange(rows.start, rows.stop)[:, np.newaxis] < np.arange(num_nodes)
+        if filter_package_types:
+            mask &= is_dock[rows, np.newaxis] | is_dock | \
+                    calc_identical_package_type_mask(active_package_types[rows, np.newaxis], active_package_types)
+        chunk_start_indices, chunk_end_indices = np.nonzero(mask)
+        start_indices.append(chunk_start_indices + rows.start)
+        end_indices.append(chunk_end_indices)
+    return np.concatenate(start_indices or [np.empty(0, dtype=np.int64)]), \
+           np.concatenate(end_indices or [np.empty(0, dtype=np.int64)])
+
+
+def calc_time_overlapping_pairs(start_temporals: [Temporal], end_temporals: [Temporal]) -> \
+        Tuple[np.ndarray, np.ndarray]:
+    start_indices, end_indices = calc_overlapping_time_windows_pairs(calc_time_windows_array(start_temporals),
+                                                                     calc_time_windows_array(end_temporals))
+    order = np.lexsort((end_indices, start_indices))
+    return start_indices[order], end_indices[order]
+
+
 def calc_arrival_envelope_cost(arrival_envelope_service: EnvelopesService,
                                start: Union[DeliveryRequest, DroneLoadingDock],
                                end: Union[DeliveryRequest, DroneLoadingDock],
@@ -80,6 +290,13 @@ def calc_arrival_envelope_cost(arrival_envelope_service: EnvelopesService,
     return edge_cost_factor * arrival_envelope_cost(arrival_envelope_start, arrival_envelope_end)
 
 
+def calc_arrival_envelope_costs(arrival_envelope_service: EnvelopesService,
+                                internal_nodes: [Union[DeliveryRequest, DroneLoadingDock]],
+                                start_indices: np.ndarray, end_indices: np.ndarray) -> np.ndarray:
+    return arrival_envelope_service.calc_arrival_envelopes_arrays(internal_nodes).calc_costs(start_indices,
+                                                                                             end_indices)
+
+
 def calc_arrival_envelope_travel_time(arrival_envelope_service: EnvelopesService,
                                       start: Union[DeliveryRequest, DroneLoadingDock],
                                       end: Union[DeliveryRequest, DroneLoadingDock],
@@ -90,8 +307,11 @@ def calc_arrival_envelope_travel_time(arrival_envelope_service: EnvelopesService
 
 def sort_delivery_requests_by_zone(delivery_requests: [DeliveryRequest], zones: [Zone]) -> Dict[
     int, List[DeliveryRequest]]:
-    return {zone_index: [dr for dr in delivery_requests if dr.calc_location() in zone.region] for
-            zone_index, zone in enumerate(zones)}
+    spatial_index = SpatialIndex(calc_locations_array(delivery_requests))
+    return {zone_index: [delivery_requests[dr_index]
+                         for dr_index in spatial_index.query_within_bbox(zone.region.calc_bbox())
+                         if create_point_2d(*spatial_index.locations[dr_index]) in zone.region]
+            for zone_index, zone in enumerate(zones)}
 
 
 def split_delivery_requests_into_clusters(delivery_requests: List[DeliveryRequest], max_clusters: int = 10) -> \
@@ -103,8 +323,7 @@ def split_delivery_requests_into_clusters(delivery_requests: List[DeliveryReques
 
 
 def _get_delivery_requests_locations(delivery_requests) -> np.ndarray:
-    return np.array(
-        [[np.array(dr.calc_location().x), np.array(dr.calc_location().y)] for dr in delivery_requests])
+    return calc_locations_array(delivery_requests)
 
 
 def draw_operational_graph(og):
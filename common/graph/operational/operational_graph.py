@@ -1,10 +1,10 @@
 from __future__ import annotations
 
+import json
 from copy import deepcopy, copy
 from dataclasses import dataclass
-from functools import lru_cache
 from pathlib import Path
-from typing import List, Union
+from typing import List, Union, Dict, Tuple
 
 import numpy as np
 from networkx import DiGraph, to_numpy_array, is_isomorphic
@@ -14,11 +14,16 @@ from common.entities.base_entities.base_entity import JsonableBaseEntity
 from common.entities.base_entities.delivery_request import DeliveryRequest
 from common.entities.base_entities.drone_loading_dock import DroneLoadingDock
 from common.entities.base_entities.entity_id import EntityID
-from common.entities.base_entities.temporal import TimeWindowExtension, Temporal
+from common.entities.base_entities.package import PackageType
+from common.entities.base_entities.temporal import TimeWindowExtension, Temporal, DateTimeExtension, SEC_IN_MIN
 from common.utils.class_controller import name_to_class, get_all_module_class_names_from_globals
+from common.utils.npz_utils import save_npz, load_npz
 from geometry.geo2d import Polygon2D
+from geometry.geo_factory import create_point_2d
 from geometry.utils import Localizable
 
+GRAPH_NPZ_FORMAT_VERSION = 1
+
 
 class OperationalNode(JsonableBaseEntity):
 
@@ -124,6 +129,10 @@ class OperationalGraph(JsonableBaseEntity):
         self._internal_graph = DiGraph()
         self._loading_docks_map = {}
         self._delivery_requests_map = {}
+        self._nodes_ids: List[EntityID] = []
+        self._nodes_indices: Dict[EntityID, int] = {}
+        self._original_nodes_indices: List[int] = []
+        self._num_of_original_nodes = 0
 
     def get_internal_graph(self):
         return self._internal_graph
@@ -132,7 +141,7 @@ class OperationalGraph(JsonableBaseEntity):
     def nodes(self) -> List[OperationalNode]:
         nodes = []
         all_internal_nodes = self._get_all_internal_nodes_map()
-        for id_ in list(self._internal_graph.nodes(data=False)):
+        for id_ in self._nodes_ids:
             node = all_internal_nodes.get(id_, None)
             if node is None:
                 raise RuntimeError(f"Graph index not found in node mapping")
@@ -159,17 +168,19 @@ class OperationalGraph(JsonableBaseEntity):
         return sum(n.get_priority() for n in self.nodes[:])
 
     def is_empty(self):
-        return self._internal_graph.nodes.__len__() == 0
+        return len(self._nodes_ids) == 0
 
     def add_drone_loading_docks(self, drone_loading_docks: [DroneLoadingDock]):
         for dl in drone_loading_docks:
             self._loading_docks_map[dl.id] = dl
             self._internal_graph.add_node(dl.id)
+            self._register_node_id(dl.id)
 
     def add_delivery_requests(self, delivery_requests: [DeliveryRequest]):
         for dr in delivery_requests:
             self._delivery_requests_map[dr.id] = dr
             self._internal_graph.add_node(dr.id)
+            self._register_node_id(dr.id)
 
     def add_operational_nodes(self, operational_nodes: [OperationalNode]):
         for operational_node in operational_nodes:
@@ -181,64 +192,67 @@ class OperationalGraph(JsonableBaseEntity):
                 raise TypeError(f"Not supported OperationalNode type: {operational_node.internal_type}")
 
     def add_operational_edges(self, operational_edges: [OperationalEdge]):
-        self._internal_graph.add_edges_from(list(map(lambda oe: oe.to_internal_tuple(), operational_edges)))
+        internal_edges = list(map(lambda oe: oe.to_internal_tuple(), operational_edges))
+        self._internal_graph.add_edges_from(internal_edges)
+        for start_id, end_id, _ in internal_edges:
+            self._register_node_id(start_id)
+            self._register_node_id(end_id)
+
+    def add_operational_edges_from_arrays(self, internal_nodes: [Union[DeliveryRequest, DroneLoadingDock]],
+                                          start_indices: np.ndarray, end_indices: np.ndarray,
+                                          costs: np.ndarray, travel_times: np.ndarray):
+        self._add_missing_internal_nodes(internal_nodes)
+        ids = [internal_node.id for internal_node in internal_nodes]
+        edge_attribs_class_name = OperationalEdgeAttribs.__name__
+        self._internal_graph.add_edges_from(
+            (ids[start_index], ids[end_index],
+             {'__class__': edge_attribs_class_name, 'cost': cost, 'travel_time_min': travel_time})
+            for start_index, end_index, cost, travel_time in zip(np.asarray(start_indices).tolist(),
+                                                                 np.asarray(end_indices).tolist(),
+                                                                 np.asarray(costs).tolist(),
+                                                                 np.asarray(travel_times).tolist()))
 
     def calc_subgraph_in_time_window(self, time_window_scope: TimeWindowExtension) -> OperationalGraph:
-        subgraph = OperationalGraph()
-        nodes_at_time = []
-        for node in self._get_all_internal_nodes_map().values():
-            if node.time_window in time_window_scope:
-                nodes_at_time.append(node.id)
-                if type(node) is DeliveryRequest:
-                    subgraph._delivery_requests_map[node.id] = node
-                elif type(node) is DroneLoadingDock:
-                    subgraph._loading_docks_map[node.id] = node
-        extracted_subgraph = self._extract_internal_subgraph_of_nodes(nodes_at_time)
-        subgraph._internal_graph = extracted_subgraph
-        return subgraph
+        return self._create_subgraph_of_nodes([node.id for node in self._get_all_internal_nodes_map().values()
+                                               if node.time_window in time_window_scope])
+
+    def calc_subgraph_overlapping_time_window(self, time_window_scope: TimeWindowExtension) -> OperationalGraph:
+        return self._create_subgraph_of_nodes([node.id for node in self._get_all_internal_nodes_map().values()
+                                               if isinstance(node, DroneLoadingDock)
+                                               or not (node.time_window.since > time_window_scope.until
+                                                       or time_window_scope.since > node.time_window.until)])
 
     def calc_subgraph_below_priority(self, max_priority: int) -> OperationalGraph:
-        subgraph = OperationalGraph()
-        nodes_below_priority = []
-        for node in self._get_all_internal_nodes_map().values():
-            if node.priority < max_priority:
-                nodes_below_priority.append(node.id)
-                if type(node) is DeliveryRequest:
-                    subgraph._delivery_requests_map[node.id] = node
-                elif type(node) is DroneLoadingDock:
-                    subgraph._loading_docks_map[node.id] = node
-        extracted_subgraph = self._extract_internal_subgraph_of_nodes(nodes_below_priority)
-        subgraph._internal_graph = extracted_subgraph
-        return subgraph
+        return self._create_subgraph_of_nodes([node.id for node in self._get_all_internal_nodes_map().values()
+                                               if node.priority < max_priority])
 
     def calc_subgraph_within_polygon(self, boundary: Polygon2D) -> OperationalGraph:
-        subgraph = OperationalGraph()
-        nodes_within_polygon = []
-        for node in self._get_all_internal_nodes_map().values():
-            if node.calc_location() in boundary:
-                nodes_within_polygon.append(node.id)
-                if type(node) is DeliveryRequest:
-                    subgraph._delivery_requests_map[node.id] = node
-                elif type(node) is DroneLoadingDock:
-                    subgraph._loading_docks_map[node.id] = node
-        extracted_subgraph = self._extract_internal_subgraph_of_nodes(nodes_within_polygon)
-        subgraph._internal_graph = extracted_subgraph
-        return subgraph
+        within_boundary = self._calc_within_polygon_mask(boundary)
+        return self._create_subgraph_of_nodes([id_ for id_ in self._get_all_internal_nodes_map().keys()
+                                               if within_boundary[self._nodes_indices[id_]]])
 
     def create_subgraph_without_nodes(self, nodes_to_remove: [OperationalNode]):
-        internal_nodes_to_remove = [node.internal_node for node in nodes_to_remove]
-        subgraph = OperationalGraph()
-        new_nodes = []
-        for node in self._get_all_internal_nodes_map().values():
-            if node not in internal_nodes_to_remove:
-                new_nodes.append(node.id)
-                if type(node) is DeliveryRequest:
-                    subgraph._delivery_requests_map[node.id] = node
-                elif type(node) is DroneLoadingDock:
-                    subgraph._loading_docks_map[node.id] = node
-        extracted_subgraph = self._extract_internal_subgraph_of_nodes(new_nodes)
-        subgraph._internal_graph = extracted_subgraph
-        return subgraph
+        ids_to_remove = {node.internal_node.id for node in nodes_to_remove}
+        return self._create_subgraph_of_nodes([id_ for id_ in self._get_all_internal_nodes_map().keys()
+                                               if id_ not in ids_to_remove])
+
+    def copy_sharing_internal_nodes(self) -> OperationalGraph:
+        """
+        Copies only the graph structure, sharing the delivery requests and loading docks with this graph, so that nodes
+        and edges can be removed from the copy without deep copying every entity.
+        """
+        new_copy = OperationalGraph()
+        new_copy._internal_graph = self._internal_graph.copy()
+        self._copy_structure_to(new_copy)
+        return new_copy
+
+    def _copy_structure_to(self, graph: OperationalGraph) -> None:
+        graph._loading_docks_map = copy(self._loading_docks_map)
+        graph._delivery_requests_map = copy(self._delivery_requests_map)
+        graph._nodes_ids = list(self._nodes_ids)
+        graph._nodes_indices = dict(self._nodes_indices)
+        graph._original_nodes_indices = list(self._original_nodes_indices)
+        graph._num_of_original_nodes = self._num_of_original_nodes
 
     def to_cost_numpy_array(self, nonedge: float, dtype) -> np.ndarray:
         costs = to_numpy_array(self._internal_graph, weight="cost", nonedge=nonedge, dtype=dtype)
@@ -252,8 +266,63 @@ class OperationalGraph(JsonableBaseEntity):
             self._zero_nodes_travel_time_to_themselves(travel_times)
         return travel_times
 
+    @property
+    def num_nodes(self) -> int:
+        return len(self._nodes_ids)
+
+    @property
+    def num_edges(self) -> int:
+        return self._internal_graph.number_of_edges()
+
+    @property
+    def locations(self) -> np.ndarray:
+        all_internal_nodes = self._get_all_internal_nodes_map()
+        return np.array([all_internal_nodes[id_].calc_location_xy() for id_ in self._nodes_ids],
+                        dtype=np.float64).reshape(-1, 2)
+
+    @property
+    def priorities(self) -> np.ndarray:
+        all_internal_nodes = self._get_all_internal_nodes_map()
+        return np.array([all_internal_nodes[id_].priority for id_ in self._nodes_ids], dtype=np.int64)
+
+    @property
+    def package_demands(self) -> np.ndarray:
+        all_internal_nodes = self._get_all_internal_nodes_map()
+        return np.array([calc_package_demands(all_internal_nodes[id_]) for id_ in self._nodes_ids],
+                        dtype=np.int64).reshape(-1, len(PackageType))
+
+    def to_csr_arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns the edges row by row in the nodes order, as (indptr, targets, costs, travel times) arrays.
+        """
+        indptr = [0]
+        targets, costs, travel_times = [], [], []
+        for id_ in self._nodes_ids:
+            for target_id, attributes in self._internal_graph.adj[id_].items():
+                targets.append(self._nodes_indices[target_id])
+                costs.append(attributes['cost'])
+                travel_times.append(attributes['travel_time_min'])
+            indptr.append(len(targets))
+        return (np.array(indptr, dtype=np.int32), np.array(targets, dtype=np.int32),
+                np.array(costs, dtype=np.float64), np.array(travel_times, dtype=np.float64))
+
+    def get_relative_time_windows_in_min(self, zero_time: DateTimeExtension) -> np.ndarray:
+        time_windows_sec = np.array([node.internal_node.time_window.get_epoch_seconds() for node in self.nodes],
+                                    dtype=np.int64).reshape(-1, 2)
+        return (time_windows_sec - zero_time.get_epoch_seconds()) / SEC_IN_MIN
+
     def get_node_index(self, node: OperationalNode) -> int:
-        return self.nodes.index(node)
+        return self.get_node_index_by_id(node.internal_node.id)
+
+    def get_original_node_index(self, index: int) -> int:
+        return self._original_nodes_indices[index]
+
+    def get_original_nodes_indices(self) -> List[int]:
+        return list(self._original_nodes_indices)
+
+    def reset_original_nodes_indices(self) -> None:
+        self._original_nodes_indices = list(range(len(self._nodes_ids)))
+        self._num_of_original_nodes = len(self._nodes_ids)
 
     def get_all_delivery_requests(self):
         return list(self._delivery_requests_map.values())
@@ -262,21 +331,22 @@ class OperationalGraph(JsonableBaseEntity):
         return list(self._loading_docks_map.values())
 
     def get_delivery_request(self, index: int):
-        id_ = list(self._internal_graph.nodes(data=False))[index]
-        return self._delivery_requests_map[id_]
+        return self._delivery_requests_map[self._nodes_ids[index]]
 
     def get_loading_dock(self, index: int):
-        id_ = list(self._internal_graph.nodes(data=False))[index]
-        return self._loading_docks_map[id_]
+        return self._loading_docks_map[self._nodes_ids[index]]
 
     def get_node_index_by_id(self, id_: EntityID) -> int:
-        index = list(self._internal_graph.nodes(data=False)).index(id_)
+        index = self._nodes_indices.get(id_)
+        if index is None:
+            raise ValueError(f"{id_} is not in graph")
         return index
 
-    @lru_cache()
+    def has_node_id(self, id_: EntityID) -> bool:
+        return id_ in self._nodes_indices
+
     def get_nodes_indices_by_ids(self, ids: tuple(EntityID)) -> [int]:
-        graph_ids = list(self._internal_graph.nodes(data=False))
-        return [graph_ids.index(id_) for id_ in ids]
+        return [self.get_node_index_by_id(id_) for id_ in ids]
 
     def get_all_delivery_requests_indices(self) -> [int]:
         return self.get_nodes_indices_by_ids(tuple(self._delivery_requests_map.keys()))
@@ -288,16 +358,97 @@ class OperationalGraph(JsonableBaseEntity):
         for dr in delivery_requests:
             self._delivery_requests_map.pop(dr.id)
             self._internal_graph.remove_node(dr.id)
+        self._unregister_nodes_ids([dr.id for dr in delivery_requests])
 
     def remove_operational_nodes(self, operational_nodes: [OperationalNode]):
-        self._internal_graph.remove_nodes_from(operational_nodes)
+        ids = [operational_node.internal_node.id for operational_node in operational_nodes]
+        for id_ in ids:
+            self._delivery_requests_map.pop(id_, None)
+            self._loading_docks_map.pop(id_, None)
+        self._internal_graph.remove_nodes_from(ids)
+        self._unregister_nodes_ids(ids)
 
-    def _zero_nodes_travel_time_to_themselves(self, travel_times: np.ndarray) -> None:
-        for i in range(len(self._internal_graph.nodes)):
-            travel_times[i, i] = 0
+    @staticmethod
+    def _zero_nodes_travel_time_to_themselves(travel_times: np.ndarray) -> None:
+        np.fill_diagonal(travel_times, 0)
+
+    def _calc_within_polygon_mask(self, boundary: Polygon2D) -> np.ndarray:
+        locations = self.locations
+        bbox = boundary.calc_bbox()
+        within_boundary = (bbox.min_x <= locations[:, 0]) & (locations[:, 0] <= bbox.max_x) & \
+                          (bbox.min_y <= locations[:, 1]) & (locations[:, 1] <= bbox.max_y)
+        for index in np.flatnonzero(within_boundary):
+            within_boundary[index] = create_point_2d(*locations[index].tolist()) in boundary
+        return within_boundary
+
+    def _create_subgraph_of_nodes(self, ids: [EntityID]) -> OperationalGraph:
+        subgraph = OperationalGraph()
+        self._copy_nodes_maps_to(subgraph, ids)
+        subgraph._set_internal_graph(self._extract_internal_subgraph_of_nodes(ids))
+        self._copy_original_nodes_indices_to(subgraph)
+        return subgraph
 
-    def _extract_internal_subgraph_of_nodes(self, nodes_in_subgraph: [OperationalNode]) -> DiGraph:
-        return DiGraph(self._internal_graph.subgraph(nodes_in_subgraph))
+    def _copy_original_nodes_indices_to(self, graph: OperationalGraph) -> None:
+        graph._original_nodes_indices = [self._original_nodes_indices[self._nodes_indices[id_]]
+                                         for id_ in graph._nodes_ids]
+        graph._num_of_original_nodes = self._num_of_original_nodes
+
+    def _copy_nodes_maps_to(self, subgraph: OperationalGraph, ids: [EntityID]) -> None:
+        for id_ in ids:
+            if id_ in self._delivery_requests_map:
+                subgraph._delivery_requests_map[id_] = self._delivery_requests_map[id_]
+            elif id_ in self._loading_docks_map:
+                subgraph._loading_docks_map[id_] = self._loading_docks_map[id_]
+
+    def _extract_internal_subgraph_of_nodes(self, nodes_in_subgraph: [EntityID]) -> DiGraph:
+        nodes_in_subgraph = set(nodes_in_subgraph)
+        internal_subgraph = DiGraph()
+        internal_subgraph.add_nodes_from(id_ for id_ in self._internal_graph.nodes if id_ in nodes_in_subgraph)
+        internal_subgraph.add_edges_from((start_id, end_id, attributes)
+                                         for start_id in internal_subgraph.nodes
+                                         for end_id, attributes in self._internal_graph.adj[start_id].items()
+                                         if end_id in nodes_in_subgraph)
+        return internal_subgraph
+
+    def _set_internal_graph(self, internal_graph: DiGraph) -> None:
+        self._internal_graph = internal_graph
+        self._rebuild_nodes_registry()
+
+    def _add_missing_internal_nodes(self, internal_nodes: [Union[DeliveryRequest, DroneLoadingDock]]) -> None:
+        self.add_operational_nodes([OperationalNode(internal_node) for internal_node in internal_nodes
+                                    if internal_node.id not in self._nodes_indices])
+
+    def _register_node_id(self, id_: EntityID) -> None:
+        if id_ not in self._nodes_indices:
+            self._nodes_indices[id_] = len(self._nodes_ids)
+            self._nodes_ids.append(id_)
+            self._original_nodes_indices.append(self._num_of_original_nodes)
+            self._num_of_original_nodes += 1
+
+    def _unregister_nodes_ids(self, ids: [EntityID]) -> None:
+        """
+        Compacts the nodes registry in a single pass from the first removed index, so indices stay contiguous and the
+        cost is linear in the number of nodes after the first removed one.
+        """
+        removed_indices = {self._nodes_indices.pop(id_) for id_ in set(ids) if id_ in self._nodes_indices}
+        if len(removed_indices) == 0:
+            return
+        kept_index = min(removed_indices)
+        for index in range(kept_index, len(self._nodes_ids)):
+            if index in removed_indices:
+                continue
+            id_ = self._nodes_ids[index]
+            self._nodes_ids[kept_index] = id_
+            self._original_nodes_indices[kept_index] = self._original_nodes_indices[index]
+            self._nodes_indices[id_] = kept_index
+            kept_index += 1
+        del self._nodes_ids[kept_index:]
+        del self._original_nodes_indices[kept_index:]
+
+    def _rebuild_nodes_registry(self) -> None:
+        self._nodes_ids = list(self._internal_graph.nodes(data=False))
+        self._nodes_indices = {id_: index for index, id_ in enumerate(self._nodes_ids)}
+        self.reset_original_nodes_indices()
 
     def _get_all_internal_nodes_map(self):
         all_internal_nodes = copy(self._loading_docks_map)
@@ -311,7 +462,7 @@ class OperationalGraph(JsonableBaseEntity):
         return f"OperationalGraph: {self.__dict__()}"
 
     def __eq__(self, other):
-        return all([is_isomorphic(self._internal_graph, other._internal_graph),
+        return all([is_isomorphic(self.get_internal_graph(), other.get_internal_graph()),
                     self._delivery_requests_map == other._delivery_requests_map,
                     self._loading_docks_map == other._loading_docks_map])
 
@@ -319,15 +470,17 @@ class OperationalGraph(JsonableBaseEntity):
         if memodict is None:
             memodict = {}
         new_copy = OperationalGraph()
-        new_copy._internal_graph = deepcopy(self._internal_graph)
+        new_copy._set_internal_graph(deepcopy(self._internal_graph))
         new_copy._loading_docks_map = deepcopy(self._loading_docks_map)
         new_copy._delivery_requests_map = deepcopy(self._delivery_requests_map)
+        new_copy._original_nodes_indices = list(self._original_nodes_indices)
+        new_copy._num_of_original_nodes = self._num_of_original_nodes
         memodict[id(self)] = new_copy
         return new_copy
 
     def __dict__(self):
         d = {'__class__': type(self).__name__,
-             'internal_graph': json_graph.node_link_data(self._internal_graph),
+             'internal_graph': json_graph.node_link_data(self.get_internal_graph()),
              'loading_docks_map': [dock.__dict__() for dock in list(self._loading_docks_map.values())],
              'delivery_requests_map': [request.__dict__() for request in list(self._delivery_requests_map.values())]}
         return d
@@ -359,7 +512,7 @@ class OperationalGraph(JsonableBaseEntity):
                 new_link_dict['target'] = EntityID.dict_to_obj(link_dict['target'])
             links.append(new_link_dict)
         graph_dict['links'] = links
-        og._internal_graph = json_graph.node_link_graph(graph_dict)
+        og._set_internal_graph(json_graph.node_link_graph(graph_dict))
         loading_docks = [DroneLoadingDock.dict_to_obj(dock)
                          for dock in dict_input['loading_docks_map']]
         og._loading_docks_map = {dock.id: dock for dock in loading_docks}
@@ -382,6 +535,72 @@ class OperationalGraph(JsonableBaseEntity):
     def to_json(self, file_path: Path = None, sort_keys=False, **kwargs) -> Union[str, None]:
         return super().to_json(file_path, sort_keys, default=self.encode_node, **kwargs)
 
+    def to_npz(self, file_path: Path) -> None:
+        """
+        Saves the graph in a binary format: the nodes' entities as a single JSON payload, in the graph's nodes order,
+        and the edges as (source index, target index, cost, travel time) arrays.
+        """
+        internal_nodes_json = json.dumps([node.internal_node.__dict__() for node in self.nodes], ensure_ascii=False)
+        edge_sources, edge_targets, edge_costs, edge_travel_times = self._get_edges_arrays()
+        save_npz(file_path, {'graph_format_version': np.array(GRAPH_NPZ_FORMAT_VERSION),
+                             'internal_nodes_json': np.frombuffer(internal_nodes_json.encode('utf-8'), dtype=np.uint8),
+                             'edge_sources': edge_sources,
+                             'edge_targets': edge_targets,
+                             'edge_costs': edge_costs,
+                             'edge_travel_times': edge_travel_times})
+
+    @classmethod
+    def from_npz(cls, file_path: Path, mmap: bool = True) -> OperationalGraph:
+        """
+        Loads a graph saved by to_npz (of any graph class). With mmap, the edges arrays are memory mapped copy on
+        write, instead of read into memory, wherever the graph class keeps them as arrays.
+        """
+        arrays = load_npz(file_path, mmap_mode='c' if mmap else None)
+        if int(arrays['graph_format_version']) != GRAPH_NPZ_FORMAT_VERSION:
+            raise UnsupportedGraphFormatException(f"Unsupported graph npz format version: "
+                                                  f"{int(arrays['graph_format_version'])}")
+        internal_nodes = [_internal_node_dict_to_obj(internal_node_dict) for internal_node_dict in
+                          json.loads(arrays['internal_nodes_json'].tobytes().decode('utf-8'))]
+        graph = cls._create_empty_for_edges_arrays(arrays['edge_costs'])
+        graph.add_operational_nodes([OperationalNode(internal_node) for internal_node in internal_nodes])
+        graph._add_edges_from_arrays(internal_nodes, arrays['edge_sources'], arrays['edge_targets'],
+                                     arrays['edge_costs'], arrays['edge_travel_times'])
+        return graph
+
+    @classmethod
+    def _create_empty_for_edges_arrays(cls, _edge_costs: np.ndarray) -> OperationalGraph:
+        return cls()
+
+    def _get_edges_arrays(self):
+        num_edges = self._internal_graph.number_of_edges()
+        edges = self._internal_graph.edges(data=True)
+        return (np.fromiter((self._nodes_indices[start_id] for start_id, _, _ in edges), dtype=np.int32,
+                            count=num_edges),
+                np.fromiter((self._nodes_indices[end_id] for _, end_id, _ in edges), dtype=np.int32,
+                            count=num_edges),
+                np.fromiter((attribs['cost'] for _, _, attribs in edges), dtype=np.float64, count=num_edges),
+                np.fromiter((attribs['travel_time_min'] for _, _, attribs in edges), dtype=np.float64,
+                            count=num_edges))
+
+    def _add_edges_from_arrays(self, internal_nodes: [Union[DeliveryRequest, DroneLoadingDock]],
+                               edge_sources: np.ndarray, edge_targets: np.ndarray,
+                               edge_costs: np.ndarray, edge_travel_times: np.ndarray) -> None:
+        self.add_operational_edges_from_arrays(internal_nodes, edge_sources, edge_targets, edge_costs,
+                                               edge_travel_times)
+
+
+def _internal_node_dict_to_obj(internal_node_dict) -> Union[DeliveryRequest, DroneLoadingDock]:
+    if internal_node_dict['__class__'] == DroneLoadingDock.__name__:
+        return DroneLoadingDock.dict_to_obj(internal_node_dict)
+    return DeliveryRequest.dict_to_obj(internal_node_dict)
+
+
+def calc_package_demands(internal_node: Union[DeliveryRequest, DroneLoadingDock]) -> List[int]:
+    if isinstance(internal_node, DeliveryRequest):
+        return [internal_node.delivery_options[0].get_package_type_amount(package_type)
+                for package_type in PackageType]
+    return [0] * len(PackageType)
+
 
 def assert_node_is_temporal(internal_node) -> None:
     if not issubclass(type(internal_node), Temporal):
@@ -399,3 +618,7 @@ class NonLocalizableNodeException(Exception):
 
 class NonTemporalNodeException(Exception):
     pass
+
+
+class UnsupportedGraphFormatException(Exception):
+    pass
@@ -0,0 +1,170 @@
+import unittest
+from copy import deepcopy
+from datetime import datetime
+from pathlib import Path
+from random import Random
+
+import numpy as np
+from numpy.testing import assert_array_equal
+
+from common.entities.base_entities.delivery_request import DeliveryRequest
+from common.entities.base_entities.entity_distribution.delivery_request_distribution import DeliveryRequestDistribution
+from common.entities.base_entities.entity_distribution.drone_loading_dock_distribution import \
+    DroneLoadingDockDistribution
+from common.entities.base_entities.package import PackageType
+from common.entities.base_entities.temporal import DateTimeExtension
+from common.graph.operational.columnar_operational_graph import ColumnarOperationalGraph
+from common.graph.operational.export_ortools_graph import OrtoolsGraphExporter
+from common.graph.operational.graph_creator import build_fully_connected_graph
+from common.graph.operational.operational_graph import OperationalGraph, OperationalNode, OperationalEdge, \
+    OperationalEdgeAttribs
+from geometry.geo_factory import create_point_2d, create_polygon_2d
+
+
+class ColumnarOperationalGraphTestCases(unittest.TestCase):
+    temp_path = Path('common/graph/operational/test/test_columnar_operational_graph.json')
+    temp_npz_path = Path('common/graph/operational/test/test_columnar_operational_graph.npz')
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dr_dataset_random = DeliveryRequestDistribution().choose_rand(random=Random(100),
+                                                                          amount={DeliveryRequest: 8})
+        cls.dld_dataset_random = DroneLoadingDockDistribution().choose_rand(random=Random(100), amount=2)
+        cls.graph = OperationalGraph()
+        cls.graph.add_drone_loading_docks(cls.dld_dataset_random)
+        cls.graph.add_delivery_requests(cls.dr_dataset_random)
+        build_fully_connected_graph(cls.graph)
+        cls.columnar_graph = ColumnarOperationalGraph.from_operational_graph(cls.graph, edge_attribs_dtype=np.float64)
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls.temp_path.exists():
+            cls.temp_path.unlink()
+        if cls.temp_npz_path.exists():
+            cls.temp_npz_path.unlink()
+
+    def test_nodes_and_edges_are_kept(self):
+        self.assertEqual(self.graph.nodes, self.columnar_graph.nodes)
+        self.assertEqual(len(self.graph.edges), self.columnar_graph.num_edges)
+        for edge, columnar_edge in zip(self.graph.edges, self.columnar_graph.edges):
+            self.assertEqual(edge.start_node, columnar_edge.start_node)
+            self.assertEqual(edge.end_node, columnar_edge.end_node)
+            self.assertEqual(edge.attributes, columnar_edge.attributes)
+
+    def test_numpy_arrays_equal_to_operational_graph(self):
+        assert_array_equal(self.graph.to_cost_numpy_array(nonedge=np.inf, dtype=np.float64),
+                           self.columnar_graph.to_cost_numpy_array(nonedge=np.inf, dtype=np.float64))
+        assert_array_equal(self.graph.to_travel_time_numpy_array(nonedge=0, dtype=np.float64),
+                           self.columnar_graph.to_travel_time_numpy_array(nonedge=0, dtype=np.float64))
+        exporter = OrtoolsGraphExporter()
+        assert_array_equal(exporter.export_travel_costs(self.graph),
+                           exporter.export_travel_costs(self.columnar_graph))
+
+    def test_node_columns(self):
+        zero_time = DateTimeExtension.from_dt(datetime(2020, 1, 23, 11, 30, 00))
+        exporter = OrtoolsGraphExporter()
+        assert_array_equal(exporter.export_priorities(self.graph), self.columnar_graph.priorities)
+        assert_array_equal(exporter.export_time_windows(self.graph, zero_time),
+                           self.columnar_graph.get_relative_time_windows_in_min(zero_time).astype(int))
+        assert_array_equal(exporter.export_package_type_demands(self.graph, PackageType.LARGE),
+                           self.columnar_graph.get_package_type_demands(PackageType.LARGE))
+        self.assertEqual((len(self.graph.nodes), 2), self.columnar_graph.locations.shape)
+        assert_array_equal(self.graph.locations, self.columnar_graph.locations)
+        with self.assertRaises(ValueError):
+            self.columnar_graph.priorities[0] = 1
+
+    def test_csr_arrays(self):
+        indptr, indices, costs, travel_times = self.columnar_graph.to_csr_arrays()
+        num_nodes = len(self.graph.nodes)
+        self.assertEqual(num_nodes + 1, len(indptr))
+        self.assertEqual(num_nodes * (num_nodes - 1), indptr[-1])
+        dense_costs = self.graph.to_cost_numpy_array(nonedge=np.inf, dtype=np.float64)
+        for source in range(num_nodes):
+            for i in range(indptr[source], indptr[source + 1]):
+                self.assertEqual(dense_costs[source, indices[i]], costs[i])
+
+    def test_duplicate_edges_keep_last_attributes(self):
+        graph = ColumnarOperationalGraph()
+        node_0 = OperationalNode(self.dr_dataset_random[0])
+        node_1 = OperationalNode(self.dr_dataset_random[1])
+        graph.add_operational_edges([OperationalEdge(node_0, node_1, OperationalEdgeAttribs(1, 2)),
+                                     OperationalEdge(node_1, node_0, OperationalEdgeAttribs(3, 4))])
+        graph.add_operational_edges([OperationalEdge(node_0, node_1, OperationalEdgeAttribs(5, 6))])
+        self.assertEqual([node_0, node_1], graph.nodes)
+        self.assertEqual(2, graph.num_edges)
+        self.assertEqual(OperationalEdgeAttribs(5, 6), graph.edges[0].attributes)
+        self.assertEqual(OperationalEdgeAttribs(3, 4), graph.edges[1].attributes)
+
+    def test_subgraphs(self):
+        max_priority = 5
+        subgraph = self.graph.calc_subgraph_below_priority(max_priority)
+        columnar_subgraph = self.columnar_graph.calc_subgraph_below_priority(max_priority)
+        self.assertIsInstance(columnar_subgraph, ColumnarOperationalGraph)
+        self.assertEqual(subgraph.nodes, columnar_subgraph.nodes)
+        assert_array_equal(subgraph.to_cost_numpy_array(nonedge=np.inf, dtype=np.float64),
+                           columnar_subgraph.to_cost_numpy_array(nonedge=np.inf, dtype=np.float64))
+        nodes_to_remove = [OperationalNode(dr) for dr in self.dr_dataset_random[2:5]]
+        subgraph = self.graph.create_subgraph_without_nodes(nodes_to_remove)
+        columnar_subgraph = self.columnar_graph.create_subgraph_without_nodes(nodes_to_remove)
+        self.assertEqual(subgraph.nodes, columnar_subgraph.nodes)
+        assert_array_equal(subgraph.to_travel_time_numpy_array(nonedge=np.inf, dtype=np.float64),
+                           columnar_subgraph.to_travel_time_numpy_array(nonedge=np.inf, dtype=np.float64))
+        boundary = create_polygon_2d([create_point_2d(-10, -10), create_point_2d(-10, 75),
+                                      create_point_2d(30, 75), create_point_2d(30, -10)])
+        subgraph = self.graph.calc_subgraph_within_polygon(boundary)
+        columnar_subgraph = self.columnar_graph.calc_subgraph_within_polygon(boundary)
+        self.assertEqual([node for node in self.graph.nodes if node.internal_node.calc_location() in boundary],
+                         subgraph.nodes)
+        self.assertEqual(subgraph.nodes, columnar_subgraph.nodes)
+
+    def test_remove_nodes(self):
+        columnar_graph = deepcopy(self.columnar_graph)
+        columnar_graph.remove_delivery_requests(self.dr_dataset_random[:3])
+        columnar_graph.remove_operational_nodes([OperationalNode(self.dld_dataset_random[0])])
+        num_nodes = len(self.graph.nodes) - 4
+        self.assertEqual(num_nodes, len(columnar_graph.nodes))
+        self.assertEqual(num_nodes * (num_nodes - 1), columnar_graph.num_edges)
+        self.assertEqual(self.dld_dataset_random[1], columnar_graph.get_loading_dock(0))
+        self.assertEqual(self.dr_dataset_random[3], columnar_graph.get_delivery_request(1))
+        self.assertEqual([1] + list(range(5, len(self.graph.nodes))), columnar_graph.get_original_nodes_indices())
+        self.assertEqual(len(self.graph.nodes), len(self.columnar_graph.nodes))
+
+    def test_copy_sharing_internal_nodes(self):
+        columnar_graph = self.columnar_graph.copy_sharing_internal_nodes()
+        self.assertIs(self.columnar_graph.get_delivery_request(2), columnar_graph.get_delivery_request(2))
+        columnar_graph.remove_delivery_requests(self.dr_dataset_random[:3])
+        columnar_graph.add_operational_edges([OperationalEdge(OperationalNode(self.dld_dataset_random[0]),
+                                                              OperationalNode(self.dld_dataset_random[1]),
+                                                              OperationalEdgeAttribs(1, 1))])
+        self.assertEqual(len(self.graph.nodes) - 3, len(columnar_graph.nodes))
+        self.assertEqual(len(self.graph.nodes), len(self.columnar_graph.nodes))
+        self.assertEqual(self.graph.edges, self.columnar_graph.edges)
+
+    def test_columnar_graph_is_jsonable(self):
+        self.columnar_graph.to_json(self.temp_path)
+        columnar_graph_from_json = ColumnarOperationalGraph.from_json(self.temp_path)
+        self.assertIsInstance(columnar_graph_from_json, ColumnarOperationalGraph)
+        self.assertEqual(self.columnar_graph, columnar_graph_from_json)
+        self.assertEqual(self.graph, columnar_graph_from_json.to_operational_graph())
+
+    def test_columnar_graph_to_npz(self):
+        self.columnar_graph.to_npz(self.temp_npz_path)
+        columnar_graph_from_npz = ColumnarOperationalGraph.from_npz(self.temp_npz_path)
+        self.assertIsInstance(columnar_graph_from_npz, ColumnarOperationalGraph)
+        self.assertEqual(self.columnar_graph.nodes, columnar_graph_from_npz.nodes)
+        self.assertEqual(self.columnar_graph.edges, columnar_graph_from_npz.edges)
+        self.assertTrue(all(_is_memory_mapped(arr) for arr in columnar_graph_from_npz.to_csr_arrays()[1:]))
+        self.assertEqual(self.graph, OperationalGraph.from_npz(self.temp_npz_path))
+        first_edge = self.columnar_graph.edges[0]
+        columnar_graph_from_npz.add_operational_edges([OperationalEdge(first_edge.start_node, first_edge.end_node,
+                                                                       OperationalEdgeAttribs(1, 2))])
+        self.assertEqual(OperationalEdgeAttribs(1, 2), columnar_graph_from_npz.edges[0].attributes)
+        self.assertEqual(self.columnar_graph.edges[1:], columnar_graph_from_npz.edges[1:])
+
+
+def _is_memory_mapped(arr: np.ndarray) -> bool:
+    while isinstance(arr, np.ndarray):
+        if isinstance(arr, np.memmap):
+            return True
+        arr = arr.base
+    return False
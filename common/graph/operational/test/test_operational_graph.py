@@ -1,6 +1,7 @@
 import itertools
 import os
 import unittest
+from copy import deepcopy
 from datetime import time, date, timedelta, datetime
 from math import sqrt
 from random import Random
@@ -27,8 +28,10 @@ from common.entities.base_entities.zone import Zone
 from common.entities.generator.delivery_request_generator import DeliveryRequestDatasetGenerator, \
     DeliveryRequestDatasetStructure
 from common.graph.operational.graph_creator import add_locally_connected_dr_graph, add_fully_connected_loading_docks, \
-    create_clustered_delivery_requests_graph
-from common.graph.operational.graph_utils import sort_delivery_requests_by_zone, split_delivery_requests_into_clusters
+    create_clustered_delivery_requests_graph, build_time_overlapping_dependent_connected_graph, \
+    add_time_overlapping_connected_delivery_requests
+from common.graph.operational.graph_utils import sort_delivery_requests_by_zone, split_delivery_requests_into_clusters, \
+    has_overlapping_time_window, calc_cost, calc_travel_time_in_min, calc_distance
 from common.graph.operational.operational_graph import OperationalEdge, \
     OperationalEdgeAttribs, OperationalNode, NonLocalizableNodeException, NonTemporalNodeException
 from common.graph.operational.operational_graph import OperationalGraph
@@ -143,6 +146,68 @@ class BasicDeliveryRequestGraphTestCases(unittest.TestCase):
         self.assertEqual(len(regional_dr_dataset) + len(dld_dataset), len(graph.nodes))
         self.assertEqual(0, len(graph.edges))
 
+    def test_time_overlapping_graph_edges_match_pairwise_calculation(self):
+        graph = OperationalGraph()
+        graph.add_drone_loading_docks(self.dld_dataset_random)
+        graph.add_delivery_requests(self.dr_dataset_local_region_1_morning + self.dr_dataset_afternoon)
+        build_time_overlapping_dependent_connected_graph(graph, edge_cost_factor=2.0, edge_travel_time_factor=3.0)
+        internal_nodes = [node.internal_node for node in graph.nodes]
+        expected_edges = {(start.id, end.id): OperationalEdgeAttribs(calc_cost(start, end, 2.0),
+                                                                     calc_travel_time_in_min(start, end, 3.0))
+                          for start, end in itertools.permutations(internal_nodes, 2)
+                          if has_overlapping_time_window(start, end)}
+        actual_edges = {(edge.start_node.internal_node.id, edge.end_node.internal_node.id): edge.attributes
+                        for edge in graph.edges}
+        self.assertEqual(expected_edges, actual_edges)
+
+    def test_added_time_overlapping_delivery_requests_edges_match_built_graph(self):
+        graph = OperationalGraph()
+        graph.add_drone_loading_docks(self.dld_dataset_random)
+        graph.add_delivery_requests(self.dr_dataset_local_region_1_morning)
+        build_time_overlapping_dependent_connected_graph(graph, edge_cost_factor=2.0, edge_travel_time_factor=3.0)
+        add_time_overlapping_connected_delivery_requests(graph, self.dr_dataset_afternoon, edge_cost_factor=2.0,
+                                                         edge_travel_time_factor=3.0)
+        built_graph = OperationalGraph()
+        built_graph.add_drone_loading_docks(self.dld_dataset_random)
+        built_graph.add_delivery_requests(self.dr_dataset_local_region_1_morning + self.dr_dataset_afternoon)
+        build_time_overlapping_dependent_connected_graph(built_graph, edge_cost_factor=2.0,
+                                                         edge_travel_time_factor=3.0)
+        self.assertEqual({(edge.start_node.internal_node.id, edge.end_node.internal_node.id): edge.attributes
+                          for edge in built_graph.edges},
+                         {(edge.start_node.internal_node.id, edge.end_node.internal_node.id): edge.attributes
+                          for edge in graph.edges})
+
+    def test_local_graph_edges_match_pairwise_calculation(self):
+        region_dataset = self.dr_dataset_local_region_1_morning + self.dr_dataset_local_region_2_morning
+        max_distance_km = 60
+        graph = OperationalGraph()
+        add_locally_connected_dr_graph(graph, region_dataset, max_distance_to_connect_km=max_distance_km)
+        expected_edges = {(start.id, end.id): OperationalEdgeAttribs(calc_cost(start, end),
+                                                                     calc_travel_time_in_min(start, end))
+                          for start, end in itertools.permutations(region_dataset, 2)
+                          if 0 < calc_distance(start, end) <= max_distance_km
+                          and has_overlapping_time_window(start, end)}
+        actual_edges = {(edge.start_node.internal_node.id, edge.end_node.internal_node.id): edge.attributes
+                        for edge in graph.edges}
+        self.assertGreater(len(expected_edges), 0)
+        self.assertEqual(expected_edges, actual_edges)
+
+    def test_sort_delivery_requests_by_zone(self):
+        delivery_requests = self.dr_dataset_local_region_1_morning + self.dr_dataset_local_region_2_morning
+        zones = [Zone(create_polygon_2d([create_point_2d(100, 50), create_point_2d(100, 150),
+                                         create_point_2d(150, 150), create_point_2d(200, 50)]), EntityID(uuid4())),
+                 Zone(create_polygon_2d([create_point_2d(1100, 150), create_point_2d(1100, 1150),
+                                         create_point_2d(1200, 1150), create_point_2d(1200, 150)]), EntityID(uuid4())),
+                 Zone(create_polygon_2d([create_point_2d(0, 0), create_point_2d(0, 10),
+                                         create_point_2d(10, 10), create_point_2d(10, 0)]), EntityID(uuid4()))]
+        expected_delivery_requests_by_zone = {
+            zone_index: [dr for dr in delivery_requests if dr.calc_location() in zone.region]
+            for zone_index, zone in enumerate(zones)}
+        delivery_requests_by_zone = sort_delivery_requests_by_zone(delivery_requests, zones)
+        self.assertEqual(expected_delivery_requests_by_zone, delivery_requests_by_zone)
+        self.assertEqual(self.dr_dataset_local_region_2_morning, delivery_requests_by_zone[1])
+        self.assertEqual([], delivery_requests_by_zone[2])
+
     def test_delivery_request_graph_creation(self):
         drg = OperationalGraph()
         drg.add_delivery_requests(self.dr_dataset_morning)
@@ -188,6 +253,24 @@ class BasicDeliveryRequestGraphTestCases(unittest.TestCase):
         node_in_time_window_morning_graph = _get_dr_from_dr_graph(drg_morning_subgraph_of_full_day)
         self.assertEqual(nodes_in_time_window_subgraph, node_in_time_window_morning_graph)
 
+    def test_calc_subgraph_overlapping_time_window(self):
+        drg_full_day = OperationalGraph()
+        drg_full_day.add_drone_loading_docks(self.dld_dataset_random)
+        drg_full_day.add_delivery_requests(self.dr_dataset_morning)
+        drg_full_day.add_delivery_requests(self.dr_dataset_afternoon)
+        end_of_morning_time_window = TimeWindowExtension(
+            since=DateTimeExtension(date(2021, 1, 1), time(9, 30, 0)),
+            until=DateTimeExtension(date(2021, 1, 1), time(12, 0, 0)))
+        noon_time_window = TimeWindowExtension(
+            since=DateTimeExtension(date(2021, 1, 1), time(12, 0, 0)),
+            until=DateTimeExtension(date(2021, 1, 1), time(16, 0, 0)))
+        end_of_morning_subgraph = drg_full_day.calc_subgraph_overlapping_time_window(end_of_morning_time_window)
+        noon_subgraph = drg_full_day.calc_subgraph_overlapping_time_window(noon_time_window)
+        self.assertEqual(self.dr_dataset_morning, end_of_morning_subgraph.get_all_delivery_requests())
+        self.assertEqual(self.dld_dataset_random, end_of_morning_subgraph.get_all_loading_docks())
+        self.assertEqual([], noon_subgraph.get_all_delivery_requests())
+        self.assertEqual(self.dld_dataset_random, noon_subgraph.get_all_loading_docks())
+
     def test_calc_subgraph_below_priority(self):
         drg_full_day = OperationalGraph()
         drg_full_day.add_delivery_requests(self.dr_dataset_top_priority)
@@ -201,6 +284,86 @@ class BasicDeliveryRequestGraphTestCases(unittest.TestCase):
         node_in_low_priority_graph = _get_dr_from_dr_graph(drg_low_priority_subgraph_of_full_day)
         self.assertEqual(nodes_in_low_priority_subgraph, node_in_low_priority_graph)
 
+    def test_node_indices_after_adding_nodes(self):
+        drg = OperationalGraph()
+        drg.add_drone_loading_docks(self.dld_dataset_random)
+        drg.add_delivery_requests(self.dr_dataset_random)
+        drg.add_delivery_requests(self.dr_dataset_random[:2])
+        self.assertEqual(len(self.dld_dataset_random) + len(self.dr_dataset_random), len(drg.nodes))
+        for index, node in enumerate(drg.nodes):
+            self.assertEqual(index, drg.get_node_index(node))
+            self.assertEqual(index, drg.get_node_index_by_id(node.internal_node.id))
+        self.assertEqual(self.dr_dataset_random[3],
+                         drg.get_delivery_request(len(self.dld_dataset_random) + 3))
+        self.assertEqual(self.dld_dataset_random[1], drg.get_loading_dock(1))
+        self.assertEqual(list(range(len(self.dld_dataset_random))), drg.get_all_loading_docks_indices())
+        with self.assertRaises(ValueError):
+            drg.get_node_index_by_id(self.dr_dataset_morning[0].id)
+
+    def test_node_indices_after_removing_nodes(self):
+        drg = OperationalGraph()
+        drg.add_drone_loading_docks(self.dld_dataset_random)
+        drg.add_delivery_requests(self.dr_dataset_random)
+        drg.remove_delivery_requests(self.dr_dataset_random[:2])
+        drg.remove_operational_nodes([OperationalNode(self.dld_dataset_random[0])])
+        self.assertEqual(len(self.dld_dataset_random) - 1 + len(self.dr_dataset_random) - 2, len(drg.nodes))
+        self.assertEqual(self.dld_dataset_random[1], drg.get_loading_dock(0))
+        self.assertEqual(self.dr_dataset_random[2], drg.get_delivery_request(len(self.dld_dataset_random) - 1))
+        for index, node in enumerate(drg.nodes):
+            self.assertEqual(index, drg.get_node_index(node))
+        with self.assertRaises(ValueError):
+            drg.get_node_index_by_id(self.dr_dataset_random[0].id)
+
+    def test_node_indices_after_removing_non_contiguous_nodes(self):
+        drg = OperationalGraph()
+        drg.add_drone_loading_docks(self.dld_dataset_random)
+        drg.add_delivery_requests(self.dr_dataset_random)
+        removed_delivery_requests = self.dr_dataset_random[1:8:3]
+        drg.remove_operational_nodes([OperationalNode(self.dld_dataset_random[1])] +
+                                     [OperationalNode(dr) for dr in removed_delivery_requests])
+        expected_internal_nodes = [dld for dld in self.dld_dataset_random if dld != self.dld_dataset_random[1]] + \
+                                  [dr for dr in self.dr_dataset_random if dr not in removed_delivery_requests]
+        self.assertEqual(expected_internal_nodes, [node.internal_node for node in drg.nodes])
+        for index, internal_node in enumerate(expected_internal_nodes):
+            self.assertEqual(index, drg.get_node_index_by_id(internal_node.id))
+        num_of_docks = len(self.dld_dataset_random)
+        self.assertEqual([index for index in range(num_of_docks + len(self.dr_dataset_random))
+                          if index != 1 and index - num_of_docks not in [1, 4, 7]],
+                         drg.get_original_nodes_indices())
+        for delivery_request in removed_delivery_requests:
+            self.assertFalse(drg.has_node_id(delivery_request.id))
+
+    def test_original_node_indices_after_removing_nodes(self):
+        drg = OperationalGraph()
+        drg.add_drone_loading_docks(self.dld_dataset_random)
+        drg.add_delivery_requests(self.dr_dataset_random)
+        num_of_docks = len(self.dld_dataset_random)
+        num_of_nodes = num_of_docks + len(self.dr_dataset_random)
+        drg.remove_delivery_requests(self.dr_dataset_random[:2])
+        drg.remove_operational_nodes([OperationalNode(self.dld_dataset_random[0])])
+        expected_original_indices = list(range(1, num_of_docks)) + list(range(num_of_docks + 2, num_of_nodes))
+        self.assertEqual(expected_original_indices, drg.get_original_nodes_indices())
+        subgraph = drg.create_subgraph_without_nodes([OperationalNode(self.dr_dataset_random[2])])
+        self.assertEqual(expected_original_indices[:num_of_docks - 1] + expected_original_indices[num_of_docks:],
+                         subgraph.get_original_nodes_indices())
+        self.assertEqual(num_of_docks + 3, subgraph.get_original_node_index(num_of_docks - 1))
+        self.assertEqual(drg.get_original_nodes_indices(), deepcopy(drg).get_original_nodes_indices())
+        drg.reset_original_nodes_indices()
+        self.assertEqual(list(range(len(drg.nodes))), drg.get_original_nodes_indices())
+
+    def test_node_indices_of_subgraph_without_nodes(self):
+        drg = OperationalGraph()
+        drg.add_drone_loading_docks(self.dld_dataset_random)
+        drg.add_delivery_requests(self.dr_dataset_random)
+        subgraph = drg.create_subgraph_without_nodes([OperationalNode(dr) for dr in self.dr_dataset_random[:3]])
+        self.assertEqual(len(self.dld_dataset_random) + len(self.dr_dataset_random) - 3, len(subgraph.nodes))
+        for index, node in enumerate(subgraph.nodes):
+            self.assertEqual(index, subgraph.get_node_index(node))
+        self.assertEqual(list(range(len(self.dld_dataset_random), len(subgraph.nodes))),
+                         subgraph.get_all_delivery_requests_indices())
+        self.assertEqual(len(self.dld_dataset_random) + len(self.dr_dataset_random),
+                         len(drg.get_all_delivery_requests_indices()) + len(drg.get_all_loading_docks_indices()))
+
     @unittest.skipIf(os.environ.get('NO_SLOW_TESTS', False), 'slow tests')
     def test_sub_graph_within_polygon(self):
         region_dataset = self.dr_dataset_local_region_1_morning + self.dr_dataset_local_region_2_morning
@@ -0,0 +1,115 @@
+import math
+import os
+import timeit
+import unittest
+from random import Random
+from uuid import uuid4
+
+from common.entities.base_entities.delivery_request import DeliveryRequest
+from common.entities.base_entities.entity_distribution.delivery_request_distribution import \
+    DeliveryRequestDistribution
+from common.entities.base_entities.entity_distribution.delivery_requestion_dataset_builder import \
+    build_delivery_request_distribution
+from common.entities.base_entities.entity_distribution.drone_loading_dock_distribution import \
+    DroneLoadingDockDistribution
+from common.entities.base_entities.entity_id import EntityID
+from common.entities.base_entities.zone import Zone
+from common.graph.operational.columnar_operational_graph import ColumnarOperationalGraph
+from common.graph.operational.graph_creator import build_package_time_dependent_connected_graph, \
+    add_locally_connected_dr_graph, add_fully_connected_loading_docks
+from common.graph.operational.graph_utils import sort_delivery_requests_by_zone
+from common.graph.operational.operational_graph import OperationalGraph
+from geometry.distribution.geo_distribution import UniformPointInBboxDistribution
+from geometry.geo_factory import create_polygon_2d, create_point_2d
+
+
+@unittest.skipUnless(os.environ.get('RUN_BENCHMARKS', False), 'benchmark')
+class OperationalGraphIndexBenchmark(unittest.TestCase):
+
+    def test_index_lookups_2k_delivery_requests(self):
+        self._benchmark_index_lookups(2000)
+
+    def test_index_lookups_10k_delivery_requests(self):
+        self._benchmark_index_lookups(10000)
+
+    def _benchmark_index_lookups(self, num_delivery_requests: int, repeats: int = 1000):
+        graph = _create_graph(num_delivery_requests)
+        random = Random(42)
+        nodes = graph.nodes
+        sampled_indices = [random.randrange(len(nodes)) for _ in range(repeats)]
+        sampled_nodes = [nodes[i] for i in sampled_indices]
+        dr_indices = graph.get_all_delivery_requests_indices()
+        sampled_dr_indices = [random.choice(dr_indices) for _ in range(repeats)]
+
+        node_index_sec = timeit.timeit(lambda: [graph.get_node_index(node) for node in sampled_nodes], number=1)
+        node_index_by_id_sec = timeit.timeit(
+            lambda: [graph.get_node_index_by_id(node.internal_node.id) for node in sampled_nodes], number=1)
+        delivery_request_sec = timeit.timeit(
+            lambda: [graph.get_delivery_request(i) for i in sampled_dr_indices], number=1)
+        all_indices_sec = timeit.timeit(graph.get_all_delivery_requests_indices, number=1)
+
+        print(f"\n{num_delivery_requests} delivery requests, {repeats} lookups:"
+              f"\n  get_node_index: {node_index_sec:.6f} sec"
+              f"\n  get_node_index_by_id: {node_index_by_id_sec:.6f} sec"
+              f"\n  get_delivery_request: {delivery_request_sec:.6f} sec"
+              f"\n  get_all_delivery_requests_indices: {all_indices_sec:.6f} sec")
+        self.assertEqual([graph.get_node_index(node) for node in sampled_nodes], sampled_indices)
+
+
+def _create_graph(num_delivery_requests: int) -> OperationalGraph:
+    graph = OperationalGraph()
+    graph.add_drone_loading_docks(DroneLoadingDockDistribution().choose_rand(random=Random(42), amount=10))
+    graph.add_delivery_requests(DeliveryRequestDistribution().choose_rand(
+        random=Random(42), amount={DeliveryRequest: num_delivery_requests}))
+    return graph
+
+
+@unittest.skipUnless(os.environ.get('RUN_BENCHMARKS', False), 'benchmark')
+class GraphCreationBenchmark(unittest.TestCase):
+
+    def test_graph_creation_5k_delivery_requests(self):
+        delivery_requests = build_delivery_request_distribution(
+            relative_pdp_location_distribution=UniformPointInBboxDistribution(min_x=0, max_x=100, min_y=0, max_y=100)
+        ).choose_rand(random=Random(42), amount={DeliveryRequest: 5000})
+        loading_docks = DroneLoadingDockDistribution().choose_rand(random=Random(42), amount=10)
+        for graph_class in [OperationalGraph, ColumnarOperationalGraph]:
+            graph = graph_class()
+            graph.add_drone_loading_docks(loading_docks)
+            graph.add_delivery_requests(delivery_requests)
+            package_time_dependent_sec = timeit.timeit(lambda: build_package_time_dependent_connected_graph(graph),
+                                                       number=1)
+            graph = graph_class()
+            locally_connected_sec = timeit.timeit(
+                lambda: (add_locally_connected_dr_graph(graph, delivery_requests, max_distance_to_connect_km=10),
+                         add_fully_connected_loading_docks(graph, loading_docks)), number=1)
+            print(f"\n{graph_class.__name__}, {len(delivery_requests)} delivery requests:"
+                  f"\n  build_package_time_dependent_connected_graph: {package_time_dependent_sec:.3f} sec"
+                  f"\n  add_locally_connected_dr_graph + add_fully_connected_loading_docks: "
+                  f"{locally_connected_sec:.3f} sec")
+
+
+@unittest.skipUnless(os.environ.get('RUN_BENCHMARKS', False), 'benchmark')
+class SpatialIndexBenchmark(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.delivery_requests = build_delivery_request_distribution(
+            relative_pdp_location_distribution=UniformPointInBboxDistribution(min_x=0, max_x=100, min_y=0, max_y=100)
+        ).choose_rand(random=Random(42), amount={DeliveryRequest: 5000})
+
+    def test_locally_connected_graph_radius_sweep(self):
+        print(f"\n{len(self.delivery_requests)} delivery requests, add_locally_connected_dr_graph:")
+        for max_distance_to_connect_km in [1, 2.5, 5, 10, 25, math.inf]:
+            graph = ColumnarOperationalGraph()
+            sec = timeit.timeit(lambda: add_locally_connected_dr_graph(
+                graph, self.delivery_requests, max_distance_to_connect_km=max_distance_to_connect_km), number=1)
+            print(f"  radius {max_distance_to_connect_km} km: {sec:.3f} sec, {graph.num_edges} edges")
+
+    def test_sort_delivery_requests_by_zone(self):
+        zones = [Zone(create_polygon_2d([create_point_2d(x, y), create_point_2d(x, y + 10),
+                                         create_point_2d(x + 10, y + 10), create_point_2d(x + 10, y)]),
+                      EntityID(uuid4()))
+                 for x in range(0, 100, 10) for y in range(0, 100, 10)]
+        sec = timeit.timeit(lambda: sort_delivery_requests_by_zone(self.delivery_requests, zones), number=1)
+        print(f"\n{len(self.delivery_requests)} delivery requests, {len(zones)} zones, "
+              f"sort_delivery_requests_by_zone: {sec:.3f} sec")
@@ -1,8 +1,11 @@
+import itertools
 import unittest
 from datetime import time, date, timedelta
 from random import Random
 from typing import List
 
+import numpy as np
+
 from common.entities.base_entities.delivery_request import DeliveryRequest
 from common.entities.base_entities.drone_loading_dock import DroneLoadingDock
 from common.entities.base_entities.entity_distribution.delivery_request_distribution import DeliveryRequestDistribution
@@ -24,7 +27,8 @@ from common.entities.base_entities.temporal import DateTimeExtension, TimeDeltaE
 from common.entities.base_entities.zone import Zone
 from common.graph.operational.graph_creator import build_package_time_dependent_connected_graph, \
     build_package_dependent_connected_graph, create_package_time_zones_dependent_graph_model
-from common.graph.operational.graph_utils import has_overlapping_time_window, sort_delivery_requests_by_zone
+from common.graph.operational.graph_utils import has_overlapping_time_window, sort_delivery_requests_by_zone, \
+    calc_overlapping_time_windows_pairs, calc_one_way_overlapping_time_windows_pairs
 from common.graph.operational.operational_graph import OperationalGraph
 from experiment_space.distribution.supplier_category_distribution import SupplierCategoryDistribution
 from experiment_space.supplier_category import SupplierCategory
@@ -131,6 +135,27 @@ class BasicDeliveryRequestGraphFilterTest(unittest.TestCase):
         self.assertEqual(expected_nodes, len(self.packages_time_zones_dependent_graph.nodes))
         self.assertEqual(expected_edges, len(self.packages_time_zones_dependent_graph.edges))
 
+    def test_overlapping_time_windows_pairs(self):
+        random = np.random.RandomState(42)
+        start_since = random.randint(0, 1000, size=200)
+        start_time_windows = np.stack([start_since, start_since + random.randint(0, 100, size=200)], axis=1)
+        end_since = random.randint(0, 1000, size=150)
+        end_time_windows = np.stack([end_since, end_since + random.randint(0, 300, size=150)], axis=1)
+        expected_pairs = [(i, j) for i, j in itertools.product(range(200), range(150))
+                          if max(start_time_windows[i, 0], end_time_windows[j, 0])
+                          < min(start_time_windows[i, 1], end_time_windows[j, 1])]
+        for max_chunk_size in [7, 2 ** 20]:
+            start_indices, end_indices = calc_overlapping_time_windows_pairs(start_time_windows, end_time_windows,
+                                                                             max_chunk_size=max_chunk_size)
+            self.assertEqual(expected_pairs, sorted(zip(start_indices.tolist(), end_indices.tolist())))
+        expected_one_way_pairs = [(i, j) for i, j in itertools.combinations(range(200), 2)
+                                  if max(start_time_windows[i, 0], start_time_windows[j, 0])
+                                  < min(start_time_windows[i, 1], start_time_windows[j, 1])]
+        for max_chunk_size in [7, 2 ** 20]:
+            start_indices, end_indices = calc_one_way_overlapping_time_windows_pairs(start_time_windows,
+                                                                                     max_chunk_size=max_chunk_size)
+            self.assertEqual(expected_one_way_pairs, sorted(zip(start_indices.tolist(), end_indices.tolist())))
+
     @staticmethod
     def draw_zone_graph(og):
         d = create_drawer_2d()
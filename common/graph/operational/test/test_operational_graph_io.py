@@ -14,6 +14,7 @@ from common.graph.operational.operational_graph import OperationalNode, Operatio
 
 class BasicGraphNodeTestCases(unittest.TestCase):
     temp_path = Path('matching/test/jsons/test_solver_config_1.json')
+    temp_npz_path = Path('common/graph/operational/test/test_operational_graph_io.npz')
 
     @classmethod
     def setUpClass(cls):
@@ -40,6 +41,8 @@ class BasicGraphNodeTestCases(unittest.TestCase):
     @classmethod
     def tearDownClass(cls):
         cls.temp_path.unlink()
+        if cls.temp_npz_path.exists():
+            cls.temp_npz_path.unlink()
 
     def test_delivery_request_operational_node_to_dict(self):
         op_node_dict = self.example_node_delivery_request_0.__dict__()
@@ -78,3 +81,21 @@ class BasicGraphNodeTestCases(unittest.TestCase):
     def test_operational_graph_deepcopy(self):
         graph_copy = deepcopy(self.example_operational_graph)
         self.assertEqual(self.example_operational_graph, graph_copy)
+
+    def test_operational_graph_copy_sharing_internal_nodes(self):
+        graph_copy = self.example_operational_graph.copy_sharing_internal_nodes()
+        self.assertEqual(self.example_operational_graph, graph_copy)
+        self.assertIs(self.dr_dataset_random[0], graph_copy.get_delivery_request(0))
+        graph_copy.remove_operational_nodes([self.example_node_delivery_request_0])
+        self.assertEqual(2, len(graph_copy.nodes))
+        self.assertEqual(0, len(graph_copy.edges))
+        self.assertEqual(3, len(self.example_operational_graph.nodes))
+        self.assertEqual(1, len(self.example_operational_graph.edges))
+
+    def test_operational_graph_to_npz(self):
+        self.example_operational_graph.to_npz(self.temp_npz_path)
+        for mmap in [True, False]:
+            operational_graph_from_npz = OperationalGraph.from_npz(self.temp_npz_path, mmap=mmap)
+            self.assertEqual(self.example_operational_graph, operational_graph_from_npz)
+            self.assertEqual(self.example_operational_graph.nodes, operational_graph_from_npz.nodes)
+            self.assertEqual(self.example_operational_graph.edges, operational_graph_from_npz.edges)
@@ -0,0 +1,163 @@
+import json
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+from functools import wraps
+from pathlib import Path
+from typing import Dict, List, Optional, Iterator, Callable
+
+try:
+    import resource
+except ImportError:  # resource is not available on Windows
+    resource = None
+
+KB_IN_MB = 1024
+BYTES_IN_MB = 1024 * 1024
+
+
+@dataclass
+class Span:
+    """
+    A timed phase of a run. The peak memory is the peak resident memory of the process at the end of the phase, in
+    MB, and is 0 where it is not available.
+    """
+    name: str
+    path: str
+    wall_sec: float = 0.0
+    cpu_sec: float = 0.0
+    peak_memory_mb: float = 0.0
+    counters: Dict[str, int] = field(default_factory=dict)
+
+    def add(self, **counters: int) -> None:
+        for name, amount in counters.items():
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+
+class _DisabledSpan:
+    def add(self, **counters: int) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+_DISABLED_SPAN = _DisabledSpan()
+
+
+class Instrumentation:
+    """
+    Records the spans of the phases of a run, nested by the order they are opened in, and counters of the whole run.
+    """
+
+    def __init__(self):
+        self._spans: List[Span] = []
+        self._open_spans: List[Span] = []
+        self._counters: Dict[str, int] = {}
+
+    @property
+    def spans(self) -> List[Span]:
+        return self._spans
+
+    @property
+    def counters(self) -> Dict[str, int]:
+        return self._counters
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[Span]:
+        span = Span(name=name, path=name if len(self._open_spans) == 0 else f'{self._open_spans[-1].path}/{name}')
+        self._spans.append(span)
+        self._open_spans.append(span)
+        start_wall, start_cpu = time.perf_counter(), time.process_time()
+        try:
+            yield span
+        finally:
+            span.wall_sec = time.perf_counter() - start_wall
+            span.cpu_sec = time.process_time() - start_cpu
+            span.peak_memory_mb = calc_peak_memory_mb()
+            self._open_spans.pop()
+
+    def count(self, name: str, amount: int = 1) -> None:
+        self._counters[name] = self._counters.get(name, 0) + amount
+
+    def calc_phases(self) -> Dict[str, dict]:
+        """
+        Returns the spans summed by their path, with the number of spans of each path.
+        """
+        phases = {}
+        for span in self._spans:
+            phase = phases.setdefault(span.path, {'calls': 0, 'wall_sec': 0.0, 'cpu_sec': 0.0,
+                                                  'peak_memory_mb': 0.0, 'counters': {}})
+            phase['calls'] += 1
+            phase['wall_sec'] += span.wall_sec
+            phase['cpu_sec'] += span.cpu_sec
+            phase['peak_memory_mb'] = max(phase['peak_memory_mb'], span.peak_memory_mb)
+            for name, amount in span.counters.items():
+                phase['counters'][name] = phase['counters'].get(name, 0) + amount
+        return phases
+
+    def to_dict(self) -> dict:
+        return {'phases': self.calc_phases(), 'counters': dict(self._counters),
+                'spans': [asdict(span) for span in self._spans]}
+
+    def to_json(self, path: Path) -> None:
+        with open(path, 'w') as file:
+            json.dump(self.to_dict(), file, indent=2)
+
+
+def calc_peak_memory_mb() -> float:
+    """
+    Returns the peak resident memory of the process, whose ru_maxrss is in KB on Linux and in bytes on macOS.
+    """
+    if resource is None:
+        return 0.0
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss / BYTES_IN_MB if sys.platform == 'darwin' else max_rss / KB_IN_MB
+
+
+_instrumentation: Optional[Instrumentation] = None
+
+
+@contextmanager
+def instrument() -> Iterator[Instrumentation]:
+    """
+    Records the spans and counters of the pipeline while in the block. Outside of it, the spans and counters are
+    not recorded, and cost only a check of the current instrumentation.
+    """
+    global _instrumentation
+    previous_instrumentation = _instrumentation
+    _instrumentation = Instrumentation()
+    try:
+        yield _instrumentation
+    finally:
+        _instrumentation = previous_instrumentation
+
+
+def is_enabled() -> bool:
+    return _instrumentation is not None
+
+
+def span(name: str):
+    if _instrumentation is None:
+        return _DISABLED_SPAN
+    return _instrumentation.span(name)
+
+
+def count(name: str, amount: int = 1) -> None:
+    if _instrumentation is not None:
+        _instrumentation.count(name, amount)
+
+
+def counted(name: str, function: Callable) -> Callable:
+    """
+    Returns the function counting its calls, for callbacks that are created while instrumenting.
+    """
+    @wraps(function)
+    def counted_function(*args, **kwargs):
+        count(name)
+        return function(*args, **kwargs)
+
+    return counted_function
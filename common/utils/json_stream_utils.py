@@ -0,0 +1,92 @@
+import json
+from itertools import islice
+from pathlib import Path
+from typing import Any, Iterable, Iterator, List, TypeVar, Union
+
+JSON_STREAM_READ_SIZE = 2 ** 16
+
+T = TypeVar('T')
+
+
+class JsonStreamException(Exception):
+    pass
+
+
+def iter_json_records(file_path: Union[Path, str], read_size: int = JSON_STREAM_READ_SIZE) -> Iterator[Any]:
+    """
+    Lazily yields the records of either a line delimited (JSONL) file or a file holding a single JSON array, so that
+    only one record is parsed and held in memory at a time.
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        buffer = _read_non_whitespace(f, read_size)
+        if buffer.startswith('['):
+            yield from _iter_json_array_records(f, buffer[1:], read_size)
+            return
+        for line in _iter_lines(f, buffer):
+            if line.strip():
+                yield json.loads(line)
+
+
+def iter_chunks(items: Iterable[T], chunk_size: int) -> Iterator[List[T]]:
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size should be positive, got {chunk_size}")
+    items = iter(items)
+    chunk = list(islice(items, chunk_size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(items, chunk_size))
+
+
+def _read_non_whitespace(f, read_size: int) -> str:
+    buffer = ''
+    while not buffer:
+        block = f.read(read_size)
+        if not block:
+            return ''
+        buffer = block.lstrip()
+    return buffer
+
+
+def _iter_lines(f, buffer: str) -> Iterator[str]:
+    *buffered_lines, partial_line = buffer.split('\n')
+    yield from buffered_lines
+    yield partial_line + f.readline()
+    yield from f
+
+
+def _iter_json_array_records(f, buffer: str, read_size: int) -> Iterator[Any]:
+    decoder = json.JSONDecoder()
+    eof = False
+    expect_record = True
+    while True:
+        buffer = buffer.lstrip()
+        if not buffer and not eof:
+            block = f.read(read_size)
+            eof = not block
+            buffer = block
+            continue
+        if buffer.startswith(']'):
+            return
+        if not expect_record:
+            if not buffer.startswith(','):
+                raise JsonStreamException(f"Expected ',' or ']' in JSON array, got {buffer[:20]!r}")
+            buffer = buffer[1:]
+            expect_record = True
+            continue
+        if not buffer:
+            raise JsonStreamException("Unterminated JSON array")
+        try:
+            record, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            record, end = None, None
+        if end is None or (end == len(buffer) and not eof):
+            block = f.read(read_size)
+            if not block:
+                if eof:
+                    raise JsonStreamException("Unterminated JSON array")
+                eof = True
+            buffer += block
+            continue
+        yield record
+        buffer = buffer[end:]
+        expect_record = False
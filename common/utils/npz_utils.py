@@ -0,0 +1,55 @@
+import struct
+import zipfile
+from pathlib import Path
+from typing import Dict, Union
+
+import numpy as np
+
+ZIP_LOCAL_HEADER_SIZE = 30
+ZIP_LOCAL_HEADER_LENGTHS_OFFSET = 26
+NPY_SUFFIX = '.npy'
+
+
+def save_npz(file_path: Union[Path, str], arrays: Dict[str, np.ndarray]) -> None:
+    """
+    Saves uncompressed, so that the arrays can later be memory mapped by load_npz.
+    """
+    with open(file_path, 'wb') as f:
+        np.savez(f, **arrays)
+
+
+def load_npz(file_path: Union[Path, str], mmap_mode: str = None) -> Dict[str, np.ndarray]:
+    """
+    Like np.load of an .npz file, which ignores mmap_mode, but memory maps the stored (uncompressed) arrays when
+    mmap_mode is given. Compressed and empty arrays are read into memory.
+    """
+    if mmap_mode is None:
+        with np.load(file_path, allow_pickle=False) as npz_file:
+            return {name: npz_file[name] for name in npz_file.files}
+    arrays = {}
+    with zipfile.ZipFile(file_path) as zip_file, open(file_path, 'rb') as f:
+        for info in zip_file.infolist():
+            name = info.filename[:-len(NPY_SUFFIX)] if info.filename.endswith(NPY_SUFFIX) else info.filename
+            if info.compress_type != zipfile.ZIP_STORED:
+                with zip_file.open(info) as array_file:
+                    arrays[name] = np.lib.format.read_array(array_file, allow_pickle=False)
+                continue
+            f.seek(info.header_offset + ZIP_LOCAL_HEADER_LENGTHS_OFFSET)
+            name_length, extra_length = struct.unpack('<HH', f.read(4))
+            f.seek(info.header_offset + ZIP_LOCAL_HEADER_SIZE + name_length + extra_length)
+            shape, fortran_order, dtype = _read_array_header(f)
+            if dtype.hasobject:
+                raise ValueError(f"Object arrays can not be memory mapped: {name}")
+            if int(np.prod(shape)) == 0:
+                arrays[name] = np.empty(shape, dtype=dtype)
+                continue
+            arrays[name] = np.memmap(f, dtype=dtype, mode=mmap_mode, shape=shape,
+                                     order='F' if fortran_order else 'C', offset=f.tell())
+    return arrays
+
+
+def _read_array_header(f):
+    version = np.lib.format.read_magic(f)
+    if version == (1, 0):
+        return np.lib.format.read_array_header_1_0(f)
+    return np.lib.format.read_array_header_2_0(f)
@@ -0,0 +1,119 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from common.graph.operational.graph_creator import build_fully_connected_graph
+from common.graph.operational.operational_graph import OperationalGraph
+from common.utils import instrumentation
+from matching.matcher_input import MatcherInput
+from matching.ortools.ortools_matcher import ORToolsMatcher
+from matching.ortools.ortools_solver_config import ORToolsSolverConfig, TRANSIT_EVALUATION_CALLBACK
+from matching.test import test_or_tools_matcher_reload_with_multiple_depots
+
+
+class InstrumentationTestCase(unittest.TestCase):
+
+    def test_disabled_span_and_count_are_not_recorded(self):
+        self.assertFalse(instrumentation.is_enabled())
+        with instrumentation.span('phase') as span:
+            span.add(nodes=1)
+        instrumentation.count('calls')
+        with instrumentation.instrument() as run_instrumentation:
+            self.assertTrue(instrumentation.is_enabled())
+        self.assertFalse(instrumentation.is_enabled())
+        self.assertEqual([], run_instrumentation.spans)
+        self.assertEqual({}, run_instrumentation.counters)
+
+    def test_nested_spans_are_summed_by_path(self):
+        with instrumentation.instrument() as run_instrumentation:
+            with instrumentation.span('match'):
+                for _ in range(3):
+                    with instrumentation.span('session') as span:
+                        span.add(nodes=2)
+                        instrumentation.count('calls')
+            counted_sum = instrumentation.counted('sums', sum)
+            self.assertEqual(3, counted_sum([1, 2]))
+
+        phases = run_instrumentation.calc_phases()
+        self.assertEqual(['match', 'match/session'], list(phases.keys()))
+        self.assertEqual(3, phases['match/session']['calls'])
+        self.assertEqual({'nodes': 6}, phases['match/session']['counters'])
+        self.assertGreaterEqual(phases['match']['wall_sec'], phases['match/session']['wall_sec'])
+        self.assertGreater(phases['match']['peak_memory_mb'], 0)
+        self.assertEqual({'calls': 3, 'sums': 1}, run_instrumentation.counters)
+
+    def test_to_json(self):
+        with instrumentation.instrument() as run_instrumentation:
+            with instrumentation.span('match') as span:
+                span.add(nodes=2)
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'instrumentation.json'
+            run_instrumentation.to_json(path)
+            with open(path) as file:
+                self.assertEqual(run_instrumentation.to_dict(), json.load(file))
+
+    def test_peak_memory_mb(self):
+        peak_memory_mb = instrumentation.calc_peak_memory_mb()
+        self.assertGreater(peak_memory_mb, 1)
+        with mock.patch.object(instrumentation.sys, 'platform', 'darwin'):
+            self.assertAlmostEqual(peak_memory_mb / 1024, instrumentation.calc_peak_memory_mb(), delta=1)
+        with mock.patch.object(instrumentation, 'resource', None):
+            self.assertEqual(0.0, instrumentation.calc_peak_memory_mb())
+
+    def test_graph_creation_span(self):
+        scenario = test_or_tools_matcher_reload_with_multiple_depots.ORToolsMatcherReloadWithMultipleDepotsTestCase
+        delivery_requests = scenario._create_delivery_requests()
+        graph = OperationalGraph()
+        graph.add_drone_loading_docks(scenario._create_loading_docks())
+        graph.add_delivery_requests(delivery_requests)
+        with instrumentation.instrument() as run_instrumentation:
+            build_fully_connected_graph(graph)
+
+        phase = run_instrumentation.calc_phases()['graph_creator.build_fully_connected_graph']
+        self.assertEqual({'nodes': 0, 'edges': graph.num_edges}, phase['counters'])
+        self.assertGreater(graph.num_edges, 0)
+
+    def test_ortools_matcher_phases_and_callbacks(self):
+        matcher_input = self._create_ortools_matcher_input()
+        graph = matcher_input.graph
+
+        with instrumentation.instrument() as run_instrumentation:
+            ORToolsMatcher(matcher_input).match()
+
+        phases = run_instrumentation.calc_phases()
+        self.assertEqual(graph.num_edges, phases['ortools.build_model']['counters']['graph_edges'])
+        self.assertGreaterEqual(phases['ortools.build_model']['counters']['nodes'], graph.num_nodes)
+        self.assertGreater(phases['ortools.solve']['counters']['solutions'], 0)
+        self.assertIn('ortools.decode', phases)
+        self.assertGreater(run_instrumentation.counters['ortools.transit_callback_calls'], 0)
+
+    def test_ortools_solve_counters_are_per_solve(self):
+        matcher = ORToolsMatcher(self._create_ortools_matcher_input())
+        solutions = [0]
+        matcher._routing_model.AddAtSolutionCallback(lambda: solutions.append(solutions.pop() + 1))
+        solutions_per_solve = []
+        with instrumentation.instrument() as run_instrumentation:
+            for _ in range(2):
+                solutions[0] = 0
+                matcher.match()
+                solutions_per_solve.append(solutions[0])
+
+        solve_spans = [span for span in run_instrumentation.spans if span.name == 'ortools.solve']
+        self.assertEqual(solutions_per_solve, [span.counters['solutions'] for span in solve_spans])
+        self.assertEqual(matcher._routing_model.solver().Branches(),
+                         sum(span.counters['branches'] for span in solve_spans))
+
+    @staticmethod
+    def _create_ortools_matcher_input() -> MatcherInput:
+        scenario = test_or_tools_matcher_reload_with_multiple_depots.ORToolsMatcherReloadWithMultipleDepotsTestCase
+        loading_docks = scenario._create_loading_docks()
+        graph = scenario._create_graph(scenario._create_delivery_requests(), loading_docks)
+        config = scenario._create_match_config()
+        config._solver = ORToolsSolverConfig(first_solution_strategy="PATH_CHEAPEST_ARC",
+                                             local_search_strategy="GUIDED_LOCAL_SEARCH", timeout_sec=1,
+                                             transit_evaluation=TRANSIT_EVALUATION_CALLBACK)
+        delivering_drones_board = scenario.\
+            _create_delivering_drones_board_with_delivering_drones_with_different_loading_docks(loading_docks)
+        return MatcherInput(graph, delivering_drones_board, config)
@@ -1,41 +1,52 @@
 import sys
-from math import cos, sin
+from math import cos
 from typing import List, Dict, Union
-from common.math.angle import Angle, AngleUnit
+
+import numpy as np
+
+from common.math.angle import Angle
 from geometry.geo2d import Point2D, Polygon2D, EmptyGeometry2D
 from geometry.geo_factory import create_point_2d, create_polygon_2d, create_empty_geometry_2d
+from geometry.utils import GeometryUtils
 import itertools
 
+MAX_ENVELOPES_PAIRS_CHUNK_SIZE = 2 ** 22
+
 
 class ArrivalEnvelope:
     def __init__(self, arrival_azimuth: Angle, repr_point: Point2D,
-                 maneuver_polygon: Union[Polygon2D, EmptyGeometry2D]):
+                 maneuver_polygon: Union[Polygon2D, EmptyGeometry2D] = None, maneuver_polygon_xy: np.ndarray = None):
+        """
+        The maneuver polygon may be given by its (num vertices, 2) vertices only, in which case the polygon is
+        created on first access.
+        """
         self._arrival_azimuth = arrival_azimuth
         self._repr_point = repr_point
         self._maneuver_polygon = maneuver_polygon
+        self._maneuver_polygon_xy = maneuver_polygon_xy
 
     @classmethod
     def from_maneuver_angle(cls, centroid: Point2D, radius: float, arrival_azimuth: Angle, maneuver_angle: Angle,
                             resolution_parameter: int = 6):
-        observation_angle = Angle(value=arrival_azimuth.degrees + 180, unit=AngleUnit.DEGREE)
-        if radius == 0:
-            return ArrivalEnvelope(arrival_azimuth=arrival_azimuth,
-                                   repr_point=centroid,
-                                   maneuver_polygon=create_empty_geometry_2d())
+        return cls.from_maneuver_angles(centroid=centroid, radius=radius, arrival_azimuths=[arrival_azimuth],
+                                        maneuver_angle=maneuver_angle, resolution_parameter=resolution_parameter)[0]
 
-        resolution_parameter_list = list(range(-resolution_parameter, resolution_parameter + 1))
-        maneuver_factor = [1 / (2 * resolution_parameter) * angle_factor for angle_factor in resolution_parameter_list]
-
-        observation_angles = [
-            Angle(value=observation_angle.degrees + factor * maneuver_angle.degrees, unit=AngleUnit.DEGREE) for factor
-            in maneuver_factor]
-
-        outer_arcs_points = [
-            create_point_2d(x=centroid.x + radius * cos(angle.radians), y=centroid.y + radius * sin(angle.radians)) for
-            angle in observation_angles]
-        return ArrivalEnvelope(arrival_azimuth=arrival_azimuth,
-                               repr_point=outer_arcs_points[resolution_parameter],
-                               maneuver_polygon=create_polygon_2d([centroid] + outer_arcs_points))
+    @classmethod
+    def from_maneuver_angles(cls, centroid: Point2D, radius: float, arrival_azimuths: List[Angle],
+                             maneuver_angle: Angle, resolution_parameter: int = 6):
+        if radius == 0:
+            return [ArrivalEnvelope(arrival_azimuth=arrival_azimuth,
+                                    repr_point=centroid,
+                                    maneuver_polygon=create_empty_geometry_2d())
+                    for arrival_azimuth in arrival_azimuths]
+        maneuver_polygons_xy = calc_maneuver_polygons_xy(centroid=centroid, radius=radius,
+                                                         arrival_azimuths=arrival_azimuths,
+                                                         maneuver_angle=maneuver_angle,
+                                                         resolution_parameter=resolution_parameter)
+        return [ArrivalEnvelope(arrival_azimuth=arrival_azimuth,
+                                repr_point=create_point_2d(*maneuver_polygon_xy[resolution_parameter + 1].tolist()),
+                                maneuver_polygon_xy=maneuver_polygon_xy)
+                for arrival_azimuth, maneuver_polygon_xy in zip(arrival_azimuths, maneuver_polygons_xy)]
 
     @property
     def arrival_azimuth(self) -> Angle:
@@ -47,8 +58,15 @@ class ArrivalEnvelope:
 
     @property
     def maneuver_polygon(self) -> Union[Polygon2D, EmptyGeometry2D]:
+        if self._maneuver_polygon is None:
+            self._maneuver_polygon = create_polygon_2d(
+                GeometryUtils.convert_xy_array_to_points_list(self._maneuver_polygon_xy.tolist()))
         return self._maneuver_polygon
 
+    @property
+    def maneuver_polygon_xy(self) -> Union[np.ndarray, None]:
+        return self._maneuver_polygon_xy
+
     def calc_cost(self, other_arrival_envelope) -> float:
         return self._repr_point.calc_distance_to_point(other_arrival_envelope.repr_point)
 
@@ -70,6 +88,49 @@ class ArrivalEnvelope:
                     self.maneuver_polygon == other.maneuver_polygon])
 
 
+def calc_maneuver_polygons_xy(centroid: Point2D, radius: float, arrival_azimuths: List[Angle],
+                              maneuver_angle: Angle, resolution_parameter: int = 6) -> np.ndarray:
+    """
+    Vertices of the arrival azimuths maneuver polygons: the centroid followed by the 2 * resolution_parameter + 1
+    outer arc points around the observation angle. Returns a (num azimuths, 2 * resolution_parameter + 2, 2) array.
+    """
+    observation_degrees = _calc_cyclic_degrees(np.array([arrival_azimuth.degrees for arrival_azimuth
+                                                         in arrival_azimuths], dtype=np.float64) + 180)
+    maneuver_factor = 1 / (2 * resolution_parameter) * np.arange(-resolution_parameter, resolution_parameter + 1)
+    observation_radians = np.radians(_calc_cyclic_degrees(
+        observation_degrees[:, np.newaxis] + maneuver_factor[np.newaxis, :] * maneuver_angle.degrees))
+    maneuver_polygons_xy = np.empty((len(observation_degrees), len(maneuver_factor) + 1, 2), dtype=np.float64)
+    maneuver_polygons_xy[:, 0] = (centroid.x, centroid.y)
+    maneuver_polygons_xy[:, 1:, 0] = centroid.x + radius * np.cos(observation_radians)
+    maneuver_polygons_xy[:, 1:, 1] = centroid.y + radius * np.sin(observation_radians)
+    return maneuver_polygons_xy
+
+
+def filter_arrival_envelopes_containing_all(arrival_envelopes: List[ArrivalEnvelope],
+                                            points_collection: List[List[Point2D]]) -> List[ArrivalEnvelope]:
+    """
+    Batched ArrivalEnvelope.contains_all over arrival envelopes given by their maneuver polygons vertices.
+    """
+    if any(arrival_envelope.maneuver_polygon_xy is None for arrival_envelope in arrival_envelopes):
+        return [arrival_envelope for arrival_envelope in arrival_envelopes
+                if arrival_envelope.contains_all(points_collection)]
+    if len(arrival_envelopes) == 0 or len(points_collection) == 0:
+        return list(arrival_envelopes)
+    if any(len(points) == 0 for points in points_collection):
+        return []
+    points_xy = np.array([(point.x, point.y) for points in points_collection for point in points], dtype=np.float64)
+    collections_starts = np.cumsum([0] + [len(points) for points in points_collection[:-1]])
+    contained = GeometryUtils.calc_points_in_polygons(
+        np.stack([arrival_envelope.maneuver_polygon_xy for arrival_envelope in arrival_envelopes]), points_xy)
+    contains_all = np.logical_or.reduceat(contained, collections_starts, axis=1).all(axis=1)
+    return [arrival_envelope for arrival_envelope, is_containing in zip(arrival_envelopes, contains_all)
+            if is_containing]
+
+
+def _calc_cyclic_degrees(degrees: np.ndarray) -> np.ndarray:
+    return np.mod(np.mod(degrees, 360) + 360, 360)
+
+
 class PotentialArrivalEnvelope:
     def __init__(self, arrival_envelopes: List[ArrivalEnvelope], centroid: Point2D):
         self._arrival_envelopes = {arrival_envelope.arrival_azimuth: arrival_envelope
@@ -108,3 +169,71 @@ def calc_cost(potential_arrival_envelope_1: PotentialArrivalEnvelope,
     if len(costs) == 0:
         return sys.maxsize
     return min(costs)
+
+
+class ArrivalEnvelopesArrays:
+    """
+    Packs the arrival envelopes representative points and azimuths of potential arrival envelopes into
+    (num potential arrival envelopes, max arrival envelopes) arrays, so that calc_cost of many pairs is computed in
+    broadcasted chunks of at most max_chunk_size arrival envelopes pairs.
+    """
+
+    def __init__(self, potential_arrival_envelopes: List[PotentialArrivalEnvelope],
+                 max_chunk_size: int = MAX_ENVELOPES_PAIRS_CHUNK_SIZE):
+        num_arrival_envelopes = [len(potential_arrival_envelope.arrival_envelopes)
+                                 for potential_arrival_envelope in potential_arrival_envelopes]
+        max_arrival_envelopes = max(num_arrival_envelopes + [1])
+        self._max_chunk_size = max_chunk_size
+        self._repr_points_xy = np.zeros((len(potential_arrival_envelopes), max_arrival_envelopes, 2), dtype=np.float64)
+        self._azimuths_radians = np.zeros((len(potential_arrival_envelopes), max_arrival_envelopes), dtype=np.float64)
+        self._is_valid = np.zeros((len(potential_arrival_envelopes), max_arrival_envelopes), dtype=bool)
+        for index, potential_arrival_envelope in enumerate(potential_arrival_envelopes):
+            arrival_envelopes = list(potential_arrival_envelope.arrival_envelopes.values())
+            if len(arrival_envelopes) == 0:
+                continue
+            self._repr_points_xy[index, :len(arrival_envelopes)] = [
+                (arrival_envelope.repr_point.x, arrival_envelope.repr_point.y) for arrival_envelope in
+                arrival_envelopes]
+            self._azimuths_radians[index, :len(arrival_envelopes)] = [
+                arrival_envelope.arrival_azimuth.radians for arrival_envelope in arrival_envelopes]
+            self._is_valid[index, :len(arrival_envelopes)] = True
+
+    def __len__(self):
+        return len(self._is_valid)
+
+    def calc_costs_matrix(self) -> np.ndarray:
+        costs = np.empty((len(self), len(self)), dtype=np.float64)
+        rows_per_chunk = max(1, self._max_chunk_size // max(1, len(self) * self._is_valid.shape[1] ** 2))
+        for start in range(0, len(self), rows_per_chunk):
+            rows = slice(start, min(start + rows_per_chunk, len(self)))
+            costs[rows] = self._calc_min_costs(self._repr_points_xy[rows, np.newaxis],
+                                               self._azimuths_radians[rows, np.newaxis],
+                                               self._is_valid[rows, np.newaxis],
+                                               self._repr_points_xy[np.newaxis], self._azimuths_radians[np.newaxis],
+                                               self._is_valid[np.newaxis])
+        return costs
+
+    def calc_costs(self, start_indices: np.ndarray, end_indices: np.ndarray) -> np.ndarray:
+        start_indices = np.asarray(start_indices, dtype=np.int64)
+        end_indices = np.asarray(end_indices, dtype=np.int64)
+        costs = np.empty(len(start_indices), dtype=np.float64)
+        pairs_per_chunk = max(1, self._max_chunk_size // self._is_valid.shape[1] ** 2)
+        for start in range(0, len(start_indices), pairs_per_chunk):
+            chunk_start_indices = start_indices[start:start + pairs_per_chunk]
+            chunk_end_indices = end_indices[start:start + pairs_per_chunk]
+            costs[start:start + pairs_per_chunk] = self._calc_min_costs(
+                self._repr_points_xy[chunk_start_indices], self._azimuths_radians[chunk_start_indices],
+                self._is_valid[chunk_start_indices], self._repr_points_xy[chunk_end_indices],
+                self._azimuths_radians[chunk_end_indices], self._is_valid[chunk_end_indices])
+        return costs
+
+    @staticmethod
+    def _calc_min_costs(start_xy: np.ndarray, start_azimuths: np.ndarray, start_is_valid: np.ndarray,
+                        end_xy: np.ndarray, end_azimuths: np.ndarray, end_is_valid: np.ndarray) -> np.ndarray:
+        deltas = end_xy[..., np.newaxis, :, :] - start_xy[..., :, np.newaxis, :]
+        costs = np.sqrt(deltas[..., 0] * deltas[..., 0] + deltas[..., 1] * deltas[..., 1]) * \
+                (2 - np.cos(start_azimuths[..., :, np.newaxis] - end_azimuths[..., np.newaxis, :]))
+        costs[~(start_is_valid[..., :, np.newaxis] & end_is_valid[..., np.newaxis, :])] = np.inf
+        min_costs = costs.min(axis=(-2, -1))
+        min_costs[np.isinf(min_costs)] = sys.maxsize
+        return min_costs
@@ -2,7 +2,8 @@ from abc import abstractmethod
 from typing import List
 
 from common.math.angle import Angle
-from drop_envelope.arrival_envelope import PotentialArrivalEnvelope, ArrivalEnvelope
+from drop_envelope.arrival_envelope import PotentialArrivalEnvelope, ArrivalEnvelope, \
+    filter_arrival_envelopes_containing_all
 from geometry.geo2d import Point2D
 from geometry.utils import Shapeable
 
@@ -63,15 +64,14 @@ class PotentialEnvelopeCollection:
     def get_potential_arrival_envelope(self, arrival_azimuths: List[Angle], maneuver_angle: Angle) -> \
             PotentialArrivalEnvelope:
         centroid = self.get_centroid()
-        max_radius = self.get_largest_distance_from_centroid()
         centroid_collection = [collection.get_shapeables_centroids() for collection in self.get_shapeable_collection()]
-        arrival_envelopes = list(filter(lambda arrival_envelope: arrival_envelope.contains_all(centroid_collection),
-                                        map(lambda arrival_azimuth:
-                                            ArrivalEnvelope.from_maneuver_angle(centroid=centroid,
-                                                                                radius=max_radius,
-                                                                                arrival_azimuth=arrival_azimuth,
-                                                                                maneuver_angle=maneuver_angle),
-                                            arrival_azimuths)))
+        max_radius = max(max(centroid.calc_distance_to_point(shapeable_centroid)
+                             for shapeable_centroid in collection_centroids)
+                         for collection_centroids in centroid_collection)
+        arrival_envelopes = filter_arrival_envelopes_containing_all(
+            ArrivalEnvelope.from_maneuver_angles(centroid=centroid, radius=max_radius,
+                                                 arrival_azimuths=arrival_azimuths, maneuver_angle=maneuver_angle),
+            centroid_collection)
         return PotentialArrivalEnvelope(arrival_envelopes=arrival_envelopes, centroid=centroid)
 
     def __iter__(self):
@@ -0,0 +1,70 @@
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Tuple, Union
+
+from common.entities.base_entities.delivery_request import DeliveryRequest
+from common.entities.base_entities.drone_loading_dock import DroneLoadingDock
+
+DEFAULT_ENVELOPES_CACHE_MAX_SIZE = 100000
+
+
+class EnvelopesCache:
+    """
+    Bounded LRU cache of envelopes, keyed by the content of the nodes they were created from, so that equal
+    delivery requests and loading docks share their envelopes across graph builds and experiments.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_ENVELOPES_CACHE_MAX_SIZE):
+        self._max_size = max_size
+        self._entries = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable):
+        return key in self._entries
+
+    def get_or_create(self, key: Hashable, create: Callable[[], Any]) -> Any:
+        if key in self._entries:
+            self._hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+        self._misses += 1
+        value = create()
+        if self._max_size > 0:
+            self._entries[key] = value
+            if len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._hits = 0
+        self._misses = 0
+
+
+def calc_envelope_cache_key(node: Union[DeliveryRequest, DroneLoadingDock]) -> Tuple:
+    if isinstance(node, DeliveryRequest):
+        return DeliveryRequest.__name__, tuple(
+            tuple(tuple((pdp.package_type.name, pdp.drop_point.x, pdp.drop_point.y, pdp.azimuth.degrees)
+                        for pdp in customer_delivery.package_delivery_plans)
+                  for customer_delivery in delivery_option.customer_deliveries)
+            for delivery_option in node.delivery_options)
+    location = node.calc_location()
+    return DroneLoadingDock.__name__, location.x, location.y
+
+
+ENVELOPES_CACHE = EnvelopesCache()
@@ -6,16 +6,18 @@ from common.entities.base_entities.delivery_request import DeliveryRequest
 from common.entities.base_entities.drone_loading_dock import DroneLoadingDock
 from common.graph.operational.operational_graph import OperationalNode
 from common.math.angle import Angle, AngleUnit
-from drop_envelope.arrival_envelope import PotentialArrivalEnvelope
+from drop_envelope.arrival_envelope import PotentialArrivalEnvelope, ArrivalEnvelopesArrays
 from drop_envelope.delivery_request_envelope import DeliveryRequestPotentialEnvelope
 from drop_envelope.envelope_collections import PotentialEnvelopeCollection
+from drop_envelope.envelopes_cache import EnvelopesCache, ENVELOPES_CACHE, calc_envelope_cache_key
 from drop_envelope.loading_dock_envelope import LoadingDockPotentialEnvelope
 from drop_envelope.slide_service import MockSlidesServiceWrapper
 
 
 class EnvelopesService:
-    def __init__(self, potential_envelopes: dict):
+    def __init__(self, potential_envelopes: dict, envelopes_cache: EnvelopesCache = ENVELOPES_CACHE):
         self._potential_envelopes = potential_envelopes
+        self._envelopes_cache = envelopes_cache
         self._potential_arrival_envelopes = self.build_arrival_envelopes_from_potential_collection()
 
     @staticmethod
@@ -45,22 +47,32 @@ class EnvelopesService:
 
     def build_arrival_envelop_object_from_dr_node(self, internal_node: DeliveryRequest, maneuver_angle: Angle,
                                                   drone_azimuth_level_values):
-        potential_envelop_collection = self._potential_envelopes[internal_node]
-        potential_arrival_env = potential_envelop_collection.get_potential_arrival_envelope(
-            arrival_azimuths=drone_azimuth_level_values, maneuver_angle=maneuver_angle)
-        return potential_arrival_env
+        return self._build_cached_arrival_envelop_object(internal_node, maneuver_angle, drone_azimuth_level_values)
 
     def build_arrival_envelop_object_from_dld_node(self, internal_node: DroneLoadingDock, maneuver_angle: Angle,
                                                    drone_azimuth_level_values):
+        return self._build_cached_arrival_envelop_object(internal_node, maneuver_angle, drone_azimuth_level_values)
+
+    def _build_cached_arrival_envelop_object(self, internal_node: DeliveryRequest | DroneLoadingDock,
+                                             maneuver_angle: Angle, drone_azimuth_level_values):
         potential_envelop_collection = self._potential_envelopes[internal_node]
-        potential_arrival_env = potential_envelop_collection.get_potential_arrival_envelope(
-            arrival_azimuths=drone_azimuth_level_values, maneuver_angle=maneuver_angle)
-        return potential_arrival_env
+
+        def build_arrival_envelop_object():
+            return potential_envelop_collection.get_potential_arrival_envelope(
+                arrival_azimuths=drone_azimuth_level_values, maneuver_angle=maneuver_angle)
+
+        if self._envelopes_cache is None:
+            return build_arrival_envelop_object()
+        return self._envelopes_cache.get_or_create(
+            (PotentialArrivalEnvelope.__name__, calc_envelope_cache_key(internal_node), maneuver_angle.degrees,
+             tuple(azimuth.degrees for azimuth in drone_azimuth_level_values)),
+            build_arrival_envelop_object)
 
     @classmethod
-    def from_nodes(cls, operational_nodes: List[OperationalNode | DeliveryRequest | DroneLoadingDock]):
+    def from_nodes(cls, operational_nodes: List[OperationalNode | DeliveryRequest | DroneLoadingDock],
+                   envelopes_cache: EnvelopesCache = ENVELOPES_CACHE):
         dr_potential_envelopes = {
-            (node, DeliveryRequestPotentialEnvelope.from_delivery_request(node))
+            (node, cls._build_cached_dr_potential_envelope(node, envelopes_cache))
             for node in [cls.filter_node_by_type(n, DeliveryRequest) for n in operational_nodes if
                          cls.filter_node_by_type(n, DeliveryRequest)]}
         ld_potential_envelopes = {
@@ -70,7 +82,16 @@ class EnvelopesService:
 
         potential_envelopes = dr_potential_envelopes.copy()
         potential_envelopes.update(ld_potential_envelopes)
-        return EnvelopesService(potential_envelopes=dict(potential_envelopes))
+        return EnvelopesService(potential_envelopes=dict(potential_envelopes), envelopes_cache=envelopes_cache)
+
+    @staticmethod
+    def _build_cached_dr_potential_envelope(delivery_request: DeliveryRequest,
+                                            envelopes_cache: EnvelopesCache) -> DeliveryRequestPotentialEnvelope:
+        if envelopes_cache is None:
+            return DeliveryRequestPotentialEnvelope.from_delivery_request(delivery_request)
+        return envelopes_cache.get_or_create(
+            (DeliveryRequestPotentialEnvelope.__name__, calc_envelope_cache_key(delivery_request)),
+            lambda: DeliveryRequestPotentialEnvelope.from_delivery_request(delivery_request))
 
     @property
     def potential_envelopes(self) -> Dict[DeliveryRequest | DroneLoadingDock, PotentialEnvelopeCollection]:
@@ -85,3 +106,8 @@ class EnvelopesService:
 
     def get_potential_arrival_envelope(self, node: DeliveryRequest | DroneLoadingDock) -> [PotentialArrivalEnvelope]:
         return self.potential_arrival_envelopes[node]
+
+    def calc_arrival_envelopes_arrays(self, nodes: List[OperationalNode | DeliveryRequest | DroneLoadingDock]) -> \
+            ArrivalEnvelopesArrays:
+        return ArrivalEnvelopesArrays([self.get_potential_arrival_envelope(
+            node.internal_node if isinstance(node, OperationalNode) else node) for node in nodes])
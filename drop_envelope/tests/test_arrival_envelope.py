@@ -1,8 +1,12 @@
+import sys
 import unittest
 from math import cos, pi, sin
 
+from numpy.testing import assert_array_almost_equal
+
 from common.math.angle import Angle, AngleUnit
-from drop_envelope.arrival_envelope import ArrivalEnvelope, PotentialArrivalEnvelope, calc_cost
+from drop_envelope.arrival_envelope import ArrivalEnvelope, PotentialArrivalEnvelope, calc_cost, \
+    filter_arrival_envelopes_containing_all, ArrivalEnvelopesArrays
 from geometry.geo_factory import create_point_2d, create_vector_2d
 from visualization.basic.pltdrawer2d import create_drawer_2d
 
@@ -47,6 +51,48 @@ class BasicArrivalEnvelopeTestCase(unittest.TestCase):
         self.assertEqual(arrival_envelopes[2], potential_arrival_envelope.arrival_envelopes[arrival_azimuths[2]])
         self.assertEqual(arrival_envelopes[3], potential_arrival_envelope.arrival_envelopes[arrival_azimuths[3]])
 
+    def test_from_maneuver_angles(self):
+        arrival_azimuths = [Angle(value=value, unit=AngleUnit.DEGREE) for value in list(range(0, 360, 45))]
+        arrival_envelopes = ArrivalEnvelope.from_maneuver_angles(centroid=self.centroid, radius=self.radius,
+                                                                 arrival_azimuths=arrival_azimuths,
+                                                                 maneuver_angle=self.maneuver_angle)
+        self.assertEqual([ArrivalEnvelope.from_maneuver_angle(centroid=self.centroid, radius=self.radius,
+                                                              arrival_azimuth=arrival_azimuth,
+                                                              maneuver_angle=self.maneuver_angle)
+                          for arrival_azimuth in arrival_azimuths], arrival_envelopes)
+        points_collection = [[create_point_2d(x=-5, y=-1), create_point_2d(x=20, y=20)], [create_point_2d(x=-3, y=-4)]]
+        self.assertEqual([arrival_envelope for arrival_envelope in arrival_envelopes
+                          if arrival_envelope.contains_all(points_collection)],
+                         filter_arrival_envelopes_containing_all(arrival_envelopes, points_collection))
+
+
+class ArrivalEnvelopesArraysTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        maneuver_angle = Angle(value=90, unit=AngleUnit.DEGREE)
+        cls.potential_arrival_envelopes = [
+            PotentialArrivalEnvelope(arrival_envelopes=ArrivalEnvelope.from_maneuver_angles(
+                centroid=create_point_2d(x=x, y=y), radius=radius,
+                arrival_azimuths=[Angle(value=value, unit=AngleUnit.DEGREE) for value in azimuths],
+                maneuver_angle=maneuver_angle), centroid=create_point_2d(x=x, y=y))
+            for x, y, radius, azimuths in [(0, 0, 10, range(0, 360, 45)), (30, -5, 7, [90, 135]),
+                                           (-12, 40, 0, [0, 180, 270]), (5, 5, 3, []), (60, 60, 20, [315])]]
+        cls.arrival_envelopes_arrays = ArrivalEnvelopesArrays(cls.potential_arrival_envelopes, max_chunk_size=50)
+
+    def test_calc_costs_matrix(self):
+        expected_costs = [[calc_cost(start, end) for end in self.potential_arrival_envelopes]
+                          for start in self.potential_arrival_envelopes]
+        assert_array_almost_equal(expected_costs, self.arrival_envelopes_arrays.calc_costs_matrix())
+
+    def test_calc_costs(self):
+        start_indices = [0, 1, 4, 2, 3, 0, 4]
+        end_indices = [1, 0, 2, 4, 1, 0, 4]
+        expected_costs = [calc_cost(self.potential_arrival_envelopes[start], self.potential_arrival_envelopes[end])
+                          for start, end in zip(start_indices, end_indices)]
+        costs = self.arrival_envelopes_arrays.calc_costs(start_indices, end_indices)
+        assert_array_almost_equal(expected_costs, costs)
+        self.assertEqual(sys.maxsize, costs[4])
+
 
 def test_calc_cost(self):
     arrival_azimuths_1 = [Angle(value=value, unit=AngleUnit.DEGREE) for value in list(range(0, 360, 45))]
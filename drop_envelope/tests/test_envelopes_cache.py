@@ -0,0 +1,59 @@
+import unittest
+from copy import deepcopy
+from random import Random
+from uuid import uuid4
+
+from common.entities.base_entities.delivery_request import DeliveryRequest
+from common.entities.base_entities.entity_distribution.drone_loading_dock_distribution import \
+    DroneLoadingDockDistribution
+from common.entities.base_entities.entity_id import EntityID
+from drop_envelope.envelopes_cache import EnvelopesCache, calc_envelope_cache_key
+from drop_envelope.envelopes_service import EnvelopesService
+from drop_envelope.tests.test_envelopes_service import create_delivery_request_distribution
+from geometry.geo_factory import create_point_2d
+
+
+class EnvelopesCacheTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.dr_dataset_random = create_delivery_request_distribution(center_point=create_point_2d(x=0, y=0), sigma_x=20,
+                                                                     sigma_y=20).choose_rand(random=Random(100),
+                                                                                             amount={
+                                                                                                 DeliveryRequest: 10})
+        cls.dld_dataset_random = DroneLoadingDockDistribution().choose_rand(random=Random(100), amount=3)
+
+    def test_least_recently_used_eviction(self):
+        cache = EnvelopesCache(max_size=2)
+        cache.get_or_create('a', lambda: 1)
+        cache.get_or_create('b', lambda: 2)
+        self.assertEqual(1, cache.get_or_create('a', lambda: 3))
+        cache.get_or_create('c', lambda: 4)
+        self.assertEqual(2, len(cache))
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(3, cache.misses)
+
+    def test_cache_key_ignores_ids(self):
+        delivery_request = self.dr_dataset_random[0]
+        self.assertEqual(calc_envelope_cache_key(delivery_request),
+                         calc_envelope_cache_key(DeliveryRequest(id_=EntityID(uuid4()),
+                                                                 delivery_options=delivery_request.delivery_options,
+                                                                 time_window=delivery_request.time_window,
+                                                                 priority=delivery_request.priority)))
+        self.assertNotEqual(calc_envelope_cache_key(delivery_request),
+                            calc_envelope_cache_key(self.dr_dataset_random[1]))
+
+    def test_services_share_cached_envelopes(self):
+        cache = EnvelopesCache()
+        nodes = self.dr_dataset_random + self.dld_dataset_random
+        service = EnvelopesService.from_nodes(nodes, envelopes_cache=cache)
+        self.assertEqual(0, cache.hits)
+        copied_service = EnvelopesService.from_nodes(deepcopy(nodes), envelopes_cache=cache)
+        self.assertEqual(len(nodes) + len(self.dr_dataset_random), cache.hits)
+        for node, copied_node in zip(nodes, deepcopy(nodes)):
+            self.assertIs(service.get_potential_arrival_envelope(node),
+                          copied_service.get_potential_arrival_envelope(copied_node))
+        uncached_service = EnvelopesService.from_nodes(nodes, envelopes_cache=None)
+        self.assertEqual([service.get_potential_arrival_envelope(node) for node in nodes],
+                         [uncached_service.get_potential_arrival_envelope(node) for node in nodes])
@@ -1,19 +1,25 @@
 from __future__ import annotations
 
 from pathlib import Path
+from typing import List, Tuple
 
 from common.entities.base_entities.base_entity import JsonableBaseEntity
 from common.entities.base_entities.drone_delivery_board import DroneDeliveryBoard
 from common.entities.base_entities.fleet.delivering_drones_board_generation import generate_delivering_drones_board
 from common.entities.base_entities.fleet.fleet_property_sets import DroneSetProperties, BoardLevelProperties
 from common.graph.operational.operational_graph import OperationalGraph
+from common.utils import instrumentation
+from common.utils.instrumentation import Instrumentation
 from experiment_space.analyzer.analyzer import Analyzer
-from experiment_space.graph_creation_algorithm import GraphCreationAlgorithm, List, create_graph_algorithm_by_name
+from experiment_space.graph_cache import GraphCache
+from experiment_space.graph_creation_algorithm import GraphCreationAlgorithm, create_graph_algorithm_by_name
 from experiment_space.supplier_category import SupplierCategory
 from matching.matcher_config import MatcherConfig
 from matching.matcher_input import MatcherInput
 from matching.matching_master import MatchingMaster
 
+OPERATIONAL_GRAPH_NPZ_SUFFIX = '.npz'
+
 
 class Experiment(JsonableBaseEntity):
 
@@ -75,29 +81,48 @@ class Experiment(JsonableBaseEntity):
                           delivery_board_path=dict_input['delivery_board_path']
                           )
 
-    def run_match(self, graph=None, init_guess_path: Path = None) -> DroneDeliveryBoard:
-        if graph is None:
-            graph = self.graph_creation_algorithm.create(supplier_category=self.supplier_category)
-        delivering_drones_board = generate_delivering_drones_board(self.drone_set_properties_list,
-                                                                   self.board_level_properties)
+    def run_match(self, graph=None, init_guess_path: Path = None, graph_cache: GraphCache = None) -> DroneDeliveryBoard:
+        with instrumentation.span('experiment.graph_creation') as span:
+            if graph is None and graph_cache is not None:
+                graph = graph_cache.get_or_create(self.supplier_category, self.graph_creation_algorithm)
+            elif graph is None:
+                graph = self.graph_creation_algorithm.create(supplier_category=self.supplier_category)
+            span.add(nodes=graph.num_nodes, edges=graph.num_edges)
+        with instrumentation.span('experiment.delivering_drones_board_generation'):
+            delivering_drones_board = generate_delivering_drones_board(self.drone_set_properties_list,
+                                                                       self.board_level_properties)
         matcher_input = MatcherInput(graph=graph, delivering_drones_board=delivering_drones_board,
                                      config=self.matcher_config)
-        delivery_board = MatchingMaster(
-            matcher_input=matcher_input).match()
+        with instrumentation.span('experiment.match'):
+            delivery_board = MatchingMaster(
+                matcher_input=matcher_input).match()
         return delivery_board
 
+    def run_instrumented_match(self, graph=None, init_guess_path: Path = None,
+                               graph_cache: GraphCache = None) -> Tuple[DroneDeliveryBoard, Instrumentation]:
+        """
+        Returns the delivery board of run_match, with the timings and counters of its phases.
+        """
+        with instrumentation.instrument() as run_instrumentation:
+            delivery_board = self.run_match(graph, init_guess_path, graph_cache)
+        return delivery_board, run_instrumentation
+
     @staticmethod
     def run_analysis_suite(drone_delivery_board: DroneDeliveryBoard, analyzers: [Analyzer]):
         return {analyzer.__name__: analyzer.calc_analysis(drone_delivery_board) for analyzer in analyzers}
 
     @staticmethod
-    def run_multi_match_analysis_pipeline(experiments: List[Experiment], analyzers: [Analyzer]):
-        return [(e, Experiment.run_analysis_suite(e.run_match(), analyzers)) for e in experiments]
+    def run_multi_match_analysis_pipeline(experiments: List[Experiment], analyzers: [Analyzer],
+                                          graph_cache: GraphCache = None):
+        return [(e, Experiment.run_analysis_suite(e.run_match(graph_cache=graph_cache), analyzers))
+                for e in experiments]
 
     def export_drone_delivery(self) -> DroneDeliveryBoard:
         return DroneDeliveryBoard.dict_to_obj(DroneDeliveryBoard.json_to_dict(Path(self.delivery_board_path)))
 
     def export_operational_graph(self) -> OperationalGraph:
+        if Path(self.operational_graph_path).suffix == OPERATIONAL_GRAPH_NPZ_SUFFIX:
+            return OperationalGraph.from_npz(Path(self.operational_graph_path))
         return OperationalGraph.dict_to_obj(OperationalGraph.json_to_dict(Path(self.operational_graph_path)))
 
     def __str__(self):
@@ -0,0 +1,104 @@
+import hashlib
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Dict, Type
+
+from common.graph.operational.columnar_operational_graph import ColumnarOperationalGraph
+from common.graph.operational.operational_graph import OperationalGraph, GRAPH_NPZ_FORMAT_VERSION
+from experiment_space.graph_creation_algorithm import GraphCreationAlgorithm
+from experiment_space.supplier_category import SupplierCategory
+
+GRAPH_CACHE_FILE_SUFFIX = '.npz'
+GRAPH_CLASSES: Dict[str, Type[OperationalGraph]] = {graph_class.__name__: graph_class for graph_class in
+                                                    [OperationalGraph, ColumnarOperationalGraph]}
+
+
+class GraphCache:
+    """
+    Caches the graphs created by graph creation algorithms, keyed by a content hash of the supplier category and the
+    algorithm with its parameters, in memory and, when a directory is given, on disk as npz files.
+    Both are evicted least recently used first: the memory by number of graphs, the disk by total bytes.
+    The returned graphs are shared between the callers, so they should not be modified.
+    """
+
+    def __init__(self, directory: Path = None, max_memory_graphs: int = 4, max_disk_bytes: int = None):
+        self._directory = directory
+        self._max_memory_graphs = max_memory_graphs
+        self._max_disk_bytes = max_disk_bytes
+        self._memory_graphs: Dict[str, OperationalGraph] = OrderedDict()
+        if directory is not None:
+            directory.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def directory(self) -> Optional[Path]:
+        return self._directory
+
+    def get_or_create(self, supplier_category: SupplierCategory,
+                      graph_creation_algorithm: GraphCreationAlgorithm) -> OperationalGraph:
+        key = self.calc_key(supplier_category, graph_creation_algorithm)
+        graph = self._get_from_memory(key)
+        if graph is None:
+            graph = self._get_from_disk(key)
+            if graph is None:
+                graph = graph_creation_algorithm.create(supplier_category=supplier_category)
+                self._put_on_disk(key, graph)
+            self._put_in_memory(key, graph)
+        return graph
+
+    def clear_memory(self) -> None:
+        self._memory_graphs.clear()
+
+    @staticmethod
+    def calc_key(supplier_category: SupplierCategory, graph_creation_algorithm: GraphCreationAlgorithm) -> str:
+        content_hash = hashlib.sha256()
+        content_hash.update(str(GRAPH_NPZ_FORMAT_VERSION).encode('utf-8'))
+        content_hash.update(graph_creation_algorithm.to_json(sort_keys=True).encode('utf-8'))
+        content_hash.update(supplier_category.to_json(sort_keys=True).encode('utf-8'))
+        return content_hash.hexdigest()
+
+    def _get_from_memory(self, key: str) -> Optional[OperationalGraph]:
+        graph = self._memory_graphs.get(key)
+        if graph is not None:
+            self._memory_graphs.move_to_end(key)
+        return graph
+
+    def _put_in_memory(self, key: str, graph: OperationalGraph) -> None:
+        if self._max_memory_graphs <= 0:
+            return
+        self._memory_graphs[key] = graph
+        while len(self._memory_graphs) > self._max_memory_graphs:
+            self._memory_graphs.popitem(last=False)
+
+    def _get_from_disk(self, key: str) -> Optional[OperationalGraph]:
+        if self._directory is None:
+            return None
+        for graph_class_name, graph_class in GRAPH_CLASSES.items():
+            file_path = self._get_file_path(key, graph_class_name)
+            if file_path.exists():
+                os.utime(file_path)
+                return graph_class.from_npz(file_path)
+        return None
+
+    def _put_on_disk(self, key: str, graph: OperationalGraph) -> None:
+        if self._directory is None or type(graph).__name__ not in GRAPH_CLASSES:
+            return
+        file_path = self._get_file_path(key, type(graph).__name__)
+        temp_file_path = file_path.with_name(f'{file_path.name}.{os.getpid()}.tmp')
+        graph.to_npz(temp_file_path)
+        os.replace(temp_file_path, file_path)
+        self._evict_from_disk()
+
+    def _evict_from_disk(self) -> None:
+        if self._max_disk_bytes is None:
+            return
+        file_paths = sorted(self._directory.glob(f'*{GRAPH_CACHE_FILE_SUFFIX}'), key=lambda path: path.stat().st_mtime)
+        total_bytes = sum(file_path.stat().st_size for file_path in file_paths)
+        for file_path in file_paths[:-1]:
+            if total_bytes <= self._max_disk_bytes:
+                break
+            total_bytes -= file_path.stat().st_size
+            file_path.unlink()
+
+    def _get_file_path(self, key: str, graph_class_name: str) -> Path:
+        return self._directory / f'{graph_class_name}_{key}{GRAPH_CACHE_FILE_SUFFIX}'
@@ -2,10 +2,11 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List
+from typing import Iterator, List
 
 from common.entities.base_entities.base_entity import JsonableBaseEntity
-from common.entities.base_entities.delivery_request import DeliveryRequest
+from common.entities.base_entities.delivery_request import DeliveryRequest, iter_delivery_requests_chunks, \
+    DEFAULT_DELIVERY_REQUESTS_CHUNK_SIZE
 from common.entities.base_entities.drone_loading_dock import DroneLoadingDock
 from common.entities.base_entities.fleet.fleet_property_sets import BoardLevelProperties, DroneSetProperties
 from common.entities.base_entities.zone import Zone
@@ -61,21 +62,27 @@ class ImportedJsonParser(JsonableBaseEntity):
                           )
 
     def export_supplier_category(self) -> SupplierCategory:
-        delivery_requests_dict = DeliveryRequest.json_to_dict(Path(self.delivery_requests_file_path))
         drone_loading_docks_dict = DroneLoadingDock.json_to_dict(Path(self.drone_loading_docks_file_path))
         zones_dict = Zone.json_to_dict(Path(self.zones_file_path))
 
-        delivery_requests = list(set([DeliveryRequest.dict_to_obj(dr_dict) for dr_dict in delivery_requests_dict]))
-        for dr in [dr for dr in delivery_requests if len(dr.delivery_options) > 1]:
-            del dr.delivery_options[1:len(dr.delivery_options)]
-
         return SupplierCategory(
-            delivery_requests=delivery_requests,
+            delivery_requests=[dr for chunk in self.iter_delivery_requests_chunks() for dr in chunk],
             drone_loading_docks=[DroneLoadingDock.dict_to_obj(dld_dict)
                                  for dld_dict in drone_loading_docks_dict],
             zero_time=self.export_matcher_config().zero_time,
             zones=[Zone.dict_to_obj(zone_dict) for zone_dict in zones_dict])
 
+    def iter_delivery_requests_chunks(self, chunk_size: int = DEFAULT_DELIVERY_REQUESTS_CHUNK_SIZE) \
+            -> Iterator[List[DeliveryRequest]]:
+        """
+        Streams the delivery requests file (a JSON array or JSONL) in chunks of unique delivery requests, keeping only
+        the first delivery option of each request, e.g. for adding them to a graph chunk by chunk.
+        """
+        for chunk in iter_delivery_requests_chunks(Path(self.delivery_requests_file_path), chunk_size):
+            for dr in [dr for dr in chunk if len(dr.delivery_options) > 1]:
+                del dr.delivery_options[1:len(dr.delivery_options)]
+            yield chunk
+
     def export_drone_set_properties(self) -> List[DroneSetProperties]:
         drone_set_properties_dict = DroneSetProperties.json_to_dict(Path(self.drone_set_properties_list_path))
         return [DroneSetProperties.dict_to_obj(dsp_dict) for dsp_dict in
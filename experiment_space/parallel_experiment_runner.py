@@ -0,0 +1,163 @@
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import List, Dict, Any, Iterator, Tuple, Type
+
+from common.entities.base_entities.fleet.fleet_property_sets import DroneSetProperties, BoardLevelProperties
+from common.graph.operational.operational_graph import OperationalGraph
+from experiment_space.analyzer.analyzer import Analyzer
+from experiment_space.experiment import Experiment
+from experiment_space.graph_cache import GraphCache
+from experiment_space.graph_creation_algorithm import GraphCreationAlgorithm
+from experiment_space.supplier_category import SupplierCategory
+from matching.matcher_config import MatcherConfig
+
+SHARED_GRAPH_FILE_NAME = 'graph_{}.npz'
+
+_worker_graphs: Dict[str, OperationalGraph] = {}
+
+
+@dataclass
+class ExperimentFailure:
+    experiment: Experiment
+    error: str
+
+
+class ParallelExperimentRunner:
+    """
+    Runs the match and the analysis suite of many experiments in a pool of worker processes.
+    Each distinct (supplier category, graph creation algorithm) graph is built once, in this process, and shipped to
+    the workers through a file backed store: the workers memory map it once and reuse it for all its experiments, so
+    that a task carries only the experiment's fleet and matcher configuration.
+    """
+
+    def __init__(self, max_workers: int = None, store_directory: Path = None, max_retries: int = 1,
+                 graph_cache: GraphCache = None):
+        self._max_workers = max_workers
+        self._store_directory = store_directory
+        self._max_retries = max_retries
+        self._graph_cache = graph_cache
+        self._failures: List[ExperimentFailure] = []
+
+    @property
+    def failures(self) -> List[ExperimentFailure]:
+        return self._failures
+
+    def run_multi_match_analysis_pipeline(self, experiments: List[Experiment],
+                                          analyzers: [Analyzer]) -> Iterator[Tuple[Experiment, Dict[str, Any]]]:
+        """
+        Yields (experiment, analysis) as the experiments complete, in completion order. Experiments that raise are
+        skipped and recorded in failures.
+        A worker that dies breaks the whole pool, failing all the running experiments, so only as many experiments as
+        there are workers are submitted at a time, and the running experiments of a broken pool are run again each in
+        a pool of its own. There, an experiment whose worker dies more than max_retries times is recorded in failures.
+        """
+        self._failures = []
+        max_workers = self._max_workers or os.cpu_count()
+        with TemporaryDirectory(dir=self._store_directory) as store_directory:
+            tasks = self._create_tasks(experiments, Path(store_directory))
+            pending_tasks = deque(range(len(experiments)))
+            broken_pool_tasks = []
+            while pending_tasks:
+                with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                    futures = {}
+                    is_broken = False
+                    while futures or (pending_tasks and not is_broken):
+                        while pending_tasks and not is_broken and len(futures) < max_workers:
+                            index = pending_tasks.popleft()
+                            futures[executor.submit(_run_match_analysis, *tasks[index], analyzers)] = index
+                        done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            index = futures.pop(future)
+                            error = future.exception()
+                            if error is None:
+                                yield experiments[index], future.result()
+                            elif isinstance(error, BrokenProcessPool):
+                                is_broken = True
+                                broken_pool_tasks.append(index)
+                            else:
+                                self._failures.append(ExperimentFailure(experiments[index], repr(error)))
+            for index in broken_pool_tasks:
+                yield from self._run_isolated_task(experiments[index], tasks[index], analyzers)
+
+    def _run_isolated_task(self, experiment: Experiment, task: Tuple[Type[OperationalGraph], str, str],
+                           analyzers: [Analyzer]) -> Iterator[Tuple[Experiment, Dict[str, Any]]]:
+        for _ in range(self._max_retries + 1):
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                future = executor.submit(_run_match_analysis, *task, analyzers)
+                error = future.exception()
+            if error is None:
+                yield experiment, future.result()
+                return
+            if not isinstance(error, BrokenProcessPool):
+                break
+        self._failures.append(ExperimentFailure(experiment, repr(error)))
+
+    def _create_tasks(self, experiments: List[Experiment],
+                      store_directory: Path) -> List[Tuple[Type[OperationalGraph], str, str]]:
+        shared_graphs: List[_SharedGraph] = []
+        tasks = []
+        for experiment in experiments:
+            shared_graph = next((shared_graph for shared_graph in shared_graphs if shared_graph.is_of(experiment)),
+                                None)
+            if shared_graph is None:
+                graph = self._create_graph(experiment)
+                graph_path = store_directory / SHARED_GRAPH_FILE_NAME.format(len(shared_graphs))
+                graph.to_npz(graph_path)
+                shared_graph = _SharedGraph(experiment.supplier_category, experiment.graph_creation_algorithm,
+                                            type(graph), str(graph_path))
+                shared_graphs.append(shared_graph)
+            tasks.append((shared_graph.graph_class, shared_graph.path,
+                          _experiment_fleet_and_config_to_json(experiment)))
+        return tasks
+
+    def _create_graph(self, experiment: Experiment) -> OperationalGraph:
+        if self._graph_cache is not None:
+            return self._graph_cache.get_or_create(experiment.supplier_category, experiment.graph_creation_algorithm)
+        return experiment.graph_creation_algorithm.create(supplier_category=experiment.supplier_category)
+
+
+@dataclass
+class _SharedGraph:
+    supplier_category: SupplierCategory
+    graph_creation_algorithm: GraphCreationAlgorithm
+    graph_class: Type[OperationalGraph]
+    path: str
+
+    def is_of(self, experiment: Experiment) -> bool:
+        return type(self.graph_creation_algorithm) == type(experiment.graph_creation_algorithm) \
+               and self.graph_creation_algorithm == experiment.graph_creation_algorithm \
+               and self.supplier_category == experiment.supplier_category
+
+
+def _experiment_fleet_and_config_to_json(experiment: Experiment) -> str:
+    return json.dumps({'drone_set_properties_list': [drone_set_properties.__dict__() for drone_set_properties in
+                                                     experiment.drone_set_properties_list],
+                       'matcher_config': experiment.matcher_config.__dict__(),
+                       'board_level_properties': experiment.board_level_properties.__dict__()})
+
+
+def _run_match_analysis(graph_class: Type[OperationalGraph], graph_path: str, experiment_json: str,
+                        analyzers: [Analyzer]) -> Dict[str, Any]:
+    experiment_dict = json.loads(experiment_json)
+    experiment = Experiment(supplier_category=None,
+                            drone_set_properties_list=[DroneSetProperties.dict_to_obj(drone_set_properties_dict)
+                                                       for drone_set_properties_dict in
+                                                       experiment_dict['drone_set_properties_list']],
+                            matcher_config=MatcherConfig.dict_to_obj(experiment_dict['matcher_config']),
+                            graph_creation_algorithm=None,
+                            board_level_properties=BoardLevelProperties.dict_to_obj(
+                                experiment_dict['board_level_properties']))
+    return Experiment.run_analysis_suite(experiment.run_match(_load_shared_graph(graph_class, graph_path)), analyzers)
+
+
+def _load_shared_graph(graph_class: Type[OperationalGraph], graph_path: str) -> OperationalGraph:
+    if graph_path not in _worker_graphs:
+        _worker_graphs[graph_path] = graph_class.from_npz(Path(graph_path))
+    return _worker_graphs[graph_path]
+
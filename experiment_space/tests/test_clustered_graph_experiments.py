@@ -3,6 +3,7 @@ import unittest
 from datetime import time, date, timedelta, datetime
 from pathlib import Path
 from random import Random
+from typing import List
 
 from common.entities.base_entities.drone import PackageConfiguration
 from common.entities.base_entities.drone_formation import DroneFormationType
@@ -61,6 +61,18 @@ class BasicExperimentTest(unittest.TestCase):
         self.assertEqual(type(analysis_results[MatchPercentageDeliveryRequestAnalyzer.__name__]), float)
         self.assertEqual(type(analysis_results[MatchedDeliveryRequestsAnalyzer.__name__]), int)
 
+    def test_instrumented_experiment(self):
+        result_drone_delivery_board, run_instrumentation = self.experiment.run_instrumented_match()
+
+        phases = run_instrumentation.calc_phases()
+        self.assertTrue(len(result_drone_delivery_board.drone_deliveries) > 0)
+        for path in ['experiment.graph_creation', 'experiment.delivering_drones_board_generation',
+                     'experiment.match', 'experiment.match/matching_master.match']:
+            self.assertIn(path, phases)
+        self.assertGreater(phases['experiment.graph_creation']['counters']['nodes'], 0)
+        self.assertGreaterEqual(phases['experiment.match']['wall_sec'],
+                                phases['experiment.match/matching_master.match']['wall_sec'])
+
     def test_cartesian_product_experiments(self):
         experiment_options = create_options_class(self.experiment)
         experiment_options.supplier_category += [self.supplier_category, self.supplier_category]
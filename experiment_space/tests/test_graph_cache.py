@@ -0,0 +1,61 @@
+import shutil
+import unittest
+from pathlib import Path
+
+from experiment_space.graph_cache import GraphCache
+from experiment_space.graph_creation_algorithm import FullyConnectedGraphAlgorithm
+from experiment_space.supplier_category import SupplierCategory
+
+
+class CountingGraphAlgorithm(FullyConnectedGraphAlgorithm):
+    _created = 0
+
+    def create(self, supplier_category: SupplierCategory):
+        CountingGraphAlgorithm._created += 1
+        return super().create(supplier_category)
+
+
+class GraphCacheTest(unittest.TestCase):
+    cache_directory = Path('experiment_space/tests/jsons/graph_cache')
+
+    @classmethod
+    def setUpClass(cls):
+        cls.supplier_category = SupplierCategory.from_json(
+            Path('experiment_space/tests/jsons/test_supplier_category.json'))
+
+    def setUp(self):
+        CountingGraphAlgorithm._created = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_directory, ignore_errors=True)
+
+    def test_key_depends_on_content(self):
+        key = GraphCache.calc_key(self.supplier_category, FullyConnectedGraphAlgorithm())
+        same_content_supplier_category = SupplierCategory.from_json(
+            Path('experiment_space/tests/jsons/test_supplier_category.json'))
+        self.assertEqual(key, GraphCache.calc_key(same_content_supplier_category, FullyConnectedGraphAlgorithm()))
+        self.assertNotEqual(key, GraphCache.calc_key(self.supplier_category,
+                                                     FullyConnectedGraphAlgorithm(edge_cost_factor=2.0)))
+        self.assertNotEqual(key, GraphCache.calc_key(self.supplier_category, CountingGraphAlgorithm()))
+
+    def test_graph_is_created_once_in_memory(self):
+        graph_cache = GraphCache()
+        graph = graph_cache.get_or_create(self.supplier_category, CountingGraphAlgorithm())
+        self.assertIs(graph, graph_cache.get_or_create(self.supplier_category, CountingGraphAlgorithm()))
+        self.assertEqual(CountingGraphAlgorithm._created, 1)
+
+    def test_graph_is_loaded_from_disk(self):
+        graph = GraphCache(self.cache_directory).get_or_create(self.supplier_category, CountingGraphAlgorithm())
+        loaded_graph = GraphCache(self.cache_directory).get_or_create(self.supplier_category,
+                                                                      CountingGraphAlgorithm())
+        self.assertEqual(CountingGraphAlgorithm._created, 1)
+        self.assertEqual(graph, loaded_graph)
+        self.assertEqual(graph.get_original_nodes_indices(), loaded_graph.get_original_nodes_indices())
+
+    def test_least_recently_used_graphs_are_evicted(self):
+        graph_cache = GraphCache(self.cache_directory, max_memory_graphs=1, max_disk_bytes=1)
+        graph_cache.get_or_create(self.supplier_category, CountingGraphAlgorithm())
+        graph_cache.get_or_create(self.supplier_category, CountingGraphAlgorithm(edge_cost_factor=2.0))
+        graph_cache.get_or_create(self.supplier_category, CountingGraphAlgorithm())
+        self.assertEqual(CountingGraphAlgorithm._created, 3)
+        self.assertEqual(len(list(self.cache_directory.iterdir())), 1)
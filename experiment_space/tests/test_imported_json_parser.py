@@ -2,6 +2,7 @@ import unittest
 from pathlib import Path
 
 from common.entities.base_entities.fleet.fleet_property_sets import BoardLevelProperties
+from common.graph.operational.operational_graph import OperationalGraph
 from experiment_space.experiment import Experiment
 from experiment_space.graph_creation_algorithm import FullyConnectedGraphAlgorithm
 from experiment_space.imported_json_parser import ImportedJsonParser
@@ -62,3 +63,16 @@ class ImportedJsonParserTest(unittest.TestCase):
         loaded_experiment = Experiment.dict_to_obj(experiments_to_dict)
 
         self.assertEqual(loaded_experiment, self.expected_experiment)
+
+    def test_iter_delivery_requests_chunks(self):
+        graph = OperationalGraph()
+        chunks = list(self.expected_parser_obj.iter_delivery_requests_chunks(chunk_size=10))
+        for chunk in chunks:
+            graph.add_delivery_requests(chunk)
+
+        delivery_requests = [dr for chunk in chunks for dr in chunk]
+        self.assertEqual([10, 10, 9], [len(chunk) for chunk in chunks])
+        self.assertEqual(len(delivery_requests), len({dr.id for dr in delivery_requests}))
+        self.assertTrue(all(len(dr.delivery_options) == 1 for dr in delivery_requests))
+        self.assertEqual(delivery_requests, self.supplier_category.delivery_requests)
+        self.assertEqual(len(delivery_requests), len(graph.nodes))
@@ -0,0 +1,108 @@
+import os
+import time
+import unittest
+from pathlib import Path
+
+from common.entities.base_entities.drone_delivery_board import DroneDeliveryBoard
+from common.entities.base_entities.fleet.fleet_property_sets import DroneSetProperties, BoardLevelProperties
+from experiment_space.analyzer.analyzer import QuantitativeAnalyzer
+from experiment_space.analyzer.quantitative_analyzers import MatchedDeliveryRequestsAnalyzer, \
+    UnmatchedDeliveryRequestsAnalyzer, AmountMatchedPerPackageTypeAnalyzer
+from experiment_space.experiment import Experiment
+from experiment_space.experiment_generator import create_options_class, Options
+from experiment_space.graph_creation_algorithm import FullyConnectedGraphAlgorithm
+from experiment_space.parallel_experiment_runner import ParallelExperimentRunner
+from experiment_space.supplier_category import SupplierCategory
+from matching.matcher_config import MatcherConfig
+
+
+class FailingAnalyzer(QuantitativeAnalyzer):
+
+    @staticmethod
+    def calc_analysis(delivery_board: DroneDeliveryBoard) -> float:
+        raise ValueError("Analysis failed")
+
+
+class CrashingAnalyzer(QuantitativeAnalyzer):
+
+    @staticmethod
+    def calc_analysis(delivery_board: DroneDeliveryBoard) -> float:
+        os._exit(1)
+
+
+class CrashingOnEmptyBoardAnalyzer(QuantitativeAnalyzer):
+    """
+    Kills the worker of an empty board, and keeps the other workers running meanwhile.
+    """
+
+    @staticmethod
+    def calc_analysis(delivery_board: DroneDeliveryBoard) -> float:
+        if len(delivery_board.drone_deliveries) == 0:
+            os._exit(1)
+        time.sleep(2)
+        return len(delivery_board.drone_deliveries)
+
+
+class ParallelExperimentRunnerTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        supplier_category = SupplierCategory.from_json(Path('experiment_space/tests/jsons/test_supplier_category.json'))
+        matcher_config = MatcherConfig.from_json(Path('experiment_space/tests/jsons/test_matcher_config.json'))
+        drone_set_properties = DroneSetProperties.from_json(
+            Path('experiment_space/tests/jsons/test_drone_set_properties.json'))
+        experiment = Experiment(supplier_category=supplier_category,
+                                matcher_config=matcher_config,
+                                drone_set_properties_list=[drone_set_properties],
+                                graph_creation_algorithm=FullyConnectedGraphAlgorithm())
+        experiment_options = create_options_class(experiment)
+        experiment_options.graph_creation_algorithm += [FullyConnectedGraphAlgorithm(edge_cost_factor=2.0)]
+        cls.experiments = Options.calc_cartesian_product(experiment_options)
+        cls.analyzers = [MatchedDeliveryRequestsAnalyzer,
+                         UnmatchedDeliveryRequestsAnalyzer,
+                         AmountMatchedPerPackageTypeAnalyzer]
+
+    def test_parallel_pipeline_equals_serial_pipeline(self):
+        runner = ParallelExperimentRunner(max_workers=2)
+        results = list(runner.run_multi_match_analysis_pipeline(self.experiments, self.analyzers))
+        expected_results = Experiment.run_multi_match_analysis_pipeline(self.experiments, self.analyzers)
+
+        self.assertEqual(len(results), len(self.experiments))
+        self.assertEqual(runner.failures, [])
+        for experiment, expected_analysis in expected_results:
+            self.assertIn((experiment, expected_analysis), results)
+
+    def test_failing_experiments_are_recorded(self):
+        runner = ParallelExperimentRunner(max_workers=2)
+        results = list(runner.run_multi_match_analysis_pipeline(self.experiments, [FailingAnalyzer]))
+
+        self.assertEqual(results, [])
+        self.assertEqual(len(runner.failures), len(self.experiments))
+        for experiment in self.experiments:
+            self.assertIn(experiment, [failure.experiment for failure in runner.failures])
+        self.assertIn("Analysis failed", runner.failures[0].error)
+
+    def test_crashed_workers_are_survived(self):
+        runner = ParallelExperimentRunner(max_workers=2, max_retries=1)
+        results = list(runner.run_multi_match_analysis_pipeline(self.experiments, [CrashingAnalyzer]))
+
+        self.assertEqual(results, [])
+        self.assertEqual(len(runner.failures), len(self.experiments))
+        self.assertIn("BrokenProcessPool", runner.failures[0].error)
+
+    def test_crashed_worker_does_not_fail_the_experiments_running_with_it(self):
+        experiment = self.experiments[0]
+        crashing_experiment = Experiment(supplier_category=experiment.supplier_category,
+                                         matcher_config=experiment.matcher_config,
+                                         drone_set_properties_list=experiment.drone_set_properties_list,
+                                         graph_creation_algorithm=experiment.graph_creation_algorithm,
+                                         board_level_properties=BoardLevelProperties(max_route_time_entire_board=1))
+        runner = ParallelExperimentRunner(max_workers=len(self.experiments) + 1, max_retries=1)
+        results = list(runner.run_multi_match_analysis_pipeline(self.experiments + [crashing_experiment],
+                                                                [CrashingOnEmptyBoardAnalyzer]))
+
+        self.assertEqual(len(self.experiments), len(results))
+        for experiment in self.experiments:
+            self.assertIn(experiment, [result_experiment for result_experiment, _ in results])
+        self.assertEqual([crashing_experiment], [failure.experiment for failure in runner.failures])
+        self.assertIn("BrokenProcessPool", runner.failures[0].error)
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from functools import reduce, lru_cache
-from typing import List, Union
+from typing import List, Union, Tuple
 
 from matplotlib.patches import Ellipse
 from shapely.geometry import MultiPoint
@@ -82,6 +82,11 @@ def calc_centroid(points: tuple(Point2D)) -> Point2D:
     return l
 
 
+def calc_centroid_xy(xys: Tuple[Tuple[float, float], ...]) -> Tuple[float, float]:
+    scale = 1.0 / len(xys)
+    return sum(x for x, _ in xys) * scale, sum(y for _, y in xys) * scale
+
+
 def calc_convex_hull_polygon(points: [Point2D]) -> Polygon2D:
     output_polygon = _ShapelyUtils.convert_shapely_to_polygon_2d(
         MultiPoint([p._shapely_obj for p in points]).convex_hull)
@@ -0,0 +1,50 @@
+from typing import Tuple
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from geometry.geo2d import Bbox2D
+
+DISTANCE_RELATIVE_TOLERANCE = 1e-9
+
+
+class SpatialIndex:
+
+    def __init__(self, locations: np.ndarray):
+        self._locations = np.asarray(locations, dtype=np.float64).reshape(-1, 2)
+        self._tree = cKDTree(self._locations) if len(self._locations) > 0 else None
+
+    @property
+    def locations(self) -> np.ndarray:
+        return self._locations
+
+    def __len__(self):
+        return len(self._locations)
+
+    def query_pairs_within_distance(self, max_distance: float) -> Tuple[np.ndarray, np.ndarray]:
+        if self._tree is None:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        pairs = self._tree.query_pairs(_inflate(max_distance), output_type='ndarray')
+        start_indices = np.concatenate([pairs[:, 0], pairs[:, 1]]).astype(np.int64)
+        end_indices = np.concatenate([pairs[:, 1], pairs[:, 0]]).astype(np.int64)
+        order = np.lexsort((end_indices, start_indices))
+        return start_indices[order], end_indices[order]
+
+    def query_within_distance(self, x: float, y: float, max_distance: float) -> np.ndarray:
+        if self._tree is None:
+            return np.empty(0, dtype=np.int64)
+        return np.sort(np.array(self._tree.query_ball_point((x, y), _inflate(max_distance)), dtype=np.int64))
+
+    def query_within_bbox(self, bbox: Bbox2D) -> np.ndarray:
+        center_x = (bbox.min_x + bbox.max_x) / 2
+        center_y = (bbox.min_y + bbox.max_y) / 2
+        half_diagonal = np.hypot(bbox.max_x - bbox.min_x, bbox.max_y - bbox.min_y) / 2
+        candidates = self.query_within_distance(center_x, center_y, half_diagonal)
+        candidates_locations = self._locations[candidates]
+        in_bbox = (bbox.min_x <= candidates_locations[:, 0]) & (candidates_locations[:, 0] <= bbox.max_x) & \
+                  (bbox.min_y <= candidates_locations[:, 1]) & (candidates_locations[:, 1] <= bbox.max_y)
+        return candidates[in_bbox]
+
+
+def _inflate(distance: float) -> float:
+    return distance * (1 + DISTANCE_RELATIVE_TOLERANCE) + DISTANCE_RELATIVE_TOLERANCE
@@ -0,0 +1,40 @@
+import itertools
+import unittest
+
+import numpy as np
+from numpy.testing import assert_array_equal
+
+from geometry.geo_factory import create_bbox
+from geometry.spatial_index import SpatialIndex
+
+
+class SpatialIndexTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.locations = np.random.RandomState(42).uniform(0, 100, size=(300, 2))
+        cls.spatial_index = SpatialIndex(cls.locations)
+
+    def test_query_pairs_within_distance(self):
+        max_distance = 7.5
+        expected_pairs = [(i, j) for i, j in itertools.permutations(range(len(self.locations)), 2)
+                          if np.linalg.norm(self.locations[i] - self.locations[j]) <= max_distance]
+        start_indices, end_indices = self.spatial_index.query_pairs_within_distance(max_distance)
+        self.assertEqual(expected_pairs, list(zip(start_indices.tolist(), end_indices.tolist())))
+
+    def test_query_within_distance(self):
+        max_distance = 12
+        expected_indices = [i for i, location in enumerate(self.locations)
+                            if np.linalg.norm(location - np.array([50, 50])) <= max_distance]
+        assert_array_equal(expected_indices, self.spatial_index.query_within_distance(50, 50, max_distance))
+
+    def test_query_within_bbox(self):
+        bbox = create_bbox(10, 20, 40, 90)
+        expected_indices = [i for i, (x, y) in enumerate(self.locations) if 10 <= x <= 40 and 20 <= y <= 90]
+        assert_array_equal(expected_indices, self.spatial_index.query_within_bbox(bbox))
+
+    def test_empty_index(self):
+        spatial_index = SpatialIndex(np.empty((0, 2)))
+        self.assertEqual(0, len(spatial_index))
+        self.assertEqual(0, len(spatial_index.query_pairs_within_distance(1)[0]))
+        self.assertEqual(0, len(spatial_index.query_within_bbox(create_bbox(0, 0, 1, 1))))
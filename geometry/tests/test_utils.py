@@ -1,6 +1,9 @@
 import unittest
 
-from geometry.geo_factory import create_point_2d
+import numpy as np
+from numpy.testing import assert_array_equal
+
+from geometry.geo_factory import create_point_2d, create_polygon_2d
 from geometry.utils import GeometryUtils
 
 
@@ -23,3 +26,18 @@ class GeometryUtilsTestCase(unittest.TestCase):
     def test_conversion_points_list_to_xy_array(self):
         point_list_converted_result = GeometryUtils.convert_points_list_to_xy_array(self.point_list)
         self.assertEqual(point_list_converted_result, self.xy_array)
+
+    def test_calc_points_in_polygons(self):
+        polygons_xy = np.array([[(0, 0), (4, 0), (4, 4), (0, 4)],
+                                [(0, 0), (4, 0), (2, 1), (0, 4)]], dtype=np.float64)
+        points_xy = np.random.RandomState(42).uniform(-1, 5, size=(200, 2))
+        points = GeometryUtils.convert_xy_array_to_points_list(points_xy.tolist())
+        expected = [[point in create_polygon_2d(GeometryUtils.convert_xy_array_to_points_list(polygon_xy.tolist()))
+                     for point in points] for polygon_xy in polygons_xy]
+        assert_array_equal(expected, GeometryUtils.calc_points_in_polygons(polygons_xy, points_xy))
+
+    def test_calc_points_in_polygons_boundary(self):
+        polygons_xy = np.array([[(0, 0), (4, 0), (4, 4), (0, 4)]], dtype=np.float64)
+        points_xy = np.array([(0, 0), (2, 0), (4, 4), (4 + 1e-12, 2), (4 + 1e-6, 2)])
+        assert_array_equal([[True, True, True, True, False]],
+                           GeometryUtils.calc_points_in_polygons(polygons_xy, points_xy))
@@ -1,6 +1,7 @@
 from abc import abstractmethod, ABC
 from typing import Tuple, List, Iterator, Union
 
+import numpy as np
 
 from geometry.geo2d import Point2D, Polygon2D, EmptyGeometry2D
 
@@ -20,6 +21,35 @@ class GeometryUtils:
     def convert_points_list_to_xy_array(points: List[Point2D]) -> List[Tuple[float, float]]:
         return [(p.x, p.y) for p in points]
 
+    @staticmethod
+    def calc_points_in_polygons(polygons_xy: np.ndarray, points_xy: np.ndarray,
+                                boundary_tolerance: float = 1e-9) -> np.ndarray:
+        """
+        Batched even-odd point in polygon test of (num polygons, num vertices, 2) polygons against (num points, 2)
+        points. Points within boundary_tolerance of a polygon's boundary are considered contained in it.
+        Returns a (num polygons, num points) boolean array.
+        """
+        polygons_xy = np.asarray(polygons_xy, dtype=np.float64)
+        points_xy = np.asarray(points_xy, dtype=np.float64).reshape(-1, 2)
+        start_xy = polygons_xy[:, np.newaxis, :, :]
+        end_xy = np.roll(polygons_xy, -1, axis=1)[:, np.newaxis, :, :]
+        px = points_xy[np.newaxis, :, np.newaxis, 0]
+        py = points_xy[np.newaxis, :, np.newaxis, 1]
+        start_x, start_y = start_xy[..., 0], start_xy[..., 1]
+        edge_x, edge_y = end_xy[..., 0] - start_x, end_xy[..., 1] - start_y
+
+        straddles = (start_y > py) != (end_xy[..., 1] > py)
+        safe_edge_y = np.where(edge_y == 0, 1, edge_y)
+        crossings = straddles & (px < start_x + (py - start_y) * edge_x / safe_edge_y)
+        inside = np.count_nonzero(crossings, axis=2) % 2 == 1
+
+        edge_length_squared = edge_x ** 2 + edge_y ** 2
+        projection = np.clip(((px - start_x) * edge_x + (py - start_y) * edge_y)
+                             / np.where(edge_length_squared == 0, 1, edge_length_squared), 0, 1)
+        boundary_distance = np.hypot(px - start_x - projection * edge_x, py - start_y - projection * edge_y)
+        on_boundary = np.any(boundary_distance <= boundary_tolerance, axis=2)
+        return inside | on_boundary
+
 
 class Localizable(ABC):
 
@@ -27,6 +57,9 @@ class Localizable(ABC):
     def calc_location(self) -> Point2D:
         raise NotImplementedError
 
+    def calc_location_xy(self) -> Tuple[float, float]:
+        return self.calc_location().xy()
+
 
 class Shapeable(ABC):
 
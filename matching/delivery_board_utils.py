@@ -0,0 +1,65 @@
+from typing import List, Set
+
+from common.entities.base_entities.drone_delivery import DroneDelivery, MatchedDeliveryRequest, DeliveringDrones
+from common.entities.base_entities.drone_delivery_board import DroneDeliveryBoard
+from common.graph.operational.operational_graph import OperationalGraph
+from matching.greedy.greedy_routes_builder import GreedyRoutesBuilder
+from matching.initial_solution import Routes
+from matching.matcher_input import MatcherInput
+from matching.ortools.ortools_reloader import ORToolsReloader
+
+
+def localize_drone_delivery(drone_delivery: DroneDelivery, graph: OperationalGraph,
+                            delivering_drones: DeliveringDrones) -> DroneDelivery:
+    """
+    Returns the drone delivery of the given delivering drones, with the graph indices and delivery requests of the
+    given graph, which should contain all the matched requests.
+    """
+    matched_requests = []
+    for matched_request in drone_delivery.matched_requests:
+        graph_index = graph.get_node_index_by_id(matched_request.delivery_request.id)
+        matched_requests.append(MatchedDeliveryRequest(
+            graph_index=graph_index,
+            delivery_request=graph.get_delivery_request(graph_index),
+            matched_delivery_option_index=matched_request.matched_delivery_option_index,
+            delivery_time_window=matched_request.delivery_time_window))
+    return DroneDelivery(delivering_drones, matched_requests, drone_delivery.start_drone_loading_dock,
+                         drone_delivery.end_drone_loading_dock)
+
+
+def get_matched_graph_indices(delivery_board: DroneDeliveryBoard) -> Set[int]:
+    return {matched_request.graph_index for drone_delivery in delivery_board.drone_deliveries
+            for matched_request in drone_delivery.matched_requests}
+
+
+def get_trips_graph_indices(delivery_board: DroneDeliveryBoard, delivering_drones: DeliveringDrones,
+                            graph: OperationalGraph) -> List[List[int]]:
+    """
+    Returns the indices, in the given graph, of the matched requests of each trip of the delivering drones, which are
+    found by their id. Requests that are not in the graph are skipped, and so are the trips left empty.
+    """
+    drone_deliveries = sorted((drone_delivery for drone_delivery in delivery_board.drone_deliveries
+                               if drone_delivery.delivering_drones.id == delivering_drones.id),
+                              key=lambda drone_delivery:
+                              drone_delivery.start_drone_loading_dock.delivery_time_window.since.get_internal())
+    trips = [[graph.get_node_index_by_id(matched_request.delivery_request.id)
+              for matched_request in drone_delivery.matched_requests
+              if graph.has_node_id(matched_request.delivery_request.id)]
+             for drone_delivery in drone_deliveries]
+    return [trip for trip in trips if len(trip) > 0]
+
+
+def create_routes_from_delivery_board(delivery_board: DroneDeliveryBoard, matcher_input: MatcherInput) -> Routes:
+    """
+    Returns the routes of the matcher input formations that follow the drone deliveries of a board matched on another
+    graph, for instance before formations dropped out or requests were cancelled. The formations and the requests are
+    found by their ids, and the visits that are no longer feasible are dropped by replaying the routes. The first
+    formation route always visits the first reloading depot when the graph has two delivery requests it can deliver.
+    """
+    reloader = ORToolsReloader(matcher_input)
+    routes = Routes([reloader.join_trips_into_route(get_trips_graph_indices(delivery_board, delivering_drones,
+                                                                            matcher_input.graph), formation_index)
+                     for formation_index, delivering_drones in
+                     enumerate(matcher_input.delivering_drones_board.delivering_drones_list)])
+    routes_builder = GreedyRoutesBuilder(matcher_input)
+    return routes_builder.to_routes(routes_builder.replay(routes))
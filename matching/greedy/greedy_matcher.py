@@ -0,0 +1,66 @@
+from datetime import timedelta
+from typing import List
+
+from common.entities.base_entities.drone_delivery import DroneDelivery, MatchedDeliveryRequest, MatchedDroneLoadingDock
+from common.entities.base_entities.drone_delivery_board import DroneDeliveryBoard, UnmatchedDeliveryRequest
+from common.entities.base_entities.drone_loading_dock import DroneLoadingDock
+from common.entities.base_entities.temporal import TimeWindowExtension, TimeDeltaExtension
+from matching.greedy.greedy_routes_builder import GreedyRoutesBuilder, GreedyTrip
+from matching.initial_solution import Routes
+from matching.matcher import Matcher
+
+
+class GreedyMatcher(Matcher):
+
+    def match(self) -> DroneDeliveryBoard:
+        routes_builder = GreedyRoutesBuilder(self._matcher_input)
+        return self._create_drone_delivery_board(routes_builder, routes_builder.build())
+
+    def match_to_routes(self) -> Routes:
+        routes_builder = GreedyRoutesBuilder(self._matcher_input)
+        return routes_builder.to_routes(routes_builder.build())
+
+    def match_from_init_solution(self, initial_routes: Routes) -> DroneDeliveryBoard:
+        routes_builder = GreedyRoutesBuilder(self._matcher_input)
+        return self._create_drone_delivery_board(routes_builder, routes_builder.build(initial_routes))
+
+    def _create_drone_delivery_board(self, routes_builder: GreedyRoutesBuilder,
+                                     formations_trips: List[List[GreedyTrip]]) -> DroneDeliveryBoard:
+        graph = self._matcher_input.graph
+        return DroneDeliveryBoard(
+            drone_deliveries=[drone_delivery
+                              for formation_index, trips in enumerate(formations_trips)
+                              for drone_delivery in self._create_drone_deliveries(formation_index, trips)],
+            unmatched_delivery_requests=[UnmatchedDeliveryRequest(graph_index, graph.get_delivery_request(graph_index))
+                                         for graph_index in
+                                         routes_builder.get_unmatched_delivery_requests(formations_trips)])
+
+    def _create_drone_deliveries(self, formation_index: int, trips: List[GreedyTrip]) -> List[DroneDelivery]:
+        delivering_drones = self._matcher_input.delivering_drones_board.delivering_drones_list[formation_index]
+        if len(trips) == 0:
+            start_time_window = delivering_drones.start_loading_dock.time_window
+            return [DroneDelivery(delivering_drones, [],
+                                  MatchedDroneLoadingDock(delivering_drones.start_loading_dock, start_time_window),
+                                  MatchedDroneLoadingDock(delivering_drones.end_loading_dock, start_time_window))]
+        return [DroneDelivery(delivering_drones,
+                              [MatchedDeliveryRequest(graph_index=graph_index,
+                                                      delivery_request=self._matcher_input.graph.get_delivery_request(
+                                                          graph_index),
+                                                      matched_delivery_option_index=0,
+                                                      delivery_time_window=self._create_time_window(arrival_time))
+                               for graph_index, arrival_time in zip(trip.delivery_requests,
+                                                                    trip.calc_arrival_times())],
+                              self._create_matched_loading_dock(delivering_drones.start_loading_dock, trip.departure),
+                              self._create_matched_loading_dock(delivering_drones.end_loading_dock,
+                                                                trip.calc_return_time()))
+                for trip in trips]
+
+    def _create_matched_loading_dock(self, loading_dock: DroneLoadingDock,
+                                     relative_time_in_min: int) -> MatchedDroneLoadingDock:
+        return MatchedDroneLoadingDock(drone_loading_dock=loading_dock,
+                                       delivery_time_window=self._create_time_window(relative_time_in_min))
+
+    def _create_time_window(self, relative_time_in_min: int) -> TimeWindowExtension:
+        date_time = self._matcher_input.config.zero_time.add_time_delta(
+            TimeDeltaExtension(timedelta(minutes=relative_time_in_min)))
+        return TimeWindowExtension(since=date_time, until=date_time)
@@ -0,0 +1,357 @@
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional, Set
+
+import numpy as np
+
+from common.entities.base_entities.package import PackageType
+from common.graph.operational.export_ortools_graph import OrtoolsGraphExporter
+from matching.initial_solution import Routes
+from matching.matcher_input import MatcherInput
+from matching.ortools.ortools_reloader import ORToolsReloader
+
+NO_EDGE_TRAVEL_TIME = 2 ** 60
+UNLIMITED_DEPARTURE = 2 ** 60
+
+
+@dataclass
+class GreedyTrip:
+    """
+    A trip of a formation from its start loading dock, through its delivery requests and back to a loading dock.
+    All times are in minutes from the matcher zero time, and the arrival offsets are the travel times from the
+    departure, as waiting is allowed only at the loading docks.
+    """
+    earliest_departure: int
+    latest_departure: int
+    delivery_requests: List[int] = field(default_factory=list)
+    arrival_offsets: List[int] = field(default_factory=list)
+    departure: Optional[int] = None
+    return_offset: Optional[int] = None
+
+    @property
+    def offset(self) -> int:
+        return self.arrival_offsets[-1] if self.arrival_offsets else 0
+
+    def calc_arrival_times(self) -> List[int]:
+        return [self.departure + arrival_offset for arrival_offset in self.arrival_offsets]
+
+    def calc_return_time(self) -> int:
+        return self.departure + self.return_offset
+
+
+@dataclass
+class _Candidates:
+    delivery_requests: np.ndarray
+    scores: np.ndarray
+    earliest_departures: np.ndarray
+    latest_departures: np.ndarray
+    arrival_offsets: np.ndarray
+
+
+class _Formation:
+
+    def __init__(self, index: int, capacity: np.ndarray, earliest_departure: int, latest_departure: int):
+        self.index = index
+        self.capacity = capacity
+        self.load = np.zeros_like(capacity)
+        self.closed_trips: List[GreedyTrip] = []
+        self.trip: Optional[GreedyTrip] = GreedyTrip(earliest_departure, latest_departure)
+        self.route_start: Optional[int] = None
+        self.is_done = False
+
+
+class GreedyRoutesBuilder:
+    """
+    Builds the formations routes by repeatedly appending, to the open trip of some formation, the delivery request
+    that takes the fewest minutes per objective gain (the unmatched penalty saved minus the priority cost). Each
+    formation keeps a departure window for its open trip, so the time windows, capacities per package type, session
+    and route times, and the return to a loading dock are all checked at once for all the neighbours of its last node.
+    When a formation cannot be extended, it reloads at its start loading dock while it has reloads left.
+    """
+
+    def __init__(self, matcher_input: MatcherInput):
+        self._matcher_input = matcher_input
+        self._reloader = ORToolsReloader(matcher_input)
+        graph = matcher_input.graph
+        graph_exporter = OrtoolsGraphExporter()
+        config = matcher_input.config
+        board = matcher_input.delivering_drones_board
+        self._indptr, self._targets, _, travel_times = graph.to_csr_arrays()
+        self._travel_times = travel_times.astype(np.int64)
+        self._time_windows = graph.get_relative_time_windows_in_min(config.zero_time).astype(np.int64)
+        self._demands = np.asarray(graph.package_demands, dtype=np.int64)
+        gains = config.unmatched_penalty - graph.priorities * config.constraints.priority.priority_cost_coefficient
+        self._gains = gains.astype(np.float64)
+        self._available = np.zeros(len(gains), dtype=bool)
+        self._available[graph_exporter.export_delivery_request_nodes_indices(graph)] = True
+        self._available &= gains > 0
+        self._initially_available = self._available.copy()
+        self._start_docks = [graph_exporter.get_node_graph_index(graph, delivering_drones.start_loading_dock)
+                             for delivering_drones in board.delivering_drones_list]
+        self._end_docks = [graph_exporter.get_node_graph_index(graph, delivering_drones.end_loading_dock)
+                           for delivering_drones in board.delivering_drones_list]
+        self._start_time_windows = [self._calc_relative_time_window(delivering_drones.start_loading_dock)
+                                    for delivering_drones in board.delivering_drones_list]
+        self._end_time_windows = [self._calc_relative_time_window(delivering_drones.end_loading_dock)
+                                  for delivering_drones in board.delivering_drones_list]
+        self._travel_times_to_docks = {dock: self._calc_travel_times_to(dock)
+                                       for dock in set(self._start_docks + self._end_docks)}
+        self._capacities = np.array([board.get_package_type_amount_per_drone_delivery(package_type)
+                                     for package_type in PackageType], dtype=np.int64).T
+        self._max_session_times = board.get_max_session_time_per_drone_delivery()
+        self._max_route_times = [delivering_drones.get_max_route_time_in_minutes()
+                                 for delivering_drones in board.delivering_drones_list]
+        self._reloading_time = config.constraints.travel_time.reloading_time
+        self._timeout_sec = config.solver.timeout_sec
+
+    def build(self, initial_routes: Routes = None) -> List[List[GreedyTrip]]:
+        """
+        Returns the trips of each formation, after replaying the feasible part of the initial routes, if given.
+        """
+        start_time = time.monotonic()
+        formations = self._replay_routes(initial_routes)
+        best_candidates = [None] * len(formations)
+        stale_formations = set(range(len(formations)))
+        while self._timeout_sec == 0 or time.monotonic() - start_time < self._timeout_sec:
+            for index in stale_formations:
+                best_candidates[index] = self._find_best_candidate(formations[index])
+            stale_formations.clear()
+            scores = [candidate[0] if candidate is not None else np.inf for candidate in best_candidates]
+            formation_index = int(np.argmin(scores))
+            if scores[formation_index] == np.inf:
+                break
+            _, delivery_request, earliest_departure, latest_departure, arrival_offset = \
+                best_candidates[formation_index]
+            self._append(formations[formation_index], delivery_request, earliest_departure, latest_departure,
+                         arrival_offset)
+            stale_formations = self._get_formations_with_candidate(best_candidates, delivery_request)
+        return [self._finalize(formation) for formation in formations]
+
+    def replay(self, initial_routes: Routes) -> List[List[GreedyTrip]]:
+        """
+        Returns the trips of each formation with only the feasible part of the initial routes, whose delivery requests
+        are visited in order and skipped when they cannot be appended.
+        """
+        return [self._finalize(formation) for formation in self._replay_routes(initial_routes)]
+
+    def to_routes(self, formations_trips: List[List[GreedyTrip]]) -> Routes:
+        """
+        Returns OR-Tools routes, where consecutive trips are joined through the formation reloading depots. The first
+        formation must reload between two delivery requests, so when it has less than two trips, its trips are rebuilt
+        through its first reload.
+        """
+        if len(formations_trips) > 0 and len(formations_trips[0]) < 2 and self._reloader.has_first_reloading_depot(0):
+            formations_trips = self._calc_trips_through_first_reloading_depot(formations_trips)
+        return Routes([self._reloader.join_trips_into_route([trip.delivery_requests for trip in trips],
+                                                            formation_index)
+                       for formation_index, trips in enumerate(formations_trips)])
+
+    def get_unmatched_delivery_requests(self, formations_trips: List[List[GreedyTrip]]) -> List[int]:
+        matched = {delivery_request for trips in formations_trips for trip in trips
+                   for delivery_request in trip.delivery_requests}
+        return [index for index in OrtoolsGraphExporter().export_delivery_request_nodes_indices(
+            self._matcher_input.graph) if index not in matched]
+
+    def _calc_trips_through_first_reloading_depot(self, formations_trips: List[List[GreedyTrip]]) \
+            -> List[List[GreedyTrip]]:
+        """
+        Returns the formations trips where the first formation makes two trips, when it can. It first tries to reload
+        within its own delivery requests, then to add a second trip with a delivery request that no formation visits,
+        and last with one taken from another formation, whose route is then replayed without it.
+        """
+        routes = [self._reloader.join_trips_into_route([trip.delivery_requests for trip in trips], formation_index)
+                  .indexes for formation_index, trips in enumerate(formations_trips)]
+        first_delivery_requests = [delivery_request for trip in formations_trips[0]
+                                   for delivery_request in trip.delivery_requests]
+        not_visited = self._initially_available.copy()
+        not_visited[[node for route in routes for node in route if node < len(not_visited)]] = False
+        not_visited[first_delivery_requests] = self._initially_available[first_delivery_requests]
+        first_trips = self._calc_first_formation_two_trips(first_delivery_requests, not_visited)
+        if first_trips is None:
+            first_trips = self._calc_first_formation_two_trips(first_delivery_requests, self._initially_available)
+        if first_trips is None:
+            self._set_visited(formations_trips)
+            return formations_trips
+        formations_trips = [first_trips] + formations_trips[1:]
+        first_visited = {delivery_request for trip in first_trips for delivery_request in trip.delivery_requests}
+        for formation_index, route in enumerate(routes[1:], 1):
+            if first_visited.isdisjoint(route):
+                continue
+            self._set_visited(formations_trips[:formation_index] + formations_trips[formation_index + 1:])
+            formation = self._create_formation(formation_index)
+            self._replay_route(formation, route)
+            formations_trips[formation_index] = self._finalize(formation)
+        self._set_visited(formations_trips)
+        return formations_trips
+
+    def _calc_first_formation_two_trips(self, delivery_requests: List[int],
+                                        available: np.ndarray) -> Optional[List[GreedyTrip]]:
+        first_reload = self._reloader.get_vehicle_arrive_indices(0)[0]
+        for split in range(len(delivery_requests) - 1, 0, -1):
+            formation = self._replay_first_formation(delivery_requests[:split] + [first_reload]
+                                                     + delivery_requests[split:], available)
+            if not np.any(self._available[delivery_requests]) and len(formation.closed_trips) == 1:
+                return self._finalize(formation)
+        for first_trip in ([delivery_requests] if len(delivery_requests) > 0 else []) + [[]]:
+            formation = self._replay_first_formation(first_trip, available)
+            if len(first_trip) == 0:
+                best_candidate = self._find_best_candidate(formation)
+                if best_candidate is None:
+                    continue
+                self._append(formation, *best_candidate[1:])
+            elif np.any(self._available[first_trip]):
+                continue
+            self._close_trip(formation)
+            best_candidate = self._find_best_candidate(formation) if not formation.is_done else None
+            if best_candidate is not None:
+                self._append(formation, *best_candidate[1:])
+                return self._finalize(formation)
+        return None
+
+    def _replay_first_formation(self, route: List[int], available: np.ndarray) -> _Formation:
+        self._available = available.copy()
+        formation = self._create_formation(0)
+        self._replay_route(formation, route)
+        return formation
+
+    def _set_visited(self, formations_trips: List[List[GreedyTrip]]) -> None:
+        self._available = self._initially_available.copy()
+        self._available[[delivery_request for trips in formations_trips for trip in trips
+                         for delivery_request in trip.delivery_requests]] = False
+
+    def _replay_routes(self, initial_routes: Optional[Routes]) -> List[_Formation]:
+        formations = [self._create_formation(index) for index in range(len(self._start_docks))]
+        if initial_routes is not None:
+            for formation, route in zip(formations, initial_routes.as_list()):
+                self._replay_route(formation, route)
+                formation.is_done = False
+        return formations
+
+    def _create_formation(self, index: int) -> _Formation:
+        return _Formation(index, self._capacities[index], *self._start_time_windows[index])
+
+    def _replay_route(self, formation: _Formation, route: List[int]) -> None:
+        arrive_indices = set(self._reloader.get_vehicle_arrive_indices(formation.index))
+        for node in route:
+            if node in arrive_indices:
+                if formation.trip is not None and len(formation.trip.delivery_requests) > 0:
+                    self._close_trip(formation)
+            elif node < len(self._available) and self._available[node] and formation.trip is not None:
+                candidates = self._calc_candidates(formation)
+                position = np.flatnonzero(candidates.delivery_requests == node)
+                if len(position) > 0:
+                    self._append(formation, node, *(int(values[position[0]]) for values in
+                                                    [candidates.earliest_departures, candidates.latest_departures,
+                                                     candidates.arrival_offsets]))
+
+    def _find_best_candidate(self, formation: _Formation):
+        while not formation.is_done:
+            candidates = self._calc_candidates(formation)
+            if len(candidates.delivery_requests) > 0:
+                best = int(np.argmin(candidates.scores))
+                return (float(candidates.scores[best]), int(candidates.delivery_requests[best]),
+                        int(candidates.earliest_departures[best]), int(candidates.latest_departures[best]),
+                        int(candidates.arrival_offsets[best]))
+            self._close_trip(formation)
+        return None
+
+    def _calc_candidates(self, formation: _Formation) -> _Candidates:
+        trip = formation.trip
+        source = trip.delivery_requests[-1] if trip.delivery_requests else self._start_docks[formation.index]
+        edges = slice(self._indptr[source], self._indptr[source + 1])
+        delivery_requests = self._targets[edges]
+        is_available = self._available[delivery_requests]
+        delivery_requests = delivery_requests[is_available]
+        arrival_offsets = trip.offset + self._travel_times[edges][is_available]
+        earliest_departures = np.maximum(trip.earliest_departure, self._time_windows[delivery_requests, 0]
+                                         - arrival_offsets)
+        latest_departures = np.minimum(trip.latest_departure, self._time_windows[delivery_requests, 1]
+                                       - arrival_offsets)
+        end_dock = self._end_docks[formation.index]
+        end_since, end_until = self._end_time_windows[formation.index]
+        return_offsets = arrival_offsets + self._travel_times_to_docks[end_dock][delivery_requests]
+        latest_departures_to_return = np.minimum(latest_departures, end_until - return_offsets)
+        if formation.route_start is None:
+            within_route_time = return_offsets <= self._max_route_times[formation.index]
+        else:
+            within_route_time = return_offsets + earliest_departures - formation.route_start \
+                                <= self._max_route_times[formation.index]
+        is_feasible = (earliest_departures <= latest_departures) \
+            & (np.maximum(earliest_departures, end_since - return_offsets) <= latest_departures_to_return) \
+            & within_route_time \
+            & (return_offsets <= self._max_session_times[formation.index]) \
+            & np.all(self._demands[delivery_requests] <= formation.capacity - formation.load, axis=1)
+        delivery_requests = delivery_requests[is_feasible]
+        earliest_departures = earliest_departures[is_feasible]
+        arrival_offsets = arrival_offsets[is_feasible]
+        spent_minutes = earliest_departures + arrival_offsets - (trip.earliest_departure + trip.offset)
+        return _Candidates(delivery_requests=delivery_requests,
+                           scores=(spent_minutes + 1) / self._gains[delivery_requests],
+                           earliest_departures=earliest_departures,
+                           latest_departures=latest_departures[is_feasible],
+                           arrival_offsets=arrival_offsets)
+
+    def _append(self, formation: _Formation, delivery_request: int, earliest_departure: int, latest_departure: int,
+                arrival_offset: int) -> None:
+        trip = formation.trip
+        trip.delivery_requests.append(delivery_request)
+        trip.arrival_offsets.append(arrival_offset)
+        trip.earliest_departure = earliest_departure
+        trip.latest_departure = latest_departure
+        formation.load += self._demands[delivery_request]
+        self._available[delivery_request] = False
+
+    def _close_trip(self, formation: _Formation) -> None:
+        """
+        Reloads at the start loading dock when the trip can return to it, and opens the next trip.
+        """
+        trip = formation.trip
+        if len(trip.delivery_requests) == 0 or len(formation.closed_trips) >= len(
+                self._reloader.get_vehicle_arrive_indices(formation.index)):
+            formation.is_done = True
+            return
+        start_dock = self._start_docks[formation.index]
+        start_since, start_until = self._start_time_windows[formation.index]
+        return_offset = trip.offset + int(self._travel_times_to_docks[start_dock][trip.delivery_requests[-1]])
+        departure = max(trip.earliest_departure, start_since - return_offset)
+        if departure > min(trip.latest_departure, start_until - return_offset) \
+                or return_offset > self._max_session_times[formation.index]:
+            formation.is_done = True
+            return
+        trip.departure = departure
+        trip.return_offset = return_offset
+        formation.closed_trips.append(trip)
+        if formation.route_start is None:
+            formation.route_start = departure
+        formation.trip = GreedyTrip(trip.calc_return_time() + self._reloading_time, UNLIMITED_DEPARTURE)
+        formation.load = np.zeros_like(formation.load)
+
+    def _finalize(self, formation: _Formation) -> List[GreedyTrip]:
+        trips = formation.closed_trips
+        if formation.trip is not None and len(formation.trip.delivery_requests) > 0:
+            trips.append(formation.trip)
+        if len(trips) == 0:
+            return trips
+        last_trip = trips[-1]
+        end_since, _ = self._end_time_windows[formation.index]
+        last_trip.return_offset = last_trip.offset + int(self._travel_times_to_docks[
+                                                             self._end_docks[formation.index]][
+                                                             last_trip.delivery_requests[-1]])
+        last_trip.departure = max(last_trip.earliest_departure, end_since - last_trip.return_offset)
+        return trips
+
+    @staticmethod
+    def _get_formations_with_candidate(best_candidates, delivery_request: int) -> Set[int]:
+        return {index for index, candidate in enumerate(best_candidates)
+                if candidate is not None and candidate[1] == delivery_request}
+
+    def _calc_travel_times_to(self, dock: int) -> np.ndarray:
+        sources = np.repeat(np.arange(len(self._indptr) - 1), np.diff(self._indptr))
+        to_dock = self._targets == dock
+        travel_times = np.full(len(self._indptr) - 1, NO_EDGE_TRAVEL_TIME, dtype=np.int64)
+        travel_times[sources[to_dock]] = self._travel_times[to_dock]
+        return travel_times
+
+    def _calc_relative_time_window(self, loading_dock) -> tuple:
+        relative_time_window = loading_dock.time_window.get_relative_time_in_min(self._matcher_input.config.zero_time)
+        return int(relative_time_window[0]), int(relative_time_window[1])
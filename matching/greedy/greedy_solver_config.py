@@ -0,0 +1,32 @@
+from common.entities.base_entities.base_entity import JsonableBaseEntity
+from matching.solver_config import SolverConfig, SolverVendor
+
+CHEAPEST_INSERTION = "cheapest_insertion"
+NO_LOCAL_SEARCH = "none"
+
+
+class GreedySolverConfig(SolverConfig, JsonableBaseEntity):
+
+    # The greedy solver builds the routes with a single cheapest insertion pass and does not improve them afterwards,
+    # so its routes are meant to be used as is, or as an initial solution of another solver.
+    # The timeout (when not 0) stops the insertions, leaving the remaining delivery requests unmatched.
+
+    def __init__(self, first_solution_strategy: str = CHEAPEST_INSERTION,
+                 local_search_strategy: str = NO_LOCAL_SEARCH, timeout_sec: int = 0):
+        super().__init__(SolverVendor.GREEDY, first_solution_strategy, local_search_strategy, timeout_sec)
+
+    def __deepcopy__(self, memodict=None):
+        if memodict is None:
+            memodict = {}
+        new_copy = GreedySolverConfig(self.first_solution_strategy, self.local_search_strategy, self.timeout_sec)
+        memodict[id(self)] = new_copy
+        return new_copy
+
+    @classmethod
+    def dict_to_obj(cls, dict_input):
+        assert (dict_input['__class__'] == cls.__name__)
+
+        return GreedySolverConfig(
+            first_solution_strategy=dict_input["first_solution_strategy"],
+            local_search_strategy=dict_input["local_search_strategy"],
+            timeout_sec=dict_input["timeout_sec"])
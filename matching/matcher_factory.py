@@ -1,3 +1,4 @@
+from matching.greedy.greedy_matcher import GreedyMatcher
 from matching.matcher import Matcher
 from matching.matcher_input import MatcherInput
 from matching.ortools.ortools_matcher import ORToolsMatcher
@@ -7,3 +8,5 @@ from matching.solver_config import SolverVendor
 def create_matcher(matcher_input: MatcherInput) -> Matcher:
     if matcher_input.config.solver.vendor == SolverVendor.OR_TOOLS:
         return ORToolsMatcher(matcher_input)
+    if matcher_input.config.solver.vendor == SolverVendor.GREEDY:
+        return GreedyMatcher(matcher_input)
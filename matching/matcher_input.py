@@ -1,4 +1,9 @@
+from __future__ import annotations
+
+import json
+from copy import deepcopy
 from dataclasses import dataclass
+from typing import Dict, Type
 
 from common.entities.base_entities.drone_delivery_board import DeliveringDronesBoard
 from common.graph.operational.operational_graph import OperationalGraph
@@ -10,3 +15,27 @@ class MatcherInput:
     graph: OperationalGraph
     delivering_drones_board: DeliveringDronesBoard
     config: MatcherConfig
+
+    def copy_sharing_internal_nodes(self) -> MatcherInput:
+        """
+        Copies the delivering drones board and config, which windowed matching updates, while the graph copy shares its
+        delivery requests and loading docks with this input.
+        """
+        return MatcherInput(graph=self.graph.copy_sharing_internal_nodes(),
+                            delivering_drones_board=deepcopy(self.delivering_drones_board),
+                            config=deepcopy(self.config))
+
+    def to_json_dict(self) -> Dict[str, str]:
+        """
+        Serializes the input for worker processes, as the base entities cannot be pickled.
+        """
+        return {'graph': self.graph.to_json(),
+                'delivering_drones_board': self.delivering_drones_board.to_json(),
+                'config': self.config.to_json()}
+
+    @classmethod
+    def from_json_dict(cls, graph_class: Type[OperationalGraph], json_dict: Dict[str, str]) -> MatcherInput:
+        return MatcherInput(graph=graph_class.dict_to_obj(json.loads(json_dict['graph'])),
+                            delivering_drones_board=DeliveringDronesBoard.dict_to_obj(
+                                json.loads(json_dict['delivering_drones_board'])),
+                            config=MatcherConfig.dict_to_obj(json.loads(json_dict['config'])))
@@ -1,28 +1,36 @@
 from copy import deepcopy
 from datetime import timedelta
 from pathlib import Path
+from typing import List, Tuple, Callable, Any
 
 from common.entities.base_entities.delivery_request import DeliveryRequest
 from common.entities.base_entities.drone_delivery_board import DroneDeliveryBoard, UnmatchedDeliveryRequest
-from common.entities.base_entities.temporal import TimeDeltaExtension, TimeWindowExtension
+from common.entities.base_entities.temporal import TimeDeltaExtension, TimeWindowExtension, DateTimeExtension
 from common.graph.operational.operational_graph import OperationalNode
+from common.utils import instrumentation
+from matching.delivery_board_utils import create_routes_from_delivery_board
 from matching.initial_solution import Routes, Route
 from matching.matcher_factory import create_matcher
 from matching.matcher_input import MatcherInput
+from matching.online_inserter import OnlineInserter
 from matching.ortools.ortools_matcher import ORToolsMatcher
 from matching.ortools.ortools_reloader import ORToolsReloader
 
+SESSION_TIME_WINDOW_MARGIN = timedelta(minutes=1)
+
 
 class MatchingMaster:
     def __init__(self, matcher_input: MatcherInput):
         self._matcher_input = matcher_input
 
     def match(self) -> DroneDeliveryBoard:
-        if self._matcher_input.config.submatch_time_window_minutes \
-                < self._matcher_input.config.constraints.travel_time.max_route_time:
-            ret_board = self._match_using_time_greedy()
-        else:
-            ret_board = ORToolsMatcher(self._matcher_input).match()
+        with instrumentation.span('matching_master.match') as span:
+            span.add(nodes=self._matcher_input.graph.num_nodes, edges=self._matcher_input.graph.num_edges)
+            if self._matcher_input.config.submatch_time_window_minutes \
+                    < self._matcher_input.config.constraints.travel_time.max_route_time:
+                ret_board = self._match_using_time_greedy()
+            else:
+                ret_board = ORToolsMatcher(self._matcher_input).match()
 
         return ret_board
 
@@ -30,34 +38,48 @@ class MatchingMaster:
         if init_guess_path:
             init_guess = Routes.from_json(init_guess_path)
         else:
-            init_guess = self._create_init_guess_using_time_greedy()
+            with instrumentation.span('matching_master.time_greedy_init_guess'):
+                init_guess = self._create_init_guess_using_time_greedy()
         matcher = ORToolsMatcher(self._matcher_input)
         delivery_board = matcher.match_from_init_solution(initial_routes=init_guess)
         return delivery_board
 
+    def rematch(self, previous_delivery_board: DroneDeliveryBoard,
+                matcher_input: MatcherInput = None) -> DroneDeliveryBoard:
+        """
+        Matches again after small changes, such as formations that dropped out or cancelled requests, starting
+        OR-Tools from the feasible part of the previous delivery board. The matcher input defaults to the master's.
+        OR-Tools logs a warning and solves from scratch when the routes are not a feasible assignment.
+        """
+        matcher_input = matcher_input or self._matcher_input
+        with instrumentation.span('matching_master.previous_board_routes'):
+            initial_routes = create_routes_from_delivery_board(previous_delivery_board, matcher_input)
+        return ORToolsMatcher(matcher_input).match_from_init_solution(initial_routes=initial_routes)
+
+    def insert_delivery_requests(self, delivery_board: DroneDeliveryBoard,
+                                 delivery_requests: List[DeliveryRequest]) -> DroneDeliveryBoard:
+        """
+        Inserts late arriving delivery requests into the solved delivery board instead of matching the whole graph
+        again. The delivery requests are added to the matcher input graph.
+        """
+        with instrumentation.span('matching_master.insert_delivery_requests') as span:
+            span.add(delivery_requests=len(delivery_requests))
+            return OnlineInserter(self._matcher_input, delivery_board).insert(delivery_requests)
+
     def _match_using_time_greedy(self):
         drone_deliveries = []
         copy_of_delivering_drones_board = deepcopy(self._matcher_input.delivering_drones_board)
-        copy_of_graph = deepcopy(self._matcher_input.graph)
+        copy_of_graph = self._matcher_input.graph.copy_sharing_internal_nodes()
+        copy_of_graph.reset_original_nodes_indices()
         updating_matcher_input = MatcherInput(copy_of_graph, copy_of_delivering_drones_board,
                                               self._matcher_input.config)
-        full_time_windows_num = int(self._matcher_input.config.constraints.travel_time.max_route_time
-                                    / self._matcher_input.config.submatch_time_window_minutes)
-        self._update_delivering_drones_max_route_time(updating_matcher_input.delivering_drones_board,
-                                                      self._matcher_input.config.submatch_time_window_minutes)
-        start_match_time_delta_in_minutes = 0
-        for i in range(full_time_windows_num):
-            self._run_intermediate_match(drone_deliveries, start_match_time_delta_in_minutes, updating_matcher_input, i)
-            start_match_time_delta_in_minutes = self._matcher_input.config.submatch_time_window_minutes
 
-        last_start_match_time_delta_in_minutes = self._matcher_input.config.constraints.travel_time.max_route_time \
-                                                 - full_time_windows_num * self._matcher_input.config.submatch_time_window_minutes
-        if last_start_match_time_delta_in_minutes > \
-                max(self._matcher_input.delivering_drones_board.get_max_session_time_per_drone_delivery()):
-            self._update_delivering_drones_max_route_time(updating_matcher_input.delivering_drones_board,
-                                                          last_start_match_time_delta_in_minutes)
-            self._run_intermediate_match(drone_deliveries, last_start_match_time_delta_in_minutes,
-                                         updating_matcher_input, full_time_windows_num - 1)
+        def handle_intermediate_delivery_board(_session_matcher_input, intermediate_delivery_board):
+            if len(intermediate_delivery_board.drone_deliveries) > 0:
+                drone_deliveries.extend(intermediate_delivery_board.drone_deliveries)
+            self._remove_matched_requests_from_graph(intermediate_delivery_board, updating_matcher_input)
+
+        self._run_submatch_sessions(updating_matcher_input, _match_submatch_session, handle_intermediate_delivery_board)
         return DroneDeliveryBoard(drone_deliveries=drone_deliveries,
                                   unmatched_delivery_requests=[UnmatchedDeliveryRequest(i, node.internal_node)
                                                                for i, node in
@@ -67,19 +89,22 @@ class MatchingMaster:
     def _create_init_guess_using_time_greedy(self):
         reloader = ORToolsReloader(self._matcher_input)
         init_guess_routes = []
-        updating_matcher_input = deepcopy(self._matcher_input)
+        updating_matcher_input = self._matcher_input.copy_sharing_internal_nodes()
+        updating_matcher_input.graph.reset_original_nodes_indices()
         updating_matcher_input.config._reload_per_vehicle = 0
         full_time_windows_num = int(self._matcher_input.config.constraints.travel_time.max_route_time
                                     / self._matcher_input.config.submatch_time_window_minutes)
         last_start_match_time_delta_in_minutes = self._matcher_input.config.constraints.travel_time.max_route_time \
                                                  - full_time_windows_num * self._matcher_input.config.submatch_time_window_minutes
-        self._update_delivering_drones_max_route_time(updating_matcher_input.delivering_drones_board,
-                                                      self._matcher_input.config.submatch_time_window_minutes)
-        start_match_time_delta_in_minutes = 0
-        for i in range(full_time_windows_num):
-            intermediate_routes = self._run_intermediate_match_to_routes(start_match_time_delta_in_minutes,
-                                                                         updating_matcher_input, i)
+        intermediate_routes_per_session = []
 
+        def handle_intermediate_routes(session_matcher_input, routes):
+            intermediate_routes_per_session.append(
+                self._remove_routed_requests_from_graph(routes, session_matcher_input, updating_matcher_input))
+
+        self._run_submatch_sessions(updating_matcher_input, _match_submatch_session_to_routes,
+                                    handle_intermediate_routes)
+        for i, intermediate_routes in enumerate(intermediate_routes_per_session[:full_time_windows_num]):
             for route_index, route in enumerate(intermediate_routes.as_list()):
                 if i == 0:
                     if len(route) > 0:
@@ -96,14 +121,7 @@ class MatchingMaster:
                         route.insert(0, reloader.get_vehicle_depart_indices(route_index)[i - 1])
                         route.append(reloader.get_vehicle_arrive_indices(route_index)[i])
                         init_guess_routes[route_index].indexes.extend(route)
-            start_match_time_delta_in_minutes = self._matcher_input.config.submatch_time_window_minutes
-        if last_start_match_time_delta_in_minutes > max(
-                self._matcher_input.delivering_drones_board.get_max_session_time_per_drone_delivery()):
-            self._update_delivering_drones_max_route_time(updating_matcher_input.delivering_drones_board,
-                                                          last_start_match_time_delta_in_minutes)
-            intermediate_routes = self._run_intermediate_match_to_routes(last_start_match_time_delta_in_minutes,
-                                                                         updating_matcher_input,
-                                                                         full_time_windows_num - 1)
+        for intermediate_routes in intermediate_routes_per_session[full_time_windows_num:]:
             for route_index, route in enumerate(intermediate_routes.as_list()):
                 if len(route) > 0:
                     route.insert(0, reloader.get_vehicle_depart_indices(route_index)[full_time_windows_num - 1])
@@ -113,30 +131,73 @@ class MatchingMaster:
                 route.indexes.pop()
         return Routes(init_guess_routes)
 
-    def _run_intermediate_match(self, drone_deliveries, start_match_time_delta_in_minutes, updating_matcher_input,
-                                session_num):
-        self._update_delivering_drones_start_dock_time_window(start_match_time_delta_in_minutes,
-                                                              updating_matcher_input)
-        self._set_end_loading_docks_initial_time_window(updating_matcher_input.delivering_drones_board, session_num)
-        intermediate_delivery_board = create_matcher(updating_matcher_input).match()
-        if len(intermediate_delivery_board.drone_deliveries) > 0:
-            drone_deliveries.extend(intermediate_delivery_board.drone_deliveries)
-        self._remove_matched_requests_from_graph(intermediate_delivery_board, updating_matcher_input)
+    def _calc_submatch_sessions(self) -> List[Tuple[int, int, int]]:
+        """
+        Each session is (start match time delta in minutes, max route time in minutes, session number)
+        """
+        submatch_time_window_minutes = self._matcher_input.config.submatch_time_window_minutes
+        full_time_windows_num = int(self._matcher_input.config.constraints.travel_time.max_route_time
+                                    / submatch_time_window_minutes)
+        sessions = [(0 if i == 0 else submatch_time_window_minutes, submatch_time_window_minutes, i)
+                    for i in range(full_time_windows_num)]
+        last_start_match_time_delta_in_minutes = self._matcher_input.config.constraints.travel_time.max_route_time \
+                                                 - full_time_windows_num * submatch_time_window_minutes
+        if last_start_match_time_delta_in_minutes > \
+                max(self._matcher_input.delivering_drones_board.get_max_session_time_per_drone_delivery()):
+            sessions.append((last_start_match_time_delta_in_minutes, last_start_match_time_delta_in_minutes,
+                             full_time_windows_num - 1))
+        return sessions
+
+    def _run_submatch_sessions(self, updating_matcher_input: MatcherInput,
+                               match_session: Callable[[MatcherInput], Any],
+                               handle_session_result: Callable[[MatcherInput, Any], None]) -> None:
+        """
+        Solves the sessions one after another, since each session is matched on the requests left unmatched by the
+        previous ones. Each session is solved on the requests whose time windows overlap the session only.
+        """
+        for start_match_time_delta_in_minutes, max_route_time, session_num in self._calc_submatch_sessions():
+            with instrumentation.span('matching_master.session') as span:
+                self._prepare_submatch_session(updating_matcher_input, start_match_time_delta_in_minutes,
+                                               max_route_time, session_num)
+                session_input = MatcherInput(
+                    updating_matcher_input.graph.calc_subgraph_overlapping_time_window(
+                        self._calc_session_time_window(updating_matcher_input.delivering_drones_board,
+                                                       max_route_time)),
+                    updating_matcher_input.delivering_drones_board,
+                    updating_matcher_input.config)
+                span.add(nodes=session_input.graph.num_nodes)
+                handle_session_result(session_input, match_session(session_input))
 
-    def _run_intermediate_match_to_routes(self, start_match_time_delta_in_minutes, updating_matcher_input, session_num):
+    def _prepare_submatch_session(self, updating_matcher_input: MatcherInput, start_match_time_delta_in_minutes: int,
+                                  max_route_time: int, session_num: int) -> None:
+        self._update_delivering_drones_max_route_time(updating_matcher_input.delivering_drones_board, max_route_time)
         self._update_delivering_drones_start_dock_time_window(start_match_time_delta_in_minutes,
                                                               updating_matcher_input)
         self._set_end_loading_docks_initial_time_window(updating_matcher_input.delivering_drones_board, session_num)
-        routes = create_matcher(updating_matcher_input).match_to_routes()
-        all_intermediate_nodes = updating_matcher_input.graph.nodes
-        all_original_nodes = self._matcher_input.graph.nodes
+
+    @staticmethod
+    def _calc_session_time_window(delivering_drones_board, max_route_time) -> TimeWindowExtension:
+        start_time_windows = [delivering_drones.start_loading_dock.time_window
+                              for delivering_drones in delivering_drones_board.delivering_drones_list]
+        session_since = min((time_window.since for time_window in start_time_windows),
+                            key=DateTimeExtension.get_internal)
+        session_until = max((time_window.until for time_window in start_time_windows),
+                            key=DateTimeExtension.get_internal)
+        return TimeWindowExtension(
+            since=session_since.add_time_delta(TimeDeltaExtension(-SESSION_TIME_WINDOW_MARGIN)),
+            until=session_until.add_time_delta(
+                TimeDeltaExtension(timedelta(minutes=max_route_time) + SESSION_TIME_WINDOW_MARGIN)))
+
+    def _remove_routed_requests_from_graph(self, routes: Routes, session_matcher_input: MatcherInput,
+                                           updating_matcher_input: MatcherInput) -> Routes:
+        session_graph = session_matcher_input.graph
+        all_intermediate_nodes = session_graph.nodes
         nodes_to_remove = []
         routes_with_original_idx = []
         for route in routes.as_list():
-            route_nodes = [all_intermediate_nodes[index] for index in route]
-            nodes_to_remove.extend(route_nodes)
-            routes_with_original_idx.append(Route([all_original_nodes.index(node) for node in route_nodes]))
-        updating_matcher_input.graph = updating_matcher_input.graph.create_subgraph_without_nodes(nodes_to_remove)
+            nodes_to_remove.extend(all_intermediate_nodes[index] for index in route)
+            routes_with_original_idx.append(Route([session_graph.get_original_node_index(index) for index in route]))
+        updating_matcher_input.graph.remove_operational_nodes(nodes_to_remove)
         return Routes(routes_with_original_idx)
 
     @staticmethod
@@ -172,7 +233,7 @@ class MatchingMaster:
         for delivery in intermediate_delivery_board.drone_deliveries:
             for matched_request in delivery.matched_requests:
                 matched_nodes.append(OperationalNode(matched_request.delivery_request))
-        updating_matcher_input.graph = updating_matcher_input.graph.create_subgraph_without_nodes(matched_nodes)
+        updating_matcher_input.graph.remove_operational_nodes(matched_nodes)
 
     def _update_delivering_drones_start_dock_time_window(self, start_match_time_delta_in_minutes,
                                                          updating_matcher_input):
@@ -196,3 +257,12 @@ class MatchingMaster:
             loading_dock._time_window = \
                 TimeWindowExtension(since=new_since,
                                     until=new_until)
+
+
+def _match_submatch_session(matcher_input: MatcherInput) -> DroneDeliveryBoard:
+    return create_matcher(matcher_input).match()
+
+
+def _match_submatch_session_to_routes(matcher_input: MatcherInput) -> Routes:
+    return create_matcher(matcher_input).match_to_routes()
+
@@ -5,7 +5,7 @@ class MonitorConfig(JsonableBaseEntity):
 
     def __init__(self, enabled: bool, iterations_between_monitoring=1, max_iterations: int = 0, save_plot: bool = False,
                  show_plot: bool = False, separate_charts: bool = False,
-                 output_directory: str = ''):
+                 output_directory: str = '', telemetry_interval_sec: float = 0, telemetry_format: str = ''):
         self._enabled = enabled
         self._iterations_between_monitoring = iterations_between_monitoring
         self._max_iterations = max_iterations
@@ -13,6 +13,8 @@ class MonitorConfig(JsonableBaseEntity):
         self._show_plot = show_plot
         self._separate_charts = separate_charts
         self._output_directory = output_directory
+        self._telemetry_interval_sec = telemetry_interval_sec
+        self._telemetry_format = telemetry_format
 
     @property
     def enabled(self) -> bool:
@@ -42,6 +44,22 @@ class MonitorConfig(JsonableBaseEntity):
     def output_directory(self) -> str:
         return self._output_directory
 
+    @property
+    def telemetry_interval_sec(self) -> float:
+        return self._telemetry_interval_sec
+
+    @property
+    def telemetry_format(self) -> str:
+        return self._telemetry_format
+
+    @property
+    def telemetry_enabled(self) -> bool:
+        """
+        Telemetry replaces the per iteration monitoring with samples of the improving solutions, taken at most once
+        per telemetry interval.
+        """
+        return self._enabled and self._telemetry_interval_sec > 0
+
     def __eq__(self, other):
         return (self.enabled == other.enabled) and \
                (self.max_iterations == other.max_iterations) and \
@@ -49,13 +67,16 @@ class MonitorConfig(JsonableBaseEntity):
                (self.save_plot == other.save_plot) and \
                (self.show_plot == other.show_plot) and \
                (self.separate_charts == other.separate_charts) and \
-               (self.output_directory == other.output_directory)
+               (self.output_directory == other.output_directory) and \
+               (self.telemetry_interval_sec == other.telemetry_interval_sec) and \
+               (self.telemetry_format == other.telemetry_format)
 
     def __deepcopy__(self, memodict=None):
         if memodict is None:
             memodict = {}
         new_copy = MonitorConfig(self._enabled, self._iterations_between_monitoring, self._max_iterations,
-                                 self._save_plot, self._show_plot, self._separate_charts, self._output_directory)
+                                 self._save_plot, self._show_plot, self._separate_charts, self._output_directory,
+                                 self._telemetry_interval_sec, self._telemetry_format)
         memodict[id(self)] = new_copy
         return new_copy
 
@@ -70,4 +91,6 @@ class MonitorConfig(JsonableBaseEntity):
             save_plot=dict_input["save_plot"],
             show_plot=dict_input["show_plot"],
             separate_charts=dict_input["separate_charts"],
-            output_directory=dict_input["output_directory"])
+            output_directory=dict_input["output_directory"],
+            telemetry_interval_sec=dict_input.get("telemetry_interval_sec", 0),
+            telemetry_format=dict_input.get("telemetry_format", ''))
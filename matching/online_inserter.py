@@ -0,0 +1,362 @@
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from common.entities.base_entities.delivery_request import DeliveryRequest
+from common.entities.base_entities.drone_delivery import DroneDelivery, MatchedDeliveryRequest, \
+    MatchedDroneLoadingDock
+from common.entities.base_entities.drone_delivery_board import DroneDeliveryBoard, UnmatchedDeliveryRequest, \
+    DeliveringDronesBoard
+from common.entities.base_entities.package import PackageType
+from common.entities.base_entities.temporal import TimeWindowExtension, TimeDeltaExtension
+from common.graph.operational.graph_creator import add_time_overlapping_connected_delivery_requests
+from common.graph.operational.graph_utils import calc_locations_array, calc_distances_array
+from common.graph.operational.operational_graph import calc_package_demands
+from matching.delivery_board_utils import localize_drone_delivery, get_trips_graph_indices
+from matching.initial_solution import Routes
+from matching.matcher_config import MatcherConfig
+from matching.matcher_factory import create_matcher
+from matching.matcher_input import MatcherInput
+from matching.ortools.ortools_reloader import ORToolsReloader
+
+UNLIMITED_TIME = np.inf
+
+
+@dataclass
+class _TripSlack:
+    """
+    The schedule of a trip and the slack it leaves for inserting delivery requests, in minutes from the matcher zero
+    time. As waiting is allowed only at the loading docks, the trip is scheduled by its departure alone, and the
+    departures that keep each visit in its time window are cached as prefix and suffix bounds over the visits.
+    """
+    formation_index: int
+    drone_delivery_index: int
+    drone_delivery: DroneDelivery
+    departure: float
+    nodes: np.ndarray
+    offsets: np.ndarray
+    load: np.ndarray
+    earliest_departure: float
+    latest_departure: float
+    latest_return: float
+    max_return_offset: float
+    since_prefix: np.ndarray
+    until_prefix: np.ndarray
+    since_suffix: np.ndarray
+    until_suffix: np.ndarray
+
+
+@dataclass
+class _Insertion:
+    trip: _TripSlack
+    position: int
+    departure: float
+    offsets: np.ndarray
+    added_travel_time: float
+
+
+class OnlineInserter:
+    """
+    Inserts late arriving delivery requests into the drone deliveries of a solved board.
+    Each request is inserted at the position, in any trip, that adds the least travel time while keeping the trip
+    time windows, capacities, session time and the formation route time, with the travel times of the graph edges,
+    so a request is inserted only between nodes it is connected to. Requests that fit no trip are matched by a
+    warm started and time limited re-solve of only the formations nearest to them.
+    The inserter keeps its board, so requests can be inserted as they arrive.
+    """
+
+    def __init__(self, matcher_input: MatcherInput, delivery_board: DroneDeliveryBoard,
+                 edge_cost_factor: float = 1.0, edge_travel_time_factor: float = 1.0,
+                 max_resolved_formations: int = 2, resolve_timeout_sec: int = 1):
+        self._matcher_input = matcher_input
+        self._edge_cost_factor = edge_cost_factor
+        self._edge_travel_time_factor = edge_travel_time_factor
+        self._max_resolved_formations = max_resolved_formations
+        self._resolve_timeout_sec = resolve_timeout_sec
+        board = matcher_input.delivering_drones_board
+        self._capacities = np.array([board.get_package_type_amount_per_drone_delivery(package_type)
+                                     for package_type in PackageType], dtype=np.int64).T
+        self._max_session_times = board.get_max_session_time_per_drone_delivery()
+        self._formations_drone_deliveries: List[List[DroneDelivery]] = [
+            delivery_board.get_drone_deliveries_by_delivering_drones(delivering_drones)
+            for delivering_drones in board.delivering_drones_list]
+        self._unmatched_delivery_requests = list(delivery_board.unmatched_delivery_requests)
+        self._set_edges_travel_times()
+        self._formations_trips = [self._calc_formation_trips(formation_index)
+                                  for formation_index in range(board.amount_of_formations())]
+
+    @property
+    def delivery_board(self) -> DroneDeliveryBoard:
+        return DroneDeliveryBoard(drone_deliveries=[drone_delivery for drone_deliveries in
+                                                    self._formations_drone_deliveries
+                                                    for drone_delivery in drone_deliveries
+                                                    if len(drone_delivery.matched_requests) > 0],
+                                  unmatched_delivery_requests=list(self._unmatched_delivery_requests))
+
+    def insert(self, delivery_requests: List[DeliveryRequest]) -> DroneDeliveryBoard:
+        """
+        Inserts the delivery requests that are not matched yet, once per id. Requests that were left unmatched are
+        offered again.
+        """
+        graph = self._matcher_input.graph
+        delivery_requests = self._pop_not_matched_delivery_requests(delivery_requests)
+        add_time_overlapping_connected_delivery_requests(
+            graph, [delivery_request for delivery_request in delivery_requests
+                    if not graph.has_node_id(delivery_request.id)],
+            self._edge_cost_factor, self._edge_travel_time_factor)
+        self._set_edges_travel_times()
+        not_inserted = [delivery_request for delivery_request in
+                        sorted(delivery_requests, key=lambda delivery_request: delivery_request.priority)
+                        if not self._insert(delivery_request)]
+        if len(not_inserted) > 0 and self._max_resolved_formations > 0:
+            not_inserted = self._resolve(not_inserted)
+        self._unmatched_delivery_requests.extend(
+            UnmatchedDeliveryRequest(graph.get_node_index_by_id(delivery_request.id), delivery_request)
+            for delivery_request in not_inserted)
+        return self.delivery_board
+
+    def _pop_not_matched_delivery_requests(self, delivery_requests: List[DeliveryRequest]) -> List[DeliveryRequest]:
+        """
+        Returns the first delivery request of each id that is not matched, and removes them from the unmatched
+        delivery requests.
+        """
+        matched_ids = {matched_request.delivery_request.id for drone_deliveries in self._formations_drone_deliveries
+                       for drone_delivery in drone_deliveries for matched_request in drone_delivery.matched_requests}
+        not_matched_delivery_requests = {}
+        for delivery_request in delivery_requests:
+            if delivery_request.id not in matched_ids:
+                not_matched_delivery_requests.setdefault(delivery_request.id, delivery_request)
+        self._unmatched_delivery_requests = [
+            unmatched_request for unmatched_request in self._unmatched_delivery_requests
+            if unmatched_request.delivery_request.id not in not_matched_delivery_requests]
+        return list(not_matched_delivery_requests.values())
+
+    def _insert(self, delivery_request: DeliveryRequest) -> bool:
+        node = self._matcher_input.graph.get_node_index_by_id(delivery_request.id)
+        time_window = delivery_request.time_window.get_relative_time_in_min(self._matcher_input.config.zero_time)
+        demand = np.array(calc_package_demands(delivery_request), dtype=np.int64)
+        best_insertion = None
+        for trips in self._formations_trips:
+            for trip in trips:
+                insertion = self._calc_best_insertion(trip, node, time_window, demand)
+                if insertion is not None and (best_insertion is None or
+                                              insertion.added_travel_time < best_insertion.added_travel_time):
+                    best_insertion = insertion
+        if best_insertion is None:
+            return False
+        self._apply(best_insertion, delivery_request)
+        return True
+
+    def _calc_best_insertion(self, trip: _TripSlack, node: int, time_window: Tuple[float, float],
+                             demand: np.ndarray) -> Optional[_Insertion]:
+        if np.any(trip.load + demand > self._capacities[trip.formation_index]):
+            return None
+        travel_times_from = self._calc_travel_times(trip.nodes[:-1], np.full(len(trip.nodes) - 1, node))
+        travel_times_to = self._calc_travel_times(np.full(len(trip.nodes) - 1, node), trip.nodes[1:])
+        has_edges = np.isfinite(travel_times_from) & np.isfinite(travel_times_to)
+        if not np.any(has_edges):
+            return None
+        travel_times_from = np.where(has_edges, travel_times_from, 0)
+        travel_times_to = np.where(has_edges, travel_times_to, 0)
+        added_travel_times = travel_times_from + travel_times_to - np.diff(trip.offsets)
+        arrival_offsets = trip.offsets[:-1] + travel_times_from
+        return_offsets = trip.offsets[-1] + added_travel_times
+        earliest_departures = np.maximum.reduce([np.full(len(arrival_offsets), trip.earliest_departure),
+                                                 trip.since_prefix, time_window[0] - arrival_offsets,
+                                                 trip.since_suffix - added_travel_times])
+        latest_departures = np.minimum.reduce([np.full(len(arrival_offsets), trip.latest_departure),
+                                               trip.until_prefix, time_window[1] - arrival_offsets,
+                                               trip.until_suffix - added_travel_times,
+                                               trip.latest_return - return_offsets])
+        is_feasible = has_edges & (earliest_departures <= latest_departures) \
+            & (return_offsets <= trip.max_return_offset)
+        if not np.any(is_feasible):
+            return None
+        position = int(np.flatnonzero(is_feasible)[np.argmin(added_travel_times[is_feasible])])
+        offsets = np.concatenate([trip.offsets[:position + 1], [arrival_offsets[position]],
+                                  trip.offsets[position + 1:] + added_travel_times[position]])
+        return _Insertion(trip=trip, position=position,
+                          departure=float(np.clip(trip.departure, earliest_departures[position],
+                                                  latest_departures[position])),
+                          offsets=offsets, added_travel_time=float(added_travel_times[position]))
+
+    def _apply(self, insertion: _Insertion, delivery_request: DeliveryRequest) -> None:
+        trip = insertion.trip
+        drone_deliveries = self._formations_drone_deliveries[trip.formation_index]
+        drone_delivery = trip.drone_delivery
+        matched_requests = list(drone_delivery.matched_requests)
+        matched_requests.insert(insertion.position, MatchedDeliveryRequest(
+            graph_index=self._matcher_input.graph.get_node_index_by_id(delivery_request.id),
+            delivery_request=delivery_request, matched_delivery_option_index=0, delivery_time_window=None))
+        inserted_drone_delivery = DroneDelivery(
+            drone_delivery.delivering_drones,
+            [MatchedDeliveryRequest(graph_index=matched_request.graph_index,
+                                    delivery_request=matched_request.delivery_request,
+                                    matched_delivery_option_index=matched_request.matched_delivery_option_index,
+                                    delivery_time_window=self._create_time_window(insertion.departure + offset))
+             for matched_request, offset in zip(matched_requests, insertion.offsets[1:-1])],
+            MatchedDroneLoadingDock(drone_delivery.start_drone_loading_dock.drone_loading_dock,
+                                    self._create_time_window(insertion.departure)),
+            MatchedDroneLoadingDock(drone_delivery.end_drone_loading_dock.drone_loading_dock,
+                                    self._create_time_window(insertion.departure + insertion.offsets[-1])))
+        if trip.drone_delivery_index < len(drone_deliveries):
+            drone_deliveries[trip.drone_delivery_index] = inserted_drone_delivery
+        else:
+            drone_deliveries.append(inserted_drone_delivery)
+        self._formations_trips[trip.formation_index] = self._calc_formation_trips(trip.formation_index)
+
+    def _resolve(self, delivery_requests: List[DeliveryRequest]) -> List[DeliveryRequest]:
+        """
+        Re-solves the formations nearest to the delivery requests, starting from their current trips, and returns the
+        delivery requests left unmatched. The re-solve is kept only if it keeps all the formations matched requests.
+        """
+        graph = self._matcher_input.graph
+        delivering_drones_list = self._matcher_input.delivering_drones_board.delivering_drones_list
+        formations = self._find_nearest_formations(delivery_requests)
+        matched_ids = {matched_request.delivery_request.id for formation_index in formations
+                       for drone_delivery in self._formations_drone_deliveries[formation_index]
+                       for matched_request in drone_delivery.matched_requests}
+        kept_ids = matched_ids.union(delivery_request.id for delivery_request in delivery_requests)
+        kept_ids.update(loading_dock.id for formation_index in formations for loading_dock in
+                        [delivering_drones_list[formation_index].start_loading_dock,
+                         delivering_drones_list[formation_index].end_loading_dock])
+        config_dict = self._matcher_input.config.__dict__()
+        config_dict['solver']['timeout_sec'] = self._resolve_timeout_sec
+        config = MatcherConfig.dict_to_obj(config_dict)
+        resolve_input = MatcherInput(graph=graph.create_subgraph_without_nodes([node for node in graph.nodes
+                                                                                if node.internal_node.id not in
+                                                                                kept_ids]),
+                                     delivering_drones_board=DeliveringDronesBoard(
+                                         [delivering_drones_list[formation_index] for formation_index in formations]),
+                                     config=config)
+        reloader = ORToolsReloader(resolve_input)
+        current_delivery_board = self.delivery_board
+        resolved_delivery_board = create_matcher(resolve_input).match_from_init_solution(Routes([
+            reloader.join_trips_into_route(get_trips_graph_indices(current_delivery_board, delivering_drones,
+                                                                   resolve_input.graph), vehicle_index)
+            for vehicle_index, delivering_drones in enumerate(resolve_input.delivering_drones_board.
+                                                              delivering_drones_list)]))
+        resolved_matched_ids = {matched_request.delivery_request.id
+                                for drone_delivery in resolved_delivery_board.drone_deliveries
+                                for matched_request in drone_delivery.matched_requests}
+        if not matched_ids.issubset(resolved_matched_ids):
+            return delivery_requests
+        for formation_index in formations:
+            delivering_drones = delivering_drones_list[formation_index]
+            self._formations_drone_deliveries[formation_index] = [
+                localize_drone_delivery(drone_delivery, graph, delivering_drones)
+                for drone_delivery in resolved_delivery_board.drone_deliveries
+                if drone_delivery.delivering_drones.id == delivering_drones.id]
+            self._formations_trips[formation_index] = self._calc_formation_trips(formation_index)
+        return [delivery_request for delivery_request in delivery_requests
+                if delivery_request.id not in resolved_matched_ids]
+
+    def _find_nearest_formations(self, delivery_requests: List[DeliveryRequest]) -> List[int]:
+        center = calc_locations_array(delivery_requests).mean(axis=0)
+        start_docks_locations = calc_locations_array(
+            [delivering_drones.start_loading_dock for delivering_drones in
+             self._matcher_input.delivering_drones_board.delivering_drones_list])
+        distances = calc_distances_array(start_docks_locations, center)
+        return sorted(np.argsort(distances, kind='stable')[:self._max_resolved_formations].tolist())
+
+    def _calc_formation_trips(self, formation_index: int) -> List[_TripSlack]:
+        """
+        Caches the slack of each trip of the formation, with the other trips fixed. A formation without drone
+        deliveries gets an empty trip, so that it can be inserted into, which is added to the board only when a
+        delivery request is inserted into it.
+        """
+        config = self._matcher_input.config
+        delivering_drones = self._matcher_input.delivering_drones_board.delivering_drones_list[formation_index]
+        drone_deliveries = self._formations_drone_deliveries[formation_index]
+        if len(drone_deliveries) == 0:
+            time_window = delivering_drones.start_loading_dock.time_window
+            drone_deliveries = [DroneDelivery(delivering_drones, [],
+                                              MatchedDroneLoadingDock(delivering_drones.start_loading_dock,
+                                                                      time_window),
+                                              MatchedDroneLoadingDock(delivering_drones.end_loading_dock,
+                                                                      time_window))]
+        schedules = [self._calc_schedule(drone_delivery) for drone_delivery in drone_deliveries]
+        reloading_time = config.constraints.travel_time.reloading_time
+        max_route_time = delivering_drones.get_max_route_time_in_minutes()
+        start_since, start_until = delivering_drones.start_loading_dock.time_window.get_relative_time_in_min(
+            config.zero_time)
+        trips = []
+        for trip_index, (drone_delivery, (departure, nodes, offsets, time_windows)) in \
+                enumerate(zip(drone_deliveries, schedules)):
+            earliest_departure, latest_return, max_return_offset = start_since, UNLIMITED_TIME, \
+                self._max_session_times[formation_index]
+            if trip_index > 0:
+                previous_departure, _, previous_offsets, _ = schedules[trip_index - 1]
+                earliest_departure = max(earliest_departure, previous_departure + previous_offsets[-1] + reloading_time)
+                latest_return = schedules[0][0] + max_route_time
+            else:
+                max_return_offset = min(max_return_offset, max_route_time)
+                if len(schedules) > 1:
+                    last_departure, _, last_offsets, _ = schedules[-1]
+                    earliest_departure = max(earliest_departure, last_departure + last_offsets[-1] - max_route_time)
+            if trip_index < len(schedules) - 1:
+                latest_return = min(latest_return, schedules[trip_index + 1][0] - reloading_time)
+            _, end_until = drone_delivery.end_drone_loading_dock.drone_loading_dock.time_window.\
+                get_relative_time_in_min(config.zero_time)
+            since_departures = time_windows[:, 0] - offsets[1:-1]
+            until_departures = time_windows[:, 1] - offsets[1:-1]
+            trips.append(_TripSlack(
+                formation_index=formation_index, drone_delivery_index=trip_index, drone_delivery=drone_delivery,
+                departure=departure, nodes=nodes, offsets=offsets,
+                load=np.sum([calc_package_demands(matched_request.delivery_request)
+                             for matched_request in drone_delivery.matched_requests]
+                            or np.zeros((0, len(PackageType))), axis=0).astype(np.int64),
+                earliest_departure=earliest_departure, latest_departure=start_until,
+                latest_return=min(latest_return, end_until), max_return_offset=max_return_offset,
+                since_prefix=np.maximum.accumulate(np.concatenate([[-UNLIMITED_TIME], since_departures])),
+                until_prefix=np.minimum.accumulate(np.concatenate([[UNLIMITED_TIME], until_departures])),
+                since_suffix=np.maximum.accumulate(np.concatenate([since_departures, [-UNLIMITED_TIME]])[::-1])[::-1],
+                until_suffix=np.minimum.accumulate(np.concatenate([until_departures, [UNLIMITED_TIME]])[::-1])[::-1]))
+        return trips
+
+    def _calc_schedule(self, drone_delivery: DroneDelivery) -> Tuple[float, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns the departure, the graph indices of the docks and the visits, the arrival offsets from the departure at
+        each of them and the time windows of the visits.
+        """
+        zero_time = self._matcher_input.config.zero_time
+        delivery_requests = [matched_request.delivery_request for matched_request in drone_delivery.matched_requests]
+        nodes = np.array(self._matcher_input.graph.get_nodes_indices_by_ids(tuple(
+            internal_node.id for internal_node in [drone_delivery.start_drone_loading_dock.drone_loading_dock]
+            + delivery_requests + [drone_delivery.end_drone_loading_dock.drone_loading_dock])), dtype=np.int64)
+        offsets = np.concatenate([[0], np.cumsum(self._calc_travel_times(nodes[:-1], nodes[1:]))])
+        time_windows = np.array([delivery_request.time_window.get_relative_time_in_min(zero_time)
+                                 for delivery_request in delivery_requests], dtype=np.float64).reshape(-1, 2)
+        departure = drone_delivery.start_drone_loading_dock.delivery_time_window.get_relative_time_in_min(zero_time)[0]
+        return departure, nodes, offsets, time_windows
+
+    def _set_edges_travel_times(self) -> None:
+        """
+        Caches the travel times of the graph edges, truncated to whole minutes as in the graphs exported to OR-Tools,
+        sorted by their (start, end) nodes and followed by a missing edge sentinel.
+        """
+        indptr, targets, _, travel_times = self._matcher_input.graph.to_csr_arrays()
+        self._num_of_nodes = len(indptr) - 1
+        edges = np.repeat(np.arange(self._num_of_nodes, dtype=np.int64), np.diff(indptr)) * self._num_of_nodes \
+            + targets
+        order = np.argsort(edges, kind='stable')
+        self._edges = np.append(edges[order], np.iinfo(np.int64).max)
+        self._edges_travel_times = np.append(np.floor(np.asarray(travel_times, dtype=np.float64)[order]),
+                                             UNLIMITED_TIME)
+
+    def _calc_travel_times(self, start_nodes: np.ndarray, end_nodes: np.ndarray) -> np.ndarray:
+        """
+        Returns the travel times of the edges from the start nodes to the end nodes, which are infinite for missing
+        edges and zero from a node to itself.
+        """
+        edges = start_nodes * self._num_of_nodes + end_nodes
+        positions = np.searchsorted(self._edges, edges)
+        travel_times = np.where(self._edges[positions] == edges, self._edges_travel_times[positions], UNLIMITED_TIME)
+        return np.where(start_nodes == end_nodes, 0, travel_times)
+
+    def _create_time_window(self, relative_time_in_min: float) -> TimeWindowExtension:
+        date_time = self._matcher_input.config.zero_time.add_time_delta(
+            TimeDeltaExtension(timedelta(minutes=relative_time_in_min)))
+        return TimeWindowExtension(since=date_time, until=date_time)
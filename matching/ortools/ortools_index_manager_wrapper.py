@@ -1,5 +1,6 @@
 from functools import lru_cache
 
+import numpy as np
 from ortools.constraint_solver.pywrapcp import RoutingIndexManager
 
 
@@ -26,3 +27,7 @@ class OrToolsIndexManagerWrapper:
     @lru_cache()
     def index_to_node(self, index: int) -> int:
         return self._index_manager.IndexToNode(index)
+
+    def get_nodes_of_indices(self) -> np.ndarray:
+        return np.array([self._index_manager.IndexToNode(index) for index in range(self.get_number_of_indices())],
+                        dtype=np.int64)
@@ -1,43 +1,55 @@
+import logging
+from typing import Optional
+
 from ortools.constraint_solver import pywrapcp
-from ortools.constraint_solver.pywrapcp import RoutingModel
+from ortools.constraint_solver.pywrapcp import RoutingModel, Assignment
 from ortools.constraint_solver.routing_parameters_pb2 import RoutingSearchParameters
 
 from common.entities.base_entities.delivery_request import DeliveryRequest
 from common.entities.base_entities.drone_delivery_board import DroneDeliveryBoard, UnmatchedDeliveryRequest
 from common.graph.operational.export_ortools_graph import OrtoolsGraphExporter
+from common.utils import instrumentation
 from matching.initial_solution import Routes
 from matching.matcher import Matcher
 from matching.matcher_input import MatcherInput
 from matching.ortools.ortools_index_manager_wrapper import OrToolsIndexManagerWrapper
 from matching.ortools.ortools_matcher_constraints import ORToolsMatcherConstraints
 from matching.ortools.ortools_matcher_monitor import ORToolsMatcherMonitor
+from matching.ortools.ortools_matcher_telemetry import ORToolsMatcherTelemetry
 from matching.ortools.ortools_matcher_objective import ORToolsMatcherObjective
 from matching.ortools.ortools_reloader import ORToolsReloader
 from matching.ortools.ortools_priority_evaluator import ORToolsPriorityEvaluator
 from matching.ortools.ortools_solution_handler import ORToolsSolutionHandler
+from matching.ortools.ortools_solver_config import ORToolsSolverConfig
+
+logger = logging.getLogger(__name__)
 
 
 class ORToolsMatcher(Matcher):
 
     def __init__(self, matcher_input: MatcherInput):
         super().__init__(matcher_input)
-        self._reloader = ORToolsReloader(matcher_input)
-        self._graph_exporter = OrtoolsGraphExporter()
-        self._start_depots_graph_indices_of_vehicles = self._get_start_depots_graph_indices_of_vehicles()
-        self._end_depots_graph_indices_of_vehicles = self._get_end_depots_graph_indices_of_vehicles()
-        self._index_manager = self._set_index_manager()
-        self._routing_model = self._set_routing_model()
-        self._solution_handler = ORToolsSolutionHandler(self._graph_exporter, self._index_manager, self._routing_model,
-                                                        self._matcher_input, self._reloader,
-                                                        self._start_depots_graph_indices_of_vehicles,
-                                                        self._end_depots_graph_indices_of_vehicles)
-        self._priority_evaluator = ORToolsPriorityEvaluator(self._index_manager, self.matcher_input,
-                                                            self._reloader)
-        self._set_objective()
-        self._set_constraints()
-        self._set_reloading_depos_for_each_formation()
-        self._close_model_with_search_params()
-        self._set_monitor()
+        with instrumentation.span('ortools.build_model') as span:
+            self._reloader = ORToolsReloader(matcher_input)
+            self._graph_exporter = OrtoolsGraphExporter()
+            self._start_depots_graph_indices_of_vehicles = self._get_start_depots_graph_indices_of_vehicles()
+            self._end_depots_graph_indices_of_vehicles = self._get_end_depots_graph_indices_of_vehicles()
+            self._index_manager = self._set_index_manager()
+            self._routing_model = self._set_routing_model()
+            self._solution_handler = ORToolsSolutionHandler(self._graph_exporter, self._index_manager,
+                                                            self._routing_model, self._matcher_input, self._reloader,
+                                                            self._start_depots_graph_indices_of_vehicles,
+                                                            self._end_depots_graph_indices_of_vehicles)
+            self._objective_value = None
+            self._priority_evaluator = ORToolsPriorityEvaluator(self._index_manager, self.matcher_input,
+                                                                self._reloader)
+            self._set_objective()
+            self._set_constraints()
+            self._set_reloading_depos_for_each_formation()
+            self._close_model_with_search_params()
+            self._set_monitor()
+            span.add(nodes=self._reloader.num_of_nodes, vehicles=self._index_manager.get_number_of_vehicles(),
+                     graph_edges=matcher_input.graph.num_edges)
 
     def _get_start_depots_graph_indices_of_vehicles(self):
         start_depots = [delivering_drones.start_loading_dock
@@ -53,12 +65,27 @@ class ORToolsMatcher(Matcher):
             self._matcher_input.graph, end_depot)
             for end_depot in end_depots]
 
+    @property
+    def objective_value(self) -> Optional[int]:
+        """
+        The objective value of the last solve, or None when it found no solution.
+        """
+        return self._objective_value
+
+    def set_solver_config(self, solver_config: ORToolsSolverConfig) -> None:
+        """
+        Sets the strategies and timeout of the next solves. The model itself stays as closed with the matcher input's
+        solver config, so that it can be solved with several solver configs without being rebuilt.
+        """
+        self._search_parameters = self._create_search_parameters(solver_config)
+
     def match(self) -> DroneDeliveryBoard:
-        solution = self._routing_model.SolveWithParameters(self._search_parameters)
+        solution = self._solve(self._search_parameters)
         if ORToolsMatcher.is_solution_valid(solution):
-            if self._matcher_input.config.monitor.enabled:
+            if self._matcher_input.config.monitor.enabled and not self._matcher_input.config.monitor.telemetry_enabled:
                 self.matcher_monitor.handle_monitor_data()
-            return self._solution_handler.create_drone_delivery_board(solution)
+            with instrumentation.span('ortools.decode'):
+                return self._solution_handler.create_drone_delivery_board(solution)
         else:
             return DroneDeliveryBoard(
                 drone_deliveries=[],
@@ -71,8 +98,9 @@ class ORToolsMatcher(Matcher):
         return solution is not None
 
     def match_to_routes(self) -> Routes:
-        solution = self._routing_model.SolveWithParameters(self._search_parameters)
-        routes = self._solution_handler.get_routes(solution=solution)
+        solution = self._solve(self._search_parameters)
+        with instrumentation.span('ortools.decode'):
+            routes = self._solution_handler.get_routes(solution=solution)
         for route in routes.as_list():
             for i, index in enumerate(route):
                 route[i] = self._index_manager.index_to_node(index)
@@ -83,16 +111,37 @@ class ORToolsMatcher(Matcher):
             for i, index in enumerate(route):
                 route[i] = self._index_manager.node_to_index(index)
         initial_solution = self._routing_model.ReadAssignmentFromRoutes(initial_routes.as_list(), False)
-        solution = self._routing_model.SolveFromAssignmentWithParameters(initial_solution, self._search_parameters)
+        if initial_solution is None:
+            logger.warning("The initial routes are not a feasible assignment, solving without them")
+        solution = self._solve(self._search_parameters, initial_solution)
         if ORToolsMatcher.is_solution_valid(solution):
-            if self._matcher_input.config.monitor.enabled:
+            if self._matcher_input.config.monitor.enabled and not self._matcher_input.config.monitor.telemetry_enabled:
                 self.matcher_monitor.handle_monitor_data()
-            return self._solution_handler.create_drone_delivery_board(solution)
+            with instrumentation.span('ortools.decode'):
+                return self._solution_handler.create_drone_delivery_board(solution)
         else:
             return DroneDeliveryBoard([], [UnmatchedDeliveryRequest(i, node.internal_node) for i, node in
                                            enumerate(self.matcher_input.graph.nodes) if
                                            isinstance(node.internal_node, DeliveryRequest)])
 
+    def _solve(self, search_parameters: RoutingSearchParameters, initial_solution: Assignment = None) -> Assignment:
+        if self._matcher_input.config.monitor.telemetry_enabled:
+            self.matcher_telemetry.start()
+        with instrumentation.span('ortools.solve') as span:
+            solver = self._routing_model.solver()
+            # The solver counts the branches and failures over its lifetime, and the solutions of the last search only
+            branches, failures = solver.Branches(), solver.Failures()
+            if initial_solution is None:
+                solution = self._routing_model.SolveWithParameters(search_parameters)
+            else:
+                solution = self._routing_model.SolveFromAssignmentWithParameters(initial_solution, search_parameters)
+            span.add(solutions=solver.Solutions(), branches=solver.Branches() - branches,
+                     failures=solver.Failures() - failures)
+        self._objective_value = solution.ObjectiveValue() if ORToolsMatcher.is_solution_valid(solution) else None
+        if self._matcher_input.config.monitor.telemetry_enabled:
+            self.matcher_telemetry.finish(solution)
+        return solution
+
     def _set_index_manager(self) -> OrToolsIndexManagerWrapper:
         manager = pywrapcp.RoutingIndexManager(self._reloader.num_of_nodes,
                                                self._matcher_input.delivering_drones_board.amount_of_formations(),
@@ -108,14 +157,17 @@ class ORToolsMatcher(Matcher):
         objective.add_priority()
 
     def _close_model_with_search_params(self) -> None:
-        self._search_parameters = pywrapcp.DefaultRoutingSearchParameters()
-        self._search_parameters.first_solution_strategy = \
-            self.matcher_input.config.solver.get_first_solution_strategy_as_int()
-        self._search_parameters.local_search_metaheuristic = \
-            self.matcher_input.config.solver.get_local_search_strategy_as_int()
-        self._search_parameters.time_limit.seconds = self.matcher_input.config.solver.timeout_sec
+        self._search_parameters = self._create_search_parameters(self.matcher_input.config.solver)
         self._routing_model.CloseModelWithParameters(self._search_parameters)
 
+    @staticmethod
+    def _create_search_parameters(solver_config: ORToolsSolverConfig) -> RoutingSearchParameters:
+        search_parameters = pywrapcp.DefaultRoutingSearchParameters()
+        search_parameters.first_solution_strategy = solver_config.get_first_solution_strategy_as_int()
+        search_parameters.local_search_metaheuristic = solver_config.get_local_search_strategy_as_int()
+        search_parameters.time_limit.seconds = solver_config.timeout_sec
+        return search_parameters
+
     def _set_constraints(self):
         matcher_constraints = ORToolsMatcherConstraints(self._index_manager, self._routing_model, self.matcher_input,
                                                         self._reloader)
@@ -129,6 +181,12 @@ class ORToolsMatcher(Matcher):
     def _set_monitor(self):
         if not self.matcher_input.config.monitor.enabled:
             return
+        if self.matcher_input.config.monitor.telemetry_enabled:
+            self.matcher_telemetry = ORToolsMatcherTelemetry(self._graph_exporter, self._index_manager,
+                                                             self._routing_model, self.matcher_input,
+                                                             self._priority_evaluator)
+            self.matcher_telemetry.add_solution_callback()
+            return
         self.matcher_monitor = ORToolsMatcherMonitor(self._graph_exporter, self._index_manager, self._routing_model,
                                                      self.matcher_input, self._solution_handler,
                                                      self._priority_evaluator)
@@ -1,6 +1,5 @@
 import sys
 from enum import Enum
-from functools import lru_cache
 from typing import Tuple, List
 
 import numpy as np
@@ -8,6 +7,7 @@ from ortools.constraint_solver.pywrapcp import RoutingModel, RoutingDimension
 
 from common.entities.base_entities.package import PackageType
 from common.graph.operational.export_ortools_graph import OrtoolsGraphExporter
+from common.utils import instrumentation
 from matching.matcher import MatcherInput
 from matching.ortools.ortools_index_manager_wrapper import OrToolsIndexManagerWrapper
 from matching.ortools.ortools_reloader import ORToolsReloader
@@ -31,14 +31,19 @@ class ORToolsMatcherConstraints:
         self._routing_model = routing_model
         self._matcher_input = matcher_input
         self._reloader = reloader
-        self._travel_cost_matrix = self._graph_exporter.export_travel_costs(self._matcher_input.graph)
-        self._travel_time_matrix = self._graph_exporter.export_travel_times(self._matcher_input.graph)
         self._time_windows = self._graph_exporter.export_time_windows(self._matcher_input.graph,
                                                                       self._matcher_input.config.zero_time)
         self._basis_nodes_indices = self._graph_exporter.export_basis_nodes_indices(self._matcher_input.graph)
+        self._arrive_indices = np.array(self._reloader.arrive_indices, dtype=np.int64)
+        self._depart_indices = np.array(self._reloader.depart_indices, dtype=np.int64)
+        self._nodes_graph_indices = self._calc_nodes_graph_indices()
+        self._travel_cost_transit_matrix = self._create_transit_matrix(
+            self._graph_exporter.export_travel_costs(self._matcher_input.graph))
+        self._travel_time_transit_matrix = self._create_transit_matrix(
+            self._graph_exporter.export_travel_times(self._matcher_input.graph))
 
     def add_travel_cost(self):
-        travel_cost_callback_index = self._routing_model.RegisterTransitCallback(self._create_travel_cost_evaluator())
+        travel_cost_callback_index = self._register_transit(self._travel_cost_transit_matrix)
         self._routing_model.AddDimension(
             travel_cost_callback_index,
             MAX_OPERATION_TIME,
@@ -47,7 +52,7 @@ class ORToolsMatcherConstraints:
             OrToolsDimensionDescription.travel_cost.value)
 
     def add_travel_time(self):
-        travel_time_callback_index = self._routing_model.RegisterTransitCallback(self._create_travel_time_evaluator())
+        travel_time_callback_index = self._register_transit(self._travel_time_transit_matrix)
         self._routing_model.AddDimension(
             travel_time_callback_index,
             MAX_OPERATION_TIME,
@@ -65,7 +70,7 @@ class ORToolsMatcherConstraints:
 
     def add_session_time(self):
 
-        session_time_callback_index = self._routing_model.RegisterTransitCallback(self._create_session_evaluator())
+        session_time_callback_index = self._register_transit(self._create_session_time_matrix())
         self._routing_model.AddDimensionWithVehicleCapacity(
             session_time_callback_index,
             max(self._matcher_input.delivering_drones_board.get_max_session_time_per_drone_delivery()),
@@ -81,8 +86,7 @@ class ORToolsMatcherConstraints:
         demand_dimension_name_prefix = OrToolsDimensionDescription.capacity.value + "_"
         for package_type in PackageType:
             demand_dimension_name = demand_dimension_name_prefix + str.lower(package_type.name)
-            demand_callback_index = self._routing_model.RegisterUnaryTransitCallback(
-                self._create_demand_evaluator(package_type))
+            demand_callback_index = self._register_unary_transit(self._calc_demands(package_type))
             max_capacity = max(
                 self._matcher_input.delivering_drones_board.get_package_type_amount_per_drone_delivery(package_type))
             self._routing_model.AddDimensionWithVehicleCapacity(
@@ -190,173 +194,75 @@ class ORToolsMatcherConstraints:
             relative_time_window = dock.time_window.get_relative_time_in_min(self._matcher_input.config.zero_time)
             time_dimension.CumulVar(index).SetRange(int(relative_time_window[0]), int(relative_time_window[1]))
 
-    def _create_travel_cost_evaluator(self):
-
-        def travel_cost(_from_node, _to_node):
-            if _from_node == _to_node:
-                return 0
-            if _from_node in self._reloader.arrive_indices and _to_node == (_from_node + 1):
-                return 0
-            if _from_node in self._reloader.arrive_indices and _to_node != (_from_node + 1):
-                return sys.maxsize
-            if _to_node in self._reloader.depart_indices and _from_node != (_to_node - 1):
-                return sys.maxsize
-            if self._are_nodes_consecutive_depos(_from_node, _to_node):
-                return sys.maxsize
-            if _from_node in self._reloader.reloading_virtual_depos_indices:
-                vehicle_of_node = self._reloader.get_reloading_depot_vehicle(_from_node)
-                dock = self._matcher_input.delivering_drones_board.delivering_drones_list[
-                    vehicle_of_node].start_loading_dock
-                _from_node = self._graph_exporter.get_node_graph_index(self._matcher_input.graph, dock)
-            elif _to_node in self._reloader.reloading_virtual_depos_indices:
-                vehicle_of_node = self._reloader.get_reloading_depot_vehicle(_to_node)
-                dock = self._matcher_input.delivering_drones_board.delivering_drones_list[
-                    vehicle_of_node].start_loading_dock
-                _to_node = self._graph_exporter.get_node_graph_index(self._matcher_input.graph, dock)
-            graph_travel_cost = self._travel_cost_matrix[_from_node][_to_node]
-            return graph_travel_cost
-
-        _travel_cost = {}
-        for from_node in range(self._reloader.num_of_nodes):
-            _travel_cost[from_node] = {}
-            for to_node in range(self._reloader.num_of_nodes):
-                if from_node == to_node:
-                    _travel_cost[from_node][to_node] = 0
-                else:
-                    _travel_cost[from_node][to_node] = int(
-                        travel_cost(
-                            from_node, to_node))
-
-        @lru_cache()
-        def travel_cost_evaluator(_from_index, _to_index):
-            return _travel_cost[self._index_manager.index_to_node(_from_index)][self._index_manager.index_to_node(
-                _to_index)]
-
-        return travel_cost_evaluator
-
-    def _create_travel_time_evaluator(self):
-
-        def travel_time(_from_node, _to_node):
-            if _from_node == _to_node:
-                return 0
-            if _from_node in self._reloader.arrive_indices and _to_node == (_from_node + 1):
-                return 0
-            if _from_node in self._reloader.arrive_indices and _to_node != (_from_node + 1):
-                return sys.maxsize
-            if _to_node in self._reloader.depart_indices and _from_node != (_to_node - 1):
-                return sys.maxsize
-            if self._are_nodes_consecutive_depos(_from_node, _to_node):
-                return sys.maxsize
-            if _from_node in self._reloader.reloading_virtual_depos_indices:
-                vehicle_of_node = self._reloader.get_reloading_depot_vehicle(_from_node)
-                dock = self._matcher_input.delivering_drones_board.delivering_drones_list[
-                    vehicle_of_node].start_loading_dock
-                _from_node = self._graph_exporter.get_node_graph_index(self._matcher_input.graph, dock)
-            elif _to_node in self._reloader.reloading_virtual_depos_indices:
-                vehicle_of_node = self._reloader.get_reloading_depot_vehicle(_to_node)
-                dock = self._matcher_input.delivering_drones_board.delivering_drones_list[
-                    vehicle_of_node].start_loading_dock
-                _to_node = self._graph_exporter.get_node_graph_index(self._matcher_input.graph, dock)
-            graph_travel_time = self._travel_time_matrix[_from_node][_to_node]
-            return graph_travel_time
-
-        _travel_time = {}
-        for from_node in range(self._reloader.num_of_nodes):
-            _travel_time[from_node] = {}
-            for to_node in range(self._reloader.num_of_nodes):
-                if from_node == to_node:
-                    _travel_time[from_node][to_node] = 0
-                else:
-                    _travel_time[from_node][to_node] = int(
-                        travel_time(
-                            from_node, to_node))
-
-        @lru_cache()
-        def travel_time_evaluator(_from_index, _to_index):
-            return _travel_time[self._index_manager.index_to_node(_from_index)][self._index_manager.index_to_node(
-                _to_index)]
-
-        return travel_time_evaluator
-
-    def _create_session_evaluator(self):
-
-        def session_time(_from_node, _to_node):
-            if _from_node == _to_node:
-                return 0
-            if _from_node in self._reloader.arrive_indices and _to_node == (_from_node + 1):
-                return -max(self._matcher_input.delivering_drones_board.get_max_session_time_per_drone_delivery())
-            if _from_node in self._reloader.arrive_indices and _to_node != (_from_node + 1):
-                return sys.maxsize
-            if _to_node in self._reloader.depart_indices and _from_node != (_to_node - 1):
-                return sys.maxsize
-            if self._are_nodes_consecutive_depos(_from_node, _to_node):
-                return sys.maxsize
-            if _from_node in self._reloader.reloading_virtual_depos_indices:
-                vehicle_of_node = self._reloader.get_reloading_depot_vehicle(_from_node)
-                dock = self._matcher_input.delivering_drones_board.delivering_drones_list[
-                    vehicle_of_node].start_loading_dock
-                _from_node = self._graph_exporter.get_node_graph_index(self._matcher_input.graph, dock)
-            elif _to_node in self._reloader.reloading_virtual_depos_indices:
-                vehicle_of_node = self._reloader.get_reloading_depot_vehicle(_to_node)
-                dock = self._matcher_input.delivering_drones_board.delivering_drones_list[
-                    vehicle_of_node].start_loading_dock
-                _to_node = self._graph_exporter.get_node_graph_index(self._matcher_input.graph, dock)
-            graph_session_time = self._travel_time_matrix[_from_node][_to_node]
-            return graph_session_time
-
-        _session_time = {}
-        for from_node in range(self._reloader.num_of_nodes):
-            _session_time[from_node] = {}
-            for to_node in range(self._reloader.num_of_nodes):
-                if from_node == to_node:
-                    _session_time[from_node][to_node] = 0
-                else:
-                    _session_time[from_node][to_node] = int(
-                        session_time(
-                            from_node, to_node))
-
-        @lru_cache()
-        def session_evaluator(_from_index, _to_index):
-            return _session_time[self._index_manager.index_to_node(_from_index)][self._index_manager.index_to_node(
-                _to_index)]
-
-        return session_evaluator
-
-    def _create_demand_evaluator(self, package_type: PackageType):
-
-        def _get_package_amount_by_type(_from_node: np.int64, _package_type: PackageType) -> int:
-            if _from_node in self._reloader.depart_indices:
-                package_amount_by_type = -1 * max(
-                    self._matcher_input.delivering_drones_board.get_package_type_amount_per_drone_delivery(
-                        _package_type))
-            elif _from_node in self._reloader.arrive_indices:
-                package_amount_by_type = 0
-            else:
-                package_amount_by_type = self._graph_exporter.export_package_type_demands(self._matcher_input.graph,
-                                                                                          _package_type)[_from_node]
-            return package_amount_by_type
-
-        package_name = str.lower(package_type.name)
-        setattr(self, "_demands_" + package_name, {})
-        _demands = getattr(self, "_demands_" + package_name)
-        for from_node in range(self._reloader.num_of_nodes):
-            _demands[from_node] = int(_get_package_amount_by_type(from_node, package_type))
-
-        exec_globals = {'self': self, 'lru_cache': lru_cache}
-        exec_locals = {}
-        callback_name = f"_get_{package_name}_demand_callback"
-        exec(f"@lru_cache()\n"
-             f"def {callback_name}(_from_index):\n"
-             f"\treturn self._demands_{package_name}["
-             f"self._index_manager.index_to_node(_from_index)]",
-             exec_globals, exec_locals)
-        return exec_locals[callback_name]
-
-    @lru_cache()
-    def _are_nodes_consecutive_depos(self, from_node, to_node) -> bool:
-        depots = self._graph_exporter.export_basis_nodes_indices(self._matcher_input.graph) \
-                 + self._reloader.reloading_virtual_depos_indices
-        return from_node in depots and to_node in depots
+    def _create_transit_matrix(self, graph_matrix: np.ndarray) -> np.ndarray:
+        transit_matrix = graph_matrix[np.ix_(self._nodes_graph_indices, self._nodes_graph_indices)]
+        depots = np.zeros(self._reloader.num_of_nodes, dtype=bool)
+        depots[self._basis_nodes_indices + self._reloader.reloading_virtual_depos_indices] = True
+        transit_matrix[np.ix_(depots, depots)] = sys.maxsize
+        transit_matrix[:, self._depart_indices] = sys.maxsize
+        transit_matrix[self._arrive_indices, :] = sys.maxsize
+        transit_matrix[self._arrive_indices, self._depart_indices] = 0
+        np.fill_diagonal(transit_matrix, 0)
+        return transit_matrix
+
+    def _create_session_time_matrix(self) -> np.ndarray:
+        session_time_matrix = self._travel_time_transit_matrix.copy()
+        session_time_matrix[self._arrive_indices, self._depart_indices] = \
+            -max(self._matcher_input.delivering_drones_board.get_max_session_time_per_drone_delivery())
+        return session_time_matrix
+
+    def _calc_nodes_graph_indices(self) -> np.ndarray:
+        nodes_graph_indices = np.arange(self._reloader.num_of_nodes, dtype=np.int64)
+        for node in self._reloader.reloading_virtual_depos_indices:
+            vehicle_of_node = self._reloader.get_reloading_depot_vehicle(node)
+            dock = self._matcher_input.delivering_drones_board.delivering_drones_list[
+                vehicle_of_node].start_loading_dock
+            nodes_graph_indices[node] = self._graph_exporter.get_node_graph_index(self._matcher_input.graph, dock)
+        return nodes_graph_indices
+
+    def _register_transit(self, transit_matrix: np.ndarray) -> int:
+        if self._matcher_input.config.solver.is_transit_matrix_evaluation():
+            return self._routing_model.RegisterTransitMatrix(transit_matrix.tolist())
+        transit_evaluator = self._create_transit_evaluator(transit_matrix)
+        if instrumentation.is_enabled():
+            transit_evaluator = instrumentation.counted('ortools.transit_callback_calls', transit_evaluator)
+        return self._routing_model.RegisterTransitCallback(transit_evaluator)
+
+    def _register_unary_transit(self, transits: np.ndarray) -> int:
+        if self._matcher_input.config.solver.is_transit_matrix_evaluation():
+            return self._routing_model.RegisterUnaryTransitVector(transits.tolist())
+        transit_evaluator = self._create_unary_transit_evaluator(transits)
+        if instrumentation.is_enabled():
+            transit_evaluator = instrumentation.counted('ortools.transit_callback_calls', transit_evaluator)
+        return self._routing_model.RegisterUnaryTransitCallback(transit_evaluator)
+
+    def _create_transit_evaluator(self, transit_matrix: np.ndarray):
+        num_of_nodes = transit_matrix.shape[0]
+        transits = transit_matrix.ravel().tolist()
+        nodes_of_indices = self._index_manager.get_nodes_of_indices()
+        from_offsets = (nodes_of_indices * num_of_nodes).tolist()
+        to_offsets = nodes_of_indices.tolist()
+
+        def transit_evaluator(_from_index, _to_index):
+            return transits[from_offsets[_from_index] + to_offsets[_to_index]]
+
+        return transit_evaluator
+
+    def _create_unary_transit_evaluator(self, transits: np.ndarray):
+        transits_of_indices = transits[self._index_manager.get_nodes_of_indices()].tolist()
+
+        def unary_transit_evaluator(_from_index):
+            return transits_of_indices[_from_index]
+
+        return unary_transit_evaluator
+
+    def _calc_demands(self, package_type: PackageType) -> np.ndarray:
+        demands = np.zeros(self._reloader.num_of_nodes, dtype=np.int64)
+        graph_demands = self._graph_exporter.export_package_type_demands(self._matcher_input.graph, package_type)
+        demands[:len(graph_demands)] = graph_demands
+        demands[self._depart_indices] = -1 * max(
+            self._matcher_input.delivering_drones_board.get_package_type_amount_per_drone_delivery(package_type))
+        return demands
 
     def _set_max_route_time_for_each_vehicle(self, time_dimension: RoutingDimension):
         for i, drone_delivery in enumerate(self._matcher_input.delivering_drones_board.delivering_drones_list):
@@ -4,6 +4,7 @@ from ortools.constraint_solver.pywrapcp import RoutingModel
 from ortools.constraint_solver.routing_parameters_pb2 import RoutingSearchParameters
 
 from common.graph.operational.export_ortools_graph import OrtoolsGraphExporter
+from common.utils import instrumentation
 from matching.matcher_input import MatcherInput
 from matching.monitor import Monitor, MonitorData, current_milli_time
 from matching.ortools.ortools_index_manager_wrapper import OrToolsIndexManagerWrapper
@@ -126,6 +127,7 @@ class ORToolsMatcherMonitor:
         self._add_route_monitoring()
 
     def monitor_search(self):
+        instrumentation.count('ortools.monitor_callback_calls')
         if self._monitor.num_of_iterations % self._monitor_config.iterations_between_monitoring == 0:
 
             if self.best_solution_collector.SolutionCount() == 0:
@@ -1,5 +1,6 @@
 from ortools.constraint_solver.pywrapcp import RoutingModel
 
+from common.utils import instrumentation
 from matching.matcher_input import MatcherInput
 from matching.ortools.ortools_matcher_constraints import OrToolsDimensionDescription
 from matching.ortools.ortools_priority_evaluator import ORToolsPriorityEvaluator
@@ -13,8 +14,14 @@ class ORToolsMatcherObjective:
         self._priority_evaluator = priority_evaluator
 
     def add_priority(self):
-        priority_callback_index = self._routing_model.RegisterUnaryTransitCallback(
-            self._priority_evaluator.priority_evaluator)
+        if self._matcher_input.config.solver.is_transit_matrix_evaluation():
+            priority_callback_index = self._routing_model.RegisterUnaryTransitVector(
+                self._priority_evaluator.priorities)
+        else:
+            priority_evaluator = self._priority_evaluator.priority_evaluator
+            if instrumentation.is_enabled():
+                priority_evaluator = instrumentation.counted('ortools.transit_callback_calls', priority_evaluator)
+            priority_callback_index = self._routing_model.RegisterUnaryTransitCallback(priority_evaluator)
         self._routing_model.SetArcCostEvaluatorOfAllVehicles(priority_callback_index)
         self._routing_model.AddDimension(
             priority_callback_index,
@@ -0,0 +1,121 @@
+import csv
+import json
+import time
+from pathlib import Path
+from typing import List, Dict, Callable, Optional
+
+from ortools.constraint_solver.pywrapcp import RoutingModel, Assignment, IntVar
+
+from common.graph.operational.export_ortools_graph import OrtoolsGraphExporter
+from common.entities.base_entities.temporal import current_milli_time
+from common.utils import instrumentation
+from matching.matcher_input import MatcherInput
+from matching.monitor import MonitorData
+from matching.ortools.ortools_index_manager_wrapper import OrToolsIndexManagerWrapper
+from matching.ortools.ortools_priority_evaluator import ORToolsPriorityEvaluator
+
+TELEMETRY_FORMAT_CSV = 'csv'
+TELEMETRY_FORMAT_JSONL = 'jsonl'
+TELEMETRY_FIELDS = ['time_sec', MonitorData.objective.name, MonitorData.total_priority.name,
+                    MonitorData.total_unmatched_delivery_requests.name,
+                    MonitorData.unmatched_delivery_requests_total_priority.name, 'solutions', 'improvements']
+
+
+class ORToolsMatcherTelemetryException(Exception):
+    pass
+
+
+class ORToolsMatcherTelemetry:
+    """
+    Records a time series of the search, with low overhead, instead of the per iteration monitoring of
+    ORToolsMatcherMonitor. A solution callback only compares the cost of each solution with the best one, and the
+    unmatched delivery requests and priorities are read from the solver variables only for improving solutions, at
+    most once per telemetry interval. The last improvement is always recorded from the returned solution.
+    """
+
+    def __init__(self, graph_exporter: OrtoolsGraphExporter, index_manager: OrToolsIndexManagerWrapper,
+                 routing_model: RoutingModel, matcher_input: MatcherInput,
+                 priority_evaluator: ORToolsPriorityEvaluator):
+        self._routing_model = routing_model
+        self._matcher_input = matcher_input
+        self._monitor_config = matcher_input.config.monitor
+        self._cost_var = routing_model.CostVar()
+        delivery_requests_indices = [index_manager.node_to_index(node) for node in
+                                     graph_exporter.export_delivery_request_nodes_indices(matcher_input.graph)]
+        self._delivery_requests_active_vars = [routing_model.ActiveVar(index) for index in delivery_requests_indices]
+        self._delivery_requests_priorities = [priority_evaluator.priority_evaluator(index)
+                                              for index in delivery_requests_indices]
+        priority_dimension = routing_model.GetDimensionOrDie('priority')
+        self._end_priority_vars = [priority_dimension.CumulVar(routing_model.End(vehicle_index))
+                                   for vehicle_index in range(routing_model.vehicles())]
+        self._records: List[Dict[str, float]] = []
+        self.start()
+
+    @property
+    def records(self) -> List[Dict[str, float]]:
+        return self._records
+
+    def add_solution_callback(self) -> None:
+        self._routing_model.AddAtSolutionCallback(self._on_solution)
+
+    def start(self) -> None:
+        self._start_time = time.monotonic()
+        self._last_record_time = -float('inf')
+        self._best_objective_value: Optional[int] = None
+        self._is_best_recorded = True
+        self._num_of_solutions = 0
+        self._num_of_improvements = 0
+        self._records = []
+
+    def finish(self, solution: Optional[Assignment]) -> None:
+        """
+        Records the returned solution, if its improvement was not recorded, and writes the time series when a
+        telemetry format is configured.
+        """
+        if solution is not None and not self._is_best_recorded:
+            self._record(solution.ObjectiveValue(), solution.Value)
+        if self._monitor_config.telemetry_format:
+            self.write(Path(self._monitor_config.output_directory) /
+                       f'Telemetry_{self._matcher_input.config.solver.first_solution_strategy}_'
+                       f'{self._matcher_input.config.solver.local_search_strategy}_'
+                       f'{self._matcher_input.config.unmatched_penalty}{str(current_milli_time())}.'
+                       f'{self._monitor_config.telemetry_format}')
+
+    def write(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.suffix == f'.{TELEMETRY_FORMAT_CSV}':
+            with open(path, 'w', newline='') as file:
+                writer = csv.DictWriter(file, fieldnames=TELEMETRY_FIELDS)
+                writer.writeheader()
+                writer.writerows(self._records)
+        elif path.suffix == f'.{TELEMETRY_FORMAT_JSONL}':
+            with open(path, 'w') as file:
+                file.writelines(json.dumps(record) + '\n' for record in self._records)
+        else:
+            raise ORToolsMatcherTelemetryException(f"Unknown telemetry format {path.suffix}")
+
+    def _on_solution(self) -> None:
+        instrumentation.count('ortools.solution_callback_calls')
+        self._num_of_solutions += 1
+        objective_value = self._cost_var.Value()
+        if self._best_objective_value is not None and objective_value >= self._best_objective_value:
+            return
+        self._best_objective_value = objective_value
+        self._num_of_improvements += 1
+        self._is_best_recorded = False
+        if time.monotonic() - self._last_record_time >= self._monitor_config.telemetry_interval_sec:
+            self._record(objective_value, IntVar.Value)
+
+    def _record(self, objective_value: int, value: Callable[[IntVar], int]) -> None:
+        self._last_record_time = time.monotonic()
+        self._is_best_recorded = True
+        is_active = [value(active_var) for active_var in self._delivery_requests_active_vars]
+        self._records.append({
+            'time_sec': round(self._last_record_time - self._start_time, 3),
+            MonitorData.objective.name: objective_value,
+            MonitorData.total_priority.name: sum(value(priority_var) for priority_var in self._end_priority_vars),
+            MonitorData.total_unmatched_delivery_requests.name: is_active.count(0),
+            MonitorData.unmatched_delivery_requests_total_priority.name: sum(
+                priority for priority, active in zip(self._delivery_requests_priorities, is_active) if not active),
+            'solutions': self._num_of_solutions,
+            'improvements': self._num_of_improvements})
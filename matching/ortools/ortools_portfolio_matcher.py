@@ -0,0 +1,132 @@
+import json
+import multiprocessing
+from itertools import product
+from queue import Empty
+from typing import List, Callable, Optional
+
+from common.entities.base_entities.base_entity import JsonableBaseEntity
+from common.entities.base_entities.drone_delivery_board import DroneDeliveryBoard
+from matching.initial_solution import Routes
+from matching.matcher import Matcher
+from matching.matcher_input import MatcherInput
+from matching.ortools.ortools_matcher import ORToolsMatcher
+from matching.ortools.ortools_solver_config import ORToolsSolverConfig
+
+RESULT_POLL_INTERVAL_SEC = 1
+
+
+class ORToolsPortfolioException(Exception):
+    pass
+
+
+class ORToolsPortfolioMatcher(Matcher):
+    """
+    Solves the OR-Tools model with each of the portfolio's solver configs in its own process, and returns the result
+    of the solve that reached the lowest objective value.
+    The model, with its transit matrices, is built once in this process and inherited by the forked solvers. When a
+    target objective value is given, the remaining solvers are stopped as soon as one of them reaches it.
+    """
+
+    def __init__(self, matcher_input: MatcherInput, solver_configs: List[ORToolsSolverConfig],
+                 target_objective_value: int = None):
+        super().__init__(matcher_input)
+        self._solver_configs = solver_configs
+        self._target_objective_value = target_objective_value
+        self._ortools_matcher = ORToolsMatcher(matcher_input)
+        self._best_solver_config: Optional[ORToolsSolverConfig] = None
+        self._best_objective_value: Optional[int] = None
+        self._objective_values: List[Optional[int]] = []
+
+    @property
+    def best_solver_config(self) -> Optional[ORToolsSolverConfig]:
+        return self._best_solver_config
+
+    @property
+    def best_objective_value(self) -> Optional[int]:
+        return self._best_objective_value
+
+    @property
+    def objective_values(self) -> List[Optional[int]]:
+        """
+        The objective value reached by each of the solver configs of the last solve, None for the solvers that failed or
+        were stopped.
+        """
+        return self._objective_values
+
+    def match(self) -> DroneDeliveryBoard:
+        return DroneDeliveryBoard.dict_to_obj(json.loads(self._solve_portfolio(ORToolsMatcher.match)))
+
+    def match_to_routes(self) -> Routes:
+        return Routes.dict_to_obj(json.loads(self._solve_portfolio(ORToolsMatcher.match_to_routes)))
+
+    def match_from_init_solution(self, initial_routes: Routes) -> DroneDeliveryBoard:
+        return DroneDeliveryBoard.dict_to_obj(json.loads(self._solve_portfolio(
+            lambda matcher: matcher.match_from_init_solution(initial_routes))))
+
+    def _solve_portfolio(self, solve: Callable[[ORToolsMatcher], JsonableBaseEntity]) -> str:
+        context = multiprocessing.get_context('fork')
+        results_queue = context.Queue()
+        processes = [context.Process(target=_solve_portfolio_member,
+                                     args=(self._ortools_matcher, solver_config, solve, member_index, results_queue),
+                                     daemon=True)
+                     for member_index, solver_config in enumerate(self._solver_configs)]
+        for process in processes:
+            process.start()
+        best_result_json, errors = None, []
+        self._best_solver_config, self._best_objective_value = None, None
+        self._objective_values = [None] * len(self._solver_configs)
+        try:
+            for member_index, objective_value, result_json, error in _iter_results(results_queue, processes):
+                if error is not None:
+                    errors.append(error)
+                    continue
+                self._objective_values[member_index] = objective_value
+                if best_result_json is None or (objective_value is not None and (
+                        self._best_objective_value is None or objective_value < self._best_objective_value)):
+                    best_result_json = result_json
+                    self._best_solver_config = self._solver_configs[member_index]
+                    self._best_objective_value = objective_value
+                if self._target_objective_value is not None and self._best_objective_value is not None \
+                        and self._best_objective_value <= self._target_objective_value:
+                    break
+        finally:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+                process.join()
+        if best_result_json is None:
+            raise ORToolsPortfolioException(f"All the portfolio solvers failed: {errors}")
+        return best_result_json
+
+
+def create_portfolio_solver_configs(first_solution_strategies: List[str], local_search_strategies: List[str],
+                                    timeout_sec: int) -> List[ORToolsSolverConfig]:
+    return [ORToolsSolverConfig(first_solution_strategy=first_solution_strategy,
+                                local_search_strategy=local_search_strategy, timeout_sec=timeout_sec)
+            for first_solution_strategy, local_search_strategy in product(first_solution_strategies,
+                                                                          local_search_strategies)]
+
+
+def _solve_portfolio_member(matcher: ORToolsMatcher, solver_config: ORToolsSolverConfig,
+                            solve: Callable[[ORToolsMatcher], JsonableBaseEntity], member_index: int,
+                            results_queue) -> None:
+    try:
+        matcher.set_solver_config(solver_config)
+        result_json = solve(matcher).to_json()
+        results_queue.put((member_index, matcher.objective_value, result_json, None))
+    except Exception as error:
+        results_queue.put((member_index, None, None, repr(error)))
+
+
+def _iter_results(results_queue, processes):
+    """
+    Yields the members results as they arrive, until all of them arrived or all the remaining processes died.
+    """
+    for _ in processes:
+        while True:
+            try:
+                yield results_queue.get(timeout=RESULT_POLL_INTERVAL_SEC)
+                break
+            except Empty:
+                if not any(process.is_alive() for process in processes) and results_queue.empty():
+                    return
@@ -1,4 +1,4 @@
-from functools import lru_cache
+from typing import List
 
 from common.graph.operational.export_ortools_graph import OrtoolsGraphExporter
 from matching.matcher_input import MatcherInput
@@ -13,9 +13,10 @@ class ORToolsPriorityEvaluator:
         self._index_manager = index_manager
         self._matcher_input = matcher_input
         self._reloader = reloader
+        self.priorities = self.calc_priorities()
         self.priority_evaluator = self.create_priority_evaluator()
 
-    def create_priority_evaluator(self):
+    def calc_priorities(self) -> List[int]:
 
         def priority(_from_node):
             if _from_node in self._reloader.reloading_virtual_depos_indices:
@@ -27,12 +28,12 @@ class ORToolsPriorityEvaluator:
                         self._matcher_input.config.constraints.priority.priority_cost_coefficient
             return _priority
 
-        _priorities = {}
-        for from_node in range(self._reloader.num_of_nodes):
-            _priorities[from_node] = int(priority(from_node))
+        return [int(priority(from_node)) for from_node in range(self._reloader.num_of_nodes)]
+
+    def create_priority_evaluator(self):
+        priorities_of_indices = [self.priorities[node] for node in self._index_manager.get_nodes_of_indices()]
 
-        @lru_cache()
         def priority_evaluator(_from_index):
-            return _priorities[self._index_manager.index_to_node(_from_index)]
+            return priorities_of_indices[_from_index]
 
         return priority_evaluator
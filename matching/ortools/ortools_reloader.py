@@ -1,3 +1,6 @@
+from typing import List, Set
+
+from matching.initial_solution import Route
 from matching.matcher_input import MatcherInput
 
 ''' Reloading depo consists of 2 nodes:
@@ -17,6 +20,7 @@ class ORToolsReloader:
             len(self._matcher_input.graph.nodes),
             len(self._matcher_input.graph.nodes) + num_of_reloading_depo_nodes))
         self._arrive_indices = self._calc_reload_arriving_nodes()
+        self._arrive_indices_set = set(self._arrive_indices)
         self._depart_indices = self._calc_reload_departing_nodes()
         self._num_of_nodes = len(self._matcher_input.graph.nodes) + len(self._reloading_virtual_depos_indices)
         self._reloading_depots_per_vehicle = {
@@ -62,6 +66,41 @@ class ORToolsReloader:
         starting_index = 1
         return self._reloading_depots_per_vehicle[vehicle_index][starting_index::NUM_OF_NODES_IN_RELOADING_DEPO]
 
+    def split_route_into_trips(self, route: List[int], delivery_requests_indices: Set[int]) -> List[List[int]]:
+        """
+        Returns the delivery requests of each non empty trip of the route, the trips being separated by the reloading
+        depots arrive nodes.
+        """
+        trips = [[]]
+        for index in route:
+            if index in self._arrive_indices_set:
+                trips.append([])
+            elif index in delivery_requests_indices:
+                trips[-1].append(index)
+        return [trip for trip in trips if len(trip) > 0]
+
+    def join_trips_into_route(self, trips: List[List[int]], vehicle_index: int) -> Route:
+        """
+        Joins consecutive trips through the vehicle reloading depots, dropping the trips beyond its reloads. OR-Tools
+        requires the first reloading depot to be visited, and its arrive and depart nodes can not be adjacent to a
+        loading dock, so it must be between two delivery requests. A single trip of the first vehicle is split before
+        its last delivery request, and a first vehicle route with less than two delivery requests can not visit it.
+        """
+        arrive_indices = self.get_vehicle_arrive_indices(vehicle_index)
+        depart_indices = self.get_vehicle_depart_indices(vehicle_index)
+        trips = [trip for trip in trips if len(trip) > 0][:len(arrive_indices) + 1]
+        if self.has_first_reloading_depot(vehicle_index) and len(trips) == 1 and len(trips[0]) > 1:
+            trips = [trips[0][:-1], trips[0][-1:]]
+        route = []
+        for trip_index, trip in enumerate(trips):
+            if trip_index > 0:
+                route.extend([arrive_indices[trip_index - 1], depart_indices[trip_index - 1]])
+            route.extend(trip)
+        return Route(route)
+
+    def has_first_reloading_depot(self, vehicle_index: int) -> bool:
+        return vehicle_index == 0 and len(self.get_vehicle_arrive_indices(vehicle_index)) > 0
+
     def _calc_reload_arriving_nodes(self):
         starting_index = 0
         return self._reloading_virtual_depos_indices[starting_index::NUM_OF_NODES_IN_RELOADING_DEPO]
@@ -4,6 +4,8 @@ from common.entities.base_entities.base_entity import JsonableBaseEntity
 from matching.solver_config import SolverConfig, SolverVendor
 
 DEFAULT_TIMEOUT_FOR_META_HEURISTICS = 30
+TRANSIT_EVALUATION_MATRIX = "matrix"
+TRANSIT_EVALUATION_CALLBACK = "callback"
 
 
 class ORToolsSolverConfig(SolverConfig, JsonableBaseEntity):
@@ -18,9 +20,22 @@ class ORToolsSolverConfig(SolverConfig, JsonableBaseEntity):
     # ['UNSET', 'AUTOMATIC', 'GREEDY_DESCENT', 'GUIDED_LOCAL_SEARCH', 'SIMULATED_ANNEALING', 'TABU_SEARCH',
     # 'GENERIC_TABU_SEARCH']
 
-    def __init__(self, first_solution_strategy: str, local_search_strategy: str, timeout_sec: int):
+    # The transit evaluations include:
+    # ['matrix', 'callback'] - 'matrix' registers precomputed transit matrices and vectors so they are evaluated
+    # natively by OR-Tools, 'callback' evaluates them through python callbacks.
+
+    def __init__(self, first_solution_strategy: str, local_search_strategy: str, timeout_sec: int,
+                 transit_evaluation: str = TRANSIT_EVALUATION_MATRIX):
         super().__init__(SolverVendor.OR_TOOLS, first_solution_strategy, local_search_strategy,
                          self.validate_timeout_sec(timeout_sec))
+        self._transit_evaluation = self.validate_transit_evaluation(transit_evaluation)
+
+    @property
+    def transit_evaluation(self) -> str:
+        return self._transit_evaluation
+
+    def is_transit_matrix_evaluation(self) -> bool:
+        return str.lower(self.transit_evaluation) == TRANSIT_EVALUATION_MATRIX
 
     def get_first_solution_strategy_as_int(self) -> int:
         return FirstSolutionStrategy.DESCRIPTOR.enum_values_by_name.get(
@@ -35,6 +50,13 @@ class ORToolsSolverConfig(SolverConfig, JsonableBaseEntity):
         return DEFAULT_TIMEOUT_FOR_META_HEURISTICS if \
             timeout_sec == 0 and self.is_meta_heuristic() else timeout_sec
 
+    @staticmethod
+    def validate_transit_evaluation(transit_evaluation: str) -> str:
+        if str.lower(transit_evaluation) not in [TRANSIT_EVALUATION_MATRIX, TRANSIT_EVALUATION_CALLBACK]:
+            raise ValueError(f"Unknown transit evaluation {transit_evaluation}, expected "
+                             f"'{TRANSIT_EVALUATION_MATRIX}' or '{TRANSIT_EVALUATION_CALLBACK}'")
+        return transit_evaluation
+
     def is_meta_heuristic(self) -> bool:
         if self.get_local_search_strategy_as_int() in [LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH,
                                                        LocalSearchMetaheuristic.SIMULATED_ANNEALING,
@@ -49,7 +71,7 @@ class ORToolsSolverConfig(SolverConfig, JsonableBaseEntity):
         if memodict is None:
             memodict = {}
         new_copy = ORToolsSolverConfig(self.first_solution_strategy,
-                                       self.local_search_strategy, self.timeout_sec)
+                                       self.local_search_strategy, self.timeout_sec, self.transit_evaluation)
         memodict[id(self)] = new_copy
         return new_copy
 
@@ -60,4 +82,8 @@ class ORToolsSolverConfig(SolverConfig, JsonableBaseEntity):
         return ORToolsSolverConfig(
             first_solution_strategy=dict_input["first_solution_strategy"],
             local_search_strategy=dict_input["local_search_strategy"],
-            timeout_sec=dict_input["timeout_sec"])
+            timeout_sec=dict_input["timeout_sec"],
+            transit_evaluation=dict_input.get("transit_evaluation", TRANSIT_EVALUATION_MATRIX))
+
+    def __eq__(self, other):
+        return super().__eq__(other) and (self.transit_evaluation == other.transit_evaluation)
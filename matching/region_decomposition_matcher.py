@@ -0,0 +1,227 @@
+import json
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Type, Optional
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
+
+from common.entities.base_entities.drone_delivery_board import DroneDeliveryBoard, UnmatchedDeliveryRequest, \
+    DeliveringDronesBoard
+from common.entities.base_entities.entity_id import EntityID
+from common.graph.operational.operational_graph import OperationalGraph
+from matching.greedy.greedy_matcher import GreedyMatcher
+from matching.delivery_board_utils import localize_drone_delivery, get_matched_graph_indices, \
+    get_trips_graph_indices
+from matching.initial_solution import Routes
+from matching.matcher import Matcher
+from matching.matcher_factory import create_matcher
+from matching.matcher_input import MatcherInput
+from matching.ortools.ortools_reloader import ORToolsReloader
+
+
+class RegionDecompositionMatcher(Matcher):
+    """
+    Matches each region of the delivery requests separately, in worker processes, and stitches the regions boards
+    into one board of the whole graph.
+    The regions are the connected components of the edges between delivery requests, such as the zones clusters of
+    a clustered delivery requests graph, merged into at most max_regions regions of balanced package demand. Each
+    formation is assigned to one region, by the region demand and the distance of its start loading dock, and each
+    region is matched by the configured solver on its subgraph with its formations loading docks.
+    The requests left unmatched are then offered to all the formations by a reinsertion pass, which replays the
+    stitched routes on the whole graph and greedily appends requests to the formations that can still reach them.
+    """
+
+    def __init__(self, matcher_input: MatcherInput, max_regions: int = None, max_workers: int = None,
+                 reinsert_unmatched: bool = True):
+        super().__init__(matcher_input)
+        self._max_regions = max_regions
+        self._max_workers = max_workers
+        self._reinsert_unmatched = reinsert_unmatched
+        self._reloader = ORToolsReloader(matcher_input)
+
+    def match(self) -> DroneDeliveryBoard:
+        return self._match_regions()
+
+    def match_to_routes(self) -> Routes:
+        return self._create_routes(self._match_regions())
+
+    def match_from_init_solution(self, initial_routes: Routes) -> DroneDeliveryBoard:
+        return self._match_regions(initial_routes)
+
+    def calc_regions(self) -> List[List[int]]:
+        """
+        Returns the graph indices of the delivery requests of each region.
+        """
+        graph = self._matcher_input.graph
+        delivery_requests_indices = np.array(graph.get_all_delivery_requests_indices(), dtype=np.int64)
+        if len(delivery_requests_indices) == 0:
+            return []
+        indptr, targets, _, _ = graph.to_csr_arrays()
+        num_of_nodes = len(indptr) - 1
+        is_delivery_request = np.zeros(num_of_nodes, dtype=bool)
+        is_delivery_request[delivery_requests_indices] = True
+        sources = np.repeat(np.arange(num_of_nodes), np.diff(indptr))
+        is_between_delivery_requests = is_delivery_request[sources] & is_delivery_request[targets]
+        adjacency = csr_matrix((np.ones(np.count_nonzero(is_between_delivery_requests)),
+                                (sources[is_between_delivery_requests], targets[is_between_delivery_requests])),
+                               shape=(num_of_nodes, num_of_nodes))
+        _, labels = connected_components(adjacency, directed=True, connection='weak')
+        components = [delivery_requests_indices[labels[delivery_requests_indices] == label]
+                      for label in np.unique(labels[delivery_requests_indices])]
+        return self._merge_components(components)
+
+    def _merge_components(self, components: List[np.ndarray]) -> List[List[int]]:
+        """
+        Merges the components into the regions, largest demand first into the region of the lowest demand.
+        """
+        num_of_formations = self._matcher_input.delivering_drones_board.amount_of_formations()
+        num_of_regions = min(len(components), num_of_formations, self._max_regions or num_of_formations)
+        demands = self._calc_demands()
+        regions = [[] for _ in range(num_of_regions)]
+        regions_demands = np.zeros(num_of_regions)
+        for component in sorted(components, key=lambda component: -demands[component].sum()):
+            region_index = int(np.argmin(regions_demands))
+            regions[region_index].extend(component.tolist())
+            regions_demands[region_index] += demands[component].sum()
+        return [sorted(region) for region in regions]
+
+    def _assign_formations(self, regions: List[List[int]]) -> List[List[int]]:
+        """
+        Returns the indices of the formations of each region. Each region gets at least one formation and the rest are
+        given in proportion to the regions demands, to the formations whose start loading docks are nearest.
+        """
+        graph = self._matcher_input.graph
+        delivering_drones_list = self._matcher_input.delivering_drones_board.delivering_drones_list
+        demands = self._calc_demands()
+        regions_demands = np.array([demands[region].sum() for region in regions], dtype=np.float64)
+        num_of_formations_per_region = np.ones(len(regions), dtype=np.int64)
+        for _ in range(len(delivering_drones_list) - len(regions)):
+            num_of_formations_per_region[int(np.argmax(regions_demands / num_of_formations_per_region))] += 1
+        locations = graph.locations
+        regions_centers = np.array([locations[region].mean(axis=0) for region in regions])
+        start_docks_locations = locations[[graph.get_node_index_by_id(delivering_drones.start_loading_dock.id)
+                                           for delivering_drones in delivering_drones_list]]
+        distances = np.linalg.norm(start_docks_locations[:, np.newaxis, :] - regions_centers[np.newaxis, :, :],
+                                   axis=2)
+        formations_per_region = [[] for _ in regions]
+        assigned = np.zeros(len(delivering_drones_list), dtype=bool)
+        for formation_index, region_index in zip(*np.unravel_index(np.argsort(distances, axis=None, kind='stable'),
+                                                                    distances.shape)):
+            if not assigned[formation_index] \
+                    and len(formations_per_region[region_index]) < num_of_formations_per_region[region_index]:
+                formations_per_region[region_index].append(int(formation_index))
+                assigned[formation_index] = True
+        return [sorted(formations) for formations in formations_per_region]
+
+    def _calc_demands(self) -> np.ndarray:
+        return np.maximum(self._matcher_input.graph.package_demands.sum(axis=1), 1)
+
+    def _match_regions(self, initial_routes: Routes = None) -> DroneDeliveryBoard:
+        regions = self.calc_regions()
+        if len(regions) == 0:
+            return create_matcher(self._matcher_input).match()
+        formations_per_region = self._assign_formations(regions)
+        regions_inputs = [self._create_region_input(region, formations)
+                          for region, formations in zip(regions, formations_per_region)]
+        regions_initial_routes = [None] * len(regions) if initial_routes is None else [
+            self._create_region_initial_routes(initial_routes, region_input, formations)
+            for region_input, formations in zip(regions_inputs, formations_per_region)]
+        delivery_board = self._stitch(self._solve_regions(regions_inputs, regions_initial_routes))
+        if self._reinsert_unmatched and len(delivery_board.unmatched_delivery_requests) > 0:
+            delivery_board = self._reinsert(delivery_board)
+        return delivery_board
+
+    def _create_region_input(self, region: List[int], formations: List[int]) -> MatcherInput:
+        graph = self._matcher_input.graph
+        delivering_drones_list = [self._matcher_input.delivering_drones_board.delivering_drones_list[formation_index]
+                                  for formation_index in formations]
+        kept_ids = {graph.get_delivery_request(index).id for index in region}
+        kept_ids.update(loading_dock.id for delivering_drones in delivering_drones_list
+                        for loading_dock in [delivering_drones.start_loading_dock, delivering_drones.end_loading_dock])
+        return MatcherInput(graph=graph.create_subgraph_without_nodes([node for node in graph.nodes
+                                                                       if node.internal_node.id not in kept_ids]),
+                            delivering_drones_board=DeliveringDronesBoard(delivering_drones_list),
+                            config=self._matcher_input.config)
+
+    def _create_region_initial_routes(self, initial_routes: Routes, region_input: MatcherInput,
+                                      formations: List[int]) -> Routes:
+        graph = self._matcher_input.graph
+        delivery_requests_indices = set(graph.get_all_delivery_requests_indices())
+        region_reloader = ORToolsReloader(region_input)
+        routes = []
+        for region_formation_index, formation_index in enumerate(formations):
+            trips = [[graph.get_delivery_request(index).id for index in trip]
+                     for trip in self._reloader.split_route_into_trips(initial_routes.as_list()[formation_index],
+                                                                       delivery_requests_indices)]
+            routes.append(region_reloader.join_trips_into_route(
+                [[region_input.graph.get_node_index_by_id(id_) for id_ in trip
+                  if region_input.graph.has_node_id(id_)]
+                 for trip in trips], region_formation_index))
+        return Routes(routes)
+
+    def _solve_regions(self, regions_inputs: List[MatcherInput],
+                       regions_initial_routes: List[Optional[Routes]]) -> List[DroneDeliveryBoard]:
+        if len(regions_inputs) == 1 or self._max_workers == 1:
+            return [_match_region(region_input, initial_routes)
+                    for region_input, initial_routes in zip(regions_inputs, regions_initial_routes)]
+        with ProcessPoolExecutor(max_workers=self._max_workers) as executor:
+            regions_boards = [executor.submit(_match_region_from_json, type(region_input.graph),
+                                              region_input.to_json_dict(),
+                                              None if initial_routes is None else initial_routes.to_json())
+                              for region_input, initial_routes in zip(regions_inputs, regions_initial_routes)]
+            return [DroneDeliveryBoard.dict_to_obj(json.loads(region_board.result()))
+                    for region_board in regions_boards]
+
+    def _stitch(self, regions_boards: List[DroneDeliveryBoard]) -> DroneDeliveryBoard:
+        """
+        Returns the regions drone deliveries with the formations and delivery requests of the matcher input, in the
+        order of the formations, and the graph indices of the whole graph.
+        """
+        graph = self._matcher_input.graph
+        delivering_drones_list = self._matcher_input.delivering_drones_board.delivering_drones_list
+        formations_indices: Dict[EntityID, int] = {delivering_drones.id: formation_index for
+                                                   formation_index, delivering_drones in
+                                                   enumerate(delivering_drones_list)}
+        drone_deliveries = sorted((localize_drone_delivery(drone_delivery, graph,
+                                                           delivering_drones_list[formations_indices[
+                                                               drone_delivery.delivering_drones.id]])
+                                   for region_board in regions_boards
+                                   for drone_delivery in region_board.drone_deliveries),
+                                  key=lambda drone_delivery: formations_indices[drone_delivery.delivering_drones.id])
+        matched_indices = get_matched_graph_indices(DroneDeliveryBoard(drone_deliveries, []))
+        return DroneDeliveryBoard(drone_deliveries=drone_deliveries,
+                                  unmatched_delivery_requests=[
+                                      UnmatchedDeliveryRequest(index, graph.get_delivery_request(index))
+                                      for index in graph.get_all_delivery_requests_indices()
+                                      if index not in matched_indices])
+
+    def _reinsert(self, delivery_board: DroneDeliveryBoard) -> DroneDeliveryBoard:
+        """
+        Keeps the stitched board unless the reinsertion keeps all of its matched requests.
+        """
+        reinserted_delivery_board = GreedyMatcher(self._matcher_input).match_from_init_solution(
+            self._create_routes(delivery_board))
+        if get_matched_graph_indices(delivery_board).issubset(get_matched_graph_indices(reinserted_delivery_board)):
+            return reinserted_delivery_board
+        return delivery_board
+
+    def _create_routes(self, delivery_board: DroneDeliveryBoard) -> Routes:
+        return Routes([self._reloader.join_trips_into_route(
+            get_trips_graph_indices(delivery_board, delivering_drones, self._matcher_input.graph), formation_index)
+            for formation_index, delivering_drones in
+            enumerate(self._matcher_input.delivering_drones_board.delivering_drones_list)])
+
+
+def _match_region(region_input: MatcherInput, initial_routes: Routes = None) -> DroneDeliveryBoard:
+    matcher = create_matcher(region_input)
+    if initial_routes is None:
+        return matcher.match()
+    return matcher.match_from_init_solution(initial_routes)
+
+
+def _match_region_from_json(graph_class: Type[OperationalGraph], region_input_json: Dict[str, str],
+                            initial_routes_json: str = None) -> str:
+    return _match_region(MatcherInput.from_json_dict(graph_class, region_input_json),
+                         None if initial_routes_json is None else Routes.dict_to_obj(
+                             json.loads(initial_routes_json))).to_json()
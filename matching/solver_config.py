@@ -5,6 +5,7 @@ from common.entities.base_entities.base_entity import JsonableBaseEntity
 
 class SolverVendor(JsonableBaseEntity, Enum):
     OR_TOOLS = "or_tools"
+    GREEDY = "greedy"
 
     @classmethod
     def dict_to_obj(cls, dict_input):
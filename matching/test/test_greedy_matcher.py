@@ -0,0 +1,175 @@
+import os
+import time
+import unittest
+from copy import deepcopy
+from datetime import timedelta
+from random import Random
+
+from common.entities.base_entities.delivery_request import DeliveryRequest
+from common.entities.base_entities.drone_delivery import DeliveringDrones
+from common.entities.base_entities.drone_delivery_board import DeliveringDronesBoard
+from common.entities.base_entities.entity_distribution.delivery_requestion_dataset_builder import \
+    build_delivery_request_distribution
+from common.entities.base_entities.entity_distribution.package_distribution import PackageDistribution
+from common.entities.base_entities.entity_distribution.temporal_distribution import ExactTimeWindowDistribution
+from common.entities.base_entities.entity_id import EntityID
+from common.entities.base_entities.package import PackageType
+from common.entities.base_entities.temporal import TimeWindowExtension, TimeDeltaExtension
+from common.graph.operational.columnar_operational_graph import ColumnarOperationalGraph
+from common.graph.operational.graph_creator import add_locally_connected_dr_graph, add_fully_connected_loading_docks
+from geometry.distribution.geo_distribution import UniformPointInBboxDistribution
+from matching.greedy.greedy_matcher import GreedyMatcher
+from matching.greedy.greedy_solver_config import GreedySolverConfig
+from matching.matcher_factory import create_matcher
+from matching.matcher_input import MatcherInput
+from matching.ortools.ortools_matcher import ORToolsMatcher
+from matching.ortools.ortools_reloader import ORToolsReloader
+from matching.solver_factory import create_solver_config
+from matching.test import test_or_tools_matcher_different_time_window, \
+    test_or_tools_matcher_time_window_greedy_reload_as_init_guess
+from matching.test.test_or_tools_matcher_time_window_greedy_reload_as_init_guess import ZERO_TIME
+
+NUM_OF_BENCHMARK_DELIVERY_REQUESTS = 10000
+NUM_OF_BENCHMARK_FORMATIONS = 20
+
+
+def _create_greedy_matcher_input(graph, delivering_drones_board, ortools_config) -> MatcherInput:
+    config = deepcopy(ortools_config)
+    config._solver = GreedySolverConfig()
+    return MatcherInput(graph, delivering_drones_board, config)
+
+
+class GreedyMatcherTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        scenario = test_or_tools_matcher_time_window_greedy_reload_as_init_guess.\
+            ORToolsMatcherTimeWindowGreedyReloadAsInitGuessTestCase
+        cls.scenario = scenario
+        cls.delivery_requests = scenario._create_delivery_requests()
+        cls.loading_docks = scenario._create_loading_docks()
+        graph = scenario._create_graph(cls.delivery_requests, cls.loading_docks)
+        cls.delivering_drones_board = \
+            scenario._create_delivering_drones_board_with_delivering_drones_with_different_loading_docks(
+                cls.loading_docks)
+        cls.ortools_match_input = MatcherInput(graph, cls.delivering_drones_board,
+                                               scenario._create_match_config_with_tw())
+        cls.match_input = _create_greedy_matcher_input(graph, cls.delivering_drones_board,
+                                                       scenario._create_match_config_with_tw())
+
+    def test_create_matcher_when_greedy_vendor(self):
+        self.assertIsInstance(create_matcher(self.match_input), GreedyMatcher)
+
+    def test_match_respects_capacity_and_time_windows(self):
+        delivery_board = GreedyMatcher(self.match_input).match()
+        matched_graph_indices = [matched_request.graph_index for drone_delivery in delivery_board.drone_deliveries
+                                 for matched_request in drone_delivery.matched_requests]
+        self.assertEqual(len(matched_graph_indices), len(set(matched_graph_indices)))
+        self.assertEqual(24, len(matched_graph_indices) + len(delivery_board.unmatched_delivery_requests))
+        self.assertGreater(len(matched_graph_indices), 0)
+        for drone_delivery in delivery_board.drone_deliveries:
+            capacity = drone_delivery.delivering_drones.drone_formation.get_package_type_amount(PackageType.LARGE)
+            self.assertLessEqual(
+                drone_delivery.get_total_package_type_amount_map().get_package_type_amount(PackageType.LARGE),
+                capacity)
+            for matched_request in drone_delivery.matched_requests:
+                self.assertIn(matched_request.delivery_time_window, matched_request.delivery_request.time_window)
+
+    def test_match_to_routes_is_an_ortools_assignment(self):
+        routes = GreedyMatcher(self.match_input).match_to_routes()
+        ortools_matcher = ORToolsMatcher(self.ortools_match_input)
+        self.assertIsNotNone(ortools_matcher._routing_model.ReadAssignmentFromRoutes(routes.as_list(), False))
+
+    def test_match_to_routes_with_few_requests_is_an_ortools_assignment(self):
+        for num_of_delivery_requests in [2, 3, 6]:
+            with self.subTest(num_of_delivery_requests=num_of_delivery_requests):
+                graph = self.scenario._create_graph(self.delivery_requests[:num_of_delivery_requests],
+                                                    self.loading_docks)
+                ortools_match_input = MatcherInput(graph, self.delivering_drones_board,
+                                                   self.scenario._create_match_config_with_tw())
+                routes = GreedyMatcher(_create_greedy_matcher_input(
+                    graph, self.delivering_drones_board, ortools_match_input.config)).match_to_routes()
+                ortools_matcher = ORToolsMatcher(ortools_match_input)
+                self.assertIn(ortools_matcher._reloader.get_vehicle_arrive_indices(0)[0], routes.as_list()[0])
+                self.assertIsNotNone(ortools_matcher._routing_model.ReadAssignmentFromRoutes(routes.as_list(),
+                                                                                             False))
+
+    def test_join_trips_into_route_visits_first_reloading_depot(self):
+        reloader = ORToolsReloader(self.ortools_match_input)
+        first_reload = [reloader.get_vehicle_arrive_indices(0)[0], reloader.get_vehicle_depart_indices(0)[0]]
+        self.assertEqual([], reloader.join_trips_into_route([], 0).indexes)
+        self.assertEqual([5], reloader.join_trips_into_route([[5]], 0).indexes)
+        self.assertEqual([5, 6] + first_reload + [7], reloader.join_trips_into_route([[5, 6, 7]], 0).indexes)
+        self.assertEqual([5] + first_reload + [6], reloader.join_trips_into_route([[5], [], [6]], 0).indexes)
+        self.assertEqual([5, 6], reloader.join_trips_into_route([[5, 6]], 1).indexes)
+
+    def test_match_from_init_solution_keeps_initial_routes(self):
+        routes = GreedyMatcher(self.match_input).match_to_routes()
+        delivery_board = GreedyMatcher(self.match_input).match_from_init_solution(routes)
+        matched_graph_indices = {matched_request.graph_index for drone_delivery in delivery_board.drone_deliveries
+                                 for matched_request in drone_delivery.matched_requests}
+        delivery_requests_indices = set(self.match_input.graph.get_all_delivery_requests_indices())
+        self.assertTrue({node for route in routes.as_list() for node in route
+                         if node in delivery_requests_indices}.issubset(matched_graph_indices))
+
+    def test_solver_config_from_dict(self):
+        solver_config = GreedySolverConfig(timeout_sec=5)
+        self.assertEqual(solver_config, create_solver_config(solver_config.__dict__()))
+
+
+class GreedyMatcherDifferentTWTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        scenario = test_or_tools_matcher_different_time_window.ORToolsMatcherDifferentTWTestCase
+        loading_dock = scenario._create_loading_dock()
+        cls.graph = scenario._create_graph(scenario._create_delivery_requests(), loading_dock)
+        cls.match_input = _create_greedy_matcher_input(cls.graph, scenario._create_delivering_drones_board(
+            loading_dock), scenario._create_match_config())
+
+    def test_match_on_columnar_graph_equals_match(self):
+        columnar_match_input = MatcherInput(ColumnarOperationalGraph.from_operational_graph(self.graph),
+                                            self.match_input.delivering_drones_board, self.match_input.config)
+        self.assertEqual(GreedyMatcher(self.match_input).match_to_routes().as_list(),
+                         GreedyMatcher(columnar_match_input).match_to_routes().as_list())
+
+    def test_match_when_requests_with_different_time_windows(self):
+        delivery_board = GreedyMatcher(self.match_input).match()
+        self.assertGreater(len(delivery_board.drone_deliveries[0].matched_requests), 0)
+        for drone_delivery in delivery_board.drone_deliveries:
+            for matched_request in drone_delivery.matched_requests:
+                self.assertIn(matched_request.delivery_time_window, matched_request.delivery_request.time_window)
+
+
+@unittest.skipUnless(os.environ.get('RUN_BENCHMARKS', False), 'benchmark')
+class GreedyMatcherBenchmark(unittest.TestCase):
+
+    def test_match_many_delivery_requests(self):
+        scenario = test_or_tools_matcher_time_window_greedy_reload_as_init_guess.\
+            ORToolsMatcherTimeWindowGreedyReloadAsInitGuessTestCase
+        delivery_requests = build_delivery_request_distribution(
+            relative_pdp_location_distribution=UniformPointInBboxDistribution(min_x=0, max_x=100, min_y=0, max_y=100),
+            time_window_distribution=ExactTimeWindowDistribution(NUM_OF_BENCHMARK_DELIVERY_REQUESTS * [
+                TimeWindowExtension(since=ZERO_TIME,
+                                    until=ZERO_TIME.add_time_delta(TimeDeltaExtension(timedelta(hours=12))))]),
+            package_type_distribution=PackageDistribution({PackageType.LARGE: 1})
+        ).choose_rand(Random(42), amount={DeliveryRequest: NUM_OF_BENCHMARK_DELIVERY_REQUESTS})
+        loading_docks = scenario._create_loading_docks()
+        graph = ColumnarOperationalGraph()
+        add_locally_connected_dr_graph(graph, delivery_requests, max_distance_to_connect_km=5)
+        add_fully_connected_loading_docks(graph, loading_docks)
+        delivering_drones_list = scenario.\
+            _create_delivering_drones_board_with_delivering_drones_with_different_loading_docks(
+                loading_docks).delivering_drones_list
+        delivering_drones_board = DeliveringDronesBoard([
+            DeliveringDrones(EntityID.generate_uuid(), delivering_drones.drone_formation,
+                             delivering_drones.start_loading_dock, delivering_drones.end_loading_dock)
+            for _ in range(NUM_OF_BENCHMARK_FORMATIONS // len(delivering_drones_list))
+            for delivering_drones in delivering_drones_list])
+        match_input = _create_greedy_matcher_input(graph, delivering_drones_board,
+                                                   scenario._create_match_config_with_tw())
+        start = time.perf_counter()
+        delivery_board = GreedyMatcher(match_input).match()
+        print(f"\n{NUM_OF_BENCHMARK_DELIVERY_REQUESTS} delivery requests, {NUM_OF_BENCHMARK_FORMATIONS} formations: "
+              f"greedy match in {time.perf_counter() - start:.3f} sec, "
+              f"{NUM_OF_BENCHMARK_DELIVERY_REQUESTS - len(delivery_board.unmatched_delivery_requests)} matched")
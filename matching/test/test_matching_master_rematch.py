@@ -0,0 +1,131 @@
+import unittest
+from datetime import timedelta
+
+from common.entities.base_entities.delivery_request import DeliveryRequest
+from common.entities.base_entities.drone_delivery import DeliveringDrones, DroneDelivery
+from common.entities.base_entities.drone_delivery_board import DeliveringDronesBoard, DroneDeliveryBoard
+from common.entities.base_entities.entity_id import EntityID
+from common.entities.base_entities.temporal import TimeWindowExtension, TimeDeltaExtension
+from matching.delivery_board_utils import create_routes_from_delivery_board
+from matching.initial_solution import Routes, Route
+from matching.matcher_input import MatcherInput
+from matching.matching_master import MatchingMaster
+from matching.ortools.ortools_matcher import ORToolsMatcher
+from matching.ortools.ortools_solver_config import ORToolsSolverConfig
+from matching.test import test_or_tools_matcher_time_window_greedy_reload_as_init_guess
+from matching.test.test_or_tools_matcher_time_window_greedy_reload_as_init_guess import ZERO_TIME
+
+
+class MatchingMasterRematchTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        scenario = test_or_tools_matcher_time_window_greedy_reload_as_init_guess.\
+            ORToolsMatcherTimeWindowGreedyReloadAsInitGuessTestCase
+        cls.scenario = scenario
+        cls.delivery_requests = scenario._create_delivery_requests()
+        cls.loading_docks = scenario._create_loading_docks()
+        delivering_drones_list = scenario.\
+            _create_delivering_drones_board_with_delivering_drones_with_different_loading_docks(
+                cls.loading_docks).delivering_drones_list
+        cls.delivering_drones_board = DeliveringDronesBoard([
+            DeliveringDrones(EntityID.generate_uuid(), delivering_drones.drone_formation,
+                             delivering_drones.start_loading_dock, delivering_drones.end_loading_dock)
+            for _ in range(2) for delivering_drones in delivering_drones_list])
+        cls.config = scenario._create_match_config_with_tw()
+        cls.config._solver = ORToolsSolverConfig(first_solution_strategy="PATH_CHEAPEST_ARC",
+                                                 local_search_strategy="GUIDED_LOCAL_SEARCH", timeout_sec=2)
+        cls.match_input = MatcherInput(scenario._create_graph(cls.delivery_requests, cls.loading_docks),
+                                       cls.delivering_drones_board, cls.config)
+        cls.delivery_board = ORToolsMatcher(cls.match_input).match()
+
+    def test_routes_skip_cancelled_requests_and_dropped_formations(self):
+        cancelled_ids = {self.delivery_requests[index].id for index in [0, 5, 9]}
+        dropped_delivering_drones = self.delivering_drones_board.delivering_drones_list[0]
+        new_match_input = MatcherInput(
+            self.scenario._create_graph([delivery_request for delivery_request in self.delivery_requests
+                                         if delivery_request.id not in cancelled_ids], self.loading_docks),
+            DeliveringDronesBoard(self.delivering_drones_board.delivering_drones_list[1:]), self.config)
+
+        routes = create_routes_from_delivery_board(self.delivery_board, new_match_input)
+
+        routed_ids = self._get_routed_ids(routes, new_match_input)
+        self.assertTrue(routed_ids.isdisjoint(cancelled_ids))
+        self.assertTrue(routed_ids.isdisjoint(
+            matched_request.delivery_request.id for drone_delivery in
+            self.delivery_board.get_drone_deliveries_by_delivering_drones(dropped_delivering_drones)
+            for matched_request in drone_delivery.matched_requests))
+        self.assertEqual(self._get_matched_ids(self.delivery_board) - cancelled_ids - self._get_matched_ids_of(
+            dropped_delivering_drones), routed_ids)
+        self.assertIsNotNone(ORToolsMatcher(new_match_input)._routing_model.ReadAssignmentFromRoutes(
+            routes.as_list(), False))
+
+    def test_routes_drop_infeasible_visits(self):
+        late_delivery_request = next(matched_request.delivery_request
+                                     for drone_delivery in self.delivery_board.drone_deliveries
+                                     for matched_request in drone_delivery.matched_requests)
+        delivery_requests = [delivery_request if delivery_request.id != late_delivery_request.id else DeliveryRequest(
+            delivery_request.id, delivery_request.delivery_options,
+            TimeWindowExtension(since=ZERO_TIME.add_time_delta(TimeDeltaExtension(timedelta(hours=13))),
+                                until=ZERO_TIME.add_time_delta(TimeDeltaExtension(timedelta(hours=14)))),
+            delivery_request.priority) for delivery_request in self.delivery_requests]
+        new_match_input = MatcherInput(self.scenario._create_graph(delivery_requests, self.loading_docks),
+                                       self.delivering_drones_board, self.config)
+
+        routes = create_routes_from_delivery_board(self.delivery_board, new_match_input)
+
+        self.assertNotIn(late_delivery_request.id, self._get_routed_ids(routes, new_match_input))
+        self.assertIsNotNone(ORToolsMatcher(new_match_input)._routing_model.ReadAssignmentFromRoutes(
+            routes.as_list(), False))
+
+    def test_routes_of_empty_and_one_request_boards_are_ortools_assignments(self):
+        drone_delivery = next(drone_delivery for drone_delivery in self.delivery_board.drone_deliveries
+                              if len(drone_delivery.matched_requests) > 0)
+        one_request_delivery_board = DroneDeliveryBoard([DroneDelivery(
+            drone_delivery.delivering_drones, drone_delivery.matched_requests[:1],
+            drone_delivery.start_drone_loading_dock, drone_delivery.end_drone_loading_dock)], [])
+        for delivery_board in [DroneDeliveryBoard([], []), one_request_delivery_board]:
+            with self.subTest(num_of_drone_deliveries=len(delivery_board.drone_deliveries)):
+                routes = create_routes_from_delivery_board(delivery_board, self.match_input)
+
+                ortools_matcher = ORToolsMatcher(self.match_input)
+                self.assertIn(ortools_matcher._reloader.get_vehicle_arrive_indices(0)[0], routes.as_list()[0])
+                self.assertIsNotNone(ortools_matcher._routing_model.ReadAssignmentFromRoutes(routes.as_list(),
+                                                                                             False))
+
+    def test_match_from_init_solution_warns_when_routes_are_rejected(self):
+        with self.assertLogs('matching.ortools.ortools_matcher', level='WARNING'):
+            delivery_board = ORToolsMatcher(self.match_input).match_from_init_solution(Routes(
+                [Route([]) for _ in self.delivering_drones_board.delivering_drones_list]))
+        self.assertGreater(len(self._get_matched_ids(delivery_board)), 0)
+
+    def test_rematch_after_formation_dropped_out(self):
+        new_match_input = MatcherInput(self.match_input.graph,
+                                       DeliveringDronesBoard(self.delivering_drones_board.delivering_drones_list[1:]),
+                                       self.config)
+
+        delivery_board = MatchingMaster(self.match_input).rematch(self.delivery_board, new_match_input)
+
+        self.assertEqual(len(self.delivery_requests), len(self._get_matched_ids(delivery_board))
+                         + len(delivery_board.unmatched_delivery_requests))
+        for drone_delivery in delivery_board.drone_deliveries:
+            self.assertIn(drone_delivery.delivering_drones, new_match_input.delivering_drones_board.
+                          delivering_drones_list)
+            for matched_request in drone_delivery.matched_requests:
+                self.assertIn(matched_request.delivery_time_window, matched_request.delivery_request.time_window)
+
+    def _get_matched_ids_of(self, delivering_drones):
+        return {matched_request.delivery_request.id for drone_delivery in
+                self.delivery_board.get_drone_deliveries_by_delivering_drones(delivering_drones)
+                for matched_request in drone_delivery.matched_requests}
+
+    @staticmethod
+    def _get_matched_ids(delivery_board):
+        return {matched_request.delivery_request.id for drone_delivery in delivery_board.drone_deliveries
+                for matched_request in drone_delivery.matched_requests}
+
+    @staticmethod
+    def _get_routed_ids(routes, match_input):
+        delivery_requests_indices = set(match_input.graph.get_all_delivery_requests_indices())
+        return {match_input.graph.get_delivery_request(index).id for route in routes.as_list() for index in route
+                if index in delivery_requests_indices}
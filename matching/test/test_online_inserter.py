@@ -0,0 +1,165 @@
+import unittest
+from copy import deepcopy
+from datetime import timedelta
+
+from common.entities.base_entities.delivery_request import DeliveryRequest
+from common.entities.base_entities.drone_delivery import DroneDelivery, MatchedDroneLoadingDock
+from common.entities.base_entities.drone_delivery_board import DroneDeliveryBoard
+from common.entities.base_entities.entity_id import EntityID
+from common.entities.base_entities.package import PackageType
+from common.entities.base_entities.temporal import TimeWindowExtension, TimeDeltaExtension
+from common.graph.operational.graph_creator import add_time_overlapping_connected_delivery_requests
+from matching.delivery_board_utils import get_trips_graph_indices
+from matching.greedy.greedy_matcher import GreedyMatcher
+from matching.matcher_input import MatcherInput
+from matching.matching_master import MatchingMaster
+from matching.online_inserter import OnlineInserter
+from matching.ortools.ortools_matcher import ORToolsMatcher
+from matching.ortools.ortools_reloader import ORToolsReloader
+from matching.ortools.ortools_solver_config import ORToolsSolverConfig
+from matching.test import test_or_tools_matcher_time_window_greedy_reload_as_init_guess
+from matching.test.test_or_tools_matcher_time_window_greedy_reload_as_init_guess import ZERO_TIME
+
+
+class OnlineInserterTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        scenario = test_or_tools_matcher_time_window_greedy_reload_as_init_guess.\
+            ORToolsMatcherTimeWindowGreedyReloadAsInitGuessTestCase
+        delivery_requests = scenario._create_delivery_requests()
+        loading_docks = scenario._create_loading_docks()
+        cls.delivery_requests = delivery_requests[:18]
+        cls.late_delivery_requests = delivery_requests[18:22]
+        cls.graph = scenario._create_graph(cls.delivery_requests, loading_docks)
+        cls.delivering_drones_board = \
+            scenario._create_delivering_drones_board_with_delivering_drones_with_different_loading_docks(
+                loading_docks)
+        cls.config = scenario._create_match_config_with_tw()
+        cls.config._solver = ORToolsSolverConfig(first_solution_strategy="PATH_CHEAPEST_ARC",
+                                                 local_search_strategy="GUIDED_LOCAL_SEARCH", timeout_sec=2)
+        cls.delivery_board = GreedyMatcher(MatcherInput(cls.graph, cls.delivering_drones_board, cls.config)).match()
+
+    def setUp(self):
+        self.match_input = MatcherInput(deepcopy(self.graph), self.delivering_drones_board, self.config)
+
+    def test_insert_into_trips_with_slack(self):
+        inserter = OnlineInserter(self.match_input, self.delivery_board, max_resolved_formations=0)
+        delivery_board = inserter.insert(self.late_delivery_requests)
+
+        self._assert_valid_board(delivery_board)
+        self.assertGreater(len(self._get_matched_ids(delivery_board)), len(self.delivery_requests))
+        self.assertTrue(self._get_matched_ids(self.delivery_board).issubset(self._get_matched_ids(delivery_board)))
+        self.assertEqual(inserter.delivery_board, delivery_board)
+
+    def test_inserted_board_is_an_ortools_assignment(self):
+        delivery_board = OnlineInserter(self.match_input, self.delivery_board,
+                                        max_resolved_formations=0).insert(self.late_delivery_requests)
+        reloader = ORToolsReloader(self.match_input)
+        routes = [reloader.join_trips_into_route(get_trips_graph_indices(delivery_board, delivering_drones,
+                                                                         self.match_input.graph),
+                                                 formation_index).indexes
+                  for formation_index, delivering_drones in
+                  enumerate(self.delivering_drones_board.delivering_drones_list)]
+        self.assertIsNotNone(ORToolsMatcher(self.match_input)._routing_model.ReadAssignmentFromRoutes(routes, False))
+
+    def test_insert_leaves_request_out_of_docks_time_window_unmatched(self):
+        late_delivery_request = self._create_delivery_request_with_time_window(
+            self.late_delivery_requests[0], TimeWindowExtension(
+                since=ZERO_TIME.add_time_delta(TimeDeltaExtension(timedelta(hours=13))),
+                until=ZERO_TIME.add_time_delta(TimeDeltaExtension(timedelta(hours=14)))))
+
+        delivery_board = OnlineInserter(self.match_input, self.delivery_board,
+                                        max_resolved_formations=0).insert([late_delivery_request])
+
+        self.assertEqual(self._get_matched_ids(self.delivery_board), self._get_matched_ids(delivery_board))
+        self.assertEqual([late_delivery_request],
+                         [unmatched_request.delivery_request
+                          for unmatched_request in delivery_board.unmatched_delivery_requests])
+
+    def test_insert_does_not_return_empty_drone_deliveries(self):
+        first_delivering_drones, second_delivering_drones = self.delivering_drones_board.delivering_drones_list
+        time_window = second_delivering_drones.start_loading_dock.time_window
+        delivery_board = DroneDeliveryBoard(
+            self.delivery_board.get_drone_deliveries_by_delivering_drones(first_delivering_drones) +
+            [DroneDelivery(second_delivering_drones, [],
+                           MatchedDroneLoadingDock(second_delivering_drones.start_loading_dock, time_window),
+                           MatchedDroneLoadingDock(second_delivering_drones.end_loading_dock, time_window))], [])
+        inserter = OnlineInserter(self.match_input, delivery_board, max_resolved_formations=0)
+        self.assertTrue(all(len(drone_delivery.matched_requests) > 0
+                            for drone_delivery in inserter.delivery_board.drone_deliveries))
+
+        inserted_delivery_board = inserter.insert(self.late_delivery_requests)
+
+        self.assertGreater(len(self._get_matched_ids(inserted_delivery_board)),
+                           len(self._get_matched_ids(delivery_board)))
+        self.assertTrue(all(len(drone_delivery.matched_requests) > 0
+                            for drone_delivery in inserted_delivery_board.drone_deliveries))
+
+    def test_insert_only_between_connected_nodes(self):
+        late_delivery_request = self.late_delivery_requests[0]
+        self.match_input.graph.add_delivery_requests([late_delivery_request])
+
+        delivery_board = OnlineInserter(self.match_input, self.delivery_board,
+                                        max_resolved_formations=0).insert([late_delivery_request])
+
+        self.assertEqual(self._get_matched_ids(self.delivery_board), self._get_matched_ids(delivery_board))
+        self.assertEqual([late_delivery_request],
+                         [unmatched_request.delivery_request
+                          for unmatched_request in delivery_board.unmatched_delivery_requests])
+
+    def test_insert_already_offered_requests_keeps_each_request_once(self):
+        inserter = OnlineInserter(self.match_input, self.delivery_board, max_resolved_formations=0)
+        inserter.insert(self.late_delivery_requests + self.late_delivery_requests[:1])
+        delivery_board = inserter.insert(self.late_delivery_requests)
+
+        self._assert_valid_board(delivery_board)
+        unmatched_ids = [unmatched_request.delivery_request.id
+                         for unmatched_request in delivery_board.unmatched_delivery_requests]
+        self.assertEqual(len(set(unmatched_ids)), len(unmatched_ids))
+        self.assertEqual(set(), self._get_matched_ids(delivery_board).intersection(unmatched_ids))
+        self.assertEqual(len(self.delivery_requests) + len(self.late_delivery_requests),
+                         len(self._get_matched_ids(delivery_board)) + len(unmatched_ids))
+
+    def test_resolve_keeps_matched_requests_of_nearest_formations(self):
+        inserter = OnlineInserter(self.match_input, self.delivery_board, resolve_timeout_sec=1)
+        add_time_overlapping_connected_delivery_requests(self.match_input.graph, self.late_delivery_requests)
+
+        not_matched = inserter._resolve(self.late_delivery_requests)
+
+        delivery_board = inserter.delivery_board
+        self._assert_valid_board(delivery_board)
+        self.assertTrue(self._get_matched_ids(self.delivery_board).issubset(self._get_matched_ids(delivery_board)))
+        self.assertEqual({delivery_request.id for delivery_request in self.late_delivery_requests},
+                         {delivery_request.id for delivery_request in not_matched}.union(
+                             self._get_matched_ids(delivery_board) - self._get_matched_ids(self.delivery_board)))
+
+    def test_matching_master_inserts_delivery_requests(self):
+        delivery_board = MatchingMaster(self.match_input).insert_delivery_requests(self.delivery_board,
+                                                                                   self.late_delivery_requests)
+        self._assert_valid_board(delivery_board)
+        self.assertEqual(len(self.delivery_requests) + len(self.late_delivery_requests),
+                         len(self._get_matched_ids(delivery_board)) + len(delivery_board.unmatched_delivery_requests))
+
+    @staticmethod
+    def _get_matched_ids(delivery_board):
+        return {matched_request.delivery_request.id for drone_delivery in delivery_board.drone_deliveries
+                for matched_request in drone_delivery.matched_requests}
+
+    @staticmethod
+    def _create_delivery_request_with_time_window(delivery_request, time_window):
+        return DeliveryRequest(EntityID.generate_uuid(), delivery_request.delivery_options, time_window,
+                               delivery_request.priority)
+
+    def _assert_valid_board(self, delivery_board):
+        matched_graph_indices = [matched_request.graph_index for drone_delivery in delivery_board.drone_deliveries
+                                 for matched_request in drone_delivery.matched_requests]
+        self.assertEqual(len(matched_graph_indices), len(set(matched_graph_indices)))
+        for drone_delivery in delivery_board.drone_deliveries:
+            self.assertLessEqual(
+                drone_delivery.get_total_package_type_amount_map().get_package_type_amount(PackageType.LARGE),
+                drone_delivery.delivering_drones.drone_formation.get_package_type_amount(PackageType.LARGE))
+            for matched_request in drone_delivery.matched_requests:
+                self.assertEqual(self.match_input.graph.get_delivery_request(matched_request.graph_index),
+                                 matched_request.delivery_request)
+                self.assertIn(matched_request.delivery_time_window, matched_request.delivery_request.time_window)
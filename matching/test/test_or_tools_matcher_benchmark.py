@@ -0,0 +1,76 @@
+import os
+import time
+import unittest
+from copy import deepcopy
+from datetime import timedelta
+from random import Random
+
+from common.entities.base_entities.delivery_request import DeliveryRequest
+from common.entities.base_entities.entity_distribution.delivery_requestion_dataset_builder import \
+    build_delivery_request_distribution
+from common.entities.base_entities.entity_distribution.package_distribution import PackageDistribution
+from common.entities.base_entities.entity_distribution.temporal_distribution import ExactTimeWindowDistribution
+from common.entities.base_entities.package import PackageType
+from common.entities.base_entities.temporal import TimeWindowExtension, TimeDeltaExtension
+from geometry.distribution.geo_distribution import UniformPointInBboxDistribution
+from matching.matcher_input import MatcherInput
+from matching.monitor_config import MonitorConfig
+from matching.ortools.ortools_matcher import ORToolsMatcher
+from matching.ortools.ortools_solver_config import ORToolsSolverConfig, TRANSIT_EVALUATION_MATRIX, \
+    TRANSIT_EVALUATION_CALLBACK
+from matching.test import test_or_tools_matcher_reload_with_multiple_depots
+from matching.test.test_or_tools_matcher_reload_with_multiple_depots import ZERO_TIME
+
+NUM_OF_DELIVERY_REQUESTS = 100
+
+
+@unittest.skipUnless(os.environ.get('RUN_BENCHMARKS', False), 'benchmark')
+class ORToolsTransitEvaluationBenchmark(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        scenario = test_or_tools_matcher_reload_with_multiple_depots.ORToolsMatcherReloadWithMultipleDepotsTestCase
+        delivery_requests = build_delivery_request_distribution(
+            relative_pdp_location_distribution=UniformPointInBboxDistribution(min_x=-20, max_x=20,
+                                                                              min_y=-20, max_y=20),
+            time_window_distribution=ExactTimeWindowDistribution(NUM_OF_DELIVERY_REQUESTS * [TimeWindowExtension(
+                since=ZERO_TIME, until=ZERO_TIME.add_time_delta(TimeDeltaExtension(timedelta(hours=4))))]),
+            package_type_distribution=PackageDistribution({PackageType.LARGE: 1})
+        ).choose_rand(Random(42), amount={DeliveryRequest: NUM_OF_DELIVERY_REQUESTS})
+        loading_docks = scenario._create_loading_docks()
+        cls.graph = scenario._create_graph(delivery_requests, loading_docks)
+        cls.delivering_drones_board = scenario.\
+            _create_delivering_drones_board_with_delivering_drones_with_different_loading_docks(loading_docks)
+        cls.config = scenario._create_match_config()
+
+    def test_solutions_per_second(self):
+        print(f"\n{len(self.graph.nodes)} nodes, guided local search for {self.config.solver.timeout_sec} sec:")
+        for transit_evaluation in [TRANSIT_EVALUATION_MATRIX, TRANSIT_EVALUATION_CALLBACK]:
+            config = deepcopy(self.config)
+            config._solver = ORToolsSolverConfig(first_solution_strategy=self.config.solver.first_solution_strategy,
+                                                 local_search_strategy=self.config.solver.local_search_strategy,
+                                                 timeout_sec=self.config.solver.timeout_sec,
+                                                 transit_evaluation=transit_evaluation)
+            start = time.perf_counter()
+            matcher = ORToolsMatcher(MatcherInput(self.graph, self.delivering_drones_board, config))
+            build_sec = time.perf_counter() - start
+            matcher.match()
+            solver = matcher._routing_model.solver()
+            print(f"  {transit_evaluation}: model build {build_sec:.3f} sec, "
+                  f"{solver.Solutions() / (solver.WallTime() / 1000):.1f} solutions/sec, "
+                  f"{solver.Branches() / (solver.WallTime() / 1000):.1f} branches/sec")
+
+    def test_monitor_overhead(self):
+        print(f"\n{len(self.graph.nodes)} nodes, guided local search for {self.config.solver.timeout_sec} sec:")
+        for monitor_name, monitor_config in [
+                ('no monitor', MonitorConfig(enabled=False)),
+                ('iterations monitor', MonitorConfig(enabled=True, iterations_between_monitoring=100,
+                                                     max_iterations=-1)),
+                ('telemetry', MonitorConfig(enabled=True, telemetry_interval_sec=1))]:
+            config = deepcopy(self.config)
+            config._monitor = monitor_config
+            matcher = ORToolsMatcher(MatcherInput(self.graph, self.delivering_drones_board, config))
+            matcher.match()
+            solver = matcher._routing_model.solver()
+            print(f"  {monitor_name}: {solver.Solutions() / (solver.WallTime() / 1000):.1f} solutions/sec, "
+                  f"{solver.Branches() / (solver.WallTime() / 1000):.1f} branches/sec")
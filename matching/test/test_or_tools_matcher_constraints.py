@@ -0,0 +1,97 @@
+import sys
+from copy import deepcopy
+from unittest import TestCase
+
+from common.entities.base_entities.package import PackageType
+from common.graph.operational.export_ortools_graph import OrtoolsGraphExporter
+from matching.matcher_input import MatcherInput
+from matching.ortools.ortools_matcher import ORToolsMatcher
+from matching.ortools.ortools_matcher_constraints import ORToolsMatcherConstraints
+from matching.ortools.ortools_solver_config import ORToolsSolverConfig, TRANSIT_EVALUATION_MATRIX, \
+    TRANSIT_EVALUATION_CALLBACK
+from matching.test import test_or_tools_matcher_reload_with_multiple_depots
+
+
+class ORToolsMatcherConstraintsTestCase(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        scenario = test_or_tools_matcher_reload_with_multiple_depots.ORToolsMatcherReloadWithMultipleDepotsTestCase
+        loading_docks = scenario._create_loading_docks()
+        cls.graph = scenario._create_graph(scenario._create_delivery_requests(), loading_docks)
+        cls.delivering_drones_board = scenario.\
+            _create_delivering_drones_board_with_delivering_drones_with_different_loading_docks(loading_docks)
+        cls.match_input = MatcherInput(cls.graph, cls.delivering_drones_board, scenario._create_match_config())
+        matcher = ORToolsMatcher(cls.match_input)
+        cls.index_manager = matcher._index_manager
+        cls.reloader = matcher._reloader
+        cls.constraints = ORToolsMatcherConstraints(cls.index_manager, matcher._routing_model, cls.match_input,
+                                                    cls.reloader)
+        cls.graph_travel_costs = matcher._graph_exporter.export_travel_costs(cls.graph)
+        cls.graph_travel_times = matcher._graph_exporter.export_travel_times(cls.graph)
+        cls.max_session_time = max(cls.delivering_drones_board.get_max_session_time_per_drone_delivery())
+
+    def test_travel_cost_evaluator(self):
+        evaluator = self.constraints._create_transit_evaluator(self.constraints._travel_cost_transit_matrix)
+        self._assert_evaluator_equal_to_pairwise_transit(evaluator, self.graph_travel_costs, 0)
+
+    def test_travel_time_evaluator(self):
+        evaluator = self.constraints._create_transit_evaluator(self.constraints._travel_time_transit_matrix)
+        self._assert_evaluator_equal_to_pairwise_transit(evaluator, self.graph_travel_times, 0)
+
+    def test_session_evaluator(self):
+        evaluator = self.constraints._create_transit_evaluator(self.constraints._create_session_time_matrix())
+        self._assert_evaluator_equal_to_pairwise_transit(evaluator, self.graph_travel_times, -self.max_session_time)
+
+    def test_demand_evaluator(self):
+        package_type = PackageType.LARGE
+        graph_demands = OrtoolsGraphExporter().export_package_type_demands(self.graph, package_type)
+        max_capacity = max(self.delivering_drones_board.get_package_type_amount_per_drone_delivery(package_type))
+        evaluator = self.constraints._create_unary_transit_evaluator(self.constraints._calc_demands(package_type))
+        for index in range(self.index_manager.get_number_of_indices()):
+            node = self.index_manager.index_to_node(index)
+            if node in self.reloader.depart_indices:
+                self.assertEqual(-max_capacity, evaluator(index))
+            elif node in self.reloader.arrive_indices:
+                self.assertEqual(0, evaluator(index))
+            else:
+                self.assertEqual(graph_demands[node], evaluator(index))
+
+    def test_matrix_and_callback_transit_evaluations_produce_same_board(self):
+        matrix_board = ORToolsMatcher(self._create_greedy_descent_match_input(TRANSIT_EVALUATION_MATRIX)).match()
+        callback_board = ORToolsMatcher(self._create_greedy_descent_match_input(TRANSIT_EVALUATION_CALLBACK)).match()
+        self.assertEqual(matrix_board, callback_board)
+
+    def _create_greedy_descent_match_input(self, transit_evaluation: str) -> MatcherInput:
+        config = deepcopy(self.match_input.config)
+        config._solver = ORToolsSolverConfig(first_solution_strategy="PATH_CHEAPEST_ARC",
+                                             local_search_strategy="GREEDY_DESCENT", timeout_sec=10,
+                                             transit_evaluation=transit_evaluation)
+        return MatcherInput(self.graph, self.delivering_drones_board, config)
+
+    def _assert_evaluator_equal_to_pairwise_transit(self, evaluator, graph_matrix, reload_transit):
+        num_of_indices = self.index_manager.get_number_of_indices()
+        for from_index in range(num_of_indices):
+            for to_index in range(num_of_indices):
+                expected_transit = self._calc_pairwise_transit(self.index_manager.index_to_node(from_index),
+                                                               self.index_manager.index_to_node(to_index),
+                                                               graph_matrix, reload_transit)
+                self.assertEqual(expected_transit, evaluator(from_index, to_index))
+
+    def _calc_pairwise_transit(self, from_node, to_node, graph_matrix, reload_transit):
+        depots = self.graph.get_all_loading_docks_indices() + self.reloader.reloading_virtual_depos_indices
+        if from_node == to_node:
+            return 0
+        if from_node in self.reloader.arrive_indices:
+            return reload_transit if to_node == from_node + 1 else sys.maxsize
+        if to_node in self.reloader.depart_indices or (from_node in depots and to_node in depots):
+            return sys.maxsize
+        if from_node in self.reloader.reloading_virtual_depos_indices:
+            from_node = self._get_reloading_depot_graph_index(from_node)
+        elif to_node in self.reloader.reloading_virtual_depos_indices:
+            to_node = self._get_reloading_depot_graph_index(to_node)
+        return int(graph_matrix[from_node][to_node])
+
+    def _get_reloading_depot_graph_index(self, node):
+        vehicle = self.reloader.get_reloading_depot_vehicle(node)
+        dock = self.delivering_drones_board.delivering_drones_list[vehicle].start_loading_dock
+        return self.graph.get_node_index_by_id(dock.id)
@@ -1,6 +1,10 @@
+import csv
+import json
+import tempfile
 import unittest
 import uuid
 from datetime import timedelta, date, time
+from pathlib import Path
 from random import Random
 from typing import List
 from unittest import TestCase
@@ -33,6 +37,7 @@ from matching.matcher_input import MatcherInput
 from matching.monitor import MonitorData
 from matching.monitor_config import MonitorConfig
 from matching.ortools.ortools_matcher import ORToolsMatcher
+from matching.ortools.ortools_matcher_telemetry import TELEMETRY_FORMAT_CSV, TELEMETRY_FORMAT_JSONL
 from matching.ortools.ortools_solver_config import ORToolsSolverConfig
 from matching.solver_config import SolverVendor
 
@@ -249,6 +254,48 @@ class ORToolsMatcherMonitorTestCase(TestCase):
         return sum(
             [max_num_of_packages - len(drone_delivery.matched_requests) for drone_delivery in board.drone_deliveries])
 
+    def test_matcher_with_telemetry(self):
+        config = self._create_match_config_without_reloading(enabled=True, max_iterations=0)
+        config._monitor = MonitorConfig(enabled=True, telemetry_interval_sec=0.01)
+        match_input = MatcherInput(self.graph_without_reloading, self.delivering_drones_board_without_reloading, config)
+        matcher = ORToolsMatcher(match_input)
+        actual_delivery_board = matcher.match()
+
+        self.assertEqual(self.expected_matched_board, actual_delivery_board)
+        self.assertFalse(hasattr(matcher, 'matcher_monitor'))
+        records = matcher.matcher_telemetry.records
+        self.assertGreater(len(records), 0)
+        objective_values = [record[MonitorData.objective.name] for record in records]
+        self.assertEqual(sorted(objective_values, reverse=True), objective_values)
+        self.assertEqual(matcher.objective_value, records[-1][MonitorData.objective.name])
+        self.assertEqual(self._get_total_priority(config, actual_delivery_board),
+                         records[-1][MonitorData.total_priority.name])
+        self.assertEqual(len(actual_delivery_board.unmatched_delivery_requests),
+                         records[-1][MonitorData.total_unmatched_delivery_requests.name])
+        self.assertEqual(self._get_unmatched_delivery_requests_total_priority(config, actual_delivery_board),
+                         records[-1][MonitorData.unmatched_delivery_requests_total_priority.name])
+
+    def test_matcher_with_telemetry_writes_time_series(self):
+        for telemetry_format in [TELEMETRY_FORMAT_CSV, TELEMETRY_FORMAT_JSONL]:
+            with tempfile.TemporaryDirectory() as output_directory:
+                config = self._create_match_config_without_reloading(enabled=True, max_iterations=0)
+                config._monitor = MonitorConfig(enabled=True, output_directory=output_directory,
+                                                telemetry_interval_sec=0.01, telemetry_format=telemetry_format)
+                matcher = ORToolsMatcher(MatcherInput(self.graph_without_reloading,
+                                                      self.delivering_drones_board_without_reloading, config))
+                matcher.match()
+
+                telemetry_paths = list(Path(output_directory).glob(f'Telemetry_*.{telemetry_format}'))
+                self.assertEqual(1, len(telemetry_paths))
+                with open(telemetry_paths[0]) as file:
+                    if telemetry_format == TELEMETRY_FORMAT_CSV:
+                        records = [{key: int(float(value)) for key, value in record.items()}
+                                   for record in csv.DictReader(file)]
+                    else:
+                        records = [json.loads(line) for line in file]
+                self.assertEqual([record[MonitorData.objective.name] for record in matcher.matcher_telemetry.records],
+                                 [record[MonitorData.objective.name] for record in records])
+
     def test_matcher_without_monitor(self):
         config = self._create_match_config_without_reloading(enabled=False, max_iterations=0)
         match_input = MatcherInput(self.graph_without_reloading, self.delivering_drones_board_without_reloading, config)
@@ -61,6 +61,21 @@ class ORToolsMatcherTimeWindowGreedyReloadAsInitGuessTestCase(TestCase):
             total_packages_of_tw_as_init_guess_actual_delivery_board,
             total_packages_of_tw_actual_delivery_board)
 
+    def test_time_window_greedy_init_guess_routes_visit_requests_of_the_full_graph_once(self):
+        config = self._create_match_config_with_tw()
+        config._solver = ORToolsSolverConfig(first_solution_strategy="PATH_CHEAPEST_ARC",
+                                             local_search_strategy="AUTOMATIC", timeout_sec=1)
+        match_input = MatcherInput(self.graph, self.delivering_drones_board, config)
+
+        init_guess = MatchingMaster(match_input)._create_init_guess_using_time_greedy()
+
+        graph_nodes = self.graph.nodes
+        routed_requests_ids = [graph_nodes[index].internal_node.id for route in init_guess.as_list()
+                               for index in route if index < self.graph.num_nodes
+                               and isinstance(graph_nodes[index].internal_node, DeliveryRequest)]
+        self.assertGreater(len(routed_requests_ids), 0)
+        self.assertEqual(len(set(routed_requests_ids)), len(routed_requests_ids))
+
     @staticmethod
     def _create_delivery_requests() -> List[DeliveryRequest]:
         dist = build_delivery_request_distribution(
@@ -61,6 +61,16 @@ class ORToolsMatcherTimeWindowGreedyReloadWithMultipleDepotsTestCase(TestCase):
         self.assertLessEqual(actual_delivery_board.get_total_work_time_in_minutes(),
                         tw_actual_delivery_board.get_total_work_time_in_minutes())
 
+    def test_time_window_greedy_reload_matches_each_request_once(self):
+        tw_actual_delivery_board = MatchingMaster(self.tw_match_input).match()
+
+        matched_requests_ids = [matched_request.delivery_request.id
+                                for delivery in tw_actual_delivery_board.drone_deliveries
+                                for matched_request in delivery.matched_requests]
+        self.assertCountEqual([delivery_request.id for delivery_request in self.delivery_requests],
+                              matched_requests_ids)
+        self.assertEqual([], tw_actual_delivery_board.unmatched_delivery_requests)
+
     def _assert_all_requests_matched(self, actual_delivery_board: DroneDeliveryBoard):
         self.assertEqual(len(self.delivery_requests),
                          actual_delivery_board.get_total_amount_per_package_type().get_package_type_amount(
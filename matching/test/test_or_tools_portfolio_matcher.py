@@ -0,0 +1,60 @@
+import time
+import unittest
+
+from matching.matcher_input import MatcherInput
+from matching.ortools.ortools_portfolio_matcher import ORToolsPortfolioMatcher, create_portfolio_solver_configs
+from matching.ortools.ortools_solver_config import ORToolsSolverConfig
+from matching.test import test_or_tools_matcher_time_window_greedy_reload_as_init_guess
+
+LONG_TIMEOUT_SEC = 60
+
+
+class ORToolsPortfolioMatcherTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        scenario = test_or_tools_matcher_time_window_greedy_reload_as_init_guess.\
+            ORToolsMatcherTimeWindowGreedyReloadAsInitGuessTestCase
+        loading_docks = scenario._create_loading_docks()
+        cls.match_input = MatcherInput(
+            scenario._create_graph(scenario._create_delivery_requests(), loading_docks),
+            scenario._create_delivering_drones_board_with_delivering_drones_with_different_loading_docks(
+                loading_docks),
+            scenario._create_match_config_with_tw())
+        cls.solver_configs = create_portfolio_solver_configs(
+            first_solution_strategies=["PATH_CHEAPEST_ARC", "PATH_MOST_CONSTRAINED_ARC", "GLOBAL_CHEAPEST_ARC",
+                                       "PARALLEL_CHEAPEST_INSERTION"],
+            local_search_strategies=["AUTOMATIC"], timeout_sec=3)
+
+    def test_match_returns_best_objective_of_portfolio(self):
+        portfolio_matcher = ORToolsPortfolioMatcher(self.match_input, self.solver_configs)
+        delivery_board = portfolio_matcher.match()
+
+        objective_values = [objective_value for objective_value in portfolio_matcher.objective_values
+                            if objective_value is not None]
+        self.assertEqual(portfolio_matcher.best_objective_value, min(objective_values))
+        self.assertEqual(portfolio_matcher.best_objective_value, portfolio_matcher.objective_values[
+            self.solver_configs.index(portfolio_matcher.best_solver_config)])
+        self.assertEqual(24, len(delivery_board.unmatched_delivery_requests) + sum(
+            len(drone_delivery.matched_requests) for drone_delivery in delivery_board.drone_deliveries))
+
+    def test_match_stops_when_target_objective_value_is_reached(self):
+        solver_configs = [ORToolsSolverConfig(first_solution_strategy="PATH_CHEAPEST_ARC",
+                                              local_search_strategy="AUTOMATIC", timeout_sec=5)] + \
+            create_portfolio_solver_configs(first_solution_strategies=["PATH_CHEAPEST_ARC", "GLOBAL_CHEAPEST_ARC"],
+                                            local_search_strategies=["GUIDED_LOCAL_SEARCH"],
+                                            timeout_sec=LONG_TIMEOUT_SEC)
+        portfolio_matcher = ORToolsPortfolioMatcher(self.match_input, solver_configs,
+                                                    target_objective_value=10 ** 12)
+
+        start_time = time.monotonic()
+        portfolio_matcher.match()
+
+        self.assertLess(time.monotonic() - start_time, LONG_TIMEOUT_SEC / 2)
+        self.assertEqual(solver_configs[0], portfolio_matcher.best_solver_config)
+        self.assertIsNotNone(portfolio_matcher.objective_values[0])
+        self.assertEqual([None, None], portfolio_matcher.objective_values[1:])
+
+    def test_match_to_routes(self):
+        routes = ORToolsPortfolioMatcher(self.match_input, self.solver_configs).match_to_routes()
+        self.assertEqual(len(routes.routes), self.match_input.delivering_drones_board.amount_of_formations())
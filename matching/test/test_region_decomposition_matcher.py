@@ -0,0 +1,104 @@
+import unittest
+
+from common.entities.base_entities.drone_delivery import DeliveringDrones
+from common.entities.base_entities.drone_delivery_board import DeliveringDronesBoard, DroneDeliveryBoard, \
+    UnmatchedDeliveryRequest
+from common.entities.base_entities.entity_id import EntityID
+from common.entities.base_entities.package import PackageType
+from common.graph.operational.graph_creator import add_locally_connected_dr_graph, add_fully_connected_loading_docks
+from common.graph.operational.graph_utils import calc_locations_array
+from common.graph.operational.operational_graph import OperationalGraph
+from matching.matcher_input import MatcherInput
+from matching.ortools.ortools_matcher import ORToolsMatcher
+from matching.ortools.ortools_solver_config import ORToolsSolverConfig
+from matching.region_decomposition_matcher import RegionDecompositionMatcher
+from matching.test import test_or_tools_matcher_time_window_greedy_reload_as_init_guess
+
+
+class RegionDecompositionMatcherTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        scenario = test_or_tools_matcher_time_window_greedy_reload_as_init_guess.\
+            ORToolsMatcherTimeWindowGreedyReloadAsInitGuessTestCase
+        delivery_requests = scenario._create_delivery_requests()
+        loading_docks = scenario._create_loading_docks()
+        is_west = calc_locations_array(delivery_requests)[:, 0] < 50
+        cls.graph = OperationalGraph()
+        add_locally_connected_dr_graph(cls.graph, [delivery_request for delivery_request, west
+                                                   in zip(delivery_requests, is_west) if west])
+        add_locally_connected_dr_graph(cls.graph, [delivery_request for delivery_request, west
+                                                   in zip(delivery_requests, is_west) if not west])
+        add_fully_connected_loading_docks(cls.graph, loading_docks)
+        cls.west_delivery_requests_ids = {delivery_request.id for delivery_request, west
+                                          in zip(delivery_requests, is_west) if west}
+        delivering_drones_list = scenario.\
+            _create_delivering_drones_board_with_delivering_drones_with_different_loading_docks(
+                loading_docks).delivering_drones_list
+        delivering_drones_board = DeliveringDronesBoard([
+            DeliveringDrones(EntityID.generate_uuid(), delivering_drones.drone_formation,
+                             delivering_drones.start_loading_dock, delivering_drones.end_loading_dock)
+            for _ in range(2) for delivering_drones in delivering_drones_list])
+        config = scenario._create_match_config_with_tw()
+        config._solver = ORToolsSolverConfig(first_solution_strategy="PATH_CHEAPEST_ARC",
+                                             local_search_strategy="GUIDED_LOCAL_SEARCH", timeout_sec=2)
+        cls.match_input = MatcherInput(cls.graph, delivering_drones_board, config)
+
+    def test_regions_are_the_clusters(self):
+        regions = RegionDecompositionMatcher(self.match_input).calc_regions()
+        self.assertEqual(len(regions), 2)
+        for region in regions:
+            self.assertEqual(len({self.graph.get_delivery_request(index).id in self.west_delivery_requests_ids
+                                  for index in region}), 1)
+        self.assertEqual(len(RegionDecompositionMatcher(self.match_input, max_regions=1).calc_regions()), 1)
+
+    def test_match_stitches_regions_boards(self):
+        delivery_board = RegionDecompositionMatcher(self.match_input, max_workers=2,
+                                                    reinsert_unmatched=False).match()
+        self._assert_valid_board(delivery_board)
+        for delivering_drones in self.match_input.delivering_drones_board.delivering_drones_list:
+            matched_ids = {matched_request.delivery_request.id for drone_delivery in
+                           delivery_board.get_drone_deliveries_by_delivering_drones(delivering_drones)
+                           for matched_request in drone_delivery.matched_requests}
+            self.assertLessEqual(len({id_ in self.west_delivery_requests_ids for id_ in matched_ids}), 1)
+
+    def test_reinsertion_matches_requests_of_other_regions(self):
+        matcher = RegionDecompositionMatcher(self.match_input, max_workers=1, reinsert_unmatched=False)
+        delivery_board = matcher.match()
+        dropped_delivering_drones = self.match_input.delivering_drones_board.delivering_drones_list[0]
+        dropped_drone_deliveries = delivery_board.get_drone_deliveries_by_delivering_drones(dropped_delivering_drones)
+        partial_delivery_board = DroneDeliveryBoard(
+            drone_deliveries=[drone_delivery for drone_delivery in delivery_board.drone_deliveries
+                              if drone_delivery not in dropped_drone_deliveries],
+            unmatched_delivery_requests=delivery_board.unmatched_delivery_requests + [
+                UnmatchedDeliveryRequest(matched_request.graph_index, matched_request.delivery_request)
+                for drone_delivery in dropped_drone_deliveries for matched_request in drone_delivery.matched_requests])
+
+        reinserted_delivery_board = matcher._reinsert(partial_delivery_board)
+
+        self._assert_valid_board(reinserted_delivery_board)
+        self.assertLess(len(reinserted_delivery_board.unmatched_delivery_requests),
+                        len(partial_delivery_board.unmatched_delivery_requests))
+
+    def test_match_to_routes_is_an_ortools_assignment(self):
+        routes = RegionDecompositionMatcher(self.match_input).match_to_routes()
+        ortools_matcher = ORToolsMatcher(self.match_input)
+        self.assertIsNotNone(ortools_matcher._routing_model.ReadAssignmentFromRoutes(routes.as_list(), False))
+        self._assert_valid_board(RegionDecompositionMatcher(self.match_input).match_from_init_solution(routes))
+
+    def _assert_valid_board(self, delivery_board):
+        matched_graph_indices = [matched_request.graph_index for drone_delivery in delivery_board.drone_deliveries
+                                 for matched_request in drone_delivery.matched_requests]
+        self.assertGreater(len(matched_graph_indices), 0)
+        self.assertEqual(len(matched_graph_indices), len(set(matched_graph_indices)))
+        self.assertEqual(24, len(matched_graph_indices) + len(delivery_board.unmatched_delivery_requests))
+        for drone_delivery in delivery_board.drone_deliveries:
+            self.assertIn(drone_delivery.delivering_drones,
+                          self.match_input.delivering_drones_board.delivering_drones_list)
+            self.assertLessEqual(
+                drone_delivery.get_total_package_type_amount_map().get_package_type_amount(PackageType.LARGE),
+                drone_delivery.delivering_drones.drone_formation.get_package_type_amount(PackageType.LARGE))
+            for matched_request in drone_delivery.matched_requests:
+                self.assertEqual(self.graph.get_delivery_request(matched_request.graph_index),
+                                 matched_request.delivery_request)
+                self.assertIn(matched_request.delivery_time_window, matched_request.delivery_request.time_window)
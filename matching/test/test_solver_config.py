@@ -30,3 +30,15 @@ class SolverConfigTestCase(TestCase):
         expected_config_dict = JsonableBaseEntity.json_to_dict(Path('matching/test/jsons/test_solver_config_1.json'))
         expected_config_obj = ORToolsSolverConfig.dict_to_obj(expected_config_dict)
         self.assertEqual(self.solver_config_obj, expected_config_obj)
+
+    def test_transit_evaluation_defaults_to_matrix(self):
+        config_dict = self.solver_config_obj.__dict__()
+        del config_dict['transit_evaluation']
+        config_obj = ORToolsSolverConfig.dict_to_obj(config_dict)
+        self.assertTrue(config_obj.is_transit_matrix_evaluation())
+        self.assertEqual(self.solver_config_obj, config_obj)
+
+    def test_unknown_transit_evaluation_raises(self):
+        with self.assertRaises(ValueError):
+            ORToolsSolverConfig(first_solution_strategy="path_cheapest_arc", local_search_strategy="automatic",
+                                timeout_sec=30, transit_evaluation="matrices")